@@ -24,6 +24,11 @@ def create_app(config_name=None):
     login_manager.init_app(app)
     csrf.init_app(app)
     
+    # Compression des réponses : enregistrée en premier, elle s'exécute après
+    # tous les autres after_request (Flask les appelle en ordre inverse)
+    from app.utils.compression import compression
+    compression.init_app(app)
+    
     # Processeur de contexte pour CSRF token
     @app.context_processor
     def inject_csrf_token():
@@ -199,9 +204,29 @@ def create_app(config_name=None):
         from markupsafe import Markup
         return Markup(text.replace('\n', '<br>\n'))
     
+    # Liens de pagination par curseur (components/pagination_curseur.html)
+    from app.utils.pagination import url_curseur
+    app.add_template_global(url_curseur)
+    
     # Créer les dossiers nécessaires
     with app.app_context():
         os.makedirs(app.config.get('UPLOAD_FOLDER', 'uploads'), exist_ok=True)
         os.makedirs(os.path.join(app.instance_path), exist_ok=True)
     
+    # Métriques Prometheus (/metrics), activées par METRICS_ENABLED et METRICS_TOKEN
+    from app.utils import metriques
+    metriques.init_app(app)
+    
+    # Profilage des requêtes à la demande (désactivé par défaut)
+    from app.utils.profilage import profileur
+    profileur.init_app(app)
+    
+    # Échantillonneur des métriques système (thread d'arrière-plan)
+    from app.utils.echantillonneur import echantillonneur
+    echantillonneur.init_app(app)
+    
+    # Planificateur de tâches périodiques (thread démarré si SCHEDULER_ENABLED)
+    from app.planificateur import planificateur
+    planificateur.init_app(app)
+    
     return app
@@ -12,22 +12,22 @@ import zipfile
 import shutil
 from io import BytesIO
 
-# Import optionnel de pandas
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
+# Import optionnel de pandas, différé au premier usage
+from app.utils.imports import ModuleParesseux, module_disponible
+pd = ModuleParesseux('pandas')
+HAS_PANDAS = module_disponible('pandas')
 
 from . import admin
 from app.extensions import db
 from app.models.utilisateurs import User
 from app.models.operateurs import Operateur
 from app.models.production_hydro import CentraleHydro, RapportHydro, GroupeProduction
+from app.utils.cache_http import reponse_conditionnelle
 from .forms import ConfigurationForm, BackupForm
 from .utils import (
     get_dashboard_stats, get_production_analytics, 
-    create_backup, get_backup_history, generate_report_analytics
+    create_backup, get_backup_history, generate_report_analytics,
+    get_system_info, METRIQUES_AFFICHEES
 )
 
 
@@ -175,6 +175,7 @@ def backup():
 @admin.route('/export-database-excel')
 @login_required
 @require_super_admin
+@reponse_conditionnelle()
 def export_database_excel():
     """Télécharger toute la base de données en format Excel"""
     if not HAS_PANDAS:
@@ -398,6 +399,113 @@ def config():
                          form=form)
 
 
+@admin.route('/taches')
+@login_required
+@require_super_admin
+def taches():
+    """Tâches planifiées : état, prochaines échéances et historique"""
+    from app.planificateur import planificateur
+    from app.models.planificateur import ExecutionTache
+    
+    executions = ExecutionTache.query.order_by(ExecutionTache.debut.desc()).limit(50).all()
+    
+    return render_template('admin/taches.html',
+                         title='Tâches Planifiées',
+                         taches=planificateur.etat(),
+                         executions=executions,
+                         planificateur_actif=current_app.config.get('SCHEDULER_ENABLED', False))
+
+
+@admin.route('/taches/<nom>/executer', methods=['POST'])
+@login_required
+@require_super_admin
+def executer_tache(nom):
+    """Exécuter immédiatement une tâche planifiée"""
+    from app.planificateur import planificateur
+    
+    if nom not in planificateur.taches:
+        flash('Tâche inconnue.', 'error')
+        return redirect(url_for('admin.taches'))
+    
+    execution = planificateur.executer(nom, declencheur='manuel')
+    if execution is None:
+        flash(f'La tâche {nom} est déjà en cours d\'exécution.', 'warning')
+    elif execution.statut == 'succes':
+        flash(f'Tâche {nom} exécutée en {execution.duree_ms:.0f} ms.', 'success')
+    else:
+        flash(f'Échec de la tâche {nom} : {execution.resultat}', 'error')
+    
+    return redirect(url_for('admin.taches'))
+
+
+@admin.route('/systeme')
+@login_required
+@require_super_admin
+def systeme():
+    """Métriques système échantillonnées en arrière-plan"""
+    return render_template('admin/systeme.html',
+                         title='Métriques Système',
+                         info=get_system_info(),
+                         metriques=METRIQUES_AFFICHEES)
+
+
+@admin.route('/api/systeme')
+@login_required
+@require_super_admin
+def api_systeme():
+    """API : dernier échantillon et historique des métriques système"""
+    points = request.args.get('points', 60, type=int)
+    info = get_system_info(points=max(1, min(points, 1000)))
+    if info.get('uptime') is not None:
+        info['uptime'] = int(info['uptime'].total_seconds())
+    return jsonify(info)
+
+
+@admin.route('/profils')
+@login_required
+@require_super_admin
+def profils():
+    """Captures du profileur de requêtes"""
+    from app.utils.profilage import profileur
+    
+    return render_template('admin/profils.html',
+                         title='Profils de Requêtes',
+                         captures=profileur.captures(),
+                         profileur=profileur)
+
+
+@admin.route('/profils/<identifiant>')
+@login_required
+@require_super_admin
+def profil_detail(identifiant):
+    """Détail d'une capture : fonctions les plus coûteuses et temps SQL"""
+    from app.utils.profilage import profileur
+    
+    capture = profileur.capture(identifiant)
+    if capture is None:
+        flash('Capture introuvable.', 'error')
+        return redirect(url_for('admin.profils'))
+    
+    return render_template('admin/profil_detail.html',
+                         title=f"Profil {capture['endpoint']}",
+                         capture=capture)
+
+
+@admin.route('/profils/<identifiant>/<extension>')
+@login_required
+@require_super_admin
+def telecharger_profil(identifiant, extension):
+    """Télécharger les données brutes d'une capture (.pstats ou .collapsed)"""
+    from app.utils.profilage import profileur
+    
+    chemin = profileur.chemin(identifiant, extension)
+    if not chemin or extension == 'json' or not os.path.exists(chemin):
+        flash('Fichier de profil introuvable.', 'error')
+        return redirect(url_for('admin.profils'))
+    
+    return send_file(chemin, as_attachment=True, download_name=os.path.basename(chemin))
+
+
 @admin.route('/api/chart-data/<chart_type>')
 @login_required
 @require_super_admin
@@ -504,6 +612,7 @@ def api_chart_data(chart_type):
 @admin.route('/export/<export_type>')
 @login_required
 @require_super_admin
+@reponse_conditionnelle(RapportHydro, CentraleHydro, Operateur)
 def export_data(export_type):
     """Export des données en différents formats"""
     try:
@@ -11,23 +11,28 @@ from typing import Dict, List, Optional
 from flask import current_app
 from sqlalchemy import func, text
 
-# Import optionnel de pandas
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
+# Import optionnel de pandas (non importé : seule sa présence est testée)
+from app.utils.imports import module_disponible
+HAS_PANDAS = module_disponible('pandas')
 
 from app.extensions import db
 from app.models.utilisateurs import User
 from app.models.operateurs import Operateur
 from app.models.production_hydro import CentraleHydro, RapportHydro, GroupeProduction
+from app.utils.helpers import bornes_mois, bornes_annee
+from app.utils.echantillonneur import echantillonneur, HAS_PSUTIL
+
+if HAS_PSUTIL:
+    import psutil
 
 
 def get_dashboard_stats() -> Dict:
     """Récupérer les statistiques pour le dashboard"""
     try:
         stats = {}
+        maintenant = datetime.now()
+        # Intervalle [début, fin[ du mois courant : filtre indexable sur date_creation
+        debut_mois, fin_mois = bornes_mois(maintenant.year, maintenant.month)
         
         # Statistiques générales
         stats['total_operateurs'] = Operateur.query.filter_by(actif=True).count()
@@ -37,8 +42,8 @@ def get_dashboard_stats() -> Dict:
         # Rapports
         stats['total_rapports'] = RapportHydro.query.count()
         stats['rapports_ce_mois'] = RapportHydro.query.filter(
-            func.extract('month', RapportHydro.date_creation) == datetime.now().month,
-            func.extract('year', RapportHydro.date_creation) == datetime.now().year
+            RapportHydro.date_creation >= debut_mois,
+            RapportHydro.date_creation < fin_mois
         ).count()
         
         # Production totale
@@ -54,8 +59,8 @@ def get_dashboard_stats() -> Dict:
             func.sum(RapportHydro.energie_produite)
         ).filter(
             RapportHydro.energie_produite.isnot(None),
-            func.extract('month', RapportHydro.date_creation) == datetime.now().month,
-            func.extract('year', RapportHydro.date_creation) == datetime.now().year
+            RapportHydro.date_creation >= debut_mois,
+            RapportHydro.date_creation < fin_mois
         ).scalar()
         stats['production_mois_mwh'] = round(production_mois or 0, 1)
         
@@ -98,18 +103,10 @@ def get_dashboard_stats() -> Dict:
             stats['variation_production'] = 0
         
         # Taux de remplissage des rapports
-        mois_courant = datetime.now().month
-        annee_courante = datetime.now().year
-        
-        rapports_mois = RapportHydro.query.filter(
-            func.extract('month', RapportHydro.date_creation) == mois_courant,
-            func.extract('year', RapportHydro.date_creation) == annee_courante
-        ).count()
-        
-        centrales_actives = CentraleHydro.query.filter_by(actif=True).count()
+        centrales_actives = stats['total_centrales']
         
         if centrales_actives > 0:
-            stats['taux_remplissage'] = round((rapports_mois / centrales_actives) * 100, 1)
+            stats['taux_remplissage'] = round((stats['rapports_ce_mois'] / centrales_actives) * 100, 1)
         else:
             stats['taux_remplissage'] = 0
         
@@ -197,10 +194,15 @@ def generate_report_analytics(annee: Optional[int] = None,
             CentraleHydro, RapportHydro.centrale_id == CentraleHydro.id
         )
         
-        # Appliquer les filtres
-        if annee:
-            query = query.filter(func.extract('year', RapportHydro.date_creation) == annee)
-        if mois:
+        # Appliquer les filtres (intervalles [début, fin[ indexables sur date_creation)
+        if annee and mois:
+            debut, fin = bornes_mois(annee, mois)
+            query = query.filter(RapportHydro.date_creation >= debut, RapportHydro.date_creation < fin)
+        elif annee:
+            debut, fin = bornes_annee(annee)
+            query = query.filter(RapportHydro.date_creation >= debut, RapportHydro.date_creation < fin)
+        elif mois:
+            # Un mois sans année couvre plusieurs intervalles : pas d'équivalent indexable
             query = query.filter(func.extract('month', RapportHydro.date_creation) == mois)
         if operateur_id:
             query = query.filter(CentraleHydro.operateur_id == operateur_id)
@@ -394,27 +396,50 @@ def cleanup_old_backups(retention_days: int = 30):
         current_app.logger.error(f"Erreur cleanup_old_backups: {e}")
 
 
-def get_system_info() -> Dict:
-    """Informations système pour le monitoring"""
+# Métriques de l'échantillonneur affichées : (clé, libellé, unité)
+METRIQUES_AFFICHEES = [
+    ('cpu', 'CPU', '%'),
+    ('memoire', 'Mémoire', '%'),
+    ('disque', 'Disque', '%'),
+    ('taille_base_mo', 'Base de données', 'Mo'),
+    ('taille_wal_mo', 'Journal WAL', 'Mo'),
+    ('requetes_par_s', 'Requêtes', 'req/s'),
+]
+
+
+def get_system_info(points: int = 60) -> Dict:
+    """
+    Informations système pour le monitoring, lues dans le tampon de
+    l'échantillonneur d'arrière-plan (aucune mesure bloquante ici)
+    """
     try:
-        import psutil
+        dernier = echantillonneur.tampon.dernier() if echantillonneur.tampon else None
+        if dernier is None:
+            # Échantillonneur pas encore passé (ou désactivé) : relevé immédiat
+            dernier = {
+                'cpu': psutil.cpu_percent(interval=None) if HAS_PSUTIL else None,
+                'memoire': psutil.virtual_memory().percent if HAS_PSUTIL else None,
+                'disque': psutil.disk_usage('/').percent if HAS_PSUTIL else None,
+            }
+        
+        if HAS_PSUTIL:
+            uptime = datetime.now() - datetime.fromtimestamp(psutil.boot_time())
+        else:
+            uptime = datetime.now() - echantillonneur.demarrage
         
-        info = {
-            'disk_usage': psutil.disk_usage('/').percent,
-            'memory_usage': psutil.virtual_memory().percent,
-            'cpu_usage': psutil.cpu_percent(interval=1),
-            'uptime': datetime.now() - datetime.fromtimestamp(psutil.boot_time())
-        }
-        return info
-    
-    except ImportError:
-        # psutil non disponible
         return {
-            'disk_usage': 0,
-            'memory_usage': 0,
-            'cpu_usage': 0,
-            'uptime': timedelta(0)
+            'disk_usage': dernier.get('disque') or 0,
+            'memory_usage': dernier.get('memoire') or 0,
+            'cpu_usage': dernier.get('cpu') or 0,
+            'uptime': uptime,
+            'db_size_mb': dernier.get('taille_base_mo'),
+            'wal_size_mb': dernier.get('taille_wal_mo'),
+            'requests_per_second': dernier.get('requetes_par_s'),
+            'psutil_available': HAS_PSUTIL,
+            'sample_interval': echantillonneur.intervalle,
+            'history': echantillonneur.historique(points)
         }
+    
     except Exception as e:
         current_app.logger.error(f"Erreur get_system_info: {e}")
         return {}
\ No newline at end of file
@@ -11,23 +11,14 @@ from sqlalchemy import func
 import json
 import io
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
-try:
-    from openpyxl import Workbook
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
-
-try:
-    from pptx import Presentation
-    PPTX_AVAILABLE = True
-except ImportError:
-    PPTX_AVAILABLE = False
+# Dépendances d'export optionnelles, importées au premier usage
+from app.utils.imports import ModuleParesseux, module_disponible
+pd = ModuleParesseux('pandas')
+openpyxl = ModuleParesseux('openpyxl')
+pptx = ModuleParesseux('pptx')
+PANDAS_AVAILABLE = module_disponible('pandas')
+OPENPYXL_AVAILABLE = module_disponible('openpyxl')
+PPTX_AVAILABLE = module_disponible('pptx')
 
 from app.are.dashboard import dashboard_bp
 from app.extensions import db
@@ -36,14 +27,22 @@ from app.models.dashboard_are import (
     DonneesProvince, RapportAnnuel
 )
 from app.models.operateurs import Operateur
+from app.models.statistiques_are import PortfolioProjet, CapaciteInstallee, StatistiqueNationale
+from app.models.production_hydro import CentraleHydro, RapportHydro
+from app.models.production_thermique import CentraleThermique, RapportThermique
+from app.models.production_solaire import CentraleSolaire, RapportSolaire
+from app.utils.cache_http import reponse_conditionnelle
+from app.utils.serialisation import Champ, Schema, format_colonnes_demande
 from app.are.dashboard.forms import (
     FiltreTableauBordForm, AlerteForm, KPIForm, 
     IndicateurSectorielForm, RapportAnnuelForm, ExportForm
 )
 from app.are.services import IndicateursAREService
 from app.are.services_statistiques import StatistiquesAREService, DashboardAREService
+from app.are.services_conformite import EvaluationKPIService
 from app.utils.decorators import admin_required
 from app.utils.permissions import get_accessible_operateurs
+from app.utils.helpers import bornes_annee
 
 
 # Route pour afficher les KPIs réglementaires (seuils de conformité RDC)
@@ -51,53 +50,9 @@ from app.utils.permissions import get_accessible_operateurs
 @login_required
 @admin_required
 def kpis_reglementaires():
-    from app.models.kpis_reglementaires import PerformanceOperateurKPI
-    from datetime import datetime
-
-    # Récupérer l'année actuelle
-    annee_actuelle = datetime.now().year
-    mois_actuel = datetime.now().month
-
-    # Récupérer tous les KPIs réglementaires actifs
-    kpis = KPIReglementaire.query.filter_by(actif=True).all()
-
-    kpis_data = []
-    for kpi in kpis:
-        # Essayer de récupérer la performance réelle la plus récente
-        performance = PerformanceOperateurKPI.query.filter_by(
-            kpi_id=kpi.id,
-            annee=annee_actuelle,
-            mois=mois_actuel
-        ).first()
-
-        if performance and performance.valeur_mesuree is not None:
-            # Utiliser la valeur mesurée réelle
-            valeur = performance.valeur_mesuree
-        else:
-            # Valeur par défaut basée sur les seuils (pour démonstration)
-            # En production, ceci devrait être calculé à partir des données réelles
-            valeur = kpi.seuil_acceptable * 0.95  # Simuler une bonne performance
-
-        # Évaluer la performance
-        niveau, penalite = kpi.evaluer_performance(valeur)
-
-        kpis_data.append({
-            'id': kpi.id,
-            'code': kpi.code,
-            'nom': kpi.nom,
-            'description': kpi.description,
-            'valeur': round(valeur, 2),
-            'seuil': kpi.seuil_acceptable,
-            'seuil_excellent': kpi.seuil_excellent,
-            'seuil_limite': kpi.seuil_limite,
-            'seuil_critique': kpi.seuil_critique,
-            'unite': kpi.unite,
-            'niveau': niveau,
-            'conforme': niveau in ['excellent', 'acceptable'],
-            'penalite': penalite,
-            'type_kpi': kpi.type_kpi.value if kpi.type_kpi else None,
-            'reference_legale': kpi.reference_legale
-        })
+    # Période courante, évaluée en lot (une requête pour tous les KPIs)
+    maintenant = datetime.now()
+    kpis_data = EvaluationKPIService.synthese_par_kpi(maintenant.year, maintenant.month)
 
     return render_template('are/dashboard/components/kpis_reglementaires.html', kpis_reglementaires=kpis_data)
 
@@ -238,33 +193,40 @@ def calculer_statistiques(annee):
 @dashboard_bp.route('/api/statistiques/portfolio')
 @login_required
 @admin_required
+@reponse_conditionnelle(PortfolioProjet)
 def api_portfolio_projets():
     """API pour récupérer le portfolio des projets"""
-    portfolio = DashboardAREService.get_portfolio_projets()
+    portfolio = DashboardAREService.get_portfolio_projets(colonnes=format_colonnes_demande())
     return jsonify(portfolio)
 
 
 @dashboard_bp.route('/api/statistiques/evolution-capacite')
 @login_required
 @admin_required
+@reponse_conditionnelle(CapaciteInstallee)
 def api_evolution_capacite():
     """API pour récupérer l'évolution de la capacité"""
     annee_debut = request.args.get('annee_debut', 2020, type=int)
     annee_fin = request.args.get('annee_fin', 2024, type=int)
     
-    evolution = DashboardAREService.get_evolution_capacite(annee_debut, annee_fin)
+    evolution = DashboardAREService.get_evolution_capacite(
+        annee_debut, annee_fin, colonnes=format_colonnes_demande()
+    )
     return jsonify(evolution)
 
 
 @dashboard_bp.route('/api/statistiques/nationales')
 @login_required
 @admin_required
+@reponse_conditionnelle(StatistiqueNationale)
 def api_statistiques_nationales():
     """API pour récupérer les statistiques nationales"""
     annee_debut = request.args.get('annee_debut', 2020, type=int)
     annee_fin = request.args.get('annee_fin', 2024, type=int)
     
-    stats = DashboardAREService.get_statistiques_nationales_periode(annee_debut, annee_fin)
+    stats = DashboardAREService.get_statistiques_nationales_periode(
+        annee_debut, annee_fin, colonnes=format_colonnes_demande()
+    )
     return jsonify(stats)
 
 
@@ -325,47 +287,8 @@ def index():
     ]
     
     # KPIs réglementaires (seuils de conformité RDC)
-    kpis_reglementaires_data = []
-    kpis_reg = KPIReglementaire.query.filter_by(actif=True).all()
-    
-    annee_actuelle = datetime.now().year
-    mois_actuel = datetime.now().month
-    
-    for kpi in kpis_reg:
-        # Essayer de récupérer la performance réelle la plus récente
-        performance = PerformanceOperateurKPI.query.filter_by(
-            kpi_id=kpi.id,
-            annee=annee_actuelle,
-            mois=mois_actuel
-        ).first()
-
-        if performance and performance.valeur_mesuree is not None:
-            # Utiliser la valeur mesurée réelle
-            valeur = performance.valeur_mesuree
-        else:
-            # Valeur par défaut basée sur les seuils (pour démonstration)
-            valeur = kpi.seuil_acceptable * 0.95  # Simuler une bonne performance
-
-        # Évaluer la performance
-        niveau, penalite = kpi.evaluer_performance(valeur)
-
-        kpis_reglementaires_data.append({
-            'id': kpi.id,
-            'code': kpi.code,
-            'nom': kpi.nom,
-            'description': kpi.description,
-            'valeur': round(valeur, 2),
-            'seuil': kpi.seuil_acceptable,
-            'seuil_excellent': kpi.seuil_excellent,
-            'seuil_limite': kpi.seuil_limite,
-            'seuil_critique': kpi.seuil_critique,
-            'unite': kpi.unite,
-            'niveau': niveau,
-            'conforme': niveau in ['excellent', 'acceptable'],
-            'penalite': penalite,
-            'type_kpi': kpi.type_kpi.value if kpi.type_kpi else None,
-            'reference_legale': kpi.reference_legale
-        })
+    maintenant = datetime.now()
+    kpis_reglementaires_data = EvaluationKPIService.synthese_par_kpi(maintenant.year, maintenant.month)
     
     # NOUVELLES STATISTIQUES NATIONALES AVANCÉES
     stats_nationales = _calculer_statistiques_nationales_avancees(annee_debut, annee_fin)
@@ -740,7 +663,7 @@ def export_excel(donnees_export, annee, operateur_id):
         return redirect(url_for('are_dashboard.export_donnees'))
     
     output = io.BytesIO()
-    workbook = Workbook()
+    workbook = openpyxl.Workbook()
     
     # Supprimer la feuille par défaut
     workbook.remove(workbook.active)
@@ -803,7 +726,7 @@ def export_powerpoint(donnees_export, annee, operateur_id):
         flash('python-pptx n\'est pas installé. Veuillez installer python-pptx pour l\'export PowerPoint.', 'error')
         return redirect(url_for('are_dashboard.export_donnees'))
     
-    prs = Presentation()
+    prs = pptx.Presentation()
     
     # Slide de titre
     slide_layout = prs.slide_layouts[0]  # Layout titre
@@ -851,9 +774,18 @@ def export_powerpoint(donnees_export, annee, operateur_id):
 
 # API endpoints pour les données dynamiques
 
+# Champs de KPIStrategic.to_dict(), opérateur joint dans la même requête
+SCHEMA_KPIS = Schema(KPIStrategic, (
+    'id', 'code', 'nom', 'description', 'valeur', 'unite', 'periode', 'annee', 'tendance',
+    'evolution_pourcentage', 'objectif', 'atteint', 'seuil_alerte',
+    Champ('operateur.nom', cle='operateur', defaut='National'), 'date_modification'
+))
+
+
 @dashboard_bp.route('/api/kpis/<int:annee>')
 @login_required
 @admin_required
+@reponse_conditionnelle(KPIStrategic, Operateur)
 def api_kpis(annee):
     """API pour récupérer les KPIs d'une année"""
     operateur_id = request.args.get('operateur_id', type=int)
@@ -862,10 +794,10 @@ def api_kpis(annee):
     if operateur_id:
         kpis_query = kpis_query.filter_by(operateur_id=operateur_id)
     
-    kpis = kpis_query.all()
+    kpis = SCHEMA_KPIS.dicts(kpis_query)
     
     return jsonify({
-        'kpis': [kpi.to_dict() for kpi in kpis],
+        'kpis': kpis,
         'total': len(kpis)
     })
 
@@ -873,6 +805,8 @@ def api_kpis(annee):
 @dashboard_bp.route('/api/mix-energetique/<int:annee>')
 @login_required
 @admin_required
+@reponse_conditionnelle(RapportHydro, CentraleHydro, RapportThermique, CentraleThermique,
+                        RapportSolaire, CentraleSolaire)
 def api_mix_energetique(annee):
     """API pour le mix énergétique"""
     operateur_id = request.args.get('operateur_id', type=int)
@@ -915,6 +849,7 @@ def supprimer_kpi(kpi_id):
 @dashboard_bp.route('/export/<export_type>/<data_type>')
 @login_required
 @admin_required
+@reponse_conditionnelle()
 def export_data(export_type, data_type):
     """Exporter des données du dashboard en différents formats"""
     if not current_user.is_super_admin():
@@ -1314,17 +1249,19 @@ def _calculer_statistiques_nationales_avancees(annee_debut, annee_fin):
     # Statistiques solaires par année
     stats_solaire = []
     for annee in range(annee_debut, annee_fin + 1):
-        # Capacité solaire installée cette année-là
-        capacite_annee = db.session.query(func.sum(CentraleSolaire.puissance_installee)).filter(
-            CentraleSolaire.actif == True,
-            func.extract('year', CentraleSolaire.date_mise_service) == annee
-        ).scalar() or 0
+        debut_annee, fin_annee = bornes_annee(annee)
         
-        # Nombre d'installations cette année-là
-        nombre_installations = db.session.query(func.count(CentraleSolaire.id)).filter(
+        # Capacité solaire installée et nombre d'installations cette année-là
+        capacite_annee, nombre_installations = db.session.query(
+            func.sum(CentraleSolaire.puissance_installee),
+            func.count(CentraleSolaire.id)
+        ).filter(
             CentraleSolaire.actif == True,
-            func.extract('year', CentraleSolaire.date_mise_service) == annee
-        ).scalar() or 0
+            CentraleSolaire.date_mise_service >= debut_annee,
+            CentraleSolaire.date_mise_service < fin_annee
+        ).one()
+        capacite_annee = capacite_annee or 0
+        nombre_installations = nombre_installations or 0
         
         if capacite_annee > 0 or nombre_installations > 0:
             stats_solaire.append({
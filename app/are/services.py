@@ -14,44 +14,96 @@ from app.models.production_thermique import CentraleThermique, RapportThermique
 from app.models.production_solaire import CentraleSolaire, RapportSolaire
 from app.models.transport import LigneTransport, RapportTransport
 from app.models.distribution import ReseauDistribution, RapportDistribution
+from app.are.services_alertes import MoteurAlertesService
+from app.utils.projections import Projection
+
+
+PROJECTION_OPERATEURS = Projection(Operateur, ('id', 'nom'))
 
 
 class IndicateursAREService:
     """Service pour calculer les indicateurs stratégiques ARE"""
     
+    # Attributs des KPIs stratégiques créés automatiquement
+    DEFINITIONS_KPIS = {
+        'TAUX_ACCES_NATIONAL': {
+            'nom': 'Taux d\'accès national à l\'électricité',
+            'unite': '%',
+            'objectif': 85.0,
+            'seuil_alerte': 70.0,
+            'source_donnees': 'Rapports distribution'
+        },
+        'PRODUCTION_NATIONALE': {
+            'nom': 'Production électrique nationale',
+            'unite': 'MWh',
+            'objectif': 15000000,  # 15 GWh objectif
+            'seuil_alerte': 8000000,  # 8 GWh seuil alerte
+            'source_donnees': 'Rapports production'
+        },
+        'OPERATEURS_ACTIFS': {
+            'nom': 'Nombre d\'opérateurs actifs',
+            'unite': 'opérateurs',
+            'source_donnees': 'Base opérateurs'
+        }
+    }
+    
+    # Approximation : 1 client raccordé = 4 personnes desservies
+    PERSONNES_PAR_CLIENT = 4
+    
+    @staticmethod
+    def calculer_taux_acces_provinces(annee, provinces=None):
+        """
+        Calcule le taux d'accès à l'électricité de toutes les provinces en une
+        requête groupée : dernier rapport de distribution de l'année par réseau
+        (fonction de fenêtre), clients sommés par province et rapportés à la
+        population de DonneesProvince. Les provinces sont celles présentes dans
+        DonneesProvince pour l'année.
+        """
+        rang = func.row_number().over(
+            partition_by=RapportDistribution.reseau_id,
+            order_by=(RapportDistribution.date_creation.desc(), RapportDistribution.id.desc())
+        ).label('rang')
+        derniers_rapports = db.session.query(
+            RapportDistribution.reseau_id.label('reseau_id'),
+            RapportDistribution.nombre_clients_fin.label('clients'),
+            rang
+        ).filter(RapportDistribution.annee == annee).subquery()
+        
+        clients_province = db.session.query(
+            ReseauDistribution.province.label('province'),
+            func.sum(derniers_rapports.c.clients).label('clients')
+        ).join(
+            derniers_rapports, derniers_rapports.c.reseau_id == ReseauDistribution.id
+        ).filter(
+            derniers_rapports.c.rang == 1,
+            ReseauDistribution.actif == True
+        ).group_by(ReseauDistribution.province).subquery()
+        
+        query = db.session.query(
+            DonneesProvince.province,
+            DonneesProvince.population,
+            clients_province.c.clients
+        ).outerjoin(
+            clients_province, clients_province.c.province == DonneesProvince.province
+        ).filter(DonneesProvince.annee == annee)
+        if provinces is not None:
+            query = query.filter(DonneesProvince.province.in_(provinces))
+        
+        taux_acces = {}
+        for province, population, clients in query.order_by(DonneesProvince.id):
+            if province in taux_acces:
+                continue  # Première ligne DonneesProvince de la province
+            if population and clients:
+                population_desservie = clients * IndicateursAREService.PERSONNES_PAR_CLIENT
+                taux_acces[province] = min((population_desservie / population) * 100, 100.0)
+            else:
+                taux_acces[province] = 0.0
+        return taux_acces
+    
     @staticmethod
     def calculer_taux_acces_province(province, annee):
         """Calcule le taux d'accès à l'électricité par province"""
-        # Récupérer les données de distribution pour la province
-        reseaux = ReseauDistribution.query.filter_by(province=province, actif=True).all()
-        
-        if not reseaux:
-            return 0.0
-        
-        # Calculer la population desservie (approximation basée sur les données de distribution)
-        population_desservie = 0
-        for reseau in reseaux:
-            # Utiliser les derniers rapports de distribution
-            dernier_rapport = RapportDistribution.query.filter(
-                RapportDistribution.reseau_id == reseau.id,
-                RapportDistribution.annee == annee
-            ).order_by(RapportDistribution.date_creation.desc()).first()
-            
-            if dernier_rapport and dernier_rapport.nombre_clients_fin:
-                # Approximation: 1 client = 4 personnes en moyenne
-                population_desservie += dernier_rapport.nombre_clients_fin * 4
-        
-        # Récupérer la population totale de la province depuis DonneesProvince
-        donnees_province = DonneesProvince.query.filter_by(
-            province=province, 
-            annee=annee
-        ).first()
-        
-        if donnees_province and donnees_province.population:
-            taux_acces = (population_desservie / donnees_province.population) * 100
-            return min(taux_acces, 100.0)  # Limiter à 100%
-        
-        return 0.0
+        return IndicateursAREService.calculer_taux_acces_provinces(annee, [province]).get(province, 0.0)
     
     @staticmethod
     def calculer_mix_energetique(annee, operateur_id=None):
@@ -116,7 +168,7 @@ class IndicateursAREService:
     @staticmethod
     def calculer_performance_operateurs(annee):
         """Calcule les indicateurs de performance des opérateurs"""
-        operateurs = Operateur.query.filter_by(actif=True).all()
+        operateurs = PROJECTION_OPERATEURS.lister(Operateur.query.filter_by(actif=True))
         performances = []
         
         for operateur in operateurs:
@@ -152,19 +204,19 @@ class IndicateursAREService:
             
             # Nombre de clients (distribution)
             clients_total = 0
-            reseaux = ReseauDistribution.query.filter_by(
+            reseau_ids = db.session.query(ReseauDistribution.id).filter_by(
                 operateur_id=operateur.id, 
                 actif=True
             ).all()
             
-            for reseau in reseaux:
-                dernier_rapport = RapportDistribution.query.filter(
-                    RapportDistribution.reseau_id == reseau.id,
+            for (reseau_id,) in reseau_ids:
+                nombre_clients_fin = db.session.query(RapportDistribution.nombre_clients_fin).filter(
+                    RapportDistribution.reseau_id == reseau_id,
                     RapportDistribution.annee == annee
-                ).order_by(RapportDistribution.date_creation.desc()).first()
+                ).order_by(RapportDistribution.date_creation.desc()).limit(1).scalar()
                 
-                if dernier_rapport and dernier_rapport.nombre_clients_fin:
-                    clients_total += dernier_rapport.nombre_clients_fin
+                if nombre_clients_fin:
+                    clients_total += nombre_clients_fin
             
             performances.append({
                 'operateur': operateur.nom,
@@ -181,185 +233,63 @@ class IndicateursAREService:
     @staticmethod
     def generer_alertes_automatiques():
         """Génère des alertes automatiques basées sur les seuils"""
-        alertes_generees = []
-        
-        # Vérifier les KPIs avec seuils d'alerte
-        kpis_critiques = KPIStrategic.query.filter(
-            KPIStrategic.seuil_alerte.isnot(None),
-            KPIStrategic.actif == True
-        ).all()
-        
-        for kpi in kpis_critiques:
-            if kpi.valeur < kpi.seuil_alerte:
-                # Vérifier si une alerte existe déjà
-                alerte_existante = AlerteRegulateur.query.filter(
-                    AlerteRegulateur.type == TypeAlerte.TECHNIQUE,
-                    AlerteRegulateur.entite_concernee.like(f'%{kpi.code}%'),
-                    AlerteRegulateur.statut == 'active'
-                ).first()
-                
-                if not alerte_existante:
-                    alerte = AlerteRegulateur(
-                        type=TypeAlerte.TECHNIQUE,
-                        severite=SeveriteAlerte.ELEVEE,
-                        entite_concernee=f"KPI {kpi.code}",
-                        titre=f"Alerte KPI: {kpi.nom}",
-                        description=f"Le KPI {kpi.nom} a une valeur de {kpi.valeur} {kpi.unite}, "
-                                  f"inférieure au seuil d'alerte de {kpi.seuil_alerte} {kpi.unite}.",
-                        operateur_id=kpi.operateur_id,
-                        createur_id=1,  # Système automatique
-                        priorite=2
-                    )
-                    alerte.save()
-                    alertes_generees.append(alerte)
-        
-        # Alertes pour retards de rapports
-        operateurs = Operateur.query.filter_by(actif=True).all()
-        date_limite = datetime.now() - timedelta(days=30)
-        
-        for operateur in operateurs:
-            # Vérifier les retards de rapports
-            derniers_rapports = {
-                'hydro': RapportHydro.query.join(CentraleHydro).filter(
-                    CentraleHydro.operateur_id == operateur.id
-                ).order_by(RapportHydro.date_creation.desc()).first(),
-                'thermique': RapportThermique.query.join(CentraleThermique).filter(
-                    CentraleThermique.operateur_id == operateur.id
-                ).order_by(RapportThermique.date_creation.desc()).first(),
-                'transport': RapportTransport.query.join(LigneTransport).filter(
-                    LigneTransport.operateur_id == operateur.id
-                ).order_by(RapportTransport.date_creation.desc()).first()
-            }
-            
-            for type_rapport, dernier_rapport in derniers_rapports.items():
-                if dernier_rapport and dernier_rapport.date_creation < date_limite:
-                    alerte_existante = AlerteRegulateur.query.filter(
-                        AlerteRegulateur.type == TypeAlerte.ADMINISTRATIF,
-                        AlerteRegulateur.entite_concernee == operateur.nom_commercial,
-                        AlerteRegulateur.description.like(f'%{type_rapport}%'),
-                        AlerteRegulateur.statut == 'active'
-                    ).first()
-                    
-                    if not alerte_existante:
-                        alerte = AlerteRegulateur(
-                            type=TypeAlerte.ADMINISTRATIF,
-                            severite=SeveriteAlerte.MOYENNE,
-                            entite_concernee=operateur.nom_commercial,
-                            titre=f"Retard rapport {type_rapport}",
-                            description=f"Aucun rapport {type_rapport} reçu depuis plus de 30 jours "
-                                      f"pour l'opérateur {operateur.nom_commercial}.",
-                            operateur_id=operateur.id,
-                            createur_id=1,
-                            priorite=2
-                        )
-                        alerte.save()
-                        alertes_generees.append(alerte)
-        
-        return alertes_generees
+        return MoteurAlertesService.executer()['alertes']
     
     @staticmethod
     def mettre_a_jour_kpis_strategiques(annee):
-        """Met à jour tous les KPIs stratégiques pour une année"""
-        kpis_mis_a_jour = []
-        
-        # KPI 1: Taux d'accès national à l'électricité
-        provinces_rdc = [
-            'Kinshasa', 'Bas-Congo', 'Bandundu', 'Équateur', 'Orientale', 
-            'Nord-Kivu', 'Sud-Kivu', 'Maniema', 'Katanga', 'Kasaï-Oriental', 'Kasaï-Occidental'
+        """
+        Met à jour tous les KPIs stratégiques pour une année : les KPIs
+        existants sont chargés en une requête et l'ensemble est enregistré
+        dans une seule transaction.
+        """
+        valeurs = {}
+        
+        # KPI 1: Taux d'accès national (moyenne des provinces disposant de données)
+        taux_provinces = [
+            taux for taux in IndicateursAREService.calculer_taux_acces_provinces(annee).values()
+            if taux > 0
         ]
-        
-        taux_acces_total = 0
-        provinces_avec_donnees = 0
-        
-        for province in provinces_rdc:
-            taux = IndicateursAREService.calculer_taux_acces_province(province, annee)
-            if taux > 0:
-                taux_acces_total += taux
-                provinces_avec_donnees += 1
-        
-        if provinces_avec_donnees > 0:
-            taux_acces_national = taux_acces_total / provinces_avec_donnees
-            
-            kpi_acces = KPIStrategic.query.filter_by(
-                code='TAUX_ACCES_NATIONAL',
-                annee=annee
-            ).first()
-            
-            if not kpi_acces:
-                kpi_acces = KPIStrategic(
-                    code='TAUX_ACCES_NATIONAL',
-                    nom='Taux d\'accès national à l\'électricité',
-                    valeur=taux_acces_national,
-                    unite='%',
-                    periode=str(annee),
-                    annee=annee,
-                    objectif=85.0,
-                    seuil_alerte=70.0,
-                    source_donnees='Rapports distribution'
-                )
-            else:
-                kpi_acces.valeur = taux_acces_national
-                kpi_acces.date_modification = datetime.utcnow()
-            
-            kpi_acces.save()
-            kpis_mis_a_jour.append(kpi_acces)
+        if taux_provinces:
+            valeurs['TAUX_ACCES_NATIONAL'] = sum(taux_provinces) / len(taux_provinces)
         
         # KPI 2: Production totale nationale
-        mix_national = IndicateursAREService.calculer_mix_energetique(annee)
-        
-        kpi_production = KPIStrategic.query.filter_by(
-            code='PRODUCTION_NATIONALE',
-            annee=annee
-        ).first()
-        
-        if not kpi_production:
-            kpi_production = KPIStrategic(
-                code='PRODUCTION_NATIONALE',
-                nom='Production électrique nationale',
-                valeur=mix_national['total'],
-                unite='MWh',
-                periode=str(annee),
-                annee=annee,
-                objectif=15000000,  # 15 GWh objectif
-                seuil_alerte=8000000,  # 8 GWh seuil alerte
-                source_donnees='Rapports production'
-            )
-        else:
-            kpi_production.valeur = mix_national['total']
-            kpi_production.date_modification = datetime.utcnow()
-        
-        kpi_production.save()
-        kpis_mis_a_jour.append(kpi_production)
+        valeurs['PRODUCTION_NATIONALE'] = IndicateursAREService.calculer_mix_energetique(annee)['total']
         
         # KPI 3: Nombre d'opérateurs actifs
-        nb_operateurs = Operateur.query.filter_by(actif=True).count()
-        
-        kpi_operateurs = KPIStrategic.query.filter_by(
-            code='OPERATEURS_ACTIFS',
-            annee=annee
-        ).first()
+        valeurs['OPERATEURS_ACTIFS'] = Operateur.query.filter_by(actif=True).count()
         
-        if not kpi_operateurs:
-            kpi_operateurs = KPIStrategic(
-                code='OPERATEURS_ACTIFS',
-                nom='Nombre d\'opérateurs actifs',
-                valeur=nb_operateurs,
-                unite='opérateurs',
-                periode=str(annee),
-                annee=annee,
-                source_donnees='Base opérateurs'
-            )
-        else:
-            kpi_operateurs.valeur = nb_operateurs
-            kpi_operateurs.date_modification = datetime.utcnow()
+        existants = {}
+        for kpi in KPIStrategic.query.filter(
+            KPIStrategic.code.in_(list(valeurs)),
+            KPIStrategic.annee == annee
+        ).order_by(KPIStrategic.id):
+            existants.setdefault(kpi.code, kpi)
         
-        kpi_operateurs.save()
-        kpis_mis_a_jour.append(kpi_operateurs)
-        
-        # Calcul automatique du statut "atteint" pour tous les KPIs avec objectif
-        for kpi in kpis_mis_a_jour:
-            if kpi.objectif is not None:
-                kpi.atteint = kpi.valeur >= kpi.objectif
-                kpi.save()
+        kpis_mis_a_jour = []
+        try:
+            for code, valeur in valeurs.items():
+                kpi = existants.get(code)
+                if not kpi:
+                    kpi = KPIStrategic(
+                        code=code,
+                        valeur=valeur,
+                        periode=str(annee),
+                        annee=annee,
+                        **IndicateursAREService.DEFINITIONS_KPIS[code]
+                    )
+                    db.session.add(kpi)
+                else:
+                    kpi.valeur = valeur
+                    kpi.date_modification = datetime.utcnow()
+                
+                # Calcul automatique du statut "atteint" pour les KPIs avec objectif
+                if kpi.objectif is not None:
+                    kpi.atteint = kpi.valeur >= kpi.objectif
+                kpis_mis_a_jour.append(kpi)
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
-        return kpis_mis_a_jour
\ No newline at end of file
+        return kpis_mis_a_jour
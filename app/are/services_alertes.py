@@ -0,0 +1,181 @@
+"""
+Moteur de règles pour les alertes automatiques du régulateur.
+
+Chaque règle calcule l'ensemble de ses alertes candidates en une requête
+groupée (et non plus opérateur par opérateur). Les candidates portent une
+clé déterministe (cle_alerte) qui sert à les dédoublonner contre les
+alertes encore actives avant une insertion en masse.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.dashboard_are import KPIStrategic, AlerteRegulateur, TypeAlerte, SeveriteAlerte
+from app.models.operateurs import Operateur
+from app.models.utilisateurs import User
+from app.models.production_hydro import CentraleHydro, RapportHydro
+from app.models.production_thermique import CentraleThermique, RapportThermique
+from app.models.transport import LigneTransport, RapportTransport
+
+
+# Taille des lots pour les clauses IN (limite de paramètres SQLite)
+TAILLE_LOT_CLES = 500
+
+
+def createur_systeme_id():
+    """Utilisateur auteur des alertes automatiques (premier super admin)"""
+    createur_id = db.session.query(func.min(User.id)).filter(User.role == 'super_admin').scalar()
+    return createur_id or 1
+
+
+class RegleAlerte:
+    """Règle du moteur : retourne des alertes candidates sous forme de dicts"""
+    code = None
+
+    def candidats(self, reference):
+        raise NotImplementedError
+
+
+class RegleSeuilKPI(RegleAlerte):
+    """KPIs stratégiques actifs passés sous leur seuil d'alerte"""
+    code = 'kpi_seuil'
+
+    def candidats(self, reference):
+        kpis = KPIStrategic.query.filter(
+            KPIStrategic.seuil_alerte.isnot(None),
+            KPIStrategic.actif == True,
+            KPIStrategic.valeur < KPIStrategic.seuil_alerte
+        ).all()
+
+        return [{
+            'cle_alerte': f"{self.code}:{kpi.id}",
+            'type': TypeAlerte.TECHNIQUE,
+            'severite': SeveriteAlerte.ELEVEE,
+            'entite_concernee': f"KPI {kpi.code}",
+            'titre': f"Alerte KPI: {kpi.nom}",
+            'description': f"Le KPI {kpi.nom} a une valeur de {kpi.valeur} {kpi.unite}, "
+                           f"inférieure au seuil d'alerte de {kpi.seuil_alerte} {kpi.unite}.",
+            'operateur_id': kpi.operateur_id,
+            'priorite': 2
+        } for kpi in kpis]
+
+
+class RegleRetardRapport(RegleAlerte):
+    """Opérateurs dont le dernier rapport d'un type date de plus de N jours"""
+    code = 'retard_rapport'
+
+    def __init__(self, type_rapport, modele_rapport, modele_installation, colonne_installation,
+                 delai_jours=30):
+        self.type_rapport = type_rapport
+        self.modele_rapport = modele_rapport
+        self.modele_installation = modele_installation
+        self.colonne_installation = colonne_installation
+        self.delai_jours = delai_jours
+
+    def requete(self, date_limite):
+        """Dernier rapport par opérateur (MAX(date_creation) GROUP BY) en retard"""
+        dernier = func.max(self.modele_rapport.date_creation)
+        return db.session.query(
+            Operateur.id, Operateur.nom, dernier.label('dernier_rapport')
+        ).join(
+            self.modele_installation, self.modele_installation.operateur_id == Operateur.id
+        ).join(
+            self.modele_rapport,
+            getattr(self.modele_rapport, self.colonne_installation) == self.modele_installation.id
+        ).filter(
+            Operateur.actif == True
+        ).group_by(
+            Operateur.id, Operateur.nom
+        ).having(dernier < date_limite)
+
+    def candidats(self, reference):
+        date_limite = reference - timedelta(days=self.delai_jours)
+        candidats = []
+        for operateur_id, nom, dernier_rapport in self.requete(date_limite):
+            candidats.append({
+                'cle_alerte': f"{self.code}:{operateur_id}:{self.type_rapport}",
+                'type': TypeAlerte.ADMINISTRATIF,
+                'severite': SeveriteAlerte.MOYENNE,
+                'entite_concernee': nom,
+                'titre': f"Retard rapport {self.type_rapport}",
+                'description': f"Aucun rapport {self.type_rapport} reçu depuis plus de "
+                               f"{self.delai_jours} jours pour l'opérateur {nom} "
+                               f"(dernier rapport le {dernier_rapport:%d/%m/%Y}).",
+                'operateur_id': operateur_id,
+                'priorite': 2
+            })
+        return candidats
+
+
+class MoteurAlertesService:
+    """Service d'exécution des règles d'alertes automatiques"""
+
+    REGLES = [
+        RegleSeuilKPI(),
+        RegleRetardRapport('hydro', RapportHydro, CentraleHydro, 'centrale_id'),
+        RegleRetardRapport('thermique', RapportThermique, CentraleThermique, 'centrale_id'),
+        RegleRetardRapport('transport', RapportTransport, LigneTransport, 'ligne_id'),
+    ]
+
+    @staticmethod
+    def calculer_candidats(reference=None, regles=None):
+        """Alertes candidates de toutes les règles, uniques par clé"""
+        reference = reference or datetime.now()
+        candidats = {}
+        for regle in regles or MoteurAlertesService.REGLES:
+            for candidat in regle.candidats(reference):
+                candidats.setdefault(candidat['cle_alerte'], candidat)
+        return list(candidats.values())
+
+    @staticmethod
+    def cles_actives(cles):
+        """Sous-ensemble des clés qui ont déjà une alerte active"""
+        cles = list(cles)
+        actives = set()
+        for debut in range(0, len(cles), TAILLE_LOT_CLES):
+            lot = cles[debut:debut + TAILLE_LOT_CLES]
+            actives.update(cle for (cle,) in db.session.query(AlerteRegulateur.cle_alerte).filter(
+                AlerteRegulateur.cle_alerte.in_(lot),
+                AlerteRegulateur.statut == 'active'
+            ))
+        return actives
+
+    @staticmethod
+    def executer(reference=None, dry_run=False):
+        """
+        Calculer les candidates, écarter celles déjà actives et insérer les
+        nouvelles en une seule instruction. Retourne un résumé contenant les
+        alertes créées (objets AlerteRegulateur).
+        """
+        candidats = MoteurAlertesService.calculer_candidats(reference)
+        actives = MoteurAlertesService.cles_actives(c['cle_alerte'] for c in candidats)
+        nouvelles = [c for c in candidats if c['cle_alerte'] not in actives]
+
+        resultat = {
+            'candidats': len(candidats),
+            'deja_actives': len(actives),
+            'a_creer': len(nouvelles),
+            'alertes': []
+        }
+        if dry_run or not nouvelles:
+            return resultat
+
+        createur_id = createur_systeme_id()
+        lignes = [dict(c, statut='active', createur_id=createur_id) for c in nouvelles]
+        try:
+            db.session.execute(AlerteRegulateur.__table__.insert(), lignes)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        cles = [c['cle_alerte'] for c in nouvelles]
+        alertes = []
+        for debut in range(0, len(cles), TAILLE_LOT_CLES):
+            alertes.extend(AlerteRegulateur.query.filter(
+                AlerteRegulateur.cle_alerte.in_(cles[debut:debut + TAILLE_LOT_CLES]),
+                AlerteRegulateur.statut == 'active'
+            ).all())
+        resultat['alertes'] = alertes
+        return resultat
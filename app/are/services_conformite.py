@@ -0,0 +1,434 @@
+"""
+Services de conformité réglementaire
+Évaluation vectorisée (NumPy) des performances des opérateurs sur les
+KPIs réglementaires : une requête pour charger une période, un UPDATE
+groupé pour écrire les évaluations et les pénalités. Campagne mensuelle
+de conformité générant sanctions et alertes
+"""
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import func, bindparam
+
+from app.extensions import db
+from app.utils.imports import ModuleParesseux
+from app.models.kpis_reglementaires import (
+    KPIReglementaire, PerformanceOperateurKPI, SanctionReglementaire
+)
+from app.models.dashboard_are import AlerteRegulateur, TypeAlerte, SeveriteAlerte
+from app.models.operateurs import Operateur
+from app.are.services_alertes import MoteurAlertesService, createur_systeme_id
+
+# NumPy n'est importé qu'à la première évaluation
+np = ModuleParesseux('numpy')
+
+
+# Niveaux dans l'ordre de gravité croissante (indice = code numérique)
+NIVEAUX_EVALUATION = ('excellent', 'acceptable', 'limite', 'critique')
+NIVEAUX_CONFORMES = ('excellent', 'acceptable')
+
+# Colonnes réécrites lorsqu'une alerte de conformité du mois est déjà active
+CHAMPS_ALERTE_MIS_A_JOUR = ('severite', 'description', 'priorite')
+
+
+def _tableau(valeurs):
+    """Convertir une séquence (avec None) en tableau float, None -> NaN"""
+    return np.array(valeurs, dtype=float)
+
+
+def classer_valeurs(valeurs, seuil_excellent, seuil_acceptable, seuil_limite,
+                    sens_augmentation, penalite_moderee, penalite_critique):
+    """
+    Classer un lot de valeurs mesurées par rapport aux seuils réglementaires.
+
+    Équivalent vectorisé de KPIReglementaire.evaluer_performance : tous les
+    paramètres sont des tableaux de même longueur (un élément par
+    performance). Pour les KPIs où une valeur élevée est meilleure
+    (tout sens autre que 'diminution', NULL compris, comme dans
+    evaluer_performance), valeurs et seuils sont inversés en signe afin
+    d'utiliser les mêmes comparaisons <=. Un seuil non renseigné (NaN)
+    n'est jamais atteint.
+
+    Retourne (codes_niveau, penalites) : codes indices de NIVEAUX_EVALUATION,
+    pénalités en USD (0 si aucune).
+    """
+    signe = np.where(sens_augmentation, -1.0, 1.0)
+    v = valeurs * signe
+    codes = np.select(
+        [v <= seuil_excellent * signe, v <= seuil_acceptable * signe, v <= seuil_limite * signe],
+        [0, 1, 2],
+        default=3
+    )
+    penalites = np.select([codes == 2, codes == 3], [penalite_moderee, penalite_critique], default=0.0)
+    return codes, np.nan_to_num(penalites, nan=0.0)
+
+
+class EvaluationKPIService:
+    """Évaluation en lot des performances KPI réglementaires"""
+
+    @staticmethod
+    def charger_performances(annee, mois, operateur_id=None):
+        """
+        Charger en une seule jointure les performances d'une période avec
+        les seuils et pénalités de leur KPI (tuples projetés, sans ORM)
+        """
+        query = db.session.query(
+            PerformanceOperateurKPI.id,
+            PerformanceOperateurKPI.operateur_id,
+            PerformanceOperateurKPI.kpi_id,
+            PerformanceOperateurKPI.valeur_mesuree,
+            PerformanceOperateurKPI.evaluation,
+            PerformanceOperateurKPI.penalite_appliquee,
+            KPIReglementaire.sens_amelioration,
+            KPIReglementaire.seuil_excellent,
+            KPIReglementaire.seuil_acceptable,
+            KPIReglementaire.seuil_limite,
+            KPIReglementaire.penalite_moderee,
+            KPIReglementaire.penalite_critique
+        ).join(
+            KPIReglementaire, PerformanceOperateurKPI.kpi_id == KPIReglementaire.id
+        ).filter(
+            PerformanceOperateurKPI.annee == annee,
+            PerformanceOperateurKPI.mois == mois,
+            PerformanceOperateurKPI.actif == True,
+            KPIReglementaire.actif == True
+        )
+        if operateur_id:
+            query = query.filter(PerformanceOperateurKPI.operateur_id == operateur_id)
+        return query.order_by(PerformanceOperateurKPI.id).all()
+
+    @staticmethod
+    def evaluer_lignes(lignes):
+        """
+        Évaluer des lignes issues de charger_performances.
+        Retourne (evaluations, penalites) sous forme de tableaux NumPy
+        """
+        if not lignes:
+            return np.array([], dtype=object), np.array([], dtype=float)
+
+        colonnes = list(zip(*lignes))
+        codes, penalites = classer_valeurs(
+            valeurs=_tableau(colonnes[3]),
+            seuil_excellent=_tableau(colonnes[7]),
+            seuil_acceptable=_tableau(colonnes[8]),
+            seuil_limite=_tableau(colonnes[9]),
+            sens_augmentation=np.array([sens != 'diminution' for sens in colonnes[6]], dtype=bool),
+            penalite_moderee=_tableau(colonnes[10]),
+            penalite_critique=_tableau(colonnes[11])
+        )
+        return np.array(NIVEAUX_EVALUATION, dtype=object)[codes], penalites
+
+    @staticmethod
+    def evaluer_periode(annee, mois, operateur_id=None, enregistrer=True, commit=True):
+        """
+        Évaluer toutes les performances d'une période (tous opérateurs × KPIs).
+
+        Seules les lignes dont l'évaluation ou la pénalité change sont
+        réécrites, en un seul UPDATE exécuté en lot (executemany). Avec
+        commit=False, l'écriture reste dans la transaction de l'appelant.
+        """
+        lignes = EvaluationKPIService.charger_performances(annee, mois, operateur_id)
+        evaluations, penalites = EvaluationKPIService.evaluer_lignes(lignes)
+
+        resultats = []
+        mises_a_jour = []
+        for ligne, evaluation, penalite in zip(lignes, evaluations, penalites.tolist()):
+            resultats.append({
+                'performance_id': ligne.id,
+                'operateur_id': ligne.operateur_id,
+                'kpi_id': ligne.kpi_id,
+                'valeur': ligne.valeur_mesuree,
+                'evaluation': evaluation,
+                'penalite': penalite
+            })
+            if ligne.evaluation != evaluation or (ligne.penalite_appliquee or 0) != penalite:
+                mises_a_jour.append({'b_id': ligne.id, 'b_evaluation': evaluation, 'b_penalite': penalite})
+
+        if enregistrer and mises_a_jour:
+            EvaluationKPIService._ecrire_evaluations(mises_a_jour, commit=commit)
+
+        repartition = {niveau: 0 for niveau in NIVEAUX_EVALUATION}
+        niveaux, effectifs = np.unique(evaluations, return_counts=True) if len(evaluations) else ([], [])
+        for niveau, effectif in zip(niveaux, effectifs):
+            repartition[niveau] = int(effectif)
+
+        return {
+            'annee': annee,
+            'mois': mois,
+            'total': len(lignes),
+            'mises_a_jour': len(mises_a_jour) if enregistrer else 0,
+            'repartition': repartition,
+            'penalites_totales': float(penalites.sum()) if len(penalites) else 0.0,
+            'evaluations': resultats
+        }
+
+    @staticmethod
+    def _ecrire_evaluations(mises_a_jour, commit=True):
+        """UPDATE groupé des évaluations et pénalités"""
+        table = PerformanceOperateurKPI.__table__
+        maintenant = datetime.utcnow()
+        for ligne in mises_a_jour:
+            ligne['b_maj'] = maintenant
+        db.session.execute(
+            table.update()
+            .where(table.c.id == bindparam('b_id'))
+            .values(
+                evaluation=bindparam('b_evaluation'),
+                penalite_appliquee=bindparam('b_penalite'),
+                date_modification=bindparam('b_maj')
+            ),
+            mises_a_jour
+        )
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def synthese_par_kpi(annee, mois):
+        """
+        Synthèse des KPIs réglementaires actifs pour le dashboard : valeur
+        mesurée de la première performance de la période (ou valeur de
+        démonstration basée sur le seuil acceptable), niveau et pénalité.
+        Une seule requête quel que soit le nombre de KPIs.
+        """
+        premieres = db.session.query(
+            PerformanceOperateurKPI.kpi_id,
+            func.min(PerformanceOperateurKPI.id).label('performance_id')
+        ).filter(
+            PerformanceOperateurKPI.annee == annee,
+            PerformanceOperateurKPI.mois == mois
+        ).group_by(PerformanceOperateurKPI.kpi_id).subquery()
+
+        lignes = db.session.query(
+            KPIReglementaire, PerformanceOperateurKPI.valeur_mesuree
+        ).outerjoin(
+            premieres, premieres.c.kpi_id == KPIReglementaire.id
+        ).outerjoin(
+            PerformanceOperateurKPI, PerformanceOperateurKPI.id == premieres.c.performance_id
+        ).filter(
+            KPIReglementaire.actif == True
+        ).order_by(KPIReglementaire.id).all()
+
+        if not lignes:
+            return []
+
+        kpis = [kpi for kpi, _ in lignes]
+        # Valeur par défaut (démonstration) si aucune mesure pour la période
+        valeurs = [
+            valeur if valeur is not None else (kpi.seuil_acceptable or 0) * 0.95
+            for kpi, valeur in lignes
+        ]
+        codes, penalites = classer_valeurs(
+            valeurs=_tableau(valeurs),
+            seuil_excellent=_tableau([k.seuil_excellent for k in kpis]),
+            seuil_acceptable=_tableau([k.seuil_acceptable for k in kpis]),
+            seuil_limite=_tableau([k.seuil_limite for k in kpis]),
+            sens_augmentation=np.array([k.sens_amelioration != 'diminution' for k in kpis], dtype=bool),
+            penalite_moderee=_tableau([k.penalite_moderee for k in kpis]),
+            penalite_critique=_tableau([k.penalite_critique for k in kpis])
+        )
+
+        synthese = []
+        for kpi, valeur, code, penalite in zip(kpis, valeurs, codes.tolist(), penalites.tolist()):
+            niveau = NIVEAUX_EVALUATION[code]
+            synthese.append({
+                'id': kpi.id,
+                'code': kpi.code,
+                'nom': kpi.nom,
+                'description': kpi.description,
+                'valeur': round(valeur, 2),
+                'seuil': kpi.seuil_acceptable,
+                'seuil_excellent': kpi.seuil_excellent,
+                'seuil_limite': kpi.seuil_limite,
+                'seuil_critique': kpi.seuil_critique,
+                'unite': kpi.unite,
+                'niveau': niveau,
+                'conforme': niveau in NIVEAUX_CONFORMES,
+                'penalite': penalite or None,
+                'type_kpi': kpi.type_kpi.value if kpi.type_kpi else None,
+                'reference_legale': kpi.reference_legale
+            })
+        return synthese
+
+
+class ConformiteMensuelleService:
+    """
+    Campagne mensuelle de conformité : évaluation en lot de toutes les
+    performances du mois, création des sanctions manquantes et d'une alerte
+    par opérateur sanctionné, le tout dans une seule transaction.
+
+    Idempotente : une performance déjà liée à une sanction n'en reçoit pas
+    de nouvelle, une relance ne crée donc rien et ne réécrit rien. Une
+    relance après une nouvelle non-conformité met à jour l'alerte active
+    de l'opérateur pour le mois au lieu d'en créer une seconde.
+    """
+
+    NIVEAUX_SANCTIONNES = ('limite', 'critique')
+    DELAI_PAIEMENT_JOURS = 30
+
+    @staticmethod
+    def mois_precedent(reference=None):
+        """(annee, mois) du mois précédant la date de référence"""
+        reference = reference or date.today()
+        if reference.month == 1:
+            return reference.year - 1, 12
+        return reference.year, reference.month - 1
+
+    @staticmethod
+    def _type_sanction(evaluation, montant):
+        if not montant:
+            return 'Avertissement'
+        return 'Amende' if evaluation == 'limite' else 'Amende majeure'
+
+    @staticmethod
+    def executer(annee, mois, dry_run=False):
+        """
+        Exécuter la campagne pour un mois. En mode dry_run rien n'est écrit :
+        le résultat décrit ce qui serait créé.
+        """
+        try:
+            evaluation = EvaluationKPIService.evaluer_periode(
+                annee, mois, enregistrer=not dry_run, commit=False
+            )
+            candidates = [
+                e for e in evaluation['evaluations']
+                if e['evaluation'] in ConformiteMensuelleService.NIVEAUX_SANCTIONNES
+            ]
+
+            # Différentiel avec les sanctions existantes (une requête)
+            deja_sanctionnees = set()
+            if candidates:
+                deja_sanctionnees = {
+                    performance_id for (performance_id,) in db.session.query(
+                        SanctionReglementaire.performance_kpi_id
+                    ).join(
+                        PerformanceOperateurKPI,
+                        SanctionReglementaire.performance_kpi_id == PerformanceOperateurKPI.id
+                    ).filter(
+                        PerformanceOperateurKPI.annee == annee,
+                        PerformanceOperateurKPI.mois == mois
+                    ).distinct()
+                }
+            nouvelles = [e for e in candidates if e['performance_id'] not in deja_sanctionnees]
+
+            sanctions, alertes = ConformiteMensuelleService._preparer(annee, mois, nouvelles, candidates)
+
+            # Une seule alerte active par opérateur et par mois : celle qui
+            # existe déjà est mise à jour (KPIs et pénalités du mois entier)
+            actives = MoteurAlertesService.cles_actives(a['cle_alerte'] for a in alertes)
+            a_mettre_a_jour = [a for a in alertes if a['cle_alerte'] in actives]
+            alertes = [a for a in alertes if a['cle_alerte'] not in actives]
+
+            if not dry_run:
+                if sanctions:
+                    db.session.execute(SanctionReglementaire.__table__.insert(), sanctions)
+                if alertes:
+                    db.session.execute(AlerteRegulateur.__table__.insert(), alertes)
+                if a_mettre_a_jour:
+                    table = AlerteRegulateur.__table__
+                    db.session.execute(
+                        table.update().where(
+                            table.c.cle_alerte == bindparam('b_cle'), table.c.statut == 'active'
+                        ).values({nom: bindparam(nom) for nom in CHAMPS_ALERTE_MIS_A_JOUR}),
+                        [dict({nom: a[nom] for nom in CHAMPS_ALERTE_MIS_A_JOUR}, b_cle=a['cle_alerte'])
+                         for a in a_mettre_a_jour]
+                    )
+                db.session.commit()
+
+            return {
+                'annee': annee,
+                'mois': mois,
+                'dry_run': dry_run,
+                'performances_evaluees': evaluation['total'],
+                'evaluations_mises_a_jour': evaluation['mises_a_jour'],
+                'repartition': evaluation['repartition'],
+                'non_conformites': len(candidates),
+                'deja_sanctionnees': len(candidates) - len(nouvelles),
+                'sanctions_creees': len(sanctions),
+                'alertes_creees': len(alertes),
+                'alertes_mises_a_jour': len(a_mettre_a_jour),
+                'montant_total': sum(s['montant_amende'] or 0 for s in sanctions),
+                'sanctions': sanctions
+            }
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _preparer(annee, mois, nouvelles, candidates):
+        """
+        Construire les lignes de sanctions (non-conformités nouvelles) et
+        d'alertes : une par opérateur ayant une nouvelle non-conformité,
+        décrivant toutes ses non-conformités du mois
+        """
+        if not nouvelles:
+            return [], []
+
+        operateur_ids = {e['operateur_id'] for e in nouvelles}
+        du_mois = [e for e in candidates if e['operateur_id'] in operateur_ids]
+        kpi_ids = {e['kpi_id'] for e in du_mois}
+        kpis = {
+            k.id: k for k in db.session.query(
+                KPIReglementaire.id, KPIReglementaire.code, KPIReglementaire.nom,
+                KPIReglementaire.unite, KPIReglementaire.seuil_limite,
+                KPIReglementaire.reference_legale
+            ).filter(KPIReglementaire.id.in_(kpi_ids))
+        }
+        operateurs = dict(
+            db.session.query(Operateur.id, Operateur.nom).filter(Operateur.id.in_(operateur_ids))
+        )
+
+        aujourd_hui = date.today()
+        echeance = aujourd_hui + timedelta(days=ConformiteMensuelleService.DELAI_PAIEMENT_JOURS)
+        date_infraction = date(annee, mois, 1)
+
+        sanctions = []
+        for e in nouvelles:
+            kpi = kpis[e['kpi_id']]
+            montant = e['penalite'] or None
+            sanctions.append({
+                'operateur_id': e['operateur_id'],
+                'performance_kpi_id': e['performance_id'],
+                'type_sanction': ConformiteMensuelleService._type_sanction(e['evaluation'], montant),
+                'motif': (
+                    f"{kpi.nom} ({kpi.code}) : valeur mesurée {e['valeur']:g} {kpi.unite or ''} "
+                    f"pour {mois:02d}/{annee}, niveau {e['evaluation']} "
+                    f"(seuil limite {kpi.seuil_limite}). {kpi.reference_legale or ''}"
+                ).strip(),
+                'montant_amende': montant,
+                'date_infraction': date_infraction,
+                'date_notification': aujourd_hui,
+                'date_echeance': echeance,
+                'statut': 'notifiee',
+                'emise_par': 'ARE',
+                'numero_decision': f"ARE/CONF/{annee}{mois:02d}/{e['operateur_id']}/{kpi.code}"
+            })
+
+        par_operateur = {}
+        for e in du_mois:
+            par_operateur.setdefault(e['operateur_id'], []).append((e, kpis[e['kpi_id']]))
+
+        createur_id = createur_systeme_id()
+        alertes = []
+        for operateur_id, violations in par_operateur.items():
+            critique = any(e['evaluation'] == 'critique' for e, _ in violations)
+            montant = sum(e['penalite'] or 0 for e, _ in violations)
+            nom = operateurs.get(operateur_id, f'Opérateur {operateur_id}')
+            alertes.append({
+                'cle_alerte': f"conformite:{operateur_id}:{annee}{mois:02d}",
+                'type': TypeAlerte.CONFORMITE,
+                'severite': SeveriteAlerte.CRITIQUE if critique else SeveriteAlerte.ELEVEE,
+                'entite_concernee': nom,
+                'titre': f"Non-conformité réglementaire {mois:02d}/{annee}",
+                'description': (
+                    f"{len(violations)} KPI(s) hors seuil pour {nom} en {mois:02d}/{annee} : "
+                    + ', '.join(kpi.code for _, kpi in violations)
+                    + f". Pénalités notifiées : {montant:,.0f} USD."
+                ),
+                'date_echeance': echeance,
+                'statut': 'active',
+                'actions_recommandees': "Notifier l'opérateur et suivre le paiement des amendes.",
+                'priorite': 1 if critique else 2,
+                'operateur_id': operateur_id,
+                'createur_id': createur_id
+            })
+        return sanctions, alertes
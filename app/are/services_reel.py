@@ -49,13 +49,15 @@ class CalculStatistiquesReellesService:
             for capacite in capacites_hydro:
                 # Production réelle basée sur les rapports
                 production_reelle = db.session.query(
-                    func.sum(RapportHydro.production_totale_kwh)
+                    func.sum(RapportHydro.energie_produite)
+                ).join(
+                    CentraleHydro, RapportHydro.centrale_id == CentraleHydro.id
                 ).filter(
-                    RapportHydro.operateur_id == capacite.operateur_id,
-                    func.extract('year', RapportHydro.date_debut) == annee
+                    CentraleHydro.operateur_id == capacite.operateur_id,
+                    RapportHydro.filtre_annee(annee)
                 ).scalar() or 0
                 
-                production_gwh = production_reelle / 1000000  # kWh -> GWh
+                production_gwh = production_reelle / 1000  # MWh -> GWh
                 
                 capacite_obj = CapaciteInstallee(
                     annee=annee,
@@ -85,13 +87,15 @@ class CalculStatistiquesReellesService:
             
             for capacite in capacites_thermiques:
                 production_reelle = db.session.query(
-                    func.sum(RapportThermique.production_totale_kwh)
+                    func.sum(RapportThermique.energie_produite)
+                ).join(
+                    CentraleThermique, RapportThermique.centrale_id == CentraleThermique.id
                 ).filter(
-                    RapportThermique.operateur_id == capacite.operateur_id,
-                    func.extract('year', RapportThermique.date_debut) == annee
+                    CentraleThermique.operateur_id == capacite.operateur_id,
+                    RapportThermique.filtre_annee(annee)
                 ).scalar() or 0
                 
-                production_gwh = production_reelle / 1000000
+                production_gwh = production_reelle / 1000
                 
                 capacite_obj = CapaciteInstallee(
                     annee=annee,
@@ -121,13 +125,15 @@ class CalculStatistiquesReellesService:
             
             for capacite in capacites_solaires:
                 production_reelle = db.session.query(
-                    func.sum(RapportSolaire.production_totale_kwh)
+                    func.sum(RapportSolaire.energie_produite)
+                ).join(
+                    CentraleSolaire, RapportSolaire.centrale_id == CentraleSolaire.id
                 ).filter(
-                    RapportSolaire.operateur_id == capacite.operateur_id,
-                    func.extract('year', RapportSolaire.date_debut) == annee
+                    CentraleSolaire.operateur_id == capacite.operateur_id,
+                    RapportSolaire.filtre_annee(annee)
                 ).scalar() or 0
                 
-                production_gwh = production_reelle / 1000000
+                production_gwh = production_reelle / 1000
                 
                 capacite_obj = CapaciteInstallee(
                     annee=annee,
@@ -15,6 +15,7 @@ from app.models.statistiques_are import (
     PortfolioProjet, CapaciteInstallee, ProductionSolaire, 
     ClienteleElectricite, StatistiqueNationale, TypeProjet
 )
+from app.utils.serialisation import Champ, Schema
 
 
 class StatistiquesAREService:
@@ -334,56 +335,84 @@ class StatistiquesAREService:
             return False
 
 
+# Champs des to_dict() des modèles, sérialisés en masse (opérateur joint en une seule requête)
+SCHEMA_PORTFOLIO = Schema(PortfolioProjet, (
+    'id', 'nom_projet', 'type_projet', Champ('operateur.nom', cle='operateur'), 'capacite_mw',
+    'investissement_usd', 'date_depot_demande', 'date_avis', 'statut', 'annee_avis', 'province',
+    'localisation'
+))
+SCHEMA_CAPACITES = Schema(CapaciteInstallee, (
+    'id', 'annee', 'type_source', Champ('operateur.nom', cle='operateur', defaut='National'),
+    'capacite_installee_mw', 'capacite_disponible_mw', 'production_annuelle_gwh', 'facteur_charge',
+    'province'
+))
+SCHEMA_STATISTIQUES_NATIONALES = Schema(StatistiqueNationale, (
+    'id', 'annee', 'capacite_totale_installee_mw', 'capacite_totale_disponible_mw',
+    'production_totale_annuelle_gwh', 'capacite_hydro_mw', 'capacite_thermique_mw',
+    'capacite_solaire_mw', 'production_hydro_gwh', 'production_thermique_gwh',
+    'production_solaire_gwh', 'total_clients_nationaux', 'clients_ht_nationaux',
+    'clients_mt_nationaux', 'clients_bt_nationaux', 'taux_acces_national',
+    'taux_electrification_national', 'taux_couverture_national', 'nombre_operateurs_actifs',
+    'date_calcul'
+))
+SCHEMA_PRODUCTION_SOLAIRE = Schema(ProductionSolaire, (
+    'id', 'annee', 'type_installation', Champ('operateur.nom', cle='operateur', defaut='National'),
+    'puissance_installee_mw', 'nombre_installations', 'production_annuelle_gwh', 'province'
+))
+SCHEMA_CLIENTELE = Schema(ClienteleElectricite, (
+    'id', 'annee', Champ('operateur.nom', cle='operateur', defaut='National'), 'province',
+    'clients_ht', 'clients_mt', 'clients_bt', 'total_clients', 'clients_factures',
+    'menages_factures', 'menages_desservis', 'taux_couverture_geographique',
+    'taux_electrification', 'taux_acces_electricite'
+))
+
+
+def _serialiser(schema, colonnes, query):
+    """Dictionnaires ou format colonnes {'cols', 'rows'} pour les graphiques"""
+    return schema.colonnes(query) if colonnes else schema.dicts(query)
+
+
 class DashboardAREService:
     """Service pour générer les données du dashboard ARE"""
 
     @staticmethod
-    def get_portfolio_projets():
-        """Récupère le portfolio des projets ARE"""
-        projets = PortfolioProjet.query.filter_by(actif=True).all()
-        return [projet.to_dict() for projet in projets]
+    def get_portfolio_projets(colonnes=False):
+        """Récupère le portfolio des projets ARE (format colonnes si `colonnes`)"""
+        return _serialiser(SCHEMA_PORTFOLIO, colonnes, PortfolioProjet.query.filter_by(actif=True))
 
     @staticmethod
-    def get_evolution_capacite(annee_debut=2020, annee_fin=2024):
-        """Récupère l'évolution de la capacité installée"""
-        capacites = CapaciteInstallee.query.filter(
+    def get_evolution_capacite(annee_debut=2020, annee_fin=2024, colonnes=False):
+        """Récupère l'évolution de la capacité installée (format colonnes si `colonnes`)"""
+        return _serialiser(SCHEMA_CAPACITES, colonnes, CapaciteInstallee.query.filter(
             and_(
                 CapaciteInstallee.annee >= annee_debut,
                 CapaciteInstallee.annee <= annee_fin
             )
-        ).order_by(CapaciteInstallee.annee, CapaciteInstallee.type_source).all()
-        
-        return [capacite.to_dict() for capacite in capacites]
+        ).order_by(CapaciteInstallee.annee, CapaciteInstallee.type_source))
 
     @staticmethod
-    def get_statistiques_nationales_periode(annee_debut=2020, annee_fin=2024):
-        """Récupère les statistiques nationales pour une période"""
-        stats = StatistiqueNationale.query.filter(
+    def get_statistiques_nationales_periode(annee_debut=2020, annee_fin=2024, colonnes=False):
+        """Récupère les statistiques nationales pour une période (format colonnes si `colonnes`)"""
+        return _serialiser(SCHEMA_STATISTIQUES_NATIONALES, colonnes, StatistiqueNationale.query.filter(
             and_(
                 StatistiqueNationale.annee >= annee_debut,
                 StatistiqueNationale.annee <= annee_fin
             )
-        ).order_by(StatistiqueNationale.annee).all()
-        
-        return [stat.to_dict() for stat in stats]
+        ).order_by(StatistiqueNationale.annee))
 
     @staticmethod
     def get_donnees_solaires():
         """Récupère les données spécifiques au solaire"""
-        productions = ProductionSolaire.query.order_by(
+        return SCHEMA_PRODUCTION_SOLAIRE.dicts(ProductionSolaire.query.order_by(
             ProductionSolaire.annee.desc()
-        ).all()
-        
-        return [prod.to_dict() for prod in productions]
+        ))
 
     @staticmethod
     def get_statistiques_clientele(annee_debut=2020, annee_fin=2024):
         """Récupère les statistiques de clientèle"""
-        clienteles = ClienteleElectricite.query.filter(
+        return SCHEMA_CLIENTELE.dicts(ClienteleElectricite.query.filter(
             and_(
                 ClienteleElectricite.annee >= annee_debut,
                 ClienteleElectricite.annee <= annee_fin
             )
-        ).order_by(ClienteleElectricite.annee).all()
-        
-        return [clientele.to_dict() for clientele in clienteles]
\ No newline at end of file
+        ).order_by(ClienteleElectricite.annee))
\ No newline at end of file
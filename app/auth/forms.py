@@ -4,7 +4,8 @@ Formulaires d'authentification
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, SelectField, TextAreaField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional
-from app.models import User, Operateur
+from app.models import User
+from app.utils.referentiel import choix_referentiel
 
 
 class LoginForm(FlaskForm):
@@ -47,9 +48,7 @@ class RegistrationForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(RegistrationForm, self).__init__(*args, **kwargs)
         # Charger les opérateurs actifs pour la liste déroulante
-        self.operateur_id.choices = [(0, 'Aucun opérateur')] + [
-            (o.id, o.nom) for o in Operateur.query.filter_by(actif=True).all()
-        ]
+        self.operateur_id.choices = choix_referentiel('operateurs', vide=(0, 'Aucun opérateur'))
     
     def validate_username(self, username):
         user = User.query.filter_by(username=username.data).first()
@@ -93,9 +92,7 @@ class UserEditForm(FlaskForm):
         super(UserEditForm, self).__init__(*args, **kwargs)
         self.user = user
         # Charger les opérateurs actifs pour la liste déroulante
-        self.operateur_id.choices = [(0, 'Aucun opérateur')] + [
-            (o.id, o.nom) for o in Operateur.query.filter_by(actif=True).all()
-        ]
+        self.operateur_id.choices = choix_referentiel('operateurs', vide=(0, 'Aucun opérateur'))
     
     def validate_username(self, username):
         if username.data != self.user.username:
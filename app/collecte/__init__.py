@@ -4,4 +4,5 @@ Remplace les fake data par des vraies soumissions
 """
 from flask import Blueprint
 
-collecte_bp = Blueprint('collecte', __name__, url_prefix='/collecte')
\ No newline at end of file
+collecte_bp = Blueprint('collecte', __name__, url_prefix='/collecte')
+from app.collecte import routes
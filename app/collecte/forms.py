@@ -3,6 +3,7 @@ Formulaires pour la collecte mensuelle des données des opérateurs
 Remplace les données fictives par des soumissions réelles
 """
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import (
     StringField, IntegerField, FloatField, SelectField, TextAreaField, 
     SubmitField, DateField, DecimalField, BooleanField
@@ -11,7 +12,7 @@ from wtforms.validators import (
     DataRequired, Optional, NumberRange, Length, ValidationError
 )
 from datetime import datetime, date
-from app.models.collecte_donnees import CollecteDonneesMensuelles, CollecteProjetNouveau
+from app.models.collecte_donnees import CollecteDonneesMensuelles, CollecteProjetNouveau, StatutCollecte
 from app.models.operateurs import Operateur
 from flask_login import current_user
 
@@ -270,10 +271,10 @@ class CollecteDonneesMensuellesForm(FlaskForm):
                 CollecteDonneesMensuelles.actif == True
             ).first()
             
-            if existing and existing.statut != 'brouillon':
+            if existing and existing.statut != StatutCollecte.BROUILLON:
                 self.mois.errors.append(
                     f"Une collecte existe déjà pour {self.mois.data}/{self.annee.data} "
-                    f"avec le statut: {existing.statut}"
+                    f"avec le statut: {existing.statut.value}"
                 )
                 return False
         
@@ -481,4 +482,37 @@ class CollecteProjetNouveauForm(FlaskForm):
             if field.data <= self.date_debut_prevue.data:
                 raise ValidationError(
                     'La date de mise en service doit être postérieure au début des travaux'
-                )
\ No newline at end of file
+                )
+
+
+class ImportCollecteForm(FlaskForm):
+    """
+    Import en masse de collectes mensuelles (fichier Excel ou CSV)
+    Une ligne par opérateur et par mois, colonnes nommées comme les champs de la collecte
+    """
+    
+    fichier = FileField(
+        'Fichier *',
+        validators=[
+            FileRequired(message="Le fichier est requis"),
+            FileAllowed(['xlsx', 'csv'], message="Formats acceptés : .xlsx, .csv")
+        ],
+        description="Colonnes : annee, mois (operateur_id pour l'ARE), puis les champs de la collecte"
+    )
+    
+    operateur_id = SelectField(
+        'Opérateur',
+        coerce=int,
+        choices=[],  # Rempli pour le super admin uniquement
+        description="Opérateur imposé à toutes les lignes, sinon colonne operateur_id du fichier"
+    )
+    
+    soumettre = BooleanField(
+        "Soumettre directement à l'ARE (sinon enregistrer en brouillon)"
+    )
+    
+    partiel = BooleanField(
+        'Enregistrer les lignes valides même si certaines sont en erreur'
+    )
+    
+    submit = SubmitField('Importer')
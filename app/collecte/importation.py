@@ -0,0 +1,403 @@
+"""
+Import en masse des collectes mensuelles depuis un fichier Excel (.xlsx)
+ou CSV, pour les opérateurs qui transmettent une année de mois d'un coup.
+
+Le fichier est lu en flux (openpyxl en lecture seule, module csv) et
+validé par lots de ``COLLECTE_IMPORT_BATCH_SIZE`` lignes avec pandas :
+conversions et contrôles sont faits colonne par colonne sur le lot, les
+erreurs sont rapportées par numéro de ligne du fichier. Les lignes
+valides sont ensuite enregistrées dans une seule transaction : mise à
+jour groupée (executemany) des collectes existantes encore modifiables,
+repérées par la contrainte unique (operateur_id, mois, annee), puis
+insertion groupée des nouvelles. Sans l'option ``partiel``, une seule
+erreur annule l'import.
+
+Le traitement tourne dans un thread d'arrière-plan ; sa progression est
+enregistrée dans ``ImportCollecte`` après chaque lot.
+"""
+import csv
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import String, bindparam, or_, select, type_coerce
+
+from app.extensions import db
+from app.models.collecte_donnees import CollecteDonneesMensuelles, ImportCollecte, StatutCollecte
+from app.models.operateurs import Operateur
+from app.utils.imports import ModuleParesseux, module_disponible
+
+pd = ModuleParesseux('pandas')
+openpyxl = ModuleParesseux('openpyxl')
+PANDAS_AVAILABLE = module_disponible('pandas')
+OPENPYXL_AVAILABLE = module_disponible('openpyxl')
+
+
+EXTENSIONS = ('.xlsx', '.csv')
+
+CLES = ('operateur_id', 'annee', 'mois')
+
+# Colonnes importables (noms des colonnes du modèle) et défaut d'une cellule vide
+CHAMPS_ENTIERS = {
+    'nouveaux_clients_ht_mois': 0, 'nouveaux_clients_mt_mois': 0, 'nouveaux_clients_bt_mois': 0,
+    'clients_deconnectes_ht_mois': 0, 'clients_deconnectes_mt_mois': 0, 'clients_deconnectes_bt_mois': 0,
+    'nouvelles_localites_desservies': 0, 'population_nouvelle_couverte': 0,
+    'nombre_pannes_majeures': 0, 'nombre_plaintes_clients': 0,
+}
+CHAMPS_DECIMAUX = {
+    'investissements_mois_millions_usd': None, 'revenus_ventes_electricite_millions_usd': None,
+    'cout_exploitation_millions_usd': None, 'cout_maintenance_millions_usd': None,
+    'longueur_nouveaux_reseaux_km': 0, 'emissions_co2_tonnes': None, 'consommation_eau_m3': None,
+    'duree_totale_pannes_heures': 0,
+}
+CHAMPS_TEXTE = ('commentaires',)
+CHAMPS = tuple(CHAMPS_ENTIERS) + tuple(CHAMPS_DECIMAUX) + CHAMPS_TEXTE
+
+# Statuts lus bruts : certaines lignes historiques portent la valeur ('brouillon') au lieu du nom
+STATUTS_MODIFIABLES = {statut.name for statut in (StatutCollecte.BROUILLON, StatutCollecte.REJETE)} | \
+    {statut.value for statut in (StatutCollecte.BROUILLON, StatutCollecte.REJETE)}
+
+# Nombre maximal d'erreurs conservées dans l'historique de l'import
+MAX_ERREURS = 500
+
+
+class ErreurImport(Exception):
+    """Fichier inexploitable (format, en-tête) : l'import échoue sans lecture des lignes"""
+
+
+# ----- Lecture en flux -----
+
+def lire_fichier(chemin):
+    """Générateur des lignes (tuples de valeurs) d'un fichier .xlsx ou .csv, en-tête compris"""
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == '.xlsx':
+        if not OPENPYXL_AVAILABLE:
+            raise ErreurImport("openpyxl n'est pas installé : import Excel indisponible")
+        classeur = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+        try:
+            yield from classeur.worksheets[0].iter_rows(values_only=True)
+        finally:
+            classeur.close()
+    elif extension == '.csv':
+        with open(chemin, newline='', encoding='utf-8-sig') as fichier:
+            echantillon = fichier.read(4096)
+            fichier.seek(0)
+            try:
+                dialecte = csv.Sniffer().sniff(echantillon, delimiters=';,\t')
+            except csv.Error:
+                dialecte = csv.excel
+            yield from csv.reader(fichier, dialecte)
+    else:
+        raise ErreurImport(f"Format non pris en charge : {extension or 'sans extension'} ({', '.join(EXTENSIONS)})")
+
+
+def _est_vide(valeur):
+    return valeur is None or (isinstance(valeur, str) and not valeur.strip())
+
+
+def lots_de_lignes(lignes, taille):
+    """Lots de [(numéro de ligne du fichier, ligne)], lignes vides ignorées"""
+    numero = 2  # la ligne 1 est l'en-tête
+    while True:
+        lot = list(islice(lignes, taille))
+        if not lot:
+            return
+        yield [(numero + i, ligne) for i, ligne in enumerate(lot)
+               if ligne and not all(_est_vide(valeur) for valeur in ligne)]
+        numero += len(lot)
+
+
+def lire_en_tete(lignes, operateur_impose):
+    """Positions des colonnes reconnues ; colonnes inconnues"""
+    en_tete = next(lignes, None)
+    if en_tete is None:
+        raise ErreurImport("Le fichier est vide")
+
+    positions, inconnues = {}, []
+    for position, nom in enumerate(en_tete):
+        nom = str(nom).strip().lower() if nom is not None else ''
+        if nom in CLES or nom in CHAMPS:
+            positions[nom] = position
+        elif nom:
+            inconnues.append(nom)
+
+    requises = ('annee', 'mois') if operateur_impose else CLES
+    manquantes = [nom for nom in requises if nom not in positions]
+    if manquantes:
+        raise ErreurImport(f"Colonnes obligatoires absentes : {', '.join(manquantes)}")
+    return positions, inconnues
+
+
+# ----- Validation par lot -----
+
+class ValidateurLot:
+    """Contrôles vectorisés d'un lot de lignes ; erreurs repérées par numéro de ligne"""
+
+    def __init__(self, positions, operateur_impose, annee_max):
+        self.positions = positions
+        self.operateur_impose = operateur_impose
+        self.annee_max = annee_max
+        self.deja_vues = set()  # clés des lots précédents (doublons dans le fichier)
+        self.operateurs_connus = {}
+
+    def valider(self, lot):
+        """(lignes valides en dictionnaires, erreurs [{ligne, colonne, message}])"""
+        numeros = [numero for numero, _ in lot]
+        df = pd.DataFrame({
+            nom: [ligne[position] if position < len(ligne) else None for _, ligne in lot]
+            for nom, position in self.positions.items()
+        }, index=numeros)
+        erreurs = []
+        invalide = pd.Series(False, index=df.index)
+
+        def signaler(masque, colonne, message):
+            nonlocal invalide
+            for numero in df.index[masque]:
+                erreurs.append({'ligne': int(numero), 'colonne': colonne, 'message': message})
+            invalide |= masque
+
+        valeurs, vides = {}, {}
+        for nom in CLES + tuple(CHAMPS_ENTIERS) + tuple(CHAMPS_DECIMAUX):
+            if nom not in df:
+                continue
+            brut = df[nom]
+            vide = brut.map(_est_vide)
+            texte = brut.astype(str).str.strip().str.replace(',', '.', regex=False).str.replace(' ', '', regex=False)
+            nombres = pd.to_numeric(texte.where(~vide), errors='coerce')
+            nombres = nombres.where(nombres.abs() != float('inf'))
+            signaler(nombres.isna() & ~vide, nom, "Valeur numérique attendue")
+            signaler(nombres < 0, nom, "Valeur négative")
+            if nom not in CHAMPS_DECIMAUX:
+                signaler(nombres.notna() & (nombres % 1 != 0), nom, "Nombre entier attendu")
+            valeurs[nom], vides[nom] = nombres, vide
+
+        for nom in ('annee', 'mois'):
+            signaler(vides[nom], nom, "Valeur obligatoire")
+        signaler(~valeurs['mois'].between(1, 12) & valeurs['mois'].notna(), 'mois', "Mois entre 1 et 12 attendu")
+        signaler(~valeurs['annee'].between(2000, self.annee_max) & valeurs['annee'].notna(), 'annee',
+                 f"Année entre 2000 et {self.annee_max} attendue")
+
+        if self.operateur_impose:
+            if 'operateur_id' in valeurs:
+                autre = valeurs['operateur_id'].notna() & (valeurs['operateur_id'] != self.operateur_impose)
+                signaler(autre, 'operateur_id', "Opérateur non autorisé pour ce compte")
+            valeurs['operateur_id'] = pd.Series(float(self.operateur_impose), index=df.index)
+        else:
+            signaler(vides['operateur_id'], 'operateur_id', "Valeur obligatoire")
+            inconnus = self._operateurs_inconnus(valeurs['operateur_id'])
+            signaler(valeurs['operateur_id'].isin(inconnus), 'operateur_id', "Opérateur inconnu")
+
+        # Conversion en types Python, cellules vides remplacées par le défaut du modèle
+        colonnes = {}
+        for nom in CLES + tuple(CHAMPS_ENTIERS):
+            if nom in valeurs:
+                defaut = CHAMPS_ENTIERS.get(nom)
+                colonnes[nom] = [defaut if v != v else int(v) for v in valeurs[nom].tolist()]
+        for nom, defaut in CHAMPS_DECIMAUX.items():
+            if nom in valeurs:
+                colonnes[nom] = [defaut if v != v else float(v) for v in valeurs[nom].tolist()]
+        for nom in CHAMPS_TEXTE:
+            if nom in df:
+                colonnes[nom] = [None if _est_vide(v) else str(v).strip() for v in df[nom].tolist()]
+
+        lignes = []
+        for i, (numero, rejete) in enumerate(zip(df.index, invalide.tolist())):
+            if rejete:
+                continue
+            ligne = {nom: valeurs_colonne[i] for nom, valeurs_colonne in colonnes.items()}
+            cle = tuple(ligne[nom] for nom in CLES)
+            if cle in self.deja_vues:
+                erreurs.append({'ligne': int(numero), 'colonne': 'mois',
+                                'message': f"Doublon : {ligne['mois']:02d}/{ligne['annee']} déjà présent dans le fichier"})
+                continue
+            self.deja_vues.add(cle)
+            ligne['_ligne'] = int(numero)
+            lignes.append(ligne)
+        return lignes, erreurs
+
+    def _operateurs_inconnus(self, identifiants):
+        """Identifiants d'opérateurs absents de la base (cache sur la durée de l'import)"""
+        nouveaux = {int(v) for v in identifiants.dropna().unique() if v % 1 == 0} - set(self.operateurs_connus)
+        if nouveaux:
+            existants = {i for (i,) in db.session.query(Operateur.id).filter(Operateur.id.in_(nouveaux))}
+            self.operateurs_connus.update({i: i in existants for i in nouveaux})
+        return [float(i) for i, existe in self.operateurs_connus.items() if not existe]
+
+
+def collectes_existantes(lignes):
+    """{(operateur_id, annee, mois): statut brut} des collectes déjà enregistrées pour ces lignes"""
+    if not lignes:
+        return {}
+    table = CollecteDonneesMensuelles.__table__
+    cles = {tuple(ligne[nom] for nom in CLES) for ligne in lignes}
+    requete = select(table.c.operateur_id, table.c.annee, table.c.mois, type_coerce(table.c.statut, String)).where(
+        table.c.operateur_id.in_({cle[0] for cle in cles}),
+        table.c.annee.in_({cle[1] for cle in cles})
+    )
+    return {(o, a, m): statut for o, a, m, statut in db.session.execute(requete) if (o, a, m) in cles}
+
+
+# ----- Écriture -----
+
+def enregistrer(a_mettre_a_jour, a_inserer, champs, statut, user_id):
+    """
+    Upsert groupé sur (operateur_id, mois, annee) dans la transaction de la
+    session (sans commit) : UPDATE executemany des collectes modifiables,
+    INSERT executemany des nouvelles
+    """
+    table = CollecteDonneesMensuelles.__table__
+    maintenant = datetime.utcnow()
+    communs = {'statut': statut, 'soumis_par_user_id': user_id,
+               'date_soumission': maintenant if statut == StatutCollecte.SOUMIS else None,
+               'date_modification': maintenant, 'actif': True}
+
+    if a_mettre_a_jour:
+        instruction = table.update().where(
+            table.c.operateur_id == bindparam('b_operateur_id'),
+            table.c.mois == bindparam('b_mois'),
+            table.c.annee == bindparam('b_annee'),
+            # IN développé (expanding) incompatible avec executemany
+            or_(*(type_coerce(table.c.statut, String) == statut for statut in sorted(STATUTS_MODIFIABLES)))
+        ).values({nom: bindparam(nom) for nom in champs + tuple(communs)})
+        parametres = [
+            dict(communs, b_operateur_id=ligne['operateur_id'], b_mois=ligne['mois'], b_annee=ligne['annee'],
+                 **{nom: ligne[nom] for nom in champs})
+            for ligne in a_mettre_a_jour
+        ]
+        resultat = db.session.execute(instruction, parametres)
+        if resultat.rowcount not in (-1, len(parametres)):
+            raise ErreurImport("Des collectes ont été soumises ou validées pendant l'import : relancez-le")
+
+    if a_inserer:
+        db.session.execute(table.insert(), [
+            dict(communs, date_creation=maintenant, operateur_id=ligne['operateur_id'],
+                 mois=ligne['mois'], annee=ligne['annee'], **{nom: ligne[nom] for nom in champs})
+            for ligne in a_inserer
+        ])
+
+
+# ----- Exécution -----
+
+class ImportCollecteService:
+    """Création et exécution des imports en masse de collectes mensuelles"""
+
+    @staticmethod
+    def dossier():
+        dossier = os.path.join(current_app.instance_path, 'imports')
+        os.makedirs(dossier, exist_ok=True)
+        return dossier
+
+    @staticmethod
+    def creer(fichier, user, operateur_id=None, soumettre=False, partiel=False):
+        """Enregistrer le fichier téléversé et l'import à traiter ; retourne (import, chemin)"""
+        nom_fichier = os.path.basename(fichier.filename or 'import')
+        extension = os.path.splitext(nom_fichier)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ErreurImport(f"Format non pris en charge : {extension or 'sans extension'} ({', '.join(EXTENSIONS)})")
+        if not PANDAS_AVAILABLE:
+            raise ErreurImport("pandas n'est pas installé : import en masse indisponible")
+
+        chemin = os.path.join(ImportCollecteService.dossier(), f"{uuid.uuid4().hex}{extension}")
+        fichier.save(chemin)
+
+        import_collecte = ImportCollecte(
+            user_id=user.id, operateur_id=operateur_id, nom_fichier=nom_fichier,
+            soumettre=soumettre, partiel=partiel, statut='en_attente'
+        )
+        import_collecte.save()
+        return import_collecte, chemin
+
+    @staticmethod
+    def lancer(import_id, chemin):
+        """Traiter l'import dans un thread d'arrière-plan"""
+        app = current_app._get_current_object()
+
+        def executer():
+            with app.app_context():
+                ImportCollecteService.executer(import_id, chemin)
+
+        thread = threading.Thread(target=executer, name=f'import-collecte-{import_id}', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def executer(import_id, chemin):
+        """Lire, valider et enregistrer le fichier ; le fichier est supprimé à la fin"""
+        import_collecte = db.session.get(ImportCollecte, import_id)
+        import_collecte.statut = 'en_cours'
+        import_collecte.debut = datetime.utcnow()
+        db.session.commit()
+        try:
+            ImportCollecteService._traiter(import_collecte, chemin)
+        except Exception as e:
+            db.session.rollback()
+            import_collecte.statut = 'echec'
+            import_collecte.message = str(e) if isinstance(e, ErreurImport) else f"{type(e).__name__}: {e}"
+            if not isinstance(e, ErreurImport):
+                current_app.logger.error(f"Import de collectes {import_id} en échec : {e}")
+        finally:
+            import_collecte.fin = datetime.utcnow()
+            db.session.commit()
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        return import_collecte
+
+    @staticmethod
+    def _traiter(import_collecte, chemin):
+        lignes = lire_fichier(chemin)
+        positions, inconnues = lire_en_tete(lignes, import_collecte.operateur_id)
+        validateur = ValidateurLot(positions, import_collecte.operateur_id, datetime.utcnow().year + 1)
+        champs = tuple(nom for nom in CHAMPS if nom in positions)
+
+        a_mettre_a_jour, a_inserer, erreurs = [], [], []
+        lignes_en_erreur = set()
+        taille = current_app.config.get('COLLECTE_IMPORT_BATCH_SIZE', 1000)
+        for lot in lots_de_lignes(lignes, taille):
+            if not lot:
+                continue
+            valides, erreurs_lot = validateur.valider(lot)
+
+            existantes = collectes_existantes(valides)
+            for ligne in valides:
+                statut = existantes.get(tuple(ligne[nom] for nom in CLES))
+                if statut is None:
+                    a_inserer.append(ligne)
+                elif statut in STATUTS_MODIFIABLES:
+                    a_mettre_a_jour.append(ligne)
+                else:
+                    erreurs_lot.append({'ligne': ligne['_ligne'], 'colonne': 'mois', 'message':
+                                        f"Collecte {ligne['mois']:02d}/{ligne['annee']} déjà {statut.lower()} : non modifiable"})
+
+            erreurs.extend(erreurs_lot[:max(0, MAX_ERREURS - len(erreurs))])
+            lignes_en_erreur.update(erreur['ligne'] for erreur in erreurs_lot)
+
+            # Progression (aucune écriture de collecte en cours : pas de verrou prolongé)
+            import_collecte.lignes_lues += len(lot)
+            import_collecte.lignes_en_erreur = len(lignes_en_erreur)
+            db.session.commit()
+
+        if lignes_en_erreur:
+            a_mettre_a_jour = [ligne for ligne in a_mettre_a_jour if ligne['_ligne'] not in lignes_en_erreur]
+            a_inserer = [ligne for ligne in a_inserer if ligne['_ligne'] not in lignes_en_erreur]
+
+        import_collecte.erreurs = json.dumps(sorted(erreurs, key=lambda e: e['ligne'])) if erreurs else None
+        message = []
+        if inconnues:
+            message.append(f"Colonnes ignorées : {', '.join(inconnues)}")
+
+        if lignes_en_erreur and not import_collecte.partiel:
+            import_collecte.statut = 'erreurs'
+            message.append(f"{len(lignes_en_erreur)} ligne(s) en erreur : aucune collecte enregistrée")
+        else:
+            statut = StatutCollecte.SOUMIS if import_collecte.soumettre else StatutCollecte.BROUILLON
+            enregistrer(a_mettre_a_jour, a_inserer, champs, statut, import_collecte.user_id)
+            import_collecte.statut = 'termine'
+            import_collecte.lignes_creees = len(a_inserer)
+            import_collecte.lignes_mises_a_jour = len(a_mettre_a_jour)
+            message.append(f"{len(a_inserer)} collecte(s) créée(s), {len(a_mettre_a_jour)} mise(s) à jour")
+        import_collecte.message = ' ; '.join(message)
+        # Collectes et bilan de l'import validés ensemble (commit de executer)
@@ -2,17 +2,28 @@
 Routes pour la collecte mensuelle des données des opérateurs
 Évite les fake data en permettant aux opérateurs de soumettre leurs vraies données
 """
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import render_template, request, redirect, url_for, flash, jsonify, abort
 from flask_login import login_required, current_user
 from datetime import datetime, date
 from app.collecte import collecte_bp
-from app.collecte.forms import CollecteDonneesMensuellesForm, CollecteProjetNouveauForm
-from app.models.collecte_donnees import CollecteDonneesMensuelles, CollecteProjetNouveau
+from app.collecte.forms import CollecteDonneesMensuellesForm, CollecteProjetNouveauForm, ImportCollecteForm
+from app.collecte.importation import CHAMPS, ErreurImport, ImportCollecteService
+from app.models.collecte_donnees import (
+    CollecteDonneesMensuelles, CollecteProjetNouveau, ImportCollecte, StatutCollecte, TypeSource
+)
 from app.models.operateurs import Operateur
 from app.utils.decorators import role_required
 from app.utils.permissions import can_access_operateur
+from app.utils.referentiel import choix_referentiel
 from app.extensions import db
 
+# Types de projet du formulaire enregistrables (le modèle ne connaît que les centrales)
+TYPES_PROJET = {
+    'production_hydro': TypeSource.HYDRO,
+    'production_thermique': TypeSource.THERMIQUE,
+    'production_solaire': TypeSource.SOLAIRE,
+}
+
 
 @collecte_bp.route('/')
 @login_required
@@ -120,8 +131,8 @@ def soumettre_collecte():
         ).first()
         
         if existing:
-            if existing.statut != 'brouillon':
-                flash(f"Une collecte existe déjà pour {form.mois.data}/{form.annee.data} avec le statut: {existing.statut}", "error")
+            if existing.statut != StatutCollecte.BROUILLON:
+                flash(f"Une collecte existe déjà pour {form.mois.data}/{form.annee.data} avec le statut: {existing.statut.value}", "error")
                 return render_template('collecte/nouvelle_collecte.html',
                                      form=form, operateur=current_user.operateur)
             else:
@@ -133,15 +144,15 @@ def soumettre_collecte():
                 operateur_id=current_user.operateur.id,
                 annee=int(form.annee.data),
                 mois=int(form.mois.data),
-                soumis_par=current_user.id
+                soumis_par_user_id=current_user.id
             )
         
         # Déterminer le statut selon le bouton cliqué
         if 'save_draft' in request.form:
-            collecte.statut = 'brouillon'
+            collecte.statut = StatutCollecte.BROUILLON
             message_success = "Brouillon enregistré avec succès"
         else:
-            collecte.statut = 'soumis'
+            collecte.statut = StatutCollecte.SOUMIS
             collecte.date_soumission = datetime.utcnow()
             message_success = "Collecte soumise avec succès à l'ARE pour validation"
         
@@ -173,6 +184,9 @@ def soumettre_collecte():
         
         collecte.observations_mois = form.observations_mois.data
         collecte.difficultees_rencontrees = form.difficultees_rencontrees.data
+        collecte.commentaires = '\n\n'.join(
+            texte for texte in (form.observations_mois.data, form.difficultees_rencontrees.data) if texte
+        ) or None
         
         collecte.save()
         
@@ -271,48 +285,34 @@ def soumettre_projet():
     form = CollecteProjetNouveauForm()
     
     if form.validate_on_submit():
-        # Déterminer le statut selon le bouton cliqué
-        if 'save_draft' in request.form:
-            statut = 'brouillon'
-            message_success = "Brouillon de projet enregistré avec succès"
-        else:
-            statut = 'soumis'
-            message_success = "Projet soumis avec succès à l'ARE pour évaluation"
-        
-        # Créer le projet
-        projet = CollecteProjetNouveau(
-            operateur_id=current_user.operateur.id,
-            nom_projet=form.nom_projet.data,
-            type_projet=form.type_projet.data,
-            description_projet=form.description_projet.data,
-            capacite_prevue_mw=form.capacite_prevue_mw.data,
-            longueur_prevue_km=form.longueur_prevue_km.data,
-            tension_nominale_kv=form.tension_nominale_kv.data,
-            province=form.province.data,
-            localisation_precise=form.localisation_precise.data,
-            cout_estime_usd=form.cout_estime_usd.data,
-            financement_acquis=form.financement_acquis.data,
-            source_financement=form.source_financement.data,
-            date_debut_prevue=form.date_debut_prevue.data,
-            duree_travaux_mois=form.duree_travaux_mois.data,
-            date_mise_service_prevue=form.date_mise_service_prevue.data,
-            population_beneficiaire=form.population_beneficiaire.data,
-            emplois_crees=form.emplois_crees.data,
-            etude_impact_realisee=form.etude_impact_realisee.data,
-            autorisation_environnementale=form.autorisation_environnementale.data,
-            etude_faisabilite_realisee=form.etude_faisabilite_realisee.data,
-            commentaires_supplementaires=form.commentaires_supplementaires.data,
-            statut=statut,
-            soumis_par=current_user.id
-        )
+        if form.type_projet.data not in TYPES_PROJET:
+            form.type_projet.errors.append("Seuls les projets de centrales peuvent être déposés ici")
+        if form.capacite_prevue_mw.data is None:
+            form.capacite_prevue_mw.errors.append("La capacité prévue est requise")
         
-        if statut == 'soumis':
-            projet.date_soumission = datetime.utcnow()
-        
-        projet.save()
-        
-        flash(message_success, "success")
-        return redirect(url_for('collecte.voir_projet', projet_id=projet.id))
+        if not form.errors:
+            # Le dossier est déposé à l'ARE (le modèle n'a pas de brouillon de projet)
+            cout = form.cout_estime_usd.data
+            projet = CollecteProjetNouveau(
+                operateur_id=current_user.operateur.id,
+                nom_projet=form.nom_projet.data,
+                type_projet=TYPES_PROJET[form.type_projet.data],
+                capacite_prevue_mw=form.capacite_prevue_mw.data,
+                investissement_prevu_millions_usd=float(cout) / 1e6 if cout is not None else None,
+                province=form.province.data,
+                localisation=form.localisation_precise.data,
+                date_depot_are=date.today(),
+                date_prevue_debut_travaux=form.date_debut_prevue.data,
+                date_prevue_mise_service=form.date_mise_service_prevue.data,
+                duree_prevue_construction_mois=form.duree_travaux_mois.data,
+                emplois_crees_prevus=form.emplois_crees.data,
+                population_beneficiaire_prevue=form.population_beneficiaire.data,
+                soumis_par_user_id=current_user.id
+            )
+            projet.save()
+            
+            flash("Projet soumis avec succès à l'ARE pour évaluation", "success")
+            return redirect(url_for('collecte.voir_projet', projet_id=projet.id))
     
     # Erreurs de validation
     return render_template('collecte/nouveau_projet.html',
@@ -367,6 +367,73 @@ def mes_projets():
                          operateur=operateur)
 
 
+@collecte_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+@role_required('operateur', 'admin_operateur', 'super_admin')
+def importer_collectes():
+    """Import en masse de collectes mensuelles depuis un fichier Excel ou CSV"""
+    
+    form = ImportCollecteForm()
+    if current_user.role == 'super_admin':
+        form.operateur_id.choices = choix_referentiel('operateurs', vide=(0, 'Colonne operateur_id du fichier'))
+    elif not current_user.operateur:
+        flash("Vous devez être associé à un opérateur pour importer des données.", "error")
+        return redirect(url_for('collecte.index'))
+    else:
+        # Les lignes sont rattachées à l'opérateur de l'utilisateur
+        del form.operateur_id
+    
+    if form.validate_on_submit():
+        if current_user.role == 'super_admin':
+            operateur_id = form.operateur_id.data or None
+        else:
+            operateur_id = current_user.operateur_id
+        try:
+            import_collecte, chemin = ImportCollecteService.creer(
+                form.fichier.data, current_user, operateur_id=operateur_id,
+                soumettre=form.soumettre.data, partiel=form.partiel.data
+            )
+        except ErreurImport as e:
+            flash(str(e), "error")
+        else:
+            ImportCollecteService.lancer(import_collecte.id, chemin)
+            flash("Import lancé : la progression s'affiche ci-dessous", "info")
+            return redirect(url_for('collecte.suivi_import', import_id=import_collecte.id))
+    
+    imports = ImportCollecte.query
+    if current_user.role != 'super_admin':
+        imports = imports.filter(ImportCollecte.user_id == current_user.id)
+    imports = imports.order_by(ImportCollecte.id.desc()).limit(10).all()
+    
+    return render_template('collecte/importer.html', form=form, imports=imports, champs=CHAMPS)
+
+
+def _import_autorise(import_id):
+    """Import de l'utilisateur connecté (tous pour le super admin), sinon 404"""
+    import_collecte = ImportCollecte.query.get_or_404(import_id)
+    if current_user.role != 'super_admin' and import_collecte.user_id != current_user.id:
+        abort(404)
+    return import_collecte
+
+
+@collecte_bp.route('/import/<int:import_id>')
+@login_required
+@role_required('operateur', 'admin_operateur', 'super_admin')
+def suivi_import(import_id):
+    """Progression et erreurs par ligne d'un import"""
+    
+    return render_template('collecte/suivi_import.html', import_collecte=_import_autorise(import_id))
+
+
+@collecte_bp.route('/api/import/<int:import_id>')
+@login_required
+@role_required('operateur', 'admin_operateur', 'super_admin')
+def api_suivi_import(import_id):
+    """API de progression d'un import (interrogée par la page de suivi)"""
+    
+    return jsonify(_import_autorise(import_id).to_dict())
+
+
 # API Routes pour l'administration ARE
 @collecte_bp.route('/api/validation/<int:collecte_id>')
 @login_required
@@ -21,6 +21,45 @@ class Config:
     
     # Pagination
     ITEMS_PER_PAGE = 20
+    
+    # Planificateur de tâches : thread dans le processus web (sinon `flask scheduler`)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS', 30))
+    
+    # Échantillonneur des métriques système (intervalle en secondes, taille de l'historique)
+    SYSTEM_SAMPLER_ENABLED = os.environ.get('SYSTEM_SAMPLER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SYSTEM_SAMPLER_INTERVAL = int(os.environ.get('SYSTEM_SAMPLER_INTERVAL', 5))
+    SYSTEM_SAMPLER_SIZE = int(os.environ.get('SYSTEM_SAMPLER_SIZE', 720))
+    
+    # Endpoint /metrics (format Prometheus), désactivé par défaut ; n'est
+    # activé qu'avec un jeton Bearer (METRICS_TOKEN)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Profilage des requêtes (instance/profiles) : X-Profile: 1 / ?_profile=1 pour
+    # les super administrateurs, ou une requête sur PROFILER_SAMPLE_RATE (0 = jamais)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILER_SAMPLE_RATE = int(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_SAMPLE_INTERVAL = float(os.environ.get('PROFILER_SAMPLE_INTERVAL', 0.005))
+    PROFILER_MAX_CAPTURES = int(os.environ.get('PROFILER_MAX_CAPTURES', 200))
+    
+    # Requêtes conditionnelles (ETag / 304) sur les APIs statistiques et les exports
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Compression des réponses (gzip, brotli si installé) : types textuels au-delà d'une taille minimale
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+    
+    # Compteurs des cartes de synthèse : recalcul complet au-delà de cette ancienneté
+    COUNTERS_RECONCILE_HOURS = int(os.environ.get('COUNTERS_RECONCILE_HOURS', 24))
+    
+    # Import en masse des collectes mensuelles : lignes validées par lot
+    COLLECTE_IMPORT_BATCH_SIZE = int(os.environ.get('COLLECTE_IMPORT_BATCH_SIZE', 1000))
+    
+    # Budget de démarrage à froid (import + create_app) vérifié par `flask startup-report`
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
 
 
 class DevelopmentConfig(Config):
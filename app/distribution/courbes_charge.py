@@ -0,0 +1,416 @@
+"""
+Courbes de charge des postes et feeders de distribution.
+
+Chaque actif (poste ou feeder) a un bloc par jour dans ``CourbeCharge`` :
+un tableau float32 de 1440 / pas valeurs (kW, NaN pour un pas sans mesure)
+stocké en BLOB, accompagné des indicateurs du jour (charge max, charge
+moyenne, énergie). Une plage de dates se lit en une requête sur l'index
+(type_actif, actif_id, jour) et se décode avec ``np.frombuffer`` en une
+matrice jours × pas, sans objet Python par mesure ; le rééchantillonnage
+(moyenne, max, min ou somme par pas plus large) est un ``reshape`` suivi
+d'une réduction NumPy.
+
+Le chargeur accepte un fichier CSV ou NDJSON d'une ligne par mesure, lu par
+lots de taille bornée. Colonnes reconnues : ``poste`` ou ``feeder`` (code),
+``poste_id`` ou ``feeder_id``, ``horodatage`` (ou ``date``) et ``charge``
+(kW, ou ``puissance``). Les mesures d'un même pas sont moyennées (le
+dernier pas d'un lot est reporté au suivant, pour ne pas couper un pas d'un
+fichier chronologique) ; elles remplacent celles déjà enregistrées pour ce
+pas, les autres pas du jour sont conservés.
+
+    matrices = CourbesChargeService.matrices('feeder', [3, 4], debut, fin)
+    horaire = reechantillonner(matrices.valeurs[3], matrices.pas, 60, 'max')
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select
+
+from app.extensions import db
+from app.models.distribution import CourbeCharge, FeederDistribution, PosteDistribution
+from app.utils.agregation import en_horodatages, en_nombres, executer_par_lots, lire_par_lots, valeur_sql
+from app.utils.imports import ModuleParesseux
+
+np = ModuleParesseux('numpy')
+pd = ModuleParesseux('pandas')
+
+
+MINUTES_JOUR = 24 * 60
+# Pas acceptés : diviseurs d'une heure, pour que les blocs restent combinables
+PAS_MINUTES = (5, 10, 15, 30, 60)
+TYPES_ACTIF = {'poste': PosteDistribution, 'feeder': FeederDistribution}
+AGREGATS = ('moyenne', 'max', 'min', 'somme')
+
+ALIAS = {'date': 'horodatage', 'puissance': 'charge', 'valeur': 'charge'}
+
+# Plage lue : pas commun et matrice jours × pas par actif (NaN si pas de mesure)
+Matrices = namedtuple('Matrices', 'jours pas valeurs')
+
+
+def encoder(valeurs):
+    """Bloc d'un jour en octets (float32 petit-boutiste)"""
+    return np.asarray(valeurs, dtype='<f4').tobytes()
+
+
+def decoder(octets):
+    """Octets d'un bloc en tableau float32 (lecture seule, sans copie)"""
+    return np.frombuffer(octets, dtype='<f4')
+
+
+def minuit(jour):
+    """Jour NumPy (datetime64[D]) en datetime à minuit, comme la colonne ``jour``"""
+    return np.datetime64(jour, 's').astype(datetime)
+
+
+def affiner(matrice, pas, pas_cible):
+    """Matrice ramenée à un pas plus fin en répétant chaque valeur"""
+    if pas == pas_cible:
+        return matrice
+    return np.repeat(matrice, pas // pas_cible, axis=-1)
+
+
+def reechantillonner(matrice, pas, pas_cible, agregat='moyenne'):
+    """
+    Matrice jours × pas réduite au pas `pas_cible` (multiple de `pas`,
+    jusqu'à 1440 minutes). Les NaN sont ignorés ; un pas cible sans aucune
+    mesure vaut NaN.
+    """
+    if agregat not in AGREGATS:
+        raise ValueError(f"Agrégat inconnu : {agregat} ({', '.join(AGREGATS)})")
+    if pas_cible % pas or MINUTES_JOUR % pas_cible:
+        raise ValueError(f"Pas {pas_cible} min incompatible avec le pas des données ({pas} min)")
+    if pas_cible == pas:
+        return matrice.astype(float)
+    paquets = matrice.reshape(matrice.shape[0], -1, pas_cible // pas).astype(float)
+    mesures = (~np.isnan(paquets)).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if agregat == 'moyenne':
+            resultat = np.nansum(paquets, axis=-1) / mesures
+        elif agregat == 'somme':
+            resultat = np.nansum(paquets, axis=-1)
+        else:
+            neutre = -np.inf if agregat == 'max' else np.inf
+            reduction = np.max if agregat == 'max' else np.min
+            resultat = reduction(np.where(np.isnan(paquets), neutre, paquets), axis=-1)
+    return np.where(mesures > 0, resultat, np.nan)
+
+
+class CourbesChargeService:
+    """Stockage par blocs journaliers des courbes de charge des postes et feeders"""
+
+    @staticmethod
+    def charger(chemin, pas_minutes=15, taille_lot=50000):
+        """
+        Charger un fichier de mesures de charge (CSV ou NDJSON) dans les blocs
+        journaliers des postes et feeders.
+
+        Args:
+            chemin: Fichier .csv, .ndjson ou .jsonl
+            pas_minutes: Pas des blocs créés (5, 10, 15, 30 ou 60 minutes)
+            taille_lot: Lignes lues par lot
+
+        Returns:
+            Bilan {'lignes_lues', 'lignes_rejetees', 'mesures', 'blocs_crees', 'blocs_modifies'}
+        """
+        if pas_minutes not in PAS_MINUTES:
+            raise ValueError(f"Pas non pris en charge : {pas_minutes} min ({', '.join(map(str, PAS_MINUTES))})")
+        codes = {
+            type_actif: dict(db.session.execute(select(modele.code, modele.id).where(modele.actif == True)).all())
+            for type_actif, modele in TYPES_ACTIF.items()
+        }
+
+        bilan = {'lignes_lues': 0, 'lignes_rejetees': 0, 'mesures': 0, 'blocs_crees': 0, 'blocs_modifies': 0}
+        reportees = {}
+        # Blocs déjà comptés (créés ou modifiés) : un bloc complété par plusieurs lots ne compte qu'une fois
+        blocs_comptes = {type_actif: set() for type_actif in TYPES_ACTIF}
+
+        def ecrire(type_actif, mesures):
+            bilan['mesures'] += len(mesures['charge'])
+            crees, modifies = CourbesChargeService._ecrire(type_actif, *CourbesChargeService._blocs(
+                mesures, pas_minutes), comptes=blocs_comptes[type_actif])
+            bilan['blocs_crees'] += crees
+            bilan['blocs_modifies'] += modifies
+
+        for lot in lire_par_lots(chemin, taille_lot):
+            bilan['lignes_lues'] += len(lot)
+            for type_actif, mesures in CourbesChargeService._mesures(lot, codes).items():
+                if type_actif in reportees:
+                    mesures = {nom: np.concatenate([reportees[type_actif][nom], valeurs])
+                               for nom, valeurs in mesures.items()}
+                # Dernier pas du lot reporté au lot suivant : dans un fichier
+                # chronologique, ses mesures peuvent s'y poursuivre
+                cases = mesures['jour'].astype(np.int64) * MINUTES_JOUR + mesures['minute'] // pas_minutes * pas_minutes
+                derniere = cases == cases.max()
+                reportees[type_actif] = {nom: valeurs[derniere] for nom, valeurs in mesures.items()}
+                if not derniere.all():
+                    ecrire(type_actif, {nom: valeurs[~derniere] for nom, valeurs in mesures.items()})
+        for type_actif, mesures in reportees.items():
+            ecrire(type_actif, mesures)
+        bilan['lignes_rejetees'] = bilan['lignes_lues'] - bilan['mesures']
+        db.session.commit()
+        return bilan
+
+    @staticmethod
+    def _mesures(lot, codes):
+        """{type_actif: {'actif_id', 'jour', 'minute', 'charge'}} des lignes valides d'un lot"""
+        lot = lot.rename(columns={nom: ALIAS[nom] for nom in lot.columns if nom in ALIAS})
+        horodatages = en_horodatages(lot['horodatage']) if 'horodatage' in lot \
+            else pd.Series(pd.NaT, index=lot.index, dtype='datetime64[ns]')
+        charge = en_nombres(lot['charge']) if 'charge' in lot else pd.Series(np.nan, index=lot.index)
+        valides = horodatages.notna() & charge.notna()
+
+        resultat = {}
+        for type_actif in TYPES_ACTIF:
+            actif_id = pd.Series(np.nan, index=lot.index)
+            if f'{type_actif}_id' in lot:
+                connus = set(codes[type_actif].values())
+                actif_id = en_nombres(lot[f'{type_actif}_id'])
+                actif_id = actif_id.where(actif_id.isin(connus))
+            if type_actif in lot:
+                actif_id = actif_id.fillna(CourbesChargeService._par_code(lot[type_actif], codes[type_actif]))
+            retenues = valides & actif_id.notna()
+            valides &= ~retenues  # une ligne ne compte que pour un actif
+            if retenues.any():
+                instants = horodatages[retenues].values.astype('datetime64[m]')
+                jours = instants.astype('datetime64[D]')
+                resultat[type_actif] = {
+                    'actif_id': actif_id[retenues].to_numpy(dtype=np.int64),
+                    'jour': jours,
+                    'minute': (instants - jours).astype(np.int64),
+                    'charge': charge[retenues].to_numpy(dtype=float),
+                }
+        return resultat
+
+    @staticmethod
+    def _par_code(colonne, codes):
+        """Identifiants des actifs par code (NaN si inconnu) ; espaces retirés au besoin"""
+        identifiants = colonne.map(codes).astype(float)
+        a_nettoyer = identifiants.isna() & colonne.notna() & (colonne != '')
+        if a_nettoyer.any():
+            identifiants[a_nettoyer] = colonne[a_nettoyer].astype(str).str.strip().map(codes).astype(float)
+        return identifiants
+
+    @staticmethod
+    def _blocs(mesures, pas):
+        """Blocs (actif_id, jour) des mesures d'un lot : moyenne des mesures de chaque pas"""
+        jours = mesures['jour'].astype(np.int64)
+        # Clé entière unique par (actif, jour) : un tri 1D plutôt que np.unique(axis=0)
+        premier = jours.min()
+        etendue = int(jours.max() - premier) + 1
+        cles, inverse = np.unique(mesures['actif_id'] * etendue + (jours - premier), return_inverse=True)
+        blocs = np.stack([cles // etendue, cles % etendue + premier], axis=1)
+        largeur = MINUTES_JOUR // pas
+        cases = inverse * largeur + mesures['minute'] // pas
+        taille = len(blocs) * largeur
+        sommes = np.bincount(cases, weights=mesures['charge'], minlength=taille)
+        nombres = np.bincount(cases, minlength=taille)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matrice = np.where(nombres > 0, sommes / nombres, np.nan).reshape(len(blocs), largeur)
+        return blocs, matrice, pas
+
+    @staticmethod
+    def _ecrire(type_actif, blocs, matrice, pas, comptes=None):
+        """
+        Fusionner les blocs avec ceux déjà enregistrés puis les écrire. Retourne (créés, modifiés).
+
+        `comptes` : clés (actif_id, jour) des blocs déjà créés ou modifiés plus tôt dans le même
+        chargement, complétée ici ; ces blocs sont fusionnés mais ne sont pas recomptés.
+        """
+        comptes = set() if comptes is None else comptes
+        table = CourbeCharge.__table__
+        jours = blocs[:, 1].astype('datetime64[D]')
+        existants = {}
+        actifs = sorted(set(blocs[:, 0].tolist()))
+        for i in range(0, len(actifs), 500):
+            requete = select(table.c.id, table.c.actif_id, table.c.jour, table.c.pas_minutes, table.c.valeurs).where(
+                table.c.type_actif == type_actif,
+                table.c.actif_id.in_(actifs[i:i + 500]),
+                table.c.jour >= minuit(jours.min()),
+                table.c.jour <= minuit(jours.max())
+            )
+            for bloc_id, actif_id, jour, pas_existant, valeurs in db.session.execute(requete):
+                existants[(actif_id, np.datetime64(jour, 'D'))] = (bloc_id, pas_existant, valeurs)
+
+        maintenant = datetime.utcnow()
+        nouveaux, modifies, recomptes = [], [], 0
+        for (actif_id, jour), valeurs in zip(zip(blocs[:, 0].tolist(), jours), matrice):
+            ligne = {'type_actif': type_actif, 'actif_id': actif_id, 'jour': minuit(jour),
+                     'date_modification': maintenant}
+            existant = existants.get((actif_id, jour))
+            pas_bloc = pas
+            if existant is not None:
+                bloc_id, pas_existant, octets = existant
+                # Pas le plus fin des deux ; les mesures du lot l'emportent
+                pas_bloc = min(pas, pas_existant)
+                anciennes = affiner(decoder(octets), pas_existant, pas_bloc)
+                valeurs = affiner(valeurs, pas, pas_bloc)
+                valeurs = np.where(np.isnan(valeurs), anciennes, valeurs)
+                ligne['b_id'] = bloc_id
+                modifies.append(ligne)
+                recomptes += (actif_id, jour) in comptes
+            else:
+                ligne.update(date_creation=maintenant, actif=True)
+                nouveaux.append(ligne)
+            comptes.add((actif_id, jour))
+            ligne.update(CourbesChargeService._indicateurs(valeurs, pas_bloc), pas_minutes=pas_bloc,
+                         valeurs=encoder(valeurs))
+
+        if modifies:
+            colonnes = ('pas_minutes', 'valeurs', 'nombre_mesures', 'charge_max', 'charge_moyenne', 'energie',
+                        'date_modification')
+            executer_par_lots(
+                table.update().where(table.c.id == bindparam('b_id')).values(
+                    {nom: bindparam(nom) for nom in colonnes}),
+                [{nom: ligne[nom] for nom in colonnes + ('b_id',)} for ligne in modifies]
+            )
+        if nouveaux:
+            executer_par_lots(table.insert(), nouveaux)
+        return len(nouveaux), len(modifies) - recomptes
+
+    @staticmethod
+    def _indicateurs(valeurs, pas):
+        """Nombre de mesures, charge max et moyenne (kW), énergie (kWh) d'un bloc"""
+        mesurees = valeurs[~np.isnan(valeurs)].astype(float)
+        if not len(mesurees):
+            return {'nombre_mesures': 0, 'charge_max': None, 'charge_moyenne': None, 'energie': None}
+        return {
+            'nombre_mesures': len(mesurees),
+            'charge_max': valeur_sql(mesurees.max()),
+            'charge_moyenne': valeur_sql(mesurees.mean()),
+            'energie': valeur_sql(mesurees.sum() * pas / 60),
+        }
+
+    # ----- Lecture -----
+
+    @staticmethod
+    def matrices(type_actif, actif_ids, debut, fin):
+        """
+        Courbes des jours `debut` à `fin` (inclus) des actifs donnés, en une
+        requête. Les blocs de pas différents sont ramenés au plus fin.
+
+        Returns:
+            Matrices(jours, pas, valeurs) : jours en datetime64[D], pas en
+            minutes et {actif_id: matrice float32 jours × pas} (NaN sans mesure)
+        """
+        debut = np.datetime64(debut, 'D')
+        fin = np.datetime64(fin, 'D')
+        jours = np.arange(debut, fin + 1)
+        table = CourbeCharge.__table__
+        lignes = db.session.execute(
+            select(table.c.actif_id, table.c.jour, table.c.pas_minutes, table.c.valeurs).where(
+                table.c.type_actif == type_actif,
+                table.c.actif_id.in_(list(actif_ids)),
+                table.c.jour >= minuit(debut),
+                table.c.jour < minuit(fin + 1),
+                table.c.actif == True
+            )
+        ).all()
+        pas = min((ligne.pas_minutes for ligne in lignes), default=PAS_MINUTES[2])
+        largeur = MINUTES_JOUR // pas
+        valeurs = {actif_id: np.full((len(jours), largeur), np.nan, dtype=np.float32) for actif_id in actif_ids}
+        for actif_id, jour, pas_bloc, octets in lignes:
+            valeurs[actif_id][(np.datetime64(jour, 'D') - debut).astype(int)] = affiner(decoder(octets), pas_bloc, pas)
+        return Matrices(jours, pas, valeurs)
+
+    @staticmethod
+    def serie(type_actif, actif_id, debut, fin, pas_minutes=None, agregat='moyenne'):
+        """
+        Série continue d'un actif du jour `debut` au jour `fin` (inclus), au
+        pas stocké ou rééchantillonnée à `pas_minutes`.
+
+        Returns:
+            (horodatages datetime64[m], valeurs float, pas en minutes)
+        """
+        matrices = CourbesChargeService.matrices(type_actif, [actif_id], debut, fin)
+        pas = pas_minutes or matrices.pas
+        valeurs = reechantillonner(matrices.valeurs[actif_id], matrices.pas, pas, agregat)
+        horodatages = (matrices.jours.astype('datetime64[m]')[:, None]
+                       + np.arange(0, MINUTES_JOUR, pas).astype('timedelta64[m]')).reshape(-1)
+        return horodatages, valeurs.reshape(-1), pas
+
+    @staticmethod
+    def dernier_jour(type_actif, actif_ids):
+        """Dernier jour enregistré parmi les actifs donnés (None s'il n'y en a pas)"""
+        if not actif_ids:
+            return None
+        return db.session.execute(
+            select(func.max(CourbeCharge.jour)).where(
+                CourbeCharge.type_actif == type_actif,
+                CourbeCharge.actif_id.in_(list(actif_ids)),
+                CourbeCharge.actif == True
+            )
+        ).scalar()
+
+    # ----- Vues des pages de détail -----
+
+    @staticmethod
+    def profil_poste(poste, feeders, pas_minutes=60):
+        """
+        Courbe du dernier jour mesuré d'un poste et de ses feeders (5 au plus
+        affichés). Sans courbe propre au poste, la charge totale est la somme
+        de celles de ses feeders.
+        """
+        feeders_ids = [feeder.id for feeder in feeders]
+        jour = max(filter(None, (CourbesChargeService.dernier_jour('poste', [poste.id]),
+                                 CourbesChargeService.dernier_jour('feeder', feeders_ids))), default=None)
+        donnees = {
+            'labels': [f"{m // 60:02d}:{m % 60:02d}" for m in range(0, MINUTES_JOUR, pas_minutes)],
+            'charge_totale': [],
+            'feeders': {},
+            'jour': jour.strftime('%d/%m/%Y') if jour else None,
+        }
+        if jour is None:
+            return donnees
+
+        du_poste = CourbesChargeService.matrices('poste', [poste.id], jour, jour)
+        des_feeders = CourbesChargeService.matrices('feeder', feeders_ids, jour, jour)
+        courbes = {feeder.id: reechantillonner(des_feeders.valeurs[feeder.id], des_feeders.pas, pas_minutes)[0]
+                   for feeder in feeders}
+        totale = reechantillonner(du_poste.valeurs[poste.id], du_poste.pas, pas_minutes)[0]
+        if np.isnan(totale).all() and courbes:
+            pile = np.vstack(list(courbes.values()))
+            totale = np.where(np.isnan(pile).all(axis=0), np.nan, np.nansum(pile, axis=0))
+
+        donnees['charge_totale'] = en_liste(totale)
+        for feeder in feeders[:5]:
+            if not np.isnan(courbes[feeder.id]).all():
+                donnees['feeders'][feeder.nom] = en_liste(courbes[feeder.id])
+        return donnees
+
+    @staticmethod
+    def performance_feeder(feeder, nb_jours=30):
+        """
+        Indicateurs journaliers d'un feeder sur les `nb_jours` derniers jours
+        mesurés : une charge nulle est comptée comme une coupure (durée et
+        nombre de coupures, disponibilité sur les pas mesurés).
+        """
+        fin = CourbesChargeService.dernier_jour('feeder', [feeder.id]) or minuit(np.datetime64('today', 'D'))
+        debut = fin - timedelta(days=nb_jours - 1)
+        matrices = CourbesChargeService.matrices('feeder', [feeder.id], debut, fin)
+        valeurs = matrices.valeurs[feeder.id]
+        mesures = ~np.isnan(valeurs)
+        coupures = mesures & (valeurs <= 0)
+        # Début de coupure : pas coupé précédé d'un pas non coupé (sur toute la période)
+        a_plat = coupures.reshape(-1)
+        debuts = (a_plat & ~np.r_[False, a_plat[:-1]]).reshape(coupures.shape)
+
+        nombre_mesures = mesures.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            disponibilite = 100 * (1 - coupures.sum(axis=1) / nombre_mesures)
+        renseignes = nombre_mesures > 0
+        return {
+            'labels': [minuit(jour).strftime('%d/%m') for jour in matrices.jours],
+            'disponibilite': en_liste(np.where(renseignes, disponibilite, np.nan), 2),
+            'nombre_pannes': en_liste(np.where(renseignes, debuts.sum(axis=1), np.nan), 0),
+            'duree_pannes': en_liste(np.where(renseignes, coupures.sum(axis=1) * matrices.pas, np.nan), 0),
+            'charge_max': en_liste(reechantillonner(valeurs, matrices.pas, MINUTES_JOUR, 'max')[:, 0]),
+            'charge_moyenne': en_liste(reechantillonner(valeurs, matrices.pas, MINUTES_JOUR)[:, 0]),
+        }
+
+
+def en_liste(valeurs, decimales=1):
+    """Tableau en liste JSON arrondie (None pour les NaN)"""
+    arrondies = np.round(np.asarray(valeurs, dtype=float), decimales)
+    if decimales == 0:
+        return [None if v != v else int(v) for v in arrondies.tolist()]
+    return [None if v != v else v for v in arrondies.tolist()]
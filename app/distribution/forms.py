@@ -208,22 +208,11 @@ class PosteDistributionForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(PosteDistributionForm, self).__init__(*args, **kwargs)
         # Configurer les choix de réseaux selon les permissions
-        from app.models.distribution import ReseauDistribution
-        from flask_login import current_user
-        
-        if current_user.is_admin():
-            reseaux = ReseauDistribution.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            reseaux = ReseauDistribution.query.filter_by(
-                operateur_id=current_user.operateur_id, 
-                actif=True
-            ).all()
-        else:
-            reseaux = []
+        from app.utils.referentiel import choix_accessibles
         
-        self.reseau_id.choices = [('', 'Sélectionner un réseau')] + [
-            (r.id, f"{r.nom} ({r.operateur.nom})") for r in reseaux
-        ]
+        self.reseau_id.choices = choix_accessibles(
+            'reseaux_distribution', '{nom} ({operateur})', vide=('', 'Sélectionner un réseau')
+        )
     
     def validate_code(self, field):
         """Validation personnalisée pour vérifier l'unicité du code du poste"""
@@ -332,22 +321,11 @@ class TransformateurDistributionForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(TransformateurDistributionForm, self).__init__(*args, **kwargs)
         # Configurer les choix de postes selon les permissions
-        from app.models.distribution import PosteDistribution, ReseauDistribution
-        from flask_login import current_user
-        
-        if current_user.is_admin():
-            postes = PosteDistribution.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            postes = PosteDistribution.query.join(ReseauDistribution).filter(
-                ReseauDistribution.operateur_id == current_user.operateur_id,
-                PosteDistribution.actif == True
-            ).all()
-        else:
-            postes = []
+        from app.utils.referentiel import choix_accessibles
         
-        self.poste_distribution_id.choices = [('', 'Sélectionner un poste')] + [
-            (p.id, f"{p.nom} ({p.reseau.nom})") for p in postes
-        ]
+        self.poste_distribution_id.choices = choix_accessibles(
+            'postes_distribution', '{nom} ({reseau})', vide=('', 'Sélectionner un poste')
+        )
 
 
 class FeederDistributionForm(FlaskForm):
@@ -421,22 +399,11 @@ class FeederDistributionForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(FeederDistributionForm, self).__init__(*args, **kwargs)
         # Configurer les choix selon les permissions
-        from app.models.distribution import ReseauDistribution, PosteDistribution
-        from flask_login import current_user
+        from app.utils.referentiel import choix_accessibles
         
-        if current_user.is_admin():
-            reseaux = ReseauDistribution.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            reseaux = ReseauDistribution.query.filter_by(
-                operateur_id=current_user.operateur_id, 
-                actif=True
-            ).all()
-        else:
-            reseaux = []
-        
-        self.reseau_id.choices = [('', 'Sélectionner un réseau')] + [
-            (r.id, f"{r.nom} ({r.operateur.nom})") for r in reseaux
-        ]
+        self.reseau_id.choices = choix_accessibles(
+            'reseaux_distribution', '{nom} ({operateur})', vide=('', 'Sélectionner un réseau')
+        )
         
         # Les postes seront mis à jour via JavaScript selon le réseau sélectionné
         self.poste_source_id.choices = [('', 'Sélectionner un poste source')]
@@ -550,22 +517,11 @@ class RapportDistributionForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(RapportDistributionForm, self).__init__(*args, **kwargs)
         # Configurer les choix de réseaux selon les permissions
-        from app.models.distribution import ReseauDistribution
-        from flask_login import current_user
+        from app.utils.referentiel import choix_accessibles
         
-        if current_user.is_admin():
-            reseaux = ReseauDistribution.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            reseaux = ReseauDistribution.query.filter_by(
-                operateur_id=current_user.operateur_id, 
-                actif=True
-            ).all()
-        else:
-            reseaux = []
-        
-        self.reseau_id.choices = [('', 'Sélectionner un réseau')] + [
-            (r.id, f"{r.nom} ({r.operateur.nom})") for r in reseaux
-        ]
+        self.reseau_id.choices = choix_accessibles(
+            'reseaux_distribution', '{nom} ({operateur})', vide=('', 'Sélectionner un réseau')
+        )
 
 
 class FiltreDistributionForm(FlaskForm):
@@ -825,25 +781,21 @@ class DonneesDistributionMensuellesForm(FlaskForm):
         super().__init__(*args, **kwargs)
         
         # Remplir les réseaux disponibles selon l'opérateur connecté
-        from app.models.distribution import ReseauDistribution
+        from app.utils.referentiel import choix_referentiel
         from flask_login import current_user
         
         if current_user.is_authenticated:
+            vide = (0, 'Sélectionner un réseau')
             if hasattr(current_user, 'operateur_id') and current_user.operateur_id:
                 # Utilisateur associé à un opérateur - voir ses réseaux
-                reseaux = ReseauDistribution.query.filter_by(
-                    operateur_id=current_user.operateur_id,
-                    actif=True
-                ).all()
+                self.reseau_id.choices = choix_referentiel(
+                    'reseaux_distribution', '{nom} ({code})', operateur_id=current_user.operateur_id, vide=vide
+                )
             elif current_user.role == 'super_admin':
                 # Super admin peut voir tous les réseaux
-                reseaux = ReseauDistribution.query.filter_by(actif=True).all()
+                self.reseau_id.choices = choix_referentiel('reseaux_distribution', '{nom} ({code})', vide=vide)
             else:
-                reseaux = []
-            
-            self.reseau_id.choices = [(0, 'Sélectionner un réseau')] + [
-                (r.id, f"{r.nom} ({r.code})") for r in reseaux
-            ]
+                self.reseau_id.choices = [vide]
         
         # Année par défaut : année courante
         from datetime import datetime
@@ -15,11 +15,15 @@ from app.models.distribution import (
     FeederDistribution, RapportDistribution
 )
 from app.models.operateurs import Operateur
+from app.distribution.courbes_charge import AGREGATS, CourbesChargeService, en_liste
 from app.distribution.forms import (
     ReseauDistributionForm, PosteDistributionForm, TransformateurDistributionForm,
     FeederDistributionForm, RapportDistributionForm, FiltreDistributionForm
 )
 from app.utils.decorators import admin_required, role_required
+from app.utils.cache_http import reponse_conditionnelle
+from app.utils.pagination import paginer_par_curseur
+from app.utils.referentiel import choix_accessibles, choix_referentiel
 from app.utils.permissions import (
     get_accessible_operateurs, can_access_operateur, 
     filter_query_by_operateur, get_default_operateur_id,
@@ -241,10 +245,7 @@ def modifier_reseau(id):
     
     # Configuration des choix selon les permissions
     if current_user.is_admin():
-        form.operateur_id.choices = [
-            (op.id, op.nom) for op in 
-            Operateur.query.filter_by(actif=True, type_operateur='Distribution').all()
-        ]
+        form.operateur_id.choices = choix_referentiel('operateurs_distribution')
     else:
         form.operateur_id.choices = [(reseau.operateur_id, reseau.operateur.nom)]
     
@@ -399,7 +400,7 @@ def detail_poste(id):
         'nombre_feeders': len(feeders),
         'nombre_transformateurs': len(transformateurs),
         'clients_total': sum([f.nombre_clients for f in feeders if f.nombre_clients]),
-        'charge_totale': sum([f.charge_actuelle for f in feeders if f.charge_actuelle])
+        'charge_totale': sum([f.charge_maximale for f in feeders if f.charge_maximale])
     }
     
     # Données pour les graphiques
@@ -467,17 +468,9 @@ def nouveau_feeder():
     form = FeederDistributionForm()
     
     # Configuration des choix de postes selon les permissions
-    if current_user.is_admin():
-        postes = PosteDistribution.query.filter_by(actif=True).all()
-    else:
-        postes = PosteDistribution.query.join(ReseauDistribution).filter(
-            ReseauDistribution.operateur_id == current_user.operateur_id,
-            PosteDistribution.actif == True
-        ).all()
-    
-    form.poste_source_id.choices = [(p.id, f"{p.nom} - {p.reseau.operateur.nom}") for p in postes]
+    form.poste_source_id.choices = choix_accessibles('postes_distribution', '{nom} - {operateur}')
     
-    if not postes:
+    if not form.poste_source_id.choices:
         flash('Aucun poste disponible. Créez d\'abord un poste de distribution.', 'error')
         return redirect(url_for('distribution.liste_postes'))
     
@@ -542,17 +535,11 @@ def modifier_feeder(id):
     form.feeder_id = feeder.id
     
     # Configuration des choix selon les permissions
-    accessible_operateurs = get_accessible_operateurs()
-    reseaux = ReseauDistribution.query.filter(
-        ReseauDistribution.operateur_id.in_([op.id for op in accessible_operateurs]),
-        ReseauDistribution.actif == True
-    ).all()
-    
-    form.reseau_id.choices = [(r.id, f"{r.nom} - {r.operateur.nom}") for r in reseaux]
+    form.reseau_id.choices = choix_accessibles('reseaux_distribution', '{nom} - {operateur}')
     
     # Postes source pour le réseau sélectionné
     if feeder.reseau_id:
-        postes = PosteDistribution.query.filter_by(
+        postes = db.session.query(PosteDistribution.id, PosteDistribution.nom).filter_by(
             reseau_id=feeder.reseau_id,
             actif=True
         ).all()
@@ -604,14 +591,14 @@ def supprimer_feeder(id):
 def liste_rapports():
     """Liste des rapports de distribution"""
     
-    page = request.args.get('page', 1, type=int)
+    curseur = request.args.get('curseur')
     per_page = request.args.get('per_page', 25, type=int)
     
     # Requête de base selon les permissions
     if current_user.is_admin():
-        query = RapportDistribution.query.join(PosteDistribution)
+        query = RapportDistribution.query
     else:
-        query = RapportDistribution.query.join(PosteDistribution).join(ReseauDistribution).filter(
+        query = RapportDistribution.query.join(ReseauDistribution).filter(
             ReseauDistribution.operateur_id == current_user.operateur_id
         )
     
@@ -638,10 +625,12 @@ def liste_rapports():
     if type_rapport:
         query = query.filter_by(type_rapport=type_rapport)
     
-    # Pagination
-    rapports_paginated = query.filter_by(actif=True).order_by(
-        RapportDistribution.periode_debut.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Pagination par curseur sur (periode_debut, id)
+    rapports_paginated = paginer_par_curseur(
+        query.filter(RapportDistribution.actif == True),
+        (RapportDistribution.periode_debut, RapportDistribution.id),
+        curseur=curseur, per_page=per_page
+    )
     
     return render_template('distribution/rapports/liste.html',
                          rapports=rapports_paginated)
@@ -649,6 +638,7 @@ def liste_rapports():
 # API Routes
 @bp.route('/api/statistiques')
 @login_required
+@reponse_conditionnelle(ReseauDistribution, PosteDistribution, FeederDistribution, RapportDistribution)
 def api_statistiques():
     """API pour récupérer les statistiques de distribution"""
     
@@ -725,6 +715,53 @@ def api_statistiques():
         'periode': periode
     })
 
+@bp.route('/api/courbes/<type_actif>/<int:id>')
+@login_required
+def api_courbe_charge(type_actif, id):
+    """
+    Courbe de charge d'un poste ou d'un feeder sur une plage de jours
+    (debut, fin : AAAA-MM-JJ), au pas stocké ou rééchantillonnée (pas en
+    minutes, agregat : moyenne, max, min, somme)
+    """
+    if type_actif == 'poste':
+        actif = PosteDistribution.query.get_or_404(id)
+    elif type_actif == 'feeder':
+        actif = FeederDistribution.query.get_or_404(id)
+    else:
+        abort(404)
+    if not verifier_permission_operateur(actif.reseau.operateur_id):
+        abort(403)
+
+    try:
+        fin = datetime.strptime(request.args['fin'], '%Y-%m-%d') if 'fin' in request.args \
+            else CourbesChargeService.dernier_jour(type_actif, [id]) or datetime.now()
+        debut = datetime.strptime(request.args['debut'], '%Y-%m-%d') if 'debut' in request.args else fin
+    except ValueError:
+        return jsonify({'error': 'Dates attendues au format AAAA-MM-JJ'}), 400
+    if not 0 <= (fin - debut).days < 366:
+        return jsonify({'error': 'La plage doit couvrir de 1 à 366 jours'}), 400
+    agregat = request.args.get('agregat', 'moyenne')
+    if agregat not in AGREGATS:
+        return jsonify({'error': f"Agrégat inconnu : {agregat}"}), 400
+
+    try:
+        horodatages, valeurs, pas = CourbesChargeService.serie(
+            type_actif, id, debut, fin, pas_minutes=request.args.get('pas', type=int), agregat=agregat
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'type_actif': type_actif,
+        'id': id,
+        'debut': debut.strftime('%Y-%m-%d'),
+        'fin': fin.strftime('%Y-%m-%d'),
+        'pas_minutes': pas,
+        'agregat': agregat,
+        'horodatages': horodatages.astype(str).tolist(),
+        'valeurs': en_liste(valeurs, 3)
+    })
+
 # Fonctions utilitaires
 def calculer_statistiques_distribution(reseaux, postes, feeders):
     """Calculer les statistiques globales de distribution à partir des données mensuelles réelles"""
@@ -938,72 +975,12 @@ def generer_donnees_performance_reseau(reseau):
     return donnees
 
 def generer_donnees_charge_poste_distribution(poste, feeders):
-    """Générer les données de charge pour un poste de distribution"""
-    
-    # Données simulées pour l'exemple - à remplacer par des vraies données
-    from random import randint, choice
-    
-    donnees = {
-        'labels': [f"H{h:02d}" for h in range(0, 24)],
-        'charge_totale': [],
-        'feeders': {}
-    }
-    
-    # Charge totale du poste (simulation)
-    charge_base = 60
-    for h in range(24):
-        if 6 <= h <= 10 or 17 <= h <= 22:  # Heures de pointe
-            charge = randint(charge_base + 20, 95)
-        elif 22 <= h <= 24 or 0 <= h <= 6:  # Heures creuses
-            charge = randint(30, charge_base - 10)
-        else:  # Heures normales
-            charge = randint(charge_base - 10, charge_base + 10)
-        
-        donnees['charge_totale'].append(charge)
-    
-    # Charge par feeder (max 5 feeders pour la lisibilité)
-    for i, feeder in enumerate(feeders[:5]):
-        donnees['feeders'][feeder.nom] = []
-        facteur = choice([0.6, 0.7, 0.8, 0.9, 1.0])  # Facteur aléatoire
-        
-        for charge_totale in donnees['charge_totale']:
-            charge_feeder = int(charge_totale * facteur * randint(15, 35) / 100)
-            donnees['feeders'][feeder.nom].append(charge_feeder)
-    
-    return donnees
+    """Courbe de charge horaire du dernier jour mesuré du poste et de ses feeders"""
+    return CourbesChargeService.profil_poste(poste, feeders)
 
 def generer_donnees_performance_feeder(feeder):
-    """Générer les données de performance pour un feeder"""
-    
-    # Données des 30 derniers jours
-    from random import randint
-    import datetime
-    
-    donnees = {
-        'labels': [],
-        'disponibilite': [],
-        'nombre_pannes': [],
-        'duree_pannes': []
-    }
-    
-    # Générer les données pour les 30 derniers jours
-    for i in range(30, 0, -1):
-        date = datetime.date.today() - datetime.timedelta(days=i)
-        donnees['labels'].append(date.strftime('%d/%m'))
-        
-        # Disponibilité (simulation: généralement haute)
-        disponibilite = randint(95, 100) if randint(1, 10) > 2 else randint(70, 94)
-        donnees['disponibilite'].append(disponibilite)
-        
-        # Nombre de pannes (rare)
-        nb_pannes = 0 if randint(1, 10) > 3 else randint(1, 3)
-        donnees['nombre_pannes'].append(nb_pannes)
-        
-        # Durée des pannes en minutes
-        duree = 0 if nb_pannes == 0 else randint(30, 240)
-        donnees['duree_pannes'].append(duree)
-    
-    return donnees
+    """Disponibilité, coupures et charge journalières du feeder sur 30 jours mesurés"""
+    return CourbesChargeService.performance_feeder(feeder)
 
 
 # Routes pour les transformateurs de distribution
@@ -1073,18 +1050,7 @@ def nouveau_transformateur():
     form = TransformateurDistributionForm()
     
     # Filtrer les postes selon les permissions
-    accessible_operateurs = get_accessible_operateurs()
-    if current_user.is_admin():
-        postes_query = PosteDistribution.query.join(ReseauDistribution)
-    else:
-        postes_query = PosteDistribution.query.join(ReseauDistribution).filter(
-            ReseauDistribution.operateur_id.in_([op.id for op in accessible_operateurs])
-        )
-    
-    form.poste_distribution_id.choices = [
-        (p.id, f"{p.nom} ({p.reseau.nom})")
-        for p in postes_query.order_by(PosteDistribution.nom).all()
-    ]
+    form.poste_distribution_id.choices = choix_accessibles('postes_distribution', '{nom} ({reseau})')
     
     # Pré-sélectionner le poste si fourni
     if poste_id and request.method == 'GET':
@@ -1161,18 +1127,7 @@ def modifier_transformateur(id):
     form = TransformateurDistributionForm(obj=transformateur)
     
     # Filtrer les postes selon les permissions
-    accessible_operateurs = get_accessible_operateurs()
-    if current_user.is_admin():
-        postes_query = PosteDistribution.query.join(ReseauDistribution)
-    else:
-        postes_query = PosteDistribution.query.join(ReseauDistribution).filter(
-            ReseauDistribution.operateur_id.in_([op.id for op in accessible_operateurs])
-        )
-    
-    form.poste_distribution_id.choices = [
-        (p.id, f"{p.nom} ({p.reseau.nom})")
-        for p in postes_query.order_by(PosteDistribution.nom).all()
-    ]
+    form.poste_distribution_id.choices = choix_accessibles('postes_distribution', '{nom} ({reseau})')
     
     if form.validate_on_submit():
         # Vérifier les permissions pour le nouveau poste si changé
@@ -1256,14 +1211,12 @@ def donnees_mensuelles():
     if mois:
         query = query.filter_by(mois=mois)
     
-    # Ordonner par période (plus récent en premier)
-    donnees = query.order_by(
-        DonneesDistributionMensuelles.annee.desc(),
-        DonneesDistributionMensuelles.mois.desc()
-    ).paginate(
-        page=request.args.get('page', 1, type=int),
-        per_page=20,
-        error_out=False
+    # Période la plus récente en premier, pagination par curseur sur (annee, mois, id)
+    donnees = paginer_par_curseur(
+        query,
+        (DonneesDistributionMensuelles.annee, DonneesDistributionMensuelles.mois,
+         DonneesDistributionMensuelles.id),
+        curseur=request.args.get('curseur'), per_page=20
     )
     
     # Calculer les statistiques globales pour l'année
@@ -11,12 +11,15 @@ from app.models.production_thermique import CentraleThermique, RapportThermique,
 from app.models.production_solaire import CentraleSolaire, RapportSolaire, DonneesSolaireQuotidiennes
 
 # Import des modèles de transport
-from app.models.transport import LigneTransport, PosteTransport, TransformateurTransport, RapportTransport
+from app.models.transport import (
+    LigneTransport, PosteTransport, TransformateurTransport, RapportTransport,
+    DonneesTransportQuotidiennes, SyntheseAnnuelleLigne
+)
 
 # Import des modèles de distribution
 from app.models.distribution import (
     ReseauDistribution, PosteDistribution, TransformateurDistribution, 
-    FeederDistribution, RapportDistribution
+    FeederDistribution, RapportDistribution, CourbeCharge
 )
 
 # Import des modèles ARE (Dashboard stratégique)
@@ -37,18 +40,27 @@ from app.models.notifications import (
     TypeNotification
 )
 
+# Compteurs par utilisateur des cartes de synthèse (notifications, messages)
+from app.models.compteurs import CompteurUtilisateur
+
 # Import des modèles de workflow
 from app.models.workflow import (
     Workflow, ValidationRapport, HistoriqueValidation, ValidateurDesigne,
-    TypeRapport, StatutWorkflow, TypeAction
+    MarqueurTraitement, TypeRapport, StatutWorkflow, TypeAction
 )
 
 # Import des modèles de collecte de données
 from app.models.collecte_donnees import (
-    CollecteDonneesMensuelles, CollecteProjetNouveau, 
+    CollecteDonneesMensuelles, CollecteProjetNouveau, ImportCollecte,
     TypeSource, TypeTension, StatutCollecte
 )
 
+# Import des modèles du planificateur de tâches
+from app.models.planificateur import VerrouTache, ExecutionTache
+
+# Import du vecteur de versions des données (ETag des réponses HTTP)
+from app.models.versions_donnees import VersionDonnees
+
 # Import des modèles de KPIs réglementaires
 from app.models.kpis_reglementaires import (
     KPIReglementaire, PerformanceOperateurKPI, SanctionReglementaire,
@@ -61,10 +73,12 @@ __all__ = [
     'CentraleThermique', 'RapportThermique', 'GroupeProductionThermique',
     'CentraleSolaire', 'RapportSolaire', 'DonneesSolaireQuotidiennes',
     'LigneTransport', 'PosteTransport', 'TransformateurTransport', 'RapportTransport',
+    'DonneesTransportQuotidiennes', 'SyntheseAnnuelleLigne',
     'ReseauDistribution', 'PosteDistribution', 'TransformateurDistribution', 
-    'FeederDistribution', 'RapportDistribution',
+    'FeederDistribution', 'RapportDistribution', 'CourbeCharge',
     'Notification', 'MessageInterne', 'TemplateNotification', 'PreferenceNotification',
-    'TypeNotification',
-    'Workflow', 'ValidationRapport', 'HistoriqueValidation', 'ValidateurDesigne',
-    'TypeRapport', 'StatutWorkflow', 'TypeAction'
+    'TypeNotification', 'CompteurUtilisateur',
+    'Workflow', 'ValidationRapport', 'HistoriqueValidation', 'ValidateurDesigne', 'MarqueurTraitement',
+    'TypeRapport', 'StatutWorkflow', 'TypeAction',
+    'VerrouTache', 'ExecutionTache', 'VersionDonnees'
 ]
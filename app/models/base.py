@@ -2,6 +2,7 @@
 Modèle de base avec méthodes communes
 """
 from datetime import datetime
+from sqlalchemy import event
 from app.extensions import db
 
 
@@ -50,3 +51,45 @@ class BaseModel(db.Model):
     
     def __repr__(self):
         return f'<{self.__class__.__name__} {self.id}>'
+
+
+class PeriodeMensuelleMixin:
+    """
+    Colonne ``periode_yyyymm`` (ex: 202403) persistée et indexée pour les
+    rapports mensuels. Contrairement à ``extract('year', periode_debut)``,
+    les filtres sur cette colonne peuvent utiliser l'index.
+    """
+    periode_yyyymm = db.Column(db.Integer, index=True)
+    
+    @staticmethod
+    def calculer_periode_yyyymm(annee, mois):
+        """Encoder une période annee/mois en entier AAAAMM"""
+        if not annee or not mois:
+            return None
+        return int(annee) * 100 + int(mois)
+    
+    @classmethod
+    def filtre_annee(cls, annee):
+        """Critère indexable équivalent à extract('year', ...) == annee"""
+        return cls.periode_yyyymm.between(int(annee) * 100 + 1, int(annee) * 100 + 12)
+    
+    @classmethod
+    def filtre_mois(cls, annee, mois):
+        """Critère indexable pour un mois précis"""
+        return cls.periode_yyyymm == cls.calculer_periode_yyyymm(annee, mois)
+    
+    def synchroniser_periode(self):
+        """Recalculer periode_yyyymm depuis annee/mois (ou periode_debut)"""
+        annee = getattr(self, 'annee', None)
+        mois = getattr(self, 'mois', None)
+        periode_debut = getattr(self, 'periode_debut', None)
+        if (not annee or not mois) and periode_debut is not None:
+            annee, mois = periode_debut.year, periode_debut.month
+        self.periode_yyyymm = self.calculer_periode_yyyymm(annee, mois)
+
+
+@event.listens_for(PeriodeMensuelleMixin, 'before_insert', propagate=True)
+@event.listens_for(PeriodeMensuelleMixin, 'before_update', propagate=True)
+def _synchroniser_periode_yyyymm(mapper, connection, target):
+    """Maintenir periode_yyyymm à jour à chaque écriture"""
+    target.synchroniser_periode()
@@ -2,6 +2,7 @@
 Modèles pour la collecte de données mensuelles des opérateurs
 Collecte uniquement les données qui ne peuvent pas être calculées automatiquement
 """
+import json
 from datetime import datetime, date
 from enum import Enum
 from app.extensions import db
@@ -30,6 +31,20 @@ class StatutCollecte(Enum):
     REJETE = "rejete"
 
 
+class EnumTolerant(db.Enum):
+    """
+    Enum stocké par nom, lu par nom ou par valeur : certaines lignes
+    historiques portent la valeur ('valide') au lieu du nom ('VALIDE')
+    """
+    cache_ok = True
+
+    def _object_value_for_elem(self, elem):
+        try:
+            return super()._object_value_for_elem(elem)
+        except LookupError:
+            return self.enum_class(elem)
+
+
 class CollecteDonneesMensuelles(BaseModel):
     """
     Collecte des données mensuelles qui ne peuvent pas être calculées automatiquement
@@ -41,7 +56,7 @@ class CollecteDonneesMensuelles(BaseModel):
     operateur_id = db.Column(db.Integer, db.ForeignKey('operateurs.id'), nullable=False)
     mois = db.Column(db.Integer, nullable=False)  # 1-12
     annee = db.Column(db.Integer, nullable=False)
-    statut = db.Column(db.Enum(StatutCollecte), default=StatutCollecte.BROUILLON)
+    statut = db.Column(EnumTolerant(StatutCollecte), default=StatutCollecte.BROUILLON)
     
     # === DONNÉES FINANCIÈRES (non calculables automatiquement) ===
     investissements_mois_millions_usd = db.Column(db.Float)  # Nouveaux investissements du mois
@@ -162,6 +177,59 @@ class CollecteDonneesMensuelles(BaseModel):
         }
 
 
+class ImportCollecte(BaseModel):
+    """
+    Import en masse de collectes mensuelles depuis un fichier Excel ou CSV,
+    traité en arrière-plan : progression et erreurs par ligne
+    """
+    __tablename__ = 'imports_collecte'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    operateur_id = db.Column(db.Integer, db.ForeignKey('operateurs.id'))  # imposé aux lignes (None : colonne operateur_id)
+    nom_fichier = db.Column(db.String(255), nullable=False)
+    soumettre = db.Column(db.Boolean, default=False)  # statut soumis au lieu de brouillon
+    partiel = db.Column(db.Boolean, default=False)  # enregistrer les lignes valides malgré les erreurs
+
+    statut = db.Column(db.String(20), nullable=False, default='en_attente')  # en_attente, en_cours, termine, erreurs, echec
+    lignes_lues = db.Column(db.Integer, default=0)
+    lignes_creees = db.Column(db.Integer, default=0)
+    lignes_mises_a_jour = db.Column(db.Integer, default=0)
+    lignes_en_erreur = db.Column(db.Integer, default=0)
+    erreurs = db.Column(db.Text)  # JSON : [{ligne, colonne, message}, ...] (tronqué)
+    message = db.Column(db.Text)
+    debut = db.Column(db.DateTime)
+    fin = db.Column(db.DateTime)
+
+    # Relations
+    user = db.relationship('User', lazy=True)
+    operateur = db.relationship('Operateur', lazy=True)
+
+    def __repr__(self):
+        return f'<ImportCollecte {self.nom_fichier} {self.statut}>'
+
+    @property
+    def est_termine(self):
+        return self.statut in ('termine', 'erreurs', 'echec')
+
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            'nom_fichier': self.nom_fichier,
+            'operateur': self.operateur.nom if self.operateur else None,
+            'statut': self.statut,
+            'est_termine': self.est_termine,
+            'lignes_lues': self.lignes_lues,
+            'lignes_creees': self.lignes_creees,
+            'lignes_mises_a_jour': self.lignes_mises_a_jour,
+            'lignes_en_erreur': self.lignes_en_erreur,
+            'erreurs': json.loads(self.erreurs) if self.erreurs else [],
+            'message': self.message,
+            'debut': self.debut.isoformat() if self.debut else None,
+            'fin': self.fin.isoformat() if self.fin else None
+        })
+        return data
+
+
 class CollecteProjetNouveau(BaseModel):
     """
     Collecte des nouveaux projets soumis à l'ARE pour avis
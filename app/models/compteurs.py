@@ -0,0 +1,313 @@
+"""
+Compteurs par utilisateur des cartes de synthèse (notifications et
+messagerie). Une ligne par utilisateur, lue en une recherche indexée au
+lieu d'un COUNT par carte.
+
+Les compteurs sont tenus à jour par delta dans la transaction de chaque
+flush qui insère, lit, archive ou supprime une notification ou un message.
+Les écritures groupées (``query.update()``, ``delete()``) marquent comme
+périmées les lignes des utilisateurs visés (toutes si on ne peut les
+déterminer) ; une ligne absente, périmée ou plus ancienne
+que ``COUNTERS_RECONCILE_HOURS`` est recalculée à la lecture par une
+requête d'agrégats conditionnels. Les écritures hors session (SQL texte)
+doivent appeler ``CompteurUtilisateur.perimer``.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, and_, case, event, func, inspect, or_, select
+)
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import BindParameter
+
+from app.extensions import db
+from app.models.base import BaseModel
+from app.models.notifications import MessageInterne, Notification
+from app.models.versions_donnees import ecritures_en_cours
+
+
+COMPTEURS_NOTIFICATIONS = (
+    'notifications_total', 'notifications_non_lues', 'notifications_importantes', 'notifications_urgentes'
+)
+COMPTEURS_MESSAGES = ('messages_recus', 'messages_non_lus', 'messages_envoyes', 'messages_archives')
+COMPTEURS = COMPTEURS_NOTIFICATIONS + COMPTEURS_MESSAGES
+
+
+class CompteurUtilisateur(BaseModel):
+    """Compteurs de notifications et de messages d'un utilisateur"""
+    __tablename__ = 'compteurs_utilisateurs'
+
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, unique=True)
+
+    notifications_total = Column(Integer, nullable=False, default=0)
+    notifications_non_lues = Column(Integer, nullable=False, default=0)
+    notifications_importantes = Column(Integer, nullable=False, default=0)
+    notifications_urgentes = Column(Integer, nullable=False, default=0)
+
+    messages_recus = Column(Integer, nullable=False, default=0)
+    messages_non_lus = Column(Integer, nullable=False, default=0)
+    messages_envoyes = Column(Integer, nullable=False, default=0)
+    messages_archives = Column(Integer, nullable=False, default=0)
+
+    # Réconciliation : recalcul complet à la prochaine lecture
+    perime = Column(Boolean, nullable=False, default=False)
+    date_calcul = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CompteurUtilisateur {self.user_id}>'
+
+    @staticmethod
+    def lire(user_id):
+        """{compteur: valeur} de l'utilisateur (recalculé si absent, périmé ou trop ancien)"""
+        table = CompteurUtilisateur.__table__
+        ligne = db.session.execute(
+            select(table).where(table.c.user_id == user_id)
+        ).mappings().first()
+
+        limite = datetime.utcnow() - timedelta(hours=current_app.config.get('COUNTERS_RECONCILE_HOURS', 24))
+        if ligne is None or ligne['perime'] or ligne['date_calcul'] < limite:
+            return CompteurUtilisateur.recalculer(user_id)
+        return {nom: ligne[nom] for nom in COMPTEURS}
+
+    @staticmethod
+    def compter(user_id, connexion=None):
+        """Compteurs calculés sur les tables (un agrégat conditionnel par table)"""
+        connexion = connexion or db.session
+        notifications = connexion.execute(select(
+            func.count(Notification.id),
+            func.sum(case((Notification.lue == False, 1), else_=0)),
+            func.sum(case((Notification.priorite == 2, 1), else_=0)),
+            func.sum(case((Notification.priorite == 3, 1), else_=0))
+        ).where(Notification.user_id == user_id, Notification.actif == True)).one()
+
+        recu = MessageInterne.destinataire_id == user_id
+        envoye = MessageInterne.expediteur_id == user_id
+        messages = connexion.execute(select(
+            func.sum(case((and_(recu, MessageInterne.archive_destinataire == False), 1), else_=0)),
+            func.sum(case((and_(recu, MessageInterne.lu == False,
+                                MessageInterne.archive_destinataire == False), 1), else_=0)),
+            func.sum(case((and_(envoye, MessageInterne.archive_expediteur == False), 1), else_=0)),
+            func.sum(case((or_(and_(recu, MessageInterne.archive_destinataire == True),
+                               and_(envoye, MessageInterne.archive_expediteur == True)), 1), else_=0))
+        ).where(or_(recu, envoye))).one()
+
+        return dict(zip(COMPTEURS, (valeur or 0 for valeur in tuple(notifications) + tuple(messages))))
+
+    @staticmethod
+    def recalculer(user_id):
+        """Recalculer et enregistrer les compteurs de l'utilisateur"""
+        if ecritures_en_cours(db.session):
+            # La transaction de la requête détient déjà les verrous d'écriture :
+            # le recalcul en fait partie et sera validé avec elle
+            return CompteurUtilisateur._recalculer(db.session.connection(), user_id)
+        try:
+            # Transaction courte distincte : une lecture ne valide pas la session de la requête
+            with db.engine.begin() as connexion:
+                return CompteurUtilisateur._recalculer(connexion, user_id)
+        except OperationalError:
+            # Base verrouillée par une autre écriture : valeurs servies sans être enregistrées
+            return CompteurUtilisateur.compter(user_id)
+
+    @staticmethod
+    def _recalculer(connexion, user_id):
+        """
+        Verrouiller la ligne, compter puis enregistrer dans la même transaction :
+        un delta concurrent attend le verrou et s'applique après ce recalcul
+        """
+        table = CompteurUtilisateur.__table__
+        existe = connexion.execute(
+            table.update().where(table.c.user_id == user_id).values(perime=True)
+        ).rowcount
+        valeurs = CompteurUtilisateur.compter(user_id, connexion)
+        maintenant = datetime.utcnow()
+
+        if existe:
+            connexion.execute(
+                table.update().where(table.c.user_id == user_id)
+                .values(perime=False, date_calcul=maintenant, date_modification=maintenant, **valeurs)
+            )
+            return valeurs
+        try:
+            with connexion.begin_nested():
+                connexion.execute(table.insert().values(
+                    user_id=user_id, perime=False, date_calcul=maintenant,
+                    date_creation=maintenant, date_modification=maintenant, actif=True, **valeurs
+                ))
+        except IntegrityError:
+            # Ligne créée entre-temps par une autre requête : elle sera réconciliée
+            pass
+        return valeurs
+
+    @staticmethod
+    def perimer(connexion, user_ids=None):
+        """Marquer les compteurs (de tous les utilisateurs si None) à recalculer"""
+        table = CompteurUtilisateur.__table__
+        instruction = table.update().values(perime=True)
+        if user_ids is not None:
+            instruction = instruction.where(table.c.user_id.in_(list(user_ids)))
+        connexion.execute(instruction)
+
+
+def _valeur(objet, attribut, ancienne):
+    """Valeur avant le flush (ancienne) ou après, None remplacé par le défaut de la colonne"""
+    valeur = getattr(objet, attribut)
+    if ancienne:
+        historique = inspect(objet).attrs[attribut].history
+        if historique.deleted:
+            valeur = historique.deleted[0]
+    if valeur is None:
+        defaut = objet.__table__.c[attribut].default
+        if defaut is not None and defaut.is_scalar:
+            valeur = defaut.arg
+    return valeur
+
+
+def _contributions_notification(objet, ancienne):
+    """{user_id: {compteur: 0|1}} d'une notification"""
+    if not _valeur(objet, 'actif', ancienne):
+        return {}
+    priorite = _valeur(objet, 'priorite', ancienne)
+    return {_valeur(objet, 'user_id', ancienne): {
+        'notifications_total': 1,
+        'notifications_non_lues': int(not _valeur(objet, 'lue', ancienne)),
+        'notifications_importantes': int(priorite == 2),
+        'notifications_urgentes': int(priorite == 3),
+    }}
+
+
+def _contributions_message(objet, ancienne):
+    """{user_id: {compteur: 0|1}} d'un message (expéditeur et destinataire)"""
+    expediteur_id = _valeur(objet, 'expediteur_id', ancienne)
+    destinataire_id = _valeur(objet, 'destinataire_id', ancienne)
+    archive_expediteur = bool(_valeur(objet, 'archive_expediteur', ancienne))
+    archive_destinataire = bool(_valeur(objet, 'archive_destinataire', ancienne))
+    lu = bool(_valeur(objet, 'lu', ancienne))
+
+    contributions = {}
+    for user_id in {expediteur_id, destinataire_id}:
+        recu = user_id == destinataire_id
+        envoye = user_id == expediteur_id
+        contributions[user_id] = {
+            'messages_recus': int(recu and not archive_destinataire),
+            'messages_non_lus': int(recu and not lu and not archive_destinataire),
+            'messages_envoyes': int(envoye and not archive_expediteur),
+            'messages_archives': int((recu and archive_destinataire) or (envoye and archive_expediteur)),
+        }
+    return contributions
+
+
+CONTRIBUTIONS = {Notification: _contributions_notification, MessageInterne: _contributions_message}
+
+# Colonnes désignant les utilisateurs concernés par une ligne
+COLONNES_UTILISATEURS = {
+    Notification.__tablename__: ('user_id',),
+    MessageInterne.__tablename__: ('expediteur_id', 'destinataire_id'),
+}
+
+# Attributs lus par les contributions (un objet supprimé ne peut plus les recharger)
+ATTRIBUTS = {
+    Notification: ('user_id', 'actif', 'lue', 'priorite'),
+    MessageInterne: ('expediteur_id', 'destinataire_id', 'lu', 'archive_expediteur', 'archive_destinataire'),
+}
+
+
+
+def _conserver_ancienne_valeur(cible, valeur, ancienne, initiateur):
+    return valeur
+
+
+def _activer_historique():
+    """Charger l'ancienne valeur avant modification, même si l'attribut a expiré (commit précédent)"""
+    for modele, attributs in ATTRIBUTS.items():
+        for attribut in attributs:
+            event.listen(getattr(modele, attribut), 'set', _conserver_ancienne_valeur,
+                         active_history=True, retval=True)
+
+
+_activer_historique()
+
+
+@event.listens_for(Session, 'after_flush')
+def _compteurs_apres_flush(session, flush_context):
+    """Appliquer aux compteurs les deltas des notifications et messages du flush"""
+    deltas = defaultdict(lambda: defaultdict(int))
+
+    def cumuler(objet, signe, ancienne):
+        for user_id, valeurs in CONTRIBUTIONS[type(objet)](objet, ancienne).items():
+            for nom, valeur in valeurs.items():
+                deltas[user_id][nom] += signe * valeur
+
+    for objet in session.new:
+        if type(objet) in CONTRIBUTIONS:
+            cumuler(objet, 1, ancienne=False)
+    tout_perimer = False
+    for objet in session.deleted:
+        if type(objet) in CONTRIBUTIONS:
+            if set(ATTRIBUTS[type(objet)]) <= set(inspect(objet).dict):
+                cumuler(objet, -1, ancienne=True)
+            else:
+                tout_perimer = True
+    for objet in session.dirty:
+        if type(objet) in CONTRIBUTIONS and session.is_modified(objet, include_collections=False):
+            cumuler(objet, -1, ancienne=True)
+            cumuler(objet, 1, ancienne=False)
+
+    if tout_perimer:
+        CompteurUtilisateur.perimer(session.connection())
+        return
+
+    table = CompteurUtilisateur.__table__
+    for user_id, valeurs in deltas.items():
+        valeurs = {nom: table.c[nom] + delta for nom, delta in valeurs.items() if delta}
+        if user_id is not None and valeurs:
+            # Sans ligne (ou ligne périmée), le calcul complet se fera à la lecture
+            session.connection().execute(
+                table.update()
+                .where(table.c.user_id == user_id, table.c.perime == False)
+                .values(**valeurs)
+            )
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _compteurs_ecritures_groupees(etat):
+    """UPDATE/DELETE/INSERT groupés sur les notifications ou les messages"""
+    instruction = etat.statement
+    if not (getattr(instruction, 'is_dml', False) and instruction.table is not None
+            and instruction.table.name in COLONNES_UTILISATEURS):
+        return
+    table = instruction.table
+    colonnes = COLONNES_UTILISATEURS[table.name]
+    parametres = etat.parameters
+    plusieurs = isinstance(parametres, (list, tuple))
+    lots = parametres if plusieurs else [parametres or {}]
+    # Utilisateurs des valeurs écrites (INSERT, nouvelle valeur d'un UPDATE)
+    user_ids = {ligne[nom] for ligne in lots for nom in colonnes if nom in ligne}
+    expression = False
+    for nom, valeur in (getattr(instruction, '_values', None) or {}).items():
+        if getattr(nom, 'key', nom) in colonnes:
+            if isinstance(valeur, BindParameter):
+                user_ids.add(valeur.value)
+            else:
+                expression = True  # valeur calculée en SQL : utilisateurs inconnus
+    if instruction.is_insert:
+        tous = expression or not user_ids
+    elif expression or instruction.whereclause is None or plusieurs:
+        tous = True
+    else:
+        # UPDATE/DELETE : utilisateurs des lignes visées, lus avant l'exécution
+        for ligne in etat.session.connection().execute(
+            select(*(table.c[nom] for nom in colonnes)).where(instruction.whereclause).distinct(),
+            parametres or {}
+        ):
+            user_ids.update(ligne)
+        tous = False
+    connexion = etat.session.connection()
+    if tous:
+        CompteurUtilisateur.perimer(connexion)
+    else:
+        user_ids.discard(None)
+        if user_ids:
+            CompteurUtilisateur.perimer(connexion, user_ids)
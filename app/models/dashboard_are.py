@@ -143,6 +143,9 @@ class AlerteRegulateur(BaseModel):
     statut = db.Column(db.String(50), default='active')  # active, en_cours, resolue
     actions_recommandees = db.Column(db.Text)
     priorite = db.Column(db.Integer, default=3)  # 1=haute, 2=moyenne, 3=basse
+    # Clé déterministe des alertes automatiques (ex: retard_rapport:12:hydro)
+    # utilisée pour dédoublonner contre les alertes actives
+    cle_alerte = db.Column(db.String(200), index=True)
     
     # Relations
     operateur_id = db.Column(db.Integer, db.ForeignKey('operateurs.id'), nullable=True)
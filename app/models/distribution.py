@@ -3,7 +3,7 @@ Modèles pour la distribution d'électricité
 """
 from app.extensions import db
 from app.models.base import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -364,6 +364,10 @@ class FeederDistribution(BaseModel):
 class RapportDistribution(BaseModel):
     """Modèle pour les rapports de distribution d'électricité"""
     __tablename__ = 'rapports_distribution'
+    __table_args__ = (
+        # Pagination par curseur de la liste des rapports
+        db.Index('ix_rapports_distribution_periode_id', 'periode_debut', 'id'),
+    )
     
     # Relations
     reseau_id = Column(Integer, ForeignKey('reseaux_distribution.id'), nullable=False)
@@ -585,6 +589,8 @@ class DonneesDistributionMensuelles(BaseModel):
     # Contrainte d'unicité : un seul enregistrement par réseau/mois/année
     __table_args__ = (
         db.UniqueConstraint('reseau_id', 'annee', 'mois', name='uq_donnees_distrib_periode'),
+        # Pagination par curseur (période la plus récente en premier)
+        db.Index('ix_donnees_distrib_mensuelles_periode_id', 'annee', 'mois', 'id'),
     )
     
     # Relations
@@ -696,4 +702,32 @@ class DonneesDistributionMensuelles(BaseModel):
         return data
     
     def __repr__(self):
-        return f'<DonneesDistributionMensuelles {self.get_periode_str()} - {self.reseau.nom if self.reseau else "N/A"}>'
\ No newline at end of file
+        return f'<DonneesDistributionMensuelles {self.get_periode_str()} - {self.reseau.nom if self.reseau else "N/A"}>'
+
+class CourbeCharge(BaseModel):
+    """
+    Courbe de charge d'un poste ou d'un feeder sur une journée : un bloc de
+    valeurs float32 (kW) au pas de `pas_minutes`, NaN pour un pas sans mesure.
+    Les indicateurs du jour sont conservés à côté du bloc pour les vues
+    journalières qui n'ont pas besoin de le décoder.
+    """
+    __tablename__ = 'courbes_charge'
+    __table_args__ = (
+        # Lecture d'une plage de jours d'un actif
+        db.UniqueConstraint('type_actif', 'actif_id', 'jour', name='uq_courbe_charge_actif_jour'),
+    )
+    
+    type_actif = Column(String(10), nullable=False)  # poste, feeder
+    actif_id = Column(Integer, nullable=False)
+    jour = Column(DateTime, nullable=False)  # minuit
+    pas_minutes = Column(Integer, nullable=False, default=15)
+    valeurs = Column(LargeBinary, nullable=False)  # float32 petit-boutiste, 1440 / pas_minutes valeurs
+    
+    # Indicateurs du jour
+    nombre_mesures = Column(Integer, default=0)
+    charge_max = Column(Float)  # kW
+    charge_moyenne = Column(Float)  # kW
+    energie = Column(Float)  # kWh
+    
+    def __repr__(self):
+        return f'<CourbeCharge {self.type_actif} {self.actif_id} {self.jour:%Y-%m-%d}>'
@@ -89,6 +89,9 @@ class PerformanceOperateurKPI(BaseModel):
     Performance d'un opérateur sur un KPI réglementaire
     """
     __tablename__ = 'performances_operateur_kpi'
+    __table_args__ = (
+        db.Index('ix_performances_operateur_kpi_periode', 'annee', 'mois'),
+    )
     
     # Relations
     operateur_id = db.Column(db.Integer, db.ForeignKey('operateurs.id'), nullable=False)
@@ -131,7 +134,7 @@ class SanctionReglementaire(BaseModel):
     
     # Relations
     operateur_id = db.Column(db.Integer, db.ForeignKey('operateurs.id'), nullable=False)
-    performance_kpi_id = db.Column(db.Integer, db.ForeignKey('performances_operateur_kpi.id'))
+    performance_kpi_id = db.Column(db.Integer, db.ForeignKey('performances_operateur_kpi.id'), index=True)
     
     # Détails de la sanction
     type_sanction = db.Column(db.String(100))  # Avertissement, Amende, Suspension
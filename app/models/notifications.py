@@ -2,7 +2,9 @@
 Modèles pour le système de notifications et messagerie interne
 """
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import joinedload, relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
 import enum
 
@@ -25,6 +27,10 @@ class TypeNotification(enum.Enum):
 class Notification(BaseModel):
     """Modèle pour les notifications utilisateur"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Pagination par curseur des notifications d'un utilisateur
+        db.Index('ix_notifications_user_creation_id', 'user_id', 'date_creation', 'id'),
+    )
     
     # Relations
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -105,6 +111,10 @@ class Notification(BaseModel):
 class MessageInterne(BaseModel):
     """Modèle pour la messagerie interne"""
     __tablename__ = 'messages_internes'
+    __table_args__ = (
+        # Messages non lus par fil dans la boîte de réception
+        db.Index('ix_messages_internes_destinataire_fil', 'destinataire_id', 'thread_id'),
+    )
     
     # Relations
     expediteur_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -126,6 +136,9 @@ class MessageInterne(BaseModel):
     message_parent_id = Column(Integer, ForeignKey('messages_internes.id'), nullable=True)
     message_parent = relationship('MessageInterne', remote_side='MessageInterne.id', backref='reponses')
     
+    # Fil de discussion : id du message racine, renseigné à l'insertion
+    thread_id = Column(Integer, nullable=True, index=True)
+    
     # Métadonnées
     priorite = Column(Integer, default=1)  # 1=normale, 2=importante, 3=urgente
     
@@ -161,6 +174,31 @@ class MessageInterne(BaseModel):
         """Vérifie si c'est une réponse à un autre message"""
         return self.message_parent_id is not None
     
+    @classmethod
+    def fil_discussion(cls, message):
+        """
+        Tous les messages du fil de `message` (réponses à tout niveau) par date,
+        expéditeurs chargés, en une requête récursive depuis la racine.
+        """
+        fil = select(cls.id).where(cls.id == (message.thread_id or message.id)) \
+                            .cte('fil', recursive=True)
+        fil = fil.union_all(select(cls.id).where(cls.message_parent_id == fil.c.id))
+        return cls.query.join(fil, cls.id == fil.c.id) \
+                        .options(joinedload(cls.expediteur)) \
+                        .order_by(cls.date_creation, cls.id).all()
+    
+    @classmethod
+    def non_lus_par_fil(cls, user_id, thread_ids=None):
+        """Nombre de messages non lus par fil ({thread_id: nombre}) pour un destinataire"""
+        query = db.session.query(cls.thread_id, func.count(cls.id)).filter(
+            cls.destinataire_id == user_id,
+            cls.lu == False,
+            cls.archive_destinataire == False
+        )
+        if thread_ids is not None:
+            query = query.filter(cls.thread_id.in_(set(thread_ids)))
+        return dict(query.group_by(cls.thread_id).all())
+    
     def to_dict(self):
         """Conversion en dictionnaire pour JSON"""
         return {
@@ -179,10 +217,31 @@ class MessageInterne(BaseModel):
             'priorite': self.priorite,
             'css_class': self.css_class,
             'est_reponse': self.est_reponse,
+            'thread_id': self.thread_id,
             'date_creation': self.date_creation.isoformat() if self.date_creation else None
         }
 
 
+
+@event.listens_for(MessageInterne, 'before_insert')
+def _rattacher_au_fil(mapper, connection, target):
+    """Une réponse rejoint le fil de son message parent"""
+    if target.thread_id is None and target.message_parent_id is not None:
+        table = MessageInterne.__table__
+        target.thread_id = connection.scalar(
+            select(func.coalesce(table.c.thread_id, table.c.id))
+            .where(table.c.id == target.message_parent_id)
+        )
+
+
+@event.listens_for(MessageInterne, 'after_insert')
+def _ouvrir_fil(mapper, connection, target):
+    """Un message sans parent ouvre son propre fil"""
+    if target.thread_id is None:
+        table = MessageInterne.__table__
+        connection.execute(update(table).where(table.c.id == target.id).values(thread_id=target.id))
+        set_committed_value(target, 'thread_id', target.id)
+
 class TemplateNotification(BaseModel):
     """Modèle pour les templates de notifications"""
     __tablename__ = 'templates_notifications'
@@ -0,0 +1,58 @@
+"""
+Modèles du planificateur de tâches périodiques
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Float, Text, Index
+from app.models.base import BaseModel
+
+
+class VerrouTache(BaseModel):
+    """
+    Verrou d'exécution d'une tâche planifiée, partagé par tous les workers :
+    un seul processus peut détenir le verrou d'une tâche pour une échéance
+    """
+    __tablename__ = 'verrous_taches'
+
+    nom = Column(String(100), nullable=False, unique=True)
+    detenteur = Column(String(200))  # hôte:pid du processus qui exécute
+    expire_le = Column(DateTime)  # libération forcée si le détenteur disparaît
+    derniere_echeance = Column(DateTime)  # dernière échéance déjà prise en charge
+
+    def __repr__(self):
+        return f'<VerrouTache {self.nom}>'
+
+
+class ExecutionTache(BaseModel):
+    """Historique des exécutions des tâches planifiées"""
+    __tablename__ = 'executions_taches'
+    __table_args__ = (
+        Index('ix_executions_taches_nom_debut', 'nom', 'debut'),
+    )
+
+    nom = Column(String(100), nullable=False)
+    declencheur = Column(String(50), default='planificateur')  # planificateur, manuel
+    echeance = Column(DateTime)
+    debut = Column(DateTime, nullable=False, default=datetime.utcnow)
+    fin = Column(DateTime)
+    duree_ms = Column(Float)
+    statut = Column(String(20), nullable=False, default='en_cours')  # en_cours, succes, echec
+    resultat = Column(Text)
+    detenteur = Column(String(200))
+
+    def __repr__(self):
+        return f'<ExecutionTache {self.nom} {self.statut}>'
+
+    def to_dict(self):
+        data = super().to_dict()
+        data.update({
+            'nom': self.nom,
+            'declencheur': self.declencheur,
+            'echeance': self.echeance.isoformat() if self.echeance else None,
+            'debut': self.debut.isoformat() if self.debut else None,
+            'fin': self.fin.isoformat() if self.fin else None,
+            'duree_ms': self.duree_ms,
+            'statut': self.statut,
+            'resultat': self.resultat,
+            'detenteur': self.detenteur
+        })
+        return data
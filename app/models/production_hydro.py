@@ -2,8 +2,8 @@
 Modèles pour la production hydroélectrique
 """
 from app.extensions import db
-from app.models.base import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean
+from app.models.base import BaseModel, PeriodeMensuelleMixin
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -92,9 +92,12 @@ class CentraleHydro(BaseModel):
         return data
 
 
-class RapportHydro(BaseModel):
+class RapportHydro(PeriodeMensuelleMixin, BaseModel):
     """Modèle pour les rapports de production hydroélectrique"""
     __tablename__ = 'rapports_hydro'
+    __table_args__ = (
+        Index('ix_rapports_hydro_date_creation', 'date_creation'),
+    )
     
     # Relations
     centrale_id = Column(Integer, ForeignKey('centrales_hydro.id'), nullable=False)
@@ -113,8 +116,15 @@ class RapportHydro(BaseModel):
     debit_min = Column(Float)
     debit_max = Column(Float)
     volume_turbiné = Column(Float)  # millions m³
+    volume_deverse = Column(Float)  # millions m³
+    jours_deversement = Column(Integer)
     debit_reserve = Column(Float)  # m³/s - Débit réservé environnemental
     
+    # Débits classés (débit total dépassé 10 %, 50 % et 90 % des jours du mois)
+    debit_q10 = Column(Float)  # m³/s
+    debit_q50 = Column(Float)
+    debit_q90 = Column(Float)
+    
     # Production
     energie_produite = Column(Float)  # MWh
     energie_disponible = Column(Float)  # MWh
@@ -192,6 +202,11 @@ class RapportHydro(BaseModel):
             'debit_min': self.debit_min,
             'debit_max': self.debit_max,
             'volume_turbiné': self.volume_turbiné,
+            'volume_deverse': self.volume_deverse,
+            'jours_deversement': self.jours_deversement,
+            'debit_q10': self.debit_q10,
+            'debit_q50': self.debit_q50,
+            'debit_q90': self.debit_q90,
             'energie_produite': self.energie_produite,
             'energie_disponible': self.energie_disponible,
             'facteur_charge': self.facteur_charge,
@@ -395,6 +410,9 @@ class TransformateurRapport(BaseModel):
 class DonneesMensuelles(BaseModel):
     """Modèle pour les données techniques mensuelles détaillées"""
     __tablename__ = 'donnees_mensuelles'
+    __table_args__ = (
+        Index('ix_donnees_mensuelles_rapport_jour', 'rapport_id', 'jour'),
+    )
     
     # Relations
     rapport_id = Column(Integer, ForeignKey('rapports_hydro.id'), nullable=False)
@@ -2,8 +2,8 @@
 Modèles pour la production solaire
 """
 from app.extensions import db
-from app.models.base import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean
+from app.models.base import BaseModel, PeriodeMensuelleMixin
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -145,9 +145,12 @@ class CentraleSolaire(BaseModel):
         return data
 
 
-class RapportSolaire(BaseModel):
+class RapportSolaire(PeriodeMensuelleMixin, BaseModel):
     """Modèle pour les rapports de production solaire"""
     __tablename__ = 'rapports_solaire'
+    __table_args__ = (
+        Index('ix_rapports_solaire_date_creation', 'date_creation'),
+    )
     
     # Relations
     centrale_id = Column(Integer, ForeignKey('centrales_solaire.id'), nullable=False)
@@ -162,6 +165,8 @@ class RapportSolaire(BaseModel):
     energie_produite = Column(Float)  # MWh
     energie_disponible = Column(Float)  # MWh théorique
     facteur_charge = Column(Float)  # %
+    puissance_max = Column(Float)  # MW, pic du mois (données quotidiennes)
+    date_puissance_max = Column(DateTime)
     productible_theorique = Column(Float)  # MWh basé sur l'irradiation
     performance_ratio = Column(Float)  # % (rapport production réelle/théorique)
     
@@ -185,6 +190,7 @@ class RapportSolaire(BaseModel):
     
     # Fonctionnement onduleurs
     temps_fonctionnement_onduleurs = Column(Float)  # heures
+    duree_arrets = Column(Float)  # heures, cumul des arrêts quotidiens
     nombre_demarrages_onduleurs = Column(Integer)
     nombre_arrets_onduleurs = Column(Integer)
     alarmes_onduleurs = Column(Integer)
@@ -266,12 +272,14 @@ class RapportSolaire(BaseModel):
             'energie_produite': self.energie_produite,
             'energie_disponible': self.energie_disponible,
             'facteur_charge': self.facteur_charge,
+            'puissance_max': self.puissance_max,
             'productible_theorique': self.productible_theorique,
             'performance_ratio': self.performance_ratio,
             'irradiation_totale': self.irradiation_totale,
             'temperature_ambiante_moyenne': self.temperature_ambiante_moyenne,
             'rendement_global': self.rendement_global,
             'temps_fonctionnement_onduleurs': self.temps_fonctionnement_onduleurs,
+            'duree_arrets': self.duree_arrets,
             'energie_stockee': self.energie_stockee,
             'maintenances_preventives': self.maintenances_preventives,
             'maintenances_correctives': self.maintenances_correctives,
@@ -290,6 +298,9 @@ class RapportSolaire(BaseModel):
 class DonneesSolaireQuotidiennes(BaseModel):
     """Modèle pour les données quotidiennes de production solaire"""
     __tablename__ = 'donnees_solaire_quotidiennes'
+    __table_args__ = (
+        Index('ix_donnees_solaire_quotidiennes_rapport_date', 'rapport_id', 'date_production'),
+    )
     
     # Relations
     rapport_id = Column(Integer, ForeignKey('rapports_solaire.id'), nullable=False)
@@ -2,8 +2,8 @@
 Modèles pour la production thermique
 """
 from app.extensions import db
-from app.models.base import BaseModel
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean
+from app.models.base import BaseModel, PeriodeMensuelleMixin
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -112,9 +112,12 @@ class CentraleThermique(BaseModel):
         return data
 
 
-class RapportThermique(BaseModel):
+class RapportThermique(PeriodeMensuelleMixin, BaseModel):
     """Modèle pour les rapports de production thermique"""
     __tablename__ = 'rapports_thermique'
+    __table_args__ = (
+        Index('ix_rapports_thermique_date_creation', 'date_creation'),
+    )
     
     # Relations
     centrale_id = Column(Integer, ForeignKey('centrales_thermique.id'), nullable=False)
@@ -73,6 +73,7 @@ class LigneTransport(BaseModel):
     # Relations
     operateur = relationship("Operateur", back_populates="lignes_transport")
     rapports = relationship("RapportTransport", back_populates="ligne", cascade="all, delete-orphan")
+    syntheses_annuelles = relationship("SyntheseAnnuelleLigne", back_populates="ligne", cascade="all, delete-orphan")
     postes_depart = relationship("PosteTransport", foreign_keys="PosteTransport.ligne_depart_id", back_populates="lignes_depart")
     postes_arrivee = relationship("PosteTransport", foreign_keys="PosteTransport.ligne_arrivee_id", back_populates="lignes_arrivee")
     
@@ -295,6 +296,10 @@ class TransformateurTransport(BaseModel):
 class RapportTransport(BaseModel):
     """Modèle pour les rapports de transport d'électricité"""
     __tablename__ = 'rapports_transport'
+    __table_args__ = (
+        # Pagination par curseur de la liste des rapports
+        db.Index('ix_rapports_transport_periode_id', 'periode_debut', 'id'),
+    )
     
     # Relations
     ligne_id = Column(Integer, ForeignKey('lignes_transport.id'), nullable=False)
@@ -309,6 +314,7 @@ class RapportTransport(BaseModel):
     energie_transitee = Column(Float)  # MWh
     energie_maximale = Column(Float)  # MW (puissance max)
     heure_pointe = Column(String(10))  # HH:MM
+    date_pointe = Column(DateTime)  # Jour et heure de la pointe du mois
     energie_minimale = Column(Float)  # MW (puissance min)
     heure_creuse = Column(String(10))  # HH:MM
     
@@ -323,6 +329,7 @@ class RapportTransport(BaseModel):
     energie_non_fournie = Column(Float, default=0.0)  # MWh
     saidi = Column(Float, default=0.0)  # minutes
     saifi = Column(Float, default=0.0)  # interruptions/client
+    disponibilite = Column(Float)  # % (hors durée des incidents)
     
     # Maintenance
     maintenances_programmees = Column(Integer, default=0)
@@ -387,6 +394,8 @@ class RapportTransport(BaseModel):
             'taux_utilisation': self.taux_utilisation,
             'nombre_incidents': self.nombre_incidents,
             'duree_total_incidents': self.duree_total_incidents,
+            'date_pointe': self.date_pointe.isoformat() if self.date_pointe else None,
+            'disponibilite': self.disponibilite,
             'saidi': self.saidi,
             'saifi': self.saifi,
             'pertes_totales': self.pertes_totales,
@@ -402,6 +411,9 @@ class RapportTransport(BaseModel):
 class DonneesTransportQuotidiennes(BaseModel):
     """Modèle pour les données quotidiennes de transport"""
     __tablename__ = 'donnees_transport_quotidiennes'
+    __table_args__ = (
+        db.Index('ix_donnees_transport_quotidiennes_rapport_date', 'rapport_id', 'date'),
+    )
     
     # Relations
     rapport_id = Column(Integer, ForeignKey('rapports_transport.id'), nullable=False)
@@ -430,4 +442,58 @@ class DonneesTransportQuotidiennes(BaseModel):
     rapport = relationship("RapportTransport", back_populates="données_quotidiennes")
     
     def __repr__(self):
-        return f'<DonneesTransportQuotidiennes {self.date.strftime("%d/%m/%Y") if self.date else "N/A"}>'
\ No newline at end of file
+        return f'<DonneesTransportQuotidiennes {self.date.strftime("%d/%m/%Y") if self.date else "N/A"}>'
+
+
+class SyntheseAnnuelleLigne(BaseModel):
+    """Synthèse annuelle d'une ligne, calculée depuis les données quotidiennes de ses rapports"""
+    __tablename__ = 'syntheses_annuelles_lignes'
+    __table_args__ = (
+        db.UniqueConstraint('ligne_id', 'annee', name='uq_synthese_ligne_annee'),
+    )
+    
+    ligne_id = Column(Integer, ForeignKey('lignes_transport.id'), nullable=False)
+    annee = Column(Integer, nullable=False)
+    
+    # Énergie et charge
+    energie_transitee = Column(Float)  # MWh
+    puissance_pointe = Column(Float)  # MW
+    date_pointe = Column(DateTime)
+    charge_moyenne = Column(Float)  # MW
+    facteur_charge = Column(Float)  # %
+    taux_utilisation = Column(Float)  # % de la capacité de transport à la pointe
+    
+    # Fiabilité
+    nombre_incidents = Column(Integer, default=0)
+    minutes_incidents = Column(Float, default=0.0)
+    disponibilite = Column(Float)  # %
+    
+    # Couverture des données
+    jours_renseignes = Column(Integer, default=0)
+    mois_renseignes = Column(Integer, default=0)
+    
+    # Relations
+    ligne = relationship("LigneTransport", back_populates="syntheses_annuelles")
+    
+    def __repr__(self):
+        return f'<SyntheseAnnuelleLigne {self.ligne_id} - {self.annee}>'
+    
+    def to_dict(self):
+        """Convertir en dictionnaire"""
+        data = super().to_dict()
+        data.update({
+            'ligne_id': self.ligne_id,
+            'annee': self.annee,
+            'energie_transitee': self.energie_transitee,
+            'puissance_pointe': self.puissance_pointe,
+            'date_pointe': self.date_pointe.isoformat() if self.date_pointe else None,
+            'charge_moyenne': self.charge_moyenne,
+            'facteur_charge': self.facteur_charge,
+            'taux_utilisation': self.taux_utilisation,
+            'nombre_incidents': self.nombre_incidents,
+            'minutes_incidents': self.minutes_incidents,
+            'disponibilite': self.disponibilite,
+            'jours_renseignes': self.jours_renseignes,
+            'mois_renseignes': self.mois_renseignes
+        })
+        return data
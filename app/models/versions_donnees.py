@@ -0,0 +1,123 @@
+"""
+Vecteur de versions des données : un compteur par table, incrémenté dans
+la transaction de chaque écriture (flush ORM, UPDATE/DELETE/INSERT groupés
+passés par la session). Les réponses HTTP calculées à partir d'un ensemble
+de tables en tirent un ETag et un Last-Modified sans relire les données.
+
+Les écritures faites hors session (``connection.execute``, SQL texte)
+doivent appeler ``VersionDonnees.incrementer`` elles-mêmes.
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+from app.models.base import BaseModel
+from app.extensions import db
+
+
+# Tables techniques dont les écritures ne changent aucune donnée affichée
+TABLES_NON_VERSIONNEES = frozenset((
+    'versions_donnees', 'verrous_taches', 'executions_taches', 'marqueurs_traitement',
+    'compteurs_utilisateurs'
+))
+
+
+class VersionDonnees(BaseModel):
+    """Compteur de version d'une table (date_modification = dernière écriture)"""
+    __tablename__ = 'versions_donnees'
+
+    nom_table = Column(String(100), nullable=False, unique=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def incrementer(connexion, noms_tables, maintenant=None):
+        """Incrémenter les compteurs des tables, dans la transaction de connexion"""
+        noms = sorted(set(noms_tables) - TABLES_NON_VERSIONNEES)
+        if not noms:
+            return
+        maintenant = maintenant or datetime.utcnow()
+        versions = VersionDonnees.__table__
+        resultat = connexion.execute(
+            versions.update()
+            .where(versions.c.nom_table.in_(noms))
+            .values(version=versions.c.version + 1, date_modification=maintenant)
+        )
+        if resultat.rowcount < len(noms):
+            # Première écriture d'une table absente du vecteur (créée après la migration)
+            existants = set(connexion.execute(
+                select(versions.c.nom_table).where(versions.c.nom_table.in_(noms))
+            ).scalars())
+            connexion.execute(versions.insert(), [
+                {'nom_table': nom, 'version': 1, 'date_creation': maintenant,
+                 'date_modification': maintenant, 'actif': True}
+                for nom in noms if nom not in existants
+            ])
+
+    @staticmethod
+    def lire(noms_tables=None):
+        """{nom_table: (version, date_modification)} des tables demandées (toutes si None)"""
+        requete = db.session.query(
+            VersionDonnees.nom_table, VersionDonnees.version, VersionDonnees.date_modification
+        )
+        if noms_tables is not None:
+            requete = requete.filter(VersionDonnees.nom_table.in_(list(noms_tables)))
+        return {nom: (version, date) for nom, version, date in requete}
+
+    def __repr__(self):
+        return f'<VersionDonnees {self.nom_table} v{self.version}>'
+
+
+def tables_requete(instruction):
+    """Noms des tables lues par une requête (FROM, jointures et colonnes)"""
+    return {table.name for table in find_tables(instruction, check_columns=True, include_joins=True)}
+
+
+def _tables_deja_incrementees(session):
+    return session.info.setdefault('versions_incrementees', set())
+
+
+def ecritures_en_cours(session):
+    """La transaction en cours de la session a-t-elle déjà écrit dans une table versionnée ?"""
+    return bool(session.info.get('versions_incrementees'))
+
+
+def _incrementer_une_fois(session, noms_tables):
+    """Un seul incrément par table et par transaction suffit"""
+    deja = _tables_deja_incrementees(session)
+    nouveaux = set(noms_tables) - deja
+    if nouveaux:
+        VersionDonnees.incrementer(session.connection(), nouveaux)
+        deja.update(nouveaux)
+
+
+@event.listens_for(Session, 'after_flush')
+def _versions_apres_flush(session, flush_context):
+    """Tables des objets insérés, supprimés ou réellement modifiés par le flush"""
+    noms = set()
+    for objet in session.new | session.deleted:
+        noms.update(table.name for table in inspect(objet).mapper.tables)
+    for objet in session.dirty:
+        # is_modified compare l'ancienne valeur connue (attribut chargé) à la
+        # nouvelle : réaffecter la même valeur n'est pas une modification. Un
+        # attribut expiré réaffecté sans avoir été relu reste compté : le
+        # flush a bien émis l'UPDATE et l'ancienne valeur n'est pas connue
+        if session.is_modified(objet, include_collections=False):
+            noms.update(table.name for table in inspect(objet).mapper.tables)
+    if noms:
+        _incrementer_une_fois(session, noms)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _versions_ecritures_groupees(etat):
+    """UPDATE/DELETE/INSERT groupés exécutés par session.execute ou query.update()"""
+    instruction = etat.statement
+    if getattr(instruction, 'is_dml', False) and instruction.table is not None:
+        _incrementer_une_fois(etat.session, [instruction.table.name])
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _reinitialiser_versions(session, transaction):
+    # Fin de la transaction principale ou d'un SAVEPOINT (dont les incréments
+    # ont pu être annulés) ; les sous-transactions internes du flush sont ignorées
+    if transaction.parent is None or transaction.nested:
+        session.info.pop('versions_incrementees', None)
@@ -3,7 +3,7 @@ Modèles pour le système de workflow de validation des rapports
 """
 from datetime import datetime, timedelta
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 from app.extensions import db
@@ -92,6 +92,12 @@ class ValidationRapport(BaseModel):
     Validation d'un rapport dans le workflow
     """
     __tablename__ = 'validations_rapport'
+    __table_args__ = (
+        # Scanner d'expiration : statut en attente + échéance dépassée
+        Index('ix_validations_rapport_statut_expiration', 'statut', 'date_expiration'),
+        # Pagination par curseur de la liste des validations
+        Index('ix_validations_rapport_creation_id', 'date_creation', 'id'),
+    )
     
     # Clés étrangères
     rapport_id = Column(Integer, nullable=False, index=True)  # Référence générique
@@ -372,4 +378,30 @@ class ValidateurDesigne(BaseModel):
             operateur_id=operateur_id,
             type_rapport=type_rapport,
             actif=True
-        ).order_by(ValidateurDesigne.niveau_validation.asc()).all()
\ No newline at end of file
+        ).order_by(ValidateurDesigne.niveau_validation.asc()).all()
+
+
+class MarqueurTraitement(BaseModel):
+    """
+    Point de reprise (high-water mark) d'un traitement périodique : les
+    exécutions suivantes ne considèrent que ce qui est postérieur à valeur
+    """
+    __tablename__ = 'marqueurs_traitement'
+    
+    nom = Column(String(100), nullable=False, unique=True)
+    valeur = Column(DateTime)
+    
+    @staticmethod
+    def lire(nom):
+        """Valeur courante du marqueur (None si jamais exécuté)"""
+        return db.session.query(MarqueurTraitement.valeur).filter_by(nom=nom).scalar()
+    
+    @staticmethod
+    def avancer(nom, valeur):
+        """Positionner le marqueur, sans valider la transaction"""
+        marqueur = MarqueurTraitement.query.filter_by(nom=nom).first()
+        if not marqueur:
+            marqueur = MarqueurTraitement(nom=nom)
+            db.session.add(marqueur)
+        marqueur.valeur = valeur
+        return marqueur
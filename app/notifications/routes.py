@@ -12,12 +12,15 @@ from app.models.notifications import (
     Notification, MessageInterne, TemplateNotification, PreferenceNotification, 
     TypeNotification
 )
+from app.models.compteurs import CompteurUtilisateur
 from app.models.utilisateurs import User
 from app.notifications.forms import (
     MessageInterneForm, ReponseMessageForm, FiltreNotificationsForm, 
     FiltreMessagesForm, PreferencesNotificationForm, CreerNotificationForm,
     CreerTemplateForm
 )
+from app.notifications.services import NotificationService
+from app.utils.pagination import paginer_par_curseur
 
 bp = Blueprint('notifications', __name__, url_prefix='/notifications')
 
@@ -48,20 +51,19 @@ def index():
         elif filtre_form.statut.data == 'archivee':
             query = query.filter(Notification.archivee == True)
     
-    # Pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    
-    notifications = query.order_by(desc(Notification.date_creation)).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Pagination par curseur sur (date_creation, id)
+    notifications = paginer_par_curseur(
+        query, (Notification.date_creation, Notification.id),
+        curseur=request.args.get('curseur'), per_page=20
     )
     
-    # Statistiques
+    # Statistiques (compteurs de l'utilisateur, une seule lecture)
+    compteurs = CompteurUtilisateur.lire(current_user.id)
     stats = {
-        'total': Notification.query.filter_by(user_id=current_user.id, actif=True).count(),
-        'non_lues': Notification.query.filter_by(user_id=current_user.id, lue=False, actif=True).count(),
-        'importantes': Notification.query.filter_by(user_id=current_user.id, priorite=2, actif=True).count(),
-        'urgentes': Notification.query.filter_by(user_id=current_user.id, priorite=3, actif=True).count()
+        'total': compteurs['notifications_total'],
+        'non_lues': compteurs['notifications_non_lues'],
+        'importantes': compteurs['notifications_importantes'],
+        'urgentes': compteurs['notifications_urgentes']
     }
     
     return render_template('notifications/index.html',
@@ -137,9 +139,7 @@ def marquer_toutes_lues():
 def api_non_lues():
     """API pour récupérer le nombre de notifications non lues"""
     
-    count = Notification.query.filter_by(
-        user_id=current_user.id, lue=False, actif=True
-    ).count()
+    count = CompteurUtilisateur.lire(current_user.id)['notifications_non_lues']
     
     return jsonify({'count': count})
 
@@ -277,25 +277,18 @@ def messages():
         page=page, per_page=per_page, error_out=False
     )
     
-    # Statistiques
+    # Non lus par fil de discussion pour les messages de la page
+    non_lus_par_fil = MessageInterne.non_lus_par_fil(
+        current_user.id, [message.thread_id for message in messages.items]
+    )
+    
+    # Statistiques (compteurs de l'utilisateur, une seule lecture)
+    compteurs = CompteurUtilisateur.lire(current_user.id)
     stats = {
-        'recus': MessageInterne.query.filter_by(
-            destinataire_id=current_user.id, archive_destinataire=False
-        ).count(),
-        'non_lus': MessageInterne.query.filter_by(
-            destinataire_id=current_user.id, lu=False, archive_destinataire=False
-        ).count(),
-        'envoyes': MessageInterne.query.filter_by(
-            expediteur_id=current_user.id, archive_expediteur=False
-        ).count(),
-        'archives': MessageInterne.query.filter(
-            or_(
-                and_(MessageInterne.destinataire_id == current_user.id, 
-                     MessageInterne.archive_destinataire == True),
-                and_(MessageInterne.expediteur_id == current_user.id, 
-                     MessageInterne.archive_expediteur == True)
-            )
-        ).count()
+        'recus': compteurs['messages_recus'],
+        'non_lus': compteurs['messages_non_lus'],
+        'envoyes': compteurs['messages_envoyes'],
+        'archives': compteurs['messages_archives']
     }
     
     from datetime import datetime
@@ -306,6 +299,7 @@ def messages():
                          filtre_form=filtre_form,
                          vue=vue,
                          stats=stats,
+                         non_lus_par_fil=non_lus_par_fil,
                          now=datetime.now(),
                          current_filters={
                              'priorite': priorite_filter,
@@ -392,12 +386,8 @@ def voir_message(id):
     if message.destinataire_id == current_user.id and not message.lu:
         message.marquer_comme_lu()
     
-    # Récupérer la conversation (message parent et réponses)
-    if message.message_parent_id:
-        message_principal = MessageInterne.query.get(message.message_parent_id)
-        conversation = [message_principal] + list(message_principal.reponses)
-    else:
-        conversation = [message] + list(message.reponses)
+    # Récupérer la conversation (fil complet, une seule requête)
+    conversation = MessageInterne.fil_discussion(message)
     
     # Formulaire de réponse
     form_reponse = ReponseMessageForm()
@@ -507,15 +497,8 @@ def admin_index():
     if not current_user.is_admin():
         abort(403)
     
-    # Statistiques générales
-    stats = {
-        'total_notifications': Notification.query.filter_by(actif=True).count(),
-        'notifications_non_lues': Notification.query.filter_by(lue=False, actif=True).count(),
-        'total_messages': MessageInterne.query.count(),
-        'messages_non_lus': MessageInterne.query.filter_by(lu=False).count(),
-        'templates_actifs': TemplateNotification.query.filter_by(actif=True).count(),
-        'utilisateurs_actifs': User.query.filter_by(actif=True).count()
-    }
+    # Statistiques générales (une seule requête)
+    stats = NotificationService.statistiques_administration()
     
     # Notifications récentes
     notifications_recentes = Notification.query.filter_by(actif=True).order_by(
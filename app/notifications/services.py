@@ -3,7 +3,7 @@ Service de notifications - Utilitaires pour créer et gérer les notifications
 """
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, func, or_, select
 
 from app.extensions import db
 from app.models.notifications import (
@@ -11,6 +11,7 @@ from app.models.notifications import (
     TypeNotification
 )
 from app.models.utilisateurs import User
+from app.utils.metriques import fan_out_notifications, observer
 
 
 class NotificationService:
@@ -76,6 +77,7 @@ class NotificationService:
     ) -> List[Notification]:
         """Créer une notification pour plusieurs utilisateurs"""
         
+        observer(fan_out_notifications, len(user_ids), type=type_notification.value)
         notifications = []
         for user_id in user_ids:
             notif = NotificationService.creer_notification(
@@ -163,6 +165,29 @@ class NotificationService:
             count += 1
         
         return count
+    
+    @staticmethod
+    def statistiques_administration() -> Dict[str, int]:
+        """Cartes du panneau d'administration, en une requête (agrégats conditionnels par table)"""
+        
+        def compter(modele, *conditions):
+            return select(*(
+                func.coalesce(func.sum(case((condition, 1), else_=0)), 0) for condition in conditions
+            )).select_from(modele).subquery()
+        
+        notifications = compter(Notification, Notification.actif == True,
+                                and_(Notification.actif == True, Notification.lue == False))
+        messages = compter(MessageInterne, MessageInterne.id.isnot(None), MessageInterne.lu == False)
+        templates = compter(TemplateNotification, TemplateNotification.actif == True)
+        utilisateurs = compter(User, User.actif == True)
+        
+        ligne = db.session.execute(select(
+            *notifications.c, *messages.c, *templates.c, *utilisateurs.c
+        )).one()
+        return dict(zip((
+            'total_notifications', 'notifications_non_lues', 'total_messages', 'messages_non_lus',
+            'templates_actifs', 'utilisateurs_actifs'
+        ), ligne))
 
 
 class MessageService:
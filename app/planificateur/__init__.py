@@ -0,0 +1,223 @@
+"""
+Planificateur de tâches périodiques (maintenance, recalculs, alertes).
+
+Les tâches sont déclarées avec le décorateur ``planificateur.tache`` et une
+expression cron. Le planificateur tourne soit dans un thread du processus
+web (SCHEDULER_ENABLED), soit comme worker dédié (``flask scheduler``).
+Un verrou en base garantit qu'une échéance n'est exécutée qu'une fois même
+si plusieurs processus tournent, et un décalage aléatoire (jitter) évite
+que tous les workers sollicitent la base à la même seconde.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.planificateur import VerrouTache, ExecutionTache
+from app.planificateur.cron import ExpressionCron
+from app.utils.metriques import duree_taches, observer
+
+
+# Taille maximale du résultat conservé dans l'historique
+TAILLE_RESULTAT = 2000
+
+
+class Tache:
+    """Tâche planifiée : fonction appelée dans un contexte d'application"""
+
+    def __init__(self, nom, cron, fonction, description=None, jitter=0, duree_verrou=3600):
+        self.nom = nom
+        self.cron = ExpressionCron(cron)
+        self.fonction = fonction
+        self.description = description or (fonction.__doc__ or '').strip()
+        self.jitter = jitter  # secondes
+        self.duree_verrou = duree_verrou  # secondes
+        self.prochaine = None
+        self.decalage = 0.0
+
+    def planifier(self, maintenant):
+        """Calculer la prochaine échéance et son décalage aléatoire"""
+        self.prochaine = self.cron.prochaine(maintenant)
+        self.decalage = random.uniform(0, self.jitter) if self.jitter else 0.0
+
+    def est_due(self, maintenant):
+        return maintenant >= self.prochaine + timedelta(seconds=self.decalage)
+
+
+class Planificateur:
+    """Registre des tâches et boucle d'exécution"""
+
+    def __init__(self):
+        self.taches = {}
+        self.app = None
+        self.identifiant = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._arret = threading.Event()
+
+    def tache(self, nom, cron, jitter=0, duree_verrou=3600, description=None):
+        """Décorateur d'enregistrement d'une tâche"""
+        def decorateur(fonction):
+            self.taches[nom] = Tache(nom, cron, fonction, description=description,
+                                     jitter=jitter, duree_verrou=duree_verrou)
+            return fonction
+        return decorateur
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['planificateur'] = self
+
+        # Enregistrement des tâches de l'application
+        from app.planificateur import taches  # noqa: F401
+
+        if app.config.get('SCHEDULER_ENABLED') and not app.testing:
+            self.demarrer()
+
+    # ----- Boucle -----
+
+    def demarrer(self):
+        """Démarrer la boucle dans un thread d'arrière-plan"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._arret.clear()
+        self._thread = threading.Thread(target=self.boucle, name='planificateur', daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+
+    def boucle(self, intervalle=None):
+        """Vérifier périodiquement les tâches dues (bloquant)"""
+        intervalle = intervalle or self.app.config.get('SCHEDULER_TICK_SECONDS', 30)
+        self.identifiant = f"{socket.gethostname()}:{os.getpid()}"
+        while not self._arret.is_set():
+            try:
+                self.verifier(datetime.utcnow())
+            except Exception as e:
+                self.app.logger.error(f"Planificateur : erreur de boucle : {e}")
+            self._arret.wait(intervalle)
+
+    def verifier(self, maintenant):
+        """Exécuter les tâches dont l'échéance (décalage compris) est atteinte"""
+        for tache in self.taches.values():
+            if tache.prochaine is None:
+                tache.planifier(maintenant)
+                continue
+            if tache.est_due(maintenant):
+                echeance = tache.prochaine
+                tache.planifier(maintenant)
+                self.executer(tache.nom, echeance=echeance)
+
+    # ----- Exécution -----
+
+    def executer(self, nom, echeance=None, declencheur='planificateur'):
+        """
+        Exécuter une tâche si son verrou est obtenu pour l'échéance.
+        Retourne l'ExecutionTache enregistrée, ou None si un autre processus
+        s'en charge (ou s'en est déjà chargé). Hors contexte d'application,
+        un contexte est ouvert le temps de l'exécution.
+        """
+        tache = self.taches[nom]
+        contexte = nullcontext() if has_app_context() else self.app.app_context()
+        with contexte:
+            debut = datetime.utcnow()
+            if not self._acquerir(tache, echeance or debut, debut):
+                return None
+
+            execution = ExecutionTache(nom=nom, declencheur=declencheur, echeance=echeance,
+                                       debut=debut, detenteur=self.identifiant)
+            try:
+                execution.save()
+                chrono = time.perf_counter()
+                try:
+                    resultat = tache.fonction()
+                    execution.statut = 'succes'
+                    execution.resultat = None if resultat is None else str(resultat)[:TAILLE_RESULTAT]
+                except Exception as e:
+                    db.session.rollback()
+                    execution.statut = 'echec'
+                    execution.resultat = f"{type(e).__name__}: {e}"[:TAILLE_RESULTAT]
+                    current_app.logger.error(f"Tâche {nom} en échec : {e}")
+                execution.duree_ms = (time.perf_counter() - chrono) * 1000
+                observer(duree_taches, execution.duree_ms / 1000, job=nom, status=execution.statut)
+                execution.fin = datetime.utcnow()
+                execution.save()
+            finally:
+                self._liberer(tache)
+            return execution
+
+    def _acquerir(self, tache, echeance, maintenant):
+        """Prendre le verrou de la tâche pour une échéance pas encore traitée"""
+        verrous = VerrouTache.__table__
+        if not db.session.query(VerrouTache.id).filter_by(nom=tache.nom).first():
+            try:
+                db.session.add(VerrouTache(nom=tache.nom))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()  # créé en parallèle par un autre processus
+
+        resultat = db.session.execute(
+            verrous.update().where(
+                verrous.c.nom == tache.nom,
+                or_(verrous.c.expire_le.is_(None), verrous.c.expire_le < maintenant),
+                or_(verrous.c.derniere_echeance.is_(None), verrous.c.derniere_echeance < echeance)
+            ).values(
+                detenteur=self.identifiant,
+                expire_le=maintenant + timedelta(seconds=tache.duree_verrou),
+                derniere_echeance=echeance,
+                date_modification=maintenant
+            )
+        )
+        db.session.commit()
+        return resultat.rowcount == 1
+
+    def _liberer(self, tache):
+        verrous = VerrouTache.__table__
+        db.session.execute(
+            verrous.update().where(
+                verrous.c.nom == tache.nom,
+                verrous.c.detenteur == self.identifiant
+            ).values(detenteur=None, expire_le=None, date_modification=datetime.utcnow())
+        )
+        db.session.commit()
+
+    # ----- Consultation -----
+
+    def etat(self):
+        """État des tâches pour la vue d'administration"""
+        maintenant = datetime.utcnow()
+        verrous = {v.nom: v for v in VerrouTache.query.all()}
+        dernieres = {}
+        for execution in ExecutionTache.query.filter(
+            ExecutionTache.id.in_(
+                db.session.query(db.func.max(ExecutionTache.id)).group_by(ExecutionTache.nom)
+            )
+        ):
+            dernieres[execution.nom] = execution
+
+        etat = []
+        for tache in self.taches.values():
+            verrou = verrous.get(tache.nom)
+            en_cours = bool(verrou and verrou.detenteur and verrou.expire_le and verrou.expire_le > maintenant)
+            etat.append({
+                'nom': tache.nom,
+                'description': tache.description,
+                'cron': tache.cron.expression,
+                'jitter': tache.jitter,
+                'prochaine': tache.prochaine or tache.cron.prochaine(maintenant),
+                'en_cours': en_cours,
+                'detenteur': verrou.detenteur if en_cours else None,
+                'derniere_echeance': verrou.derniere_echeance if verrou else None,
+                'derniere_execution': dernieres.get(tache.nom)
+            })
+        return etat
+
+
+planificateur = Planificateur()
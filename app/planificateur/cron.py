@@ -0,0 +1,94 @@
+"""
+Expressions cron à cinq champs : minute heure jour-du-mois mois jour-de-semaine
+
+Syntaxe supportée par champ : ``*``, ``*/n``, ``a``, ``a-b``, ``a-b/n`` et
+les listes ``a,b,c``. Le jour de semaine va de 0 (dimanche) à 6, 7 étant
+accepté pour dimanche. Comme cron, si le jour du mois et le jour de semaine
+sont tous deux restreints, une date correspond si l'un des deux correspond.
+"""
+from datetime import datetime, timedelta
+
+
+# Raccourcis usuels
+ALIAS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+# Bornes (minimum, maximum) des cinq champs
+BORNES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# Horizon de recherche de la prochaine échéance (années bissextiles incluses)
+HORIZON_RECHERCHE = timedelta(days=366 * 5)
+
+
+class ExpressionCron:
+    """Expression cron analysée"""
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        champs = ALIAS.get(self.expression, self.expression).split()
+        if len(champs) != 5:
+            raise ValueError(f"Expression cron invalide (5 champs attendus) : {expression!r}")
+
+        valeurs = [self._analyser(champ, *bornes) for champ, bornes in zip(champs, BORNES)]
+        self.minutes, self.heures, self.jours, self.mois, jours_semaine = valeurs
+        self.jours_semaine = {0 if j == 7 else j for j in jours_semaine}
+        self.jour_libre = champs[2] == '*'
+        self.jour_semaine_libre = champs[4] == '*'
+
+    def __repr__(self):
+        return f'<ExpressionCron {self.expression}>'
+
+    @staticmethod
+    def _analyser(champ, minimum, maximum):
+        """Ensemble des valeurs autorisées pour un champ"""
+        valeurs = set()
+        for partie in champ.split(','):
+            plage, _, pas = partie.partition('/')
+            pas = int(pas) if pas else 1
+            if plage == '*':
+                debut, fin = minimum, maximum
+            elif '-' in plage:
+                debut, fin = (int(v) for v in plage.split('-', 1))
+            else:
+                debut = fin = int(plage)
+                if pas > 1:
+                    fin = maximum
+            if pas < 1 or debut < minimum or fin > maximum or debut > fin:
+                raise ValueError(f"Champ cron invalide : {champ!r}")
+            valeurs.update(range(debut, fin + 1, pas))
+        return valeurs
+
+    def _jour_correspond(self, moment):
+        jour_semaine = (moment.weekday() + 1) % 7  # cron : 0 = dimanche
+        correspond_jour = moment.day in self.jours
+        correspond_semaine = jour_semaine in self.jours_semaine
+        if self.jour_libre or self.jour_semaine_libre:
+            return correspond_jour and correspond_semaine
+        return correspond_jour or correspond_semaine
+
+    def correspond(self, moment):
+        """Le moment (à la minute près) correspond-il à l'expression ?"""
+        return (moment.minute in self.minutes and moment.hour in self.heures
+                and moment.month in self.mois and self._jour_correspond(moment))
+
+    def prochaine(self, apres):
+        """Première échéance strictement postérieure à ``apres``"""
+        moment = apres.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = apres + HORIZON_RECHERCHE
+        while moment <= limite:
+            if moment.month not in self.mois:
+                annee, mois = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = datetime(annee, mois, 1)
+            elif not self._jour_correspond(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.heures:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Aucune échéance trouvée pour {self.expression!r}")
@@ -0,0 +1,71 @@
+"""
+Tâches périodiques de l'application
+
+Les services sont importés dans les fonctions pour ne pas charger tous les
+modules métier au démarrage de l'application.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.planificateur import ExecutionTache
+from app.planificateur import planificateur
+
+
+# Durée de conservation de l'historique des exécutions
+RETENTION_HISTORIQUE_JOURS = 30
+
+
+@planificateur.tache('expiration_validations', '*/15 * * * *', jitter=60)
+def expiration_validations():
+    """Passer en « expiré » les validations dont l'échéance est dépassée"""
+    from app.workflow.services import WorkflowService
+    resultat = WorkflowService.expirer_validations()
+    return f"{resultat['expirees']} validation(s) expirée(s)"
+
+
+@planificateur.tache('alertes_automatiques', '0 6 * * *', jitter=300)
+def alertes_automatiques():
+    """Générer les alertes automatiques du régulateur (seuils KPI, retards de rapports)"""
+    from app.are.services_alertes import MoteurAlertesService
+    resultat = MoteurAlertesService.executer()
+    return (f"{resultat['a_creer']} alerte(s) créée(s) sur {resultat['candidats']} candidate(s), "
+            f"{resultat['deja_actives']} déjà active(s)")
+
+
+@planificateur.tache('kpis_strategiques', '30 1 * * *', jitter=300)
+def kpis_strategiques():
+    """Recalculer les KPIs stratégiques de l'année en cours"""
+    from app.are.services import IndicateursAREService
+    kpis = IndicateursAREService.mettre_a_jour_kpis_strategiques(datetime.now().year)
+    return f"{len(kpis)} KPI(s) mis à jour"
+
+
+@planificateur.tache('statistiques_workflow', '5 0 * * *', jitter=120)
+def statistiques_workflow():
+    """Recalculer et mettre en cache les statistiques détaillées du workflow"""
+    from app.workflow.services import WorkflowService
+    statistiques = WorkflowService.get_statistiques_detaillees(rafraichir=True)
+    return f"{statistiques['global']['total']} validation(s) analysée(s)"
+
+
+@planificateur.tache('notifications_archivees', '30 3 * * *', jitter=300)
+def notifications_archivees():
+    """Supprimer les notifications archivées depuis plus de 90 jours"""
+    from app.notifications.services import NotificationService
+    return f"{NotificationService.nettoyer_notifications_archivees()} notification(s) supprimée(s)"
+
+
+@planificateur.tache('sauvegardes_anciennes', '0 4 * * *', jitter=300)
+def sauvegardes_anciennes():
+    """Supprimer les sauvegardes de plus de 30 jours"""
+    from app.admin.utils import cleanup_old_backups
+    cleanup_old_backups()
+
+
+@planificateur.tache('historique_taches', '45 4 * * 0', jitter=300)
+def historique_taches():
+    """Purger l'historique des exécutions de tâches"""
+    limite = datetime.utcnow() - timedelta(days=RETENTION_HISTORIQUE_JOURS)
+    supprimees = ExecutionTache.query.filter(ExecutionTache.debut < limite).delete(synchronize_session=False)
+    db.session.commit()
+    return f"{supprimees} exécution(s) purgée(s)"
@@ -10,4 +10,7 @@ from app.production_hydro import routes_rapports
 from app.production_hydro import routes_centrales
 from app.production_hydro import routes_equipements
 from app.production_hydro import routes_api
-from app.production_hydro import routes_export
\ No newline at end of file
+from app.production_hydro import routes_export
+
+# Recalcul incrémental des rapports depuis les données journalières
+from app.production_hydro import donnees_quotidiennes
@@ -0,0 +1,224 @@
+"""
+Agrégation des données journalières hydro (DonneesMensuelles) dans les
+rapports mensuels.
+
+Les lignes journalières d'un ou plusieurs rapports (un mois, ou une année
+entière toutes centrales confondues) sont lues en une requête, chargées en
+tableaux NumPy et réduites par rapport avec ``Groupes`` : niveaux de
+retenue, débits (débit total = turbiné + déversé), volumes, énergie, heures
+de fonctionnement, facteur de charge et débits classés Q10/Q50/Q90 (débit
+total dépassé 10 %, 50 % et 90 % des jours). Les résultats sont écrits par
+un UPDATE groupé ; un champ sans aucune valeur journalière conserve la
+valeur saisie dans le rapport.
+
+Le recalcul est incrémental : les rapports dont une ligne journalière est
+ajoutée, modifiée ou supprimée (par l'ORM ou par une écriture groupée) sont
+notés pendant la transaction puis agrégés juste avant sa validation.
+"""
+import calendar
+from datetime import datetime
+
+from sqlalchemy import bindparam, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.production_hydro import CentraleHydro, DonneesMensuelles, RapportHydro
+from app.utils.agregation import Groupes, valeur_sql
+from app.utils.imports import ModuleParesseux
+
+np = ModuleParesseux('numpy')
+
+
+# Champs du rapport recalculés depuis les données journalières
+CHAMPS_RAPPORT = (
+    'niveau_retenue_moyen', 'niveau_retenue_min', 'niveau_retenue_max',
+    'debit_moyen', 'debit_min', 'debit_max', 'debit_q10', 'debit_q50', 'debit_q90',
+    'volume_turbiné', 'volume_deverse', 'jours_deversement',
+    'energie_produite', 'temps_fonctionnement', 'facteur_charge'
+)
+
+SECONDES_JOUR = 86400
+
+# Clés de session.info : rapports à recalculer, ou tous les rapports touchés
+CLE_RAPPORTS = 'rapports_hydro_a_agreger'
+CLE_TOUS = 'rapports_hydro_tous_a_agreger'
+
+
+class DonneesHydroService:
+    """Agrégation vectorisée des séries journalières hydro dans les rapports mensuels"""
+
+    @staticmethod
+    def agreger_rapports(rapport_ids, session=None):
+        """
+        Recalculer les rapports donnés depuis leurs données journalières
+        (lecture par lots de 500 rapports). Ne valide pas la transaction.
+        Retourne le nombre de rapports mis à jour.
+        """
+        session = session or db.session
+        rapport_ids = sorted(rapport_ids)
+        donnees = DonneesMensuelles.__table__
+        parametres = []
+        for i in range(0, len(rapport_ids), 500):
+            condition = donnees.c.rapport_id.in_(rapport_ids[i:i + 500])
+            parametres.extend(DonneesHydroService._agregats(session, condition))
+        return DonneesHydroService._ecrire(session, parametres)
+
+    @staticmethod
+    def agreger_periode(annee=None, mois=None, centrale_id=None, session=None):
+        """
+        Recalculer tous les rapports d'une période (année, mois, centrale :
+        filtres facultatifs) en une seule lecture. Ne valide pas la transaction.
+        """
+        session = session or db.session
+        rapports = RapportHydro.__table__
+        conditions = []
+        if annee is not None:
+            conditions.append(rapports.c.annee == annee)
+        if mois is not None:
+            conditions.append(rapports.c.mois == mois)
+        if centrale_id is not None:
+            conditions.append(rapports.c.centrale_id == centrale_id)
+        return DonneesHydroService._ecrire(session, DonneesHydroService._agregats(session, *conditions))
+
+    @staticmethod
+    def _ecrire(session, parametres):
+        if parametres:
+            rapports = RapportHydro.__table__
+            # COALESCE : un champ sans donnée journalière garde sa valeur saisie
+            valeurs = {nom: func.coalesce(bindparam(nom), rapports.c[nom]) for nom in CHAMPS_RAPPORT}
+            valeurs['date_modification'] = bindparam('date_modification')
+            instruction = rapports.update().where(rapports.c.id == bindparam('b_id')).values(valeurs)
+            for i in range(0, len(parametres), 1000):
+                session.execute(instruction, parametres[i:i + 1000])
+        return len(parametres)
+
+    @staticmethod
+    def _agregats(session, *conditions):
+        """Paramètres d'UPDATE des rapports ayant des données journalières actives"""
+        donnees = DonneesMensuelles.__table__
+        rapports = RapportHydro.__table__
+        lignes = session.execute(
+            select(donnees.c.rapport_id, rapports.c.annee, rapports.c.mois, CentraleHydro.puissance_installee,
+                   donnees.c.niveau_retenue, donnees.c['debit_turbiné'], donnees.c['debit_déversé'],
+                   donnees.c.energie_produite, donnees.c.heures_fonctionnement)
+            .join(rapports, rapports.c.id == donnees.c.rapport_id)
+            .join(CentraleHydro, CentraleHydro.id == rapports.c.centrale_id)
+            .where(donnees.c.actif == True, *conditions)
+        ).all()
+        if not lignes:
+            return []
+
+        colonnes = list(zip(*lignes))
+        groupes = Groupes(np.array(colonnes[0], dtype=np.int64))
+        # Contexte du rapport : première ligne de chaque groupe
+        premieres = groupes.ordre[groupes.debuts]
+        annees, mois = (np.array(colonne, dtype=np.int64)[premieres] for colonne in colonnes[1:3])
+        puissance_installee = np.array(colonnes[3], dtype=float)[premieres]  # MW
+        niveau, turbine, deverse, energie, heures = (np.array(colonne, dtype=float) for colonne in colonnes[4:])
+
+        jours_mois = np.array([calendar.monthrange(a, m)[1] for a, m in zip(annees, mois)], dtype=float)
+        # Débit total du jour : NaN seulement si turbiné et déversé sont tous deux inconnus
+        debit = np.where(np.isnan(turbine) & np.isnan(deverse), np.nan,
+                         np.nan_to_num(turbine) + np.nan_to_num(deverse))
+        energie_totale = groupes.somme(energie)
+        # Q10 : débit dépassé 10 % du temps, soit le quantile 0,9
+        q10, q50, q90 = groupes.quantiles(debit, (0.9, 0.5, 0.1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            facteur_charge = energie_totale / (puissance_installee * jours_mois * 24) * 100
+
+        resultats = {
+            'niveau_retenue_moyen': groupes.moyenne(niveau),
+            'niveau_retenue_min': groupes.minimum(niveau),
+            'niveau_retenue_max': groupes.maximum(niveau),
+            'debit_moyen': groupes.moyenne(debit),
+            'debit_min': groupes.minimum(debit),
+            'debit_max': groupes.maximum(debit),
+            'debit_q10': q10,
+            'debit_q50': q50,
+            'debit_q90': q90,
+            'volume_turbiné': groupes.somme(turbine) * SECONDES_JOUR / 1e6,  # millions m³
+            'volume_deverse': groupes.somme(deverse) * SECONDES_JOUR / 1e6,
+            'jours_deversement': np.where(groupes.compte(deverse) > 0,
+                                          groupes.somme((deverse > 0).astype(float)), np.nan),
+            'energie_produite': energie_totale,  # MWh
+            'temps_fonctionnement': groupes.somme(heures),
+            'facteur_charge': np.where(puissance_installee > 0, facteur_charge, np.nan),
+        }
+        maintenant = datetime.utcnow()
+        parametres = []
+        for g, rapport_id in enumerate(groupes.cles):
+            ligne = {nom: valeur_sql(valeurs[g]) for nom, valeurs in resultats.items()}
+            if ligne['jours_deversement'] is not None:
+                ligne['jours_deversement'] = int(ligne['jours_deversement'])
+            ligne.update(b_id=int(rapport_id), date_modification=maintenant)
+            parametres.append(ligne)
+        return parametres
+
+
+def _noter(session, rapport_ids=(), tous=False):
+    if tous:
+        session.info[CLE_TOUS] = True
+    session.info.setdefault(CLE_RAPPORTS, set()).update(r for r in rapport_ids if r is not None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _donnees_hydro_apres_flush(session, flush_context):
+    """Rapports des lignes journalières insérées, modifiées ou supprimées par le flush"""
+    for objet in session.new | session.deleted | session.dirty:
+        if not isinstance(objet, DonneesMensuelles):
+            continue
+        if objet in session.dirty and not session.is_modified(objet, include_collections=False):
+            continue
+        etat = inspect(objet)
+        # Rapport actuel et, si la ligne a changé de rapport, l'ancien
+        rapport_ids = {etat.dict.get('rapport_id')} | set(etat.attrs.rapport_id.history.deleted or ())
+        rapport_ids.discard(None)
+        _noter(session, rapport_ids, tous=not rapport_ids)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _donnees_hydro_ecritures_groupees(etat):
+    """INSERT/UPDATE/DELETE groupés sur les données journalières"""
+    instruction = etat.statement
+    if not (getattr(instruction, 'is_dml', False) and instruction.table is not None
+            and instruction.table.name == DonneesMensuelles.__tablename__):
+        return
+    parametres = etat.parameters
+    plusieurs = isinstance(parametres, (list, tuple))
+    lots = parametres if plusieurs else [parametres or {}]
+    rapport_ids = {ligne['rapport_id'] for ligne in lots if 'rapport_id' in ligne}
+    if instruction.is_insert:
+        tous = not rapport_ids
+    elif instruction.whereclause is None:
+        tous = True
+    elif plusieurs:
+        tous = not rapport_ids
+    else:
+        # UPDATE/DELETE : rapports des lignes visées, lus avant l'exécution
+        table = instruction.table
+        rapport_ids.update(etat.session.connection().execute(
+            select(table.c.rapport_id).where(instruction.whereclause).distinct(), parametres or {}
+        ).scalars())
+        tous = False
+    _noter(etat.session, rapport_ids, tous=tous)
+
+
+@event.listens_for(Session, 'before_commit')
+def _agreger_avant_validation(session):
+    # La validation n'exécute son dernier flush qu'après cet événement :
+    # l'anticiper pour connaître les lignes journalières qu'il écrit
+    session.flush()
+    if not session.info.get(CLE_RAPPORTS) and not session.info.get(CLE_TOUS):
+        return
+    rapport_ids = session.info.pop(CLE_RAPPORTS, set())
+    if session.info.pop(CLE_TOUS, False):
+        DonneesHydroService.agreger_periode(session=session)
+    elif rapport_ids:
+        DonneesHydroService.agreger_rapports(rapport_ids, session=session)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _oublier_rapports_hydro(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(CLE_RAPPORTS, None)
+        session.info.pop(CLE_TOUS, None)
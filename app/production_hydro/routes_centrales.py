@@ -11,6 +11,13 @@ from app.models.operateurs import Operateur
 from app.extensions import db
 from app.utils.decorators import super_admin_required
 from app.utils.permissions import can_access_operateur
+from app.utils.projections import Projection
+
+
+# Champs affichés par les cartes de la liste des centrales
+PROJECTION_CENTRALES = Projection(CentraleHydro, (
+    'id', 'nom', 'localisation', 'puissance_installee', 'statut', 'operateur.nom'
+))
 
 
 @production_hydro.route('/centrales/nouvelle', methods=['GET', 'POST'])
@@ -94,7 +101,7 @@ def nouvelle_centrale():
 @login_required
 def centrales():
     """Liste des centrales hydroélectriques"""
-    centrales_list = CentraleHydro.query.filter_by(actif=True).all()
+    centrales_list = PROJECTION_CENTRALES.lister(CentraleHydro.query.filter_by(actif=True))
 
     return render_template('production_hydro/centrales_list.html',
                          title='Centrales Hydroélectriques',
@@ -13,18 +13,30 @@ from app.models.production_hydro import (
 )
 from app.extensions import db
 from app.utils.decorators import super_admin_required
+from app.utils.projections import Projection
 
 
-def get_accessible_centrales():
-    """Obtenir les centrales accessibles selon les permissions"""
+# Champs affichés par la liste des rapports et ses filtres
+PROJECTION_RAPPORTS = Projection(RapportHydro, (
+    'id', 'annee', 'mois', 'periode_debut', 'periode_fin', 'energie_produite',
+    'energie_disponible', 'facteur_charge', 'statut', 'date_creation', 'date_modification',
+    'centrale.nom', 'centrale.code', 'centrale.localisation'
+), methodes=('get_periode_str',))
+PROJECTION_CENTRALES_FILTRE = Projection(CentraleHydro, ('id', 'nom', 'code'))
+
+
+def get_accessible_centrales(projection=None):
+    """Obtenir les centrales accessibles selon les permissions (entités ou lignes projetées)"""
     if current_user.is_admin():
-        return CentraleHydro.query.filter_by(actif=True).all()
+        query = CentraleHydro.query.filter_by(actif=True)
     elif current_user.operateur:
-        return CentraleHydro.query.filter_by(
+        query = CentraleHydro.query.filter_by(
             operateur_id=current_user.operateur.id,
             actif=True
-        ).all()
-    return []
+        )
+    else:
+        return []
+    return projection.lister(query) if projection else query.all()
 
 
 @production_hydro.route('/')
@@ -35,7 +47,7 @@ def index():
     per_page = 10
 
     # Obtenir les centrales accessibles
-    centrales_accessibles = get_accessible_centrales()
+    centrales_accessibles = get_accessible_centrales(PROJECTION_CENTRALES_FILTRE)
     if not centrales_accessibles:
         flash('Aucune centrale hydroélectrique accessible.', 'warning')
         return render_template('production_hydro/no_access.html')
@@ -76,14 +88,13 @@ def index():
             CentraleHydro.nom.contains(search)
         )
 
-    # Pagination avec jointure correcte
-    rapports = query.join(CentraleHydro).order_by(
+    # Pagination avec jointure correcte (déjà faite par la recherche textuelle)
+    query_liste = query if search else query.join(CentraleHydro)
+    rapports = PROJECTION_RAPPORTS.paginer(query_liste.order_by(
         RapportHydro.annee.desc(),
         RapportHydro.mois.desc(),
         CentraleHydro.nom
-    ).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    ), page, per_page)
 
     # Statistiques rapides
     stats = {
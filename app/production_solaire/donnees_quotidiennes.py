@@ -0,0 +1,363 @@
+"""
+Chargement en masse des données solaires quotidiennes et agrégation
+mensuelle dans les rapports.
+
+Le chargeur accepte un fichier CSV ou NDJSON de séries quotidiennes (une
+ligne par centrale et par jour) ou d'exports d'onduleurs (une ligne par
+onduleur et par pas de temps). Il est lu par lots de taille bornée : les
+lignes d'un même horodatage sont d'abord cumulées entre onduleurs
+(énergie et puissance additionnées, mesures météo moyennées), puis
+réduites par jour. Chaque jour est rattaché au rapport mensuel de sa
+centrale (créé en brouillon s'il n'existe pas) et remplace les données
+déjà enregistrées pour ce jour ; les jours d'un rapport transmis ou validé
+sont ignorés, sauf chargement forcé. Seuls les mois touchés sont ensuite
+recalculés par ``DonneesSolaireService.agreger_rapports``.
+
+Colonnes reconnues : ``centrale`` (code) ou ``centrale_id``, ``date`` ou
+``horodatage``, ``energie_produite`` (kWh), ``puissance_max`` ou
+``puissance`` (kW), ``heure_puissance_max``, ``irradiation`` (kWh/m²),
+``temperature_ambiante_max``, ``temperature_ambiante_min``,
+``temperature_modules_max``, ``humidite_relative``, ``vitesse_vent_max``,
+``duree_arrets`` (heures), ``cause_arrets``, ``performance_ratio`` (%).
+"""
+import calendar
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, select
+
+from app.extensions import db
+from app.models.production_solaire import CentraleSolaire, DonneesSolaireQuotidiennes, RapportSolaire
+from app.utils.agregation import (
+    Groupes, date_avec_heure, en_horodatages, en_nombres, en_textes, executer_par_lots, lire_par_lots, valeur_sql
+)
+from app.utils.imports import ModuleParesseux
+
+np = ModuleParesseux('numpy')
+pd = ModuleParesseux('pandas')
+
+
+ALIAS = {
+    'date': 'horodatage', 'date_production': 'horodatage',
+    'puissance': 'puissance_max', 'energie': 'energie_produite',
+    'centrale': 'centrale_code', 'code': 'centrale_code',
+}
+
+# Additionnées entre les onduleurs d'un même horodatage
+MESURES_ADDITIVES = ('energie_produite', 'puissance_max')
+# Moyennées entre onduleurs (capteurs partagés, arrêts en heures équivalentes centrale)
+MESURES_MOYENNEES = (
+    'irradiation', 'temperature_ambiante_max', 'temperature_ambiante_min', 'temperature_modules_max',
+    'humidite_relative', 'vitesse_vent_max', 'duree_arrets', 'performance_ratio'
+)
+TEXTES = ('heure_puissance_max', 'cause_arrets')
+
+# Réduction par jour des mesures d'horodatage
+SOMMES_JOUR = ('energie_produite', 'irradiation', 'duree_arrets')
+REDUCTION_JOUR = {
+    'temperature_ambiante_max': 'max', 'temperature_modules_max': 'max', 'vitesse_vent_max': 'max',
+    'temperature_ambiante_min': 'min',
+    'humidite_relative': 'mean', 'performance_ratio': 'mean',
+    'cause_arrets': 'first',
+}
+
+# Champs du rapport recalculés depuis les données quotidiennes
+CHAMPS_RAPPORT = (
+    'energie_produite', 'puissance_max', 'date_puissance_max', 'productible_theorique', 'performance_ratio',
+    'facteur_charge', 'irradiation_totale', 'irradiation_moyenne_quotidienne', 'temperature_ambiante_moyenne',
+    'humidite_relative_moyenne', 'duree_arrets', 'disponibilite_systeme', 'disponibilite_donnees'
+)
+
+
+class DonneesSolaireService:
+    """Chargement des séries quotidiennes solaires et agrégation dans les rapports mensuels"""
+
+    @staticmethod
+    def charger(chemin, operateur_id=None, taille_lot=5000, force=False):
+        """
+        Charger un fichier de séries (CSV ou NDJSON) et recalculer les mois touchés.
+
+        Args:
+            chemin: Fichier .csv, .ndjson ou .jsonl
+            operateur_id: Limiter aux centrales d'un opérateur (None = toutes)
+            taille_lot: Lignes lues par lot
+            force: Remplacer aussi les jours des rapports transmis ou validés
+
+        Returns:
+            Bilan {'lignes_lues', 'lignes_rejetees', 'jours', 'jours_ignores', 'rapports_ignores',
+            'rapports_crees', 'mois_recalcules'}
+        """
+        requete = select(CentraleSolaire.id, CentraleSolaire.code, CentraleSolaire.puissance_installee) \
+            .where(CentraleSolaire.actif == True)
+        if operateur_id:
+            requete = requete.where(CentraleSolaire.operateur_id == operateur_id)
+        centrales = db.session.execute(requete).all()
+        codes = {code: centrale_id for centrale_id, code, _ in centrales}
+        centrales_ids = set(codes.values())
+
+        partiels, lignes_lues, lignes_rejetees = [], 0, 0
+        for lot in lire_par_lots(chemin, taille_lot):
+            lignes_lues += len(lot)
+            horodatages = DonneesSolaireService._horodatages(lot, codes, centrales_ids)
+            rejetees = horodatages['centrale_id'].isna() | horodatages['horodatage'].isna()
+            lignes_rejetees += int(rejetees.sum())
+            partiels.append(DonneesSolaireService._par_horodatage(horodatages[~rejetees]))
+
+        jours = DonneesSolaireService._par_jour(partiels)
+        bilan = {'lignes_lues': lignes_lues, 'lignes_rejetees': lignes_rejetees, 'jours': len(jours),
+                 'jours_ignores': 0, 'rapports_ignores': 0, 'rapports_crees': 0, 'mois_recalcules': 0}
+        if jours.empty:
+            return bilan
+
+        # Performance ratio du jour (%) s'il n'est pas fourni : E / (Pc x H / 1 kW/m²)
+        puissance_kwc = jours['centrale_id'].map({c: p for c, _, p in centrales}).astype(float) * 1000
+        calcule = jours['energie_produite'] / (puissance_kwc * jours['irradiation']) * 100
+        jours['performance_ratio'] = jours['performance_ratio'].fillna(calcule.replace([np.inf, -np.inf], np.nan))
+
+        rapports, bilan['rapports_crees'], verrouilles = DonneesSolaireService._rapports_des_mois(jours, force)
+        cles = list(zip(jours['centrale_id'], jours['jour'].dt.year, jours['jour'].dt.month))
+        if verrouilles:
+            # Un rapport transmis ou validé n'est pas réécrit par un chargement non forcé
+            modifiables = np.array([cle not in verrouilles for cle in cles], dtype=bool)
+            bilan['jours_ignores'] = int((~modifiables).sum())
+            bilan['rapports_ignores'] = len(verrouilles)
+            jours = jours[modifiables].reset_index(drop=True)
+            cles = [cle for cle, modifiable in zip(cles, modifiables) if modifiable]
+            bilan['jours'] = len(jours)
+            if jours.empty:
+                return bilan
+        jours['rapport_id'] = [rapports[cle] for cle in cles]
+        DonneesSolaireService._remplacer_jours(jours)
+
+        rapport_ids = sorted(set(rapports.values()))
+        bilan['mois_recalcules'] = DonneesSolaireService.agreger_rapports(rapport_ids)
+        db.session.commit()
+        return bilan
+
+    # ----- Lecture -----
+
+    @staticmethod
+    def _horodatages(lot, codes, centrales_ids):
+        """Colonnes normalisées d'un lot : centrale_id, horodatage, mesures numériques, textes"""
+        lot = lot.rename(columns={nom: ALIAS[nom] for nom in lot.columns if nom in ALIAS})
+        donnees = pd.DataFrame(index=lot.index)
+
+        if 'centrale_id' in lot:
+            centrale_id = en_nombres(lot['centrale_id'])
+            donnees['centrale_id'] = centrale_id.where(centrale_id.isin(centrales_ids))
+        else:
+            donnees['centrale_id'] = np.nan
+        if 'centrale_code' in lot:
+            par_code = lot['centrale_code'].astype(str).str.strip().map(codes).astype(float)
+            donnees['centrale_id'] = donnees['centrale_id'].fillna(par_code)
+
+        donnees['horodatage'] = en_horodatages(lot['horodatage']) if 'horodatage' in lot else pd.NaT
+        for nom in MESURES_ADDITIVES + MESURES_MOYENNEES:
+            donnees[nom] = en_nombres(lot[nom]) if nom in lot else np.nan
+        for nom in TEXTES:
+            donnees[nom] = en_textes(lot[nom]) if nom in lot else None
+        return donnees
+
+    @staticmethod
+    def _par_horodatage(donnees):
+        """Cumul partiel par (centrale, horodatage) : sommes et comptes, combinables entre lots"""
+        cles = ['centrale_id', 'horodatage']
+        groupes = donnees.groupby(cles, sort=False)
+        partiel = groupes[list(MESURES_ADDITIVES + MESURES_MOYENNEES)].sum(min_count=1)
+        comptes = groupes[list(MESURES_MOYENNEES)].count().add_prefix('n_')
+        textes = groupes[list(TEXTES)].first()
+        return pd.concat([partiel, comptes, textes], axis=1)
+
+    @staticmethod
+    def _par_jour(partiels):
+        """Réduction par (centrale, jour) des cumuls par horodatage de tous les lots"""
+        partiels = [partiel for partiel in partiels if not partiel.empty]
+        if not partiels:
+            return pd.DataFrame()
+        tout = pd.concat(partiels)
+        if tout.index.duplicated().any():
+            # Un même horodatage réparti sur plusieurs lots
+            groupes = tout.groupby(level=[0, 1], sort=False)
+            tout = pd.concat([
+                groupes[[c for c in tout.columns if c not in TEXTES]].sum(min_count=1),
+                groupes[list(TEXTES)].first()
+            ], axis=1)
+        for nom in MESURES_MOYENNEES:
+            tout[nom] = tout[nom] / tout[f'n_{nom}'].where(tout[f'n_{nom}'] > 0)
+        tout = tout.reset_index()
+        tout['jour'] = tout['horodatage'].dt.normalize()
+
+        cles = ['centrale_id', 'jour']
+        groupes = tout.groupby(cles)
+        jours = groupes[list(SOMMES_JOUR)].sum(min_count=1).join(groupes.agg(REDUCTION_JOUR))
+
+        # Pic de puissance du jour, heure du fichier ou de l'horodatage (exports infra-journaliers)
+        pics = tout.sort_values('puissance_max', ascending=False, na_position='last') \
+            .drop_duplicates(cles).set_index(cles)
+        heures = pics['heure_puissance_max']
+        if (tout['horodatage'] != tout['jour']).any():
+            heures = heures.fillna(pics['horodatage'].dt.strftime('%H:%M'))
+        jours['puissance_max'] = pics['puissance_max']
+        jours['heure_puissance_max'] = heures.where(jours['puissance_max'].notna(), None)
+
+        jours = jours.reset_index()
+        jours['centrale_id'] = jours['centrale_id'].astype(int)
+        return jours
+
+    # ----- Écriture -----
+
+    @staticmethod
+    def _rapports_des_mois(jours, force=False):
+        """
+        ({(centrale_id, annee, mois): rapport_id}, rapports créés, mois verrouillés) : rapports
+        manquants créés en brouillon ; sans `force`, les mois dont le rapport n'est plus en
+        brouillon sont verrouillés et absents du dictionnaire.
+        """
+        mois = {(int(c), j.year, j.month) for c, j in zip(jours['centrale_id'], jours['jour'])}
+        periodes = {RapportSolaire.calculer_periode_yyyymm(annee, m) for _, annee, m in mois}
+        table = RapportSolaire.__table__
+
+        def existants():
+            requete = select(table.c.id, table.c.centrale_id, table.c.annee, table.c.mois, table.c.statut).where(
+                table.c.centrale_id.in_({c for c, _, _ in mois}),
+                table.c.periode_yyyymm.in_(periodes),
+                table.c.actif == True
+            ).order_by(table.c.id.desc())
+            # Le plus ancien rapport du mois l'emporte s'il y en a plusieurs
+            return {(c, a, m): (rapport_id, statut) for rapport_id, c, a, m, statut in db.session.execute(requete)}
+
+        rapports = existants()
+        manquants = sorted(mois - set(rapports))
+        if manquants:
+            maintenant = datetime.utcnow()
+            executer_par_lots(table.insert(), [
+                dict(centrale_id=c, annee=a, mois=m, statut='brouillon',
+                     periode_debut=datetime(a, m, 1), periode_fin=datetime(a, m, calendar.monthrange(a, m)[1]),
+                     periode_yyyymm=RapportSolaire.calculer_periode_yyyymm(a, m),
+                     date_creation=maintenant, date_modification=maintenant, actif=True)
+                for c, a, m in manquants
+            ])
+            rapports = existants()
+        verrouilles = set() if force else {cle for cle in mois if rapports[cle][1] not in (None, 'brouillon')}
+        return {cle: rapports[cle][0] for cle in mois - verrouilles}, len(manquants), verrouilles
+
+    @staticmethod
+    def _remplacer_jours(jours):
+        """Supprimer les données déjà enregistrées pour ces jours puis insérer les nouvelles"""
+        table = DonneesSolaireQuotidiennes.__table__
+        executer_par_lots(
+            table.delete().where(
+                table.c.rapport_id == bindparam('b_rapport_id'),
+                table.c.date_production >= bindparam('b_debut'),
+                table.c.date_production < bindparam('b_fin')
+            ),
+            [{'b_rapport_id': int(r), 'b_debut': j.to_pydatetime(), 'b_fin': (j + timedelta(days=1)).to_pydatetime()}
+             for r, j in zip(jours['rapport_id'], jours['jour'])]
+        )
+
+        maintenant = datetime.utcnow()
+        colonnes = MESURES_ADDITIVES + MESURES_MOYENNEES + TEXTES
+        valeurs = {nom: jours[nom].astype(object).tolist() for nom in colonnes}
+        lignes = []
+        for i, (rapport_id, jour) in enumerate(zip(jours['rapport_id'], jours['jour'])):
+            ligne = {nom: valeur_sql(valeurs[nom][i]) for nom in colonnes}
+            ligne.update(rapport_id=int(rapport_id), date_production=jour.to_pydatetime(),
+                         date_creation=maintenant, date_modification=maintenant, actif=True)
+            if ligne['duree_arrets'] is None:
+                ligne['duree_arrets'] = 0.0
+            lignes.append(ligne)
+        executer_par_lots(table.insert(), lignes)
+
+    # ----- Agrégation -----
+
+    @staticmethod
+    def agreger_rapports(rapport_ids):
+        """
+        Recalculer les champs mensuels des rapports depuis leurs données quotidiennes
+        (une lecture par lot de rapports, calcul vectorisé, UPDATE groupé).
+        Ne valide pas la transaction. Retourne le nombre de rapports mis à jour.
+        """
+        quotidiennes = DonneesSolaireQuotidiennes.__table__
+        rapports = RapportSolaire.__table__
+        parametres = []
+        for i in range(0, len(rapport_ids), 500):
+            ids = rapport_ids[i:i + 500]
+            lignes = db.session.execute(
+                select(quotidiennes.c.rapport_id, quotidiennes.c.date_production, quotidiennes.c.heure_puissance_max,
+                       quotidiennes.c.energie_produite, quotidiennes.c.puissance_max, quotidiennes.c.irradiation,
+                       quotidiennes.c.temperature_ambiante_max, quotidiennes.c.temperature_ambiante_min,
+                       quotidiennes.c.humidite_relative, quotidiennes.c.duree_arrets,
+                       quotidiennes.c.performance_ratio)
+                .where(quotidiennes.c.rapport_id.in_(ids), quotidiennes.c.actif == True)
+            ).all()
+            if not lignes:
+                continue
+            contexte = {
+                rapport_id: (annee, mois, puissance)
+                for rapport_id, annee, mois, puissance in db.session.execute(
+                    select(rapports.c.id, rapports.c.annee, rapports.c.mois, CentraleSolaire.puissance_installee)
+                    .join(CentraleSolaire, CentraleSolaire.id == rapports.c.centrale_id)
+                    .where(rapports.c.id.in_(ids))
+                )
+            }
+            parametres.extend(DonneesSolaireService._agregats(lignes, contexte))
+
+        if parametres:
+            executer_par_lots(
+                rapports.update().where(rapports.c.id == bindparam('b_id'))
+                .values({nom: bindparam(nom) for nom in CHAMPS_RAPPORT + ('date_modification',)}),
+                parametres
+            )
+        return len(parametres)
+
+    @staticmethod
+    def _agregats(lignes, contexte):
+        """Paramètres d'UPDATE des rapports présents dans `lignes` (tuples des données quotidiennes)"""
+        colonnes = list(zip(*lignes))
+        rapport_id = np.array(colonnes[0], dtype=np.int64)
+        dates, heures = colonnes[1], colonnes[2]
+        energie, puissance, irradiation, t_max, t_min, humidite, arrets, pr_quotidien = (
+            np.array(colonne, dtype=float) for colonne in colonnes[3:]
+        )
+
+        groupes = Groupes(rapport_id)
+        ids = groupes.cles
+        jours_mois = np.array([calendar.monthrange(*contexte[r][:2])[1] for r in ids], dtype=float)
+        puissance_installee = np.array([contexte[r][2] or np.nan for r in ids], dtype=float)  # MWc
+
+        energie_mwh = groupes.somme(energie) / 1000
+        irradiation_totale = groupes.somme(irradiation)
+        # Performance ratio sur les jours où production et irradiation sont connues
+        mesures = ~np.isnan(energie) & ~np.isnan(irradiation)
+        energie_pr = groupes.somme(np.where(mesures, energie, np.nan)) / 1000
+        irradiation_pr = groupes.somme(np.where(mesures, irradiation, np.nan))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            performance_ratio = energie_pr / (puissance_installee * irradiation_pr) * 100
+            facteur_charge = energie_mwh / (puissance_installee * jours_mois * 24) * 100
+        performance_ratio = np.where(np.isnan(performance_ratio), groupes.moyenne(pr_quotidien), performance_ratio)
+
+        arrets_total = np.nan_to_num(groupes.somme(arrets))
+        jours_renseignes = groupes.tailles
+        pic = groupes.indice_max(puissance)
+
+        resultats = {
+            'energie_produite': energie_mwh,
+            'puissance_max': groupes.maximum(puissance) / 1000,  # MW
+            'productible_theorique': puissance_installee * irradiation_totale,  # MWh
+            'performance_ratio': performance_ratio,
+            'facteur_charge': facteur_charge,
+            'irradiation_totale': irradiation_totale,
+            'irradiation_moyenne_quotidienne': groupes.moyenne(irradiation),
+            'temperature_ambiante_moyenne': groupes.moyenne((t_max + t_min) / 2),
+            'humidite_relative_moyenne': groupes.moyenne(humidite),
+            'duree_arrets': arrets_total,
+            'disponibilite_systeme': 100 * (1 - arrets_total / (jours_renseignes * 24)),
+            'disponibilite_donnees': 100 * jours_renseignes / jours_mois,
+        }
+        maintenant = datetime.utcnow()
+        parametres = []
+        for g, rapport in enumerate(ids):
+            ligne = {nom: valeur_sql(valeurs[g]) for nom, valeurs in resultats.items()}
+            ligne['date_puissance_max'] = date_avec_heure(dates[pic[g]], heures[pic[g]]) if pic[g] >= 0 else None
+            ligne.update(b_id=int(rapport), date_modification=maintenant)
+            parametres.append(ligne)
+        return parametres
@@ -323,12 +323,11 @@ class RapportSolaireForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(RapportSolaireForm, self).__init__(*args, **kwargs)
         # Import here to avoid circular imports
-        from app.models.production_solaire import CentraleSolaire
-        # Charger les centrales actives pour la liste déroulante
-        centrales = CentraleSolaire.query.filter_by(actif=True).all()
-        self.centrale_id.choices = [(None, 'Sélectionner une centrale')] + [
-            (c.id, f"{c.nom} ({c.code})") for c in centrales
-        ]
+        from app.utils.referentiel import choix_referentiel
+        # Centrales actives pour la liste déroulante
+        self.centrale_id.choices = choix_referentiel(
+            'centrales_solaire', '{nom} ({code})', vide=(None, 'Sélectionner une centrale')
+        )
 
 
 class DonneesSolaireQuotidiennesForm(FlaskForm):
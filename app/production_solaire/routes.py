@@ -5,7 +5,7 @@ import calendar
 from flask import render_template, redirect, url_for, flash, request, abort, jsonify, current_app
 from flask_login import login_required, current_user
 from datetime import datetime, date
-from sqlalchemy import extract, func, and_
+from sqlalchemy import func, and_
 from app.production_solaire import production_solaire
 from app.production_solaire.forms import (
     RapportSolaireForm, CentraleSolaireForm, FiltreRapportSolaireForm,
@@ -17,23 +17,44 @@ from app.models.production_solaire import (
 from app.extensions import db
 from app.models.operateurs import Operateur
 from app.extensions import db
+from app.utils.cache_http import reponse_conditionnelle
 from app.utils.permissions import (
     get_accessible_operateurs, can_access_operateur, 
     filter_query_by_operateur, get_default_operateur_id
 )
+from app.utils.projections import Projection
 import calendar
 
 
-def get_accessible_centrales_solaire():
-    """Obtenir les centrales solaires accessibles selon les permissions"""
+# Champs affichés par la liste des rapports et ses filtres
+PROJECTION_RAPPORTS = Projection(RapportSolaire, (
+    'id', 'annee', 'mois', 'periode_debut', 'periode_fin', 'energie_produite',
+    'energie_disponible', 'irradiation_totale', 'irradiation_moyenne_quotidienne',
+    'performance_ratio', 'statut', 'date_creation', 'date_modification',
+    'centrale.nom', 'centrale.code', 'centrale.technologie_modules'
+), methodes=('get_periode_str',))
+PROJECTION_CENTRALES_FILTRE = Projection(CentraleSolaire, ('id', 'nom'))
+
+# Champs affichés par la liste des centrales (description tronquée à l'affichage)
+PROJECTION_CENTRALES = Projection(CentraleSolaire, (
+    'id', 'nom', 'code', 'localisation', 'province', 'puissance_installee',
+    'nombre_modules', 'statut', 'operateur.nom',
+    ('description', func.substr(CentraleSolaire.description, 1, 101))
+))
+
+
+def get_accessible_centrales_solaire(projection=None):
+    """Obtenir les centrales solaires accessibles selon les permissions (entités ou lignes projetées)"""
     if current_user.is_admin():
-        return CentraleSolaire.query.filter_by(actif=True).all()
+        query = CentraleSolaire.query.filter_by(actif=True)
     elif current_user.operateur:
-        return CentraleSolaire.query.filter_by(
+        query = CentraleSolaire.query.filter_by(
             operateur_id=current_user.operateur.id,
             actif=True
-        ).all()
-    return []
+        )
+    else:
+        return []
+    return projection.lister(query) if projection else query.all()
 
 
 @production_solaire.route('/')
@@ -49,7 +70,7 @@ def index():
         return render_template('production_solaire/no_access.html')
     
     # Obtenir les centrales accessibles
-    centrales_accessibles = get_accessible_centrales_solaire()
+    centrales_accessibles = get_accessible_centrales_solaire(PROJECTION_CENTRALES_FILTRE)
     
     # IDs des centrales accessibles (peut être vide pour super admin)
     centrale_ids = [c.id for c in centrales_accessibles] if centrales_accessibles else []
@@ -68,7 +89,7 @@ def index():
     ]
     
     # Années disponibles
-    annees = db.session.query(extract('year', RapportSolaire.periode_debut).label('annee'))\
+    annees = db.session.query(RapportSolaire.annee.label('annee'))\
         .filter(RapportSolaire.centrale_id.in_(centrale_ids))\
         .distinct().order_by('annee').all()
     filtre_form.annee.choices = [(None, 'Toutes les années')] + [(int(a.annee), str(a.annee)) for a in annees]
@@ -77,15 +98,15 @@ def index():
         if filtre_form.centrale_id.data is not None:
             query = query.filter(RapportSolaire.centrale_id == filtre_form.centrale_id.data)
         if filtre_form.annee.data is not None:
-            query = query.filter(extract('year', RapportSolaire.periode_debut) == filtre_form.annee.data)
+            query = query.filter(RapportSolaire.filtre_annee(filtre_form.annee.data))
         if filtre_form.mois.data:
             query = query.filter(RapportSolaire.mois == int(filtre_form.mois.data))
         if filtre_form.statut.data:
             query = query.filter(RapportSolaire.statut == filtre_form.statut.data)
     
     # Pagination
-    rapports = query.order_by(RapportSolaire.periode_debut.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    rapports = PROJECTION_RAPPORTS.paginer(
+        query.order_by(RapportSolaire.periode_debut.desc()), page, per_page
     )
     
     # Statistiques générales
@@ -400,7 +421,7 @@ def supprimer_rapport(id):
 @login_required
 def liste_centrales():
     """Liste des centrales solaires"""
-    centrales = get_accessible_centrales_solaire()
+    centrales = get_accessible_centrales_solaire(PROJECTION_CENTRALES)
     
     return render_template('production_solaire/liste_centrales.html',
                          centrales=centrales,
@@ -539,6 +560,7 @@ def detail_centrale(id):
 
 @production_solaire.route('/api/stats')
 @login_required
+@reponse_conditionnelle(CentraleSolaire, RapportSolaire)
 def api_stats():
     """API pour les statistiques de production solaire"""
     centrales_accessibles = get_accessible_centrales_solaire()
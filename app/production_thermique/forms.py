@@ -281,12 +281,11 @@ class RapportThermiqueForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(RapportThermiqueForm, self).__init__(*args, **kwargs)
         # Import here to avoid circular imports
-        from app.models.production_thermique import CentraleThermique
-        # Charger les centrales actives pour la liste déroulante
-        centrales = CentraleThermique.query.filter_by(actif=True).all()
-        self.centrale_id.choices = [(None, 'Sélectionner une centrale')] + [
-            (c.id, f"{c.nom} ({c.code})") for c in centrales
-        ]
+        from app.utils.referentiel import choix_referentiel
+        # Centrales actives pour la liste déroulante
+        self.centrale_id.choices = choix_referentiel(
+            'centrales_thermique', '{nom} ({code})', vide=(None, 'Sélectionner une centrale')
+        )
 
 
 class GroupeProductionThermiqueForm(FlaskForm):
@@ -5,7 +5,7 @@ import calendar
 from flask import render_template, redirect, url_for, flash, request, abort, jsonify, current_app
 from flask_login import login_required, current_user
 from datetime import datetime, date
-from sqlalchemy import extract, func, and_
+from sqlalchemy import func, and_
 from app.production_thermique import production_thermique
 from app.production_thermique.forms import (
     RapportThermiqueForm, CentraleThermiqueForm, FiltreRapportThermiqueForm,
@@ -57,7 +57,7 @@ def index():
     # Années disponibles pour les filtres
     annees = []
     if centrale_ids:
-        annees = db.session.query(extract('year', RapportThermique.periode_debut).label('annee'))\
+        annees = db.session.query(RapportThermique.annee.label('annee'))\
             .filter(RapportThermique.centrale_id.in_(centrale_ids))\
             .distinct().order_by('annee').all()
     
@@ -92,7 +92,7 @@ def index():
     
     annee_param = request.args.get('annee')
     if annee_param and annee_param.isdigit():
-        query = query.filter(extract('year', RapportThermique.periode_debut) == int(annee_param))
+        query = query.filter(RapportThermique.filtre_annee(int(annee_param)))
     
     centrale_param = request.args.get('centrale_id')
     if centrale_param and centrale_param.isdigit():
@@ -4,17 +4,19 @@ Routes API pour la production thermique
 from flask import jsonify, request
 from flask_login import login_required, current_user
 from datetime import datetime
-from sqlalchemy import extract, func
+from sqlalchemy import func
 from app.production_thermique import production_thermique
 from app.models.production_thermique import (
     CentraleThermique, RapportThermique
 )
 from app.extensions import db
 from app.production_thermique.utils import get_accessible_centrales_thermique
+from app.utils.cache_http import reponse_conditionnelle
 
 
 @production_thermique.route('/api/statistiques')
 @login_required
+@reponse_conditionnelle(CentraleThermique, RapportThermique)
 def api_statistiques():
     """API pour les statistiques de production thermique"""
     centrales_accessibles = get_accessible_centrales_thermique()
@@ -90,7 +92,7 @@ def api_filters():
 
     annee_param = request.args.get('annee')
     if annee_param and annee_param.isdigit():
-        query = query.filter(extract('year', RapportThermique.periode_debut) == int(annee_param))
+        query = query.filter(RapportThermique.filtre_annee(int(annee_param)))
 
     centrale_param = request.args.get('centrale_id')
     if centrale_param and centrale_param.isdigit():
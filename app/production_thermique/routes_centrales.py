@@ -12,13 +12,22 @@ from app.models.production_thermique import (
 from app.models.operateurs import Operateur
 from app.extensions import db
 from app.production_thermique.utils import get_accessible_centrales_thermique
+from app.utils.projections import Projection
+
+
+# Champs affichés par la liste des centrales (description tronquée à l'affichage)
+PROJECTION_CENTRALES = Projection(CentraleThermique, (
+    'id', 'nom', 'code', 'localisation', 'province', 'puissance_installee',
+    'type_combustible', 'nombre_groupes', 'statut', 'operateur.nom',
+    ('description', func.substr(CentraleThermique.description, 1, 101))
+))
 
 
 @production_thermique.route('/centrales')
 @login_required
 def liste_centrales():
     """Liste des centrales thermiques"""
-    centrales = get_accessible_centrales_thermique()
+    centrales = get_accessible_centrales_thermique(PROJECTION_CENTRALES)
 
     return render_template('production_thermique/liste_centrales.html',
                          centrales=centrales,
@@ -5,7 +5,7 @@ import calendar
 from flask import render_template, redirect, url_for, flash, request, abort, current_app
 from flask_login import login_required, current_user
 from datetime import datetime, date
-from sqlalchemy import extract, func, and_
+from sqlalchemy import func, and_
 from app.production_thermique import production_thermique
 from app.production_thermique.forms import (
     RapportThermiqueForm, FiltreRapportThermiqueForm
@@ -15,6 +15,17 @@ from app.models.production_thermique import (
 )
 from app.extensions import db
 from app.production_thermique.utils import get_accessible_centrales_thermique
+from app.utils.projections import Projection
+
+
+# Champs affichés par la liste des rapports et ses filtres
+PROJECTION_RAPPORTS = Projection(RapportThermique, (
+    'id', 'annee', 'mois', 'periode_debut', 'periode_fin', 'energie_produite',
+    'energie_disponible', 'facteur_charge', 'consommation_combustible',
+    'consommation_specifique_reelle', 'statut', 'date_creation', 'date_modification',
+    'centrale.nom', 'centrale.code', 'centrale.type_combustible'
+), methodes=('get_periode_str',))
+PROJECTION_CENTRALES_FILTRE = Projection(CentraleThermique, ('id', 'nom'))
 
 
 @production_thermique.route('/')
@@ -30,7 +41,7 @@ def index():
         return render_template('production_thermique/no_access.html')
 
     # Obtenir les centrales accessibles
-    centrales_accessibles = get_accessible_centrales_thermique()
+    centrales_accessibles = get_accessible_centrales_thermique(PROJECTION_CENTRALES_FILTRE)
 
     # IDs des centrales accessibles (peut être vide pour super admin)
     centrale_ids = [c.id for c in centrales_accessibles] if centrales_accessibles else []
@@ -49,7 +60,7 @@ def index():
     ]
 
     # Années disponibles
-    annees = db.session.query(extract('year', RapportThermique.periode_debut).label('annee'))\
+    annees = db.session.query(RapportThermique.annee.label('annee'))\
         .filter(RapportThermique.centrale_id.in_(centrale_ids))\
         .distinct().order_by('annee').all()
     filtre_form.annee.choices = [(None, 'Toutes les années')] + [(int(a.annee), str(a.annee)) for a in annees]
@@ -58,15 +69,15 @@ def index():
         if filtre_form.centrale_id.data is not None:
             query = query.filter(RapportThermique.centrale_id == filtre_form.centrale_id.data)
         if filtre_form.annee.data is not None:
-            query = query.filter(extract('year', RapportThermique.periode_debut) == filtre_form.annee.data)
+            query = query.filter(RapportThermique.filtre_annee(filtre_form.annee.data))
         if filtre_form.mois.data:
             query = query.filter(RapportThermique.mois == int(filtre_form.mois.data))
         if filtre_form.statut.data:
             query = query.filter(RapportThermique.statut == filtre_form.statut.data)
 
     # Pagination
-    rapports = query.order_by(RapportThermique.periode_debut.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    rapports = PROJECTION_RAPPORTS.paginer(
+        query.order_by(RapportThermique.periode_debut.desc()), page, per_page
     )
 
     # Statistiques générales
@@ -5,13 +5,15 @@ from flask_login import current_user
 from app.models.production_thermique import CentraleThermique
 
 
-def get_accessible_centrales_thermique():
-    """Obtenir les centrales thermiques accessibles selon les permissions"""
+def get_accessible_centrales_thermique(projection=None):
+    """Obtenir les centrales thermiques accessibles selon les permissions (entités ou lignes projetées)"""
     if current_user.is_admin():
-        return CentraleThermique.query.filter_by(actif=True).all()
+        query = CentraleThermique.query.filter_by(actif=True)
     elif current_user.operateur:
-        return CentraleThermique.query.filter_by(
+        query = CentraleThermique.query.filter_by(
             operateur_id=current_user.operateur.id,
             actif=True
-        ).all()
-    return []
\ No newline at end of file
+        )
+    else:
+        return []
+    return projection.lister(query) if projection else query.all()
\ No newline at end of file
@@ -0,0 +1,435 @@
+"""
+Chargement en masse des données quotidiennes de transport et agrégation
+mensuelle (RapportTransport) et annuelle (SyntheseAnnuelleLigne).
+
+Le chargeur accepte un fichier CSV ou NDJSON d'une ligne par ligne de
+transport et par jour, ou de relevés infra-journaliers (plusieurs lignes par
+jour : énergies et incidents additionnés, pointe et creux retenus avec leur
+heure). Il est lu par lots de taille bornée ; chaque jour est rattaché au
+rapport mensuel de sa ligne (créé en brouillon s'il n'existe pas) et
+remplace les données déjà enregistrées pour ce jour ; les jours d'un rapport
+transmis ou validé sont ignorés, sauf chargement forcé. Les rapports des mois
+touchés et les synthèses annuelles de leurs lignes sont ensuite recalculés
+par des réductions NumPy et écrits en masse : les tableaux de bord lisent
+ces agrégats sans parcourir les données quotidiennes.
+
+Colonnes reconnues : ``ligne`` (code) ou ``ligne_id``, ``date`` ou
+``horodatage``, ``energie_transitee`` (MWh), ``puissance_maximale``,
+``heure_puissance_max``, ``puissance_minimale``, ``heure_puissance_min``,
+``puissance_moyenne`` (MW), ``nombre_incidents``, ``duree_incidents``
+(minutes), ``type_incidents``, ``temperature_max``, ``humidite``.
+"""
+import calendar
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select
+
+from app.extensions import db
+from app.models.transport import DonneesTransportQuotidiennes, LigneTransport, RapportTransport, SyntheseAnnuelleLigne
+from app.utils.agregation import (
+    Groupes, date_avec_heure, en_horodatages, en_nombres, en_textes, executer_par_lots, lire_par_lots, valeur_sql
+)
+from app.utils.imports import ModuleParesseux
+
+np = ModuleParesseux('numpy')
+pd = ModuleParesseux('pandas')
+
+
+ALIAS = {
+    'date': 'horodatage', 'ligne': 'ligne_code', 'code': 'ligne_code',
+    'energie': 'energie_transitee', 'puissance_max': 'puissance_maximale', 'puissance_min': 'puissance_minimale',
+    'incidents': 'nombre_incidents',
+}
+
+MESURES = (
+    'energie_transitee', 'puissance_maximale', 'puissance_minimale', 'puissance_moyenne',
+    'nombre_incidents', 'duree_incidents', 'temperature_max', 'humidite'
+)
+# Additionnées entre les relevés d'un même jour
+SOMMES_JOUR = ('energie_transitee', 'nombre_incidents', 'duree_incidents')
+# Moyennées : cumul (s_) et nombre de valeurs (n_), combinables entre lots
+MOYENNES_JOUR = ('puissance_moyenne', 'humidite')
+
+MINUTES_JOUR = 24 * 60
+
+# Champs du rapport mensuel recalculés depuis les données quotidiennes
+CHAMPS_RAPPORT = (
+    'energie_transitee', 'energie_maximale', 'heure_pointe', 'date_pointe', 'energie_minimale', 'heure_creuse',
+    'facteur_charge', 'taux_utilisation', 'charge_moyenne', 'nombre_incidents', 'duree_total_incidents',
+    'disponibilite', 'temperature_maximale', 'humidite_moyenne'
+)
+
+
+class DonneesTransportService:
+    """Chargement des données quotidiennes de transport et agrégats mensuels et annuels"""
+
+    @staticmethod
+    def charger(chemin, operateur_id=None, taille_lot=5000, force=False):
+        """
+        Charger un fichier de données quotidiennes (CSV ou NDJSON) puis recalculer
+        les rapports des mois touchés et les synthèses annuelles de leurs lignes.
+
+        Args:
+            chemin: Fichier .csv, .ndjson ou .jsonl
+            operateur_id: Limiter aux lignes d'un opérateur (None = toutes)
+            taille_lot: Lignes lues par lot
+            force: Remplacer aussi les jours des rapports transmis ou validés
+
+        Returns:
+            Bilan {'lignes_lues', 'lignes_rejetees', 'jours', 'jours_ignores', 'rapports_ignores',
+            'rapports_crees', 'mois_recalcules', 'syntheses_recalculees'}
+        """
+        requete = select(LigneTransport.id, LigneTransport.code).where(LigneTransport.actif == True)
+        if operateur_id:
+            requete = requete.where(LigneTransport.operateur_id == operateur_id)
+        codes = {code: ligne_id for ligne_id, code in db.session.execute(requete)}
+        lignes_ids = set(codes.values())
+
+        partiels, lignes_lues, lignes_rejetees = [], 0, 0
+        for lot in lire_par_lots(chemin, taille_lot):
+            lignes_lues += len(lot)
+            releves = DonneesTransportService._releves(lot, codes, lignes_ids)
+            rejetes = releves['ligne_id'].isna() | releves['jour'].isna()
+            lignes_rejetees += int(rejetes.sum())
+            partiels.append(DonneesTransportService._par_jour(releves[~rejetes]))
+
+        partiels = [partiel for partiel in partiels if not partiel.empty]
+        bilan = {'lignes_lues': lignes_lues, 'lignes_rejetees': lignes_rejetees, 'jours': 0,
+                 'jours_ignores': 0, 'rapports_ignores': 0, 'rapports_crees': 0,
+                 'mois_recalcules': 0, 'syntheses_recalculees': 0}
+        if not partiels:
+            return bilan
+
+        # Un même jour peut être réparti sur plusieurs lots
+        jours = DonneesTransportService._par_jour(pd.concat(partiels, ignore_index=True))
+        for nom in MOYENNES_JOUR:
+            jours[nom] = jours[f's_{nom}'] / jours[f'n_{nom}'].where(jours[f'n_{nom}'] > 0)
+        jours['ligne_id'] = jours['ligne_id'].astype(int)
+        bilan['jours'] = len(jours)
+
+        rapports, bilan['rapports_crees'], verrouilles = DonneesTransportService._rapports_des_mois(jours, force)
+        cles = list(zip(jours['ligne_id'], jours['jour'].dt.year, jours['jour'].dt.month))
+        if verrouilles:
+            # Un rapport transmis ou validé n'est pas réécrit par un chargement non forcé
+            modifiables = np.array([cle not in verrouilles for cle in cles], dtype=bool)
+            bilan['jours_ignores'] = int((~modifiables).sum())
+            bilan['rapports_ignores'] = len(verrouilles)
+            jours = jours[modifiables].reset_index(drop=True)
+            cles = [cle for cle, modifiable in zip(cles, modifiables) if modifiable]
+            bilan['jours'] = len(jours)
+            if jours.empty:
+                return bilan
+        jours['rapport_id'] = [rapports[cle] for cle in cles]
+        DonneesTransportService._remplacer_jours(jours)
+
+        bilan['mois_recalcules'] = DonneesTransportService.agreger_rapports(sorted(set(rapports.values())))
+        annees = {(ligne_id, annee) for ligne_id, annee, _ in rapports}
+        bilan['syntheses_recalculees'] = DonneesTransportService.agreger_syntheses(annees)
+        db.session.commit()
+        return bilan
+
+    @staticmethod
+    def agreger_periode(annee=None, ligne_id=None):
+        """Recalculer les rapports et synthèses d'une année et/ou d'une ligne. Ne valide pas la transaction."""
+        table = RapportTransport.__table__
+        requete = select(table.c.id, table.c.ligne_id, table.c.annee).where(table.c.actif == True)
+        if annee is not None:
+            requete = requete.where(table.c.annee == annee)
+        if ligne_id is not None:
+            requete = requete.where(table.c.ligne_id == ligne_id)
+        rapports = db.session.execute(requete).all()
+        mois = DonneesTransportService.agreger_rapports([rapport_id for rapport_id, _, _ in rapports])
+        syntheses = DonneesTransportService.agreger_syntheses({(l, a) for _, l, a in rapports})
+        return mois, syntheses
+
+    # ----- Lecture -----
+
+    @staticmethod
+    def _releves(lot, codes, lignes_ids):
+        """Colonnes normalisées d'un lot : ligne_id, jour, heures, mesures, cumuls des moyennes"""
+        lot = lot.rename(columns={nom: ALIAS[nom] for nom in lot.columns if nom in ALIAS})
+        releves = pd.DataFrame(index=lot.index)
+
+        if 'ligne_id' in lot:
+            ligne_id = en_nombres(lot['ligne_id'])
+            releves['ligne_id'] = ligne_id.where(ligne_id.isin(lignes_ids))
+        else:
+            releves['ligne_id'] = np.nan
+        if 'ligne_code' in lot:
+            par_code = lot['ligne_code'].astype(str).str.strip().map(codes).astype(float)
+            releves['ligne_id'] = releves['ligne_id'].fillna(par_code)
+
+        horodatages = en_horodatages(lot['horodatage']) if 'horodatage' in lot \
+            else pd.Series(pd.NaT, index=lot.index, dtype='datetime64[ns]')
+        releves['jour'] = horodatages.dt.normalize()
+        for nom in MESURES:
+            releves[nom] = en_nombres(lot[nom]) if nom in lot else np.nan
+        for nom in MOYENNES_JOUR:
+            releves[f's_{nom}'] = releves.pop(nom)
+            releves[f'n_{nom}'] = releves[f's_{nom}'].notna().astype(int)
+        releves['type_incidents'] = en_textes(lot['type_incidents']) if 'type_incidents' in lot else None
+
+        # Heure fournie, sinon celle du relevé pour les fichiers infra-journaliers
+        heures = pd.Series(None, index=lot.index, dtype=object)
+        if (horodatages.notna() & (horodatages != releves['jour'])).any():
+            heures = horodatages.dt.strftime('%H:%M')
+        for nom in ('heure_puissance_max', 'heure_puissance_min'):
+            releves[nom] = en_textes(lot[nom]).fillna(heures) if nom in lot else heures
+        return releves
+
+    @staticmethod
+    def _par_jour(releves):
+        """Réduction par (ligne, jour), applicable aussi aux cumuls partiels de plusieurs lots"""
+        if releves.empty:
+            return pd.DataFrame()
+        cles = ['ligne_id', 'jour']
+        groupes = releves.groupby(cles)
+        cumuls = [f'{prefixe}_{nom}' for nom in MOYENNES_JOUR for prefixe in ('s', 'n')]
+        jours = groupes[list(SOMMES_JOUR)].sum(min_count=1).join(groupes[cumuls].sum()).join(groupes.agg({
+            'puissance_maximale': 'max', 'puissance_minimale': 'min', 'temperature_max': 'max',
+            'type_incidents': 'first',
+        }))
+        # Heures de la pointe et du creux : relevé portant l'extrême du jour
+        # (tri stable : à égalité, le premier relevé du fichier)
+        pointes = releves.sort_values('puissance_maximale', ascending=False, na_position='last', kind='stable') \
+            .drop_duplicates(cles).set_index(cles)
+        creux = releves.sort_values('puissance_minimale', na_position='last', kind='stable') \
+            .drop_duplicates(cles).set_index(cles)
+        jours['heure_puissance_max'] = pointes['heure_puissance_max']
+        jours['heure_puissance_min'] = creux['heure_puissance_min']
+        return jours.reset_index()
+
+    # ----- Écriture -----
+
+    @staticmethod
+    def _rapports_des_mois(jours, force=False):
+        """
+        ({(ligne_id, annee, mois): rapport_id}, rapports créés, mois verrouillés) : rapports
+        manquants créés en brouillon ; sans `force`, les mois dont le rapport n'est plus en
+        brouillon sont verrouillés et absents du dictionnaire.
+        """
+        mois = {(int(l), j.year, j.month) for l, j in zip(jours['ligne_id'], jours['jour'])}
+        table = RapportTransport.__table__
+
+        def existants():
+            requete = select(table.c.id, table.c.ligne_id, table.c.annee, table.c.mois, table.c.statut).where(
+                table.c.ligne_id.in_({l for l, _, _ in mois}),
+                table.c.annee.in_({a for _, a, _ in mois}),
+                table.c.actif == True
+            ).order_by(table.c.id.desc())
+            # Le plus ancien rapport du mois l'emporte s'il y en a plusieurs
+            return {(l, a, m): (rapport_id, statut) for rapport_id, l, a, m, statut in db.session.execute(requete)}
+
+        rapports = existants()
+        manquants = sorted(mois - set(rapports))
+        if manquants:
+            maintenant = datetime.utcnow()
+            executer_par_lots(table.insert(), [
+                dict(ligne_id=l, annee=a, mois=m, statut='brouillon',
+                     periode_debut=datetime(a, m, 1), periode_fin=datetime(a, m, calendar.monthrange(a, m)[1]),
+                     date_creation=maintenant, date_modification=maintenant, actif=True)
+                for l, a, m in manquants
+            ])
+            rapports = existants()
+        verrouilles = set() if force else {cle for cle in mois if rapports[cle][1] not in (None, 'brouillon')}
+        return {cle: rapports[cle][0] for cle in mois - verrouilles}, len(manquants), verrouilles
+
+    @staticmethod
+    def _remplacer_jours(jours):
+        """Supprimer les données déjà enregistrées pour ces jours puis insérer les nouvelles"""
+        table = DonneesTransportQuotidiennes.__table__
+        executer_par_lots(
+            table.delete().where(
+                table.c.rapport_id == bindparam('b_rapport_id'),
+                table.c.date >= bindparam('b_debut'),
+                table.c.date < bindparam('b_fin')
+            ),
+            [{'b_rapport_id': int(r), 'b_debut': j.to_pydatetime(), 'b_fin': (j + timedelta(days=1)).to_pydatetime()}
+             for r, j in zip(jours['rapport_id'], jours['jour'])]
+        )
+
+        maintenant = datetime.utcnow()
+        colonnes = MESURES + ('type_incidents', 'heure_puissance_max', 'heure_puissance_min')
+        valeurs = {nom: jours[nom].astype(object).tolist() for nom in colonnes}
+        lignes = []
+        for i, (rapport_id, jour) in enumerate(zip(jours['rapport_id'], jours['jour'])):
+            ligne = {nom: valeur_sql(valeurs[nom][i]) for nom in colonnes}
+            ligne.update(rapport_id=int(rapport_id), date=jour.to_pydatetime(),
+                         date_creation=maintenant, date_modification=maintenant, actif=True)
+            ligne['nombre_incidents'] = int(ligne['nombre_incidents'] or 0)
+            ligne['duree_incidents'] = ligne['duree_incidents'] or 0.0
+            lignes.append(ligne)
+        executer_par_lots(table.insert(), lignes)
+
+    # ----- Agrégation -----
+
+    @staticmethod
+    def _donnees(*conditions):
+        """Données quotidiennes actives en tableaux, avec la ligne, l'année et le mois de leur rapport"""
+        quotidiennes = DonneesTransportQuotidiennes.__table__
+        rapports = RapportTransport.__table__
+        lignes = db.session.execute(
+            select(quotidiennes.c.rapport_id, rapports.c.ligne_id, rapports.c.annee, rapports.c.mois,
+                   LigneTransport.capacite_transport, quotidiennes.c.date, quotidiennes.c.heure_puissance_max,
+                   quotidiennes.c.heure_puissance_min, quotidiennes.c.energie_transitee,
+                   quotidiennes.c.puissance_maximale, quotidiennes.c.puissance_minimale,
+                   quotidiennes.c.puissance_moyenne, quotidiennes.c.nombre_incidents,
+                   quotidiennes.c.duree_incidents, quotidiennes.c.temperature_max, quotidiennes.c.humidite)
+            .join(rapports, rapports.c.id == quotidiennes.c.rapport_id)
+            .join(LigneTransport, LigneTransport.id == rapports.c.ligne_id)
+            .where(quotidiennes.c.actif == True, *conditions)
+        ).all()
+        if not lignes:
+            return None
+        colonnes = list(zip(*lignes))
+        donnees = {nom: np.array(colonne, dtype=np.int64)
+                   for nom, colonne in zip(('rapport_id', 'ligne_id', 'annee', 'mois'), colonnes[:4])}
+        donnees['capacite'] = np.array(colonnes[4], dtype=float)  # MVA
+        donnees.update(dates=colonnes[5], heures_max=colonnes[6], heures_min=colonnes[7])
+        for nom, colonne in zip(MESURES, colonnes[8:]):
+            donnees[nom] = np.array(colonne, dtype=float)
+        # Charge moyenne du jour : mesurée, sinon énergie / 24 h
+        donnees['charge'] = np.where(np.isnan(donnees['puissance_moyenne']),
+                                     donnees['energie_transitee'] / 24, donnees['puissance_moyenne'])
+        return donnees
+
+    @staticmethod
+    def _indicateurs(groupes, donnees):
+        """Agrégats communs aux rapports et aux synthèses : énergie, pointe, charge, incidents, disponibilité"""
+        premieres = groupes.ordre[groupes.debuts]
+        pointe = groupes.maximum(donnees['puissance_maximale'])
+        charge = groupes.moyenne(donnees['charge'])
+        minutes = np.nan_to_num(groupes.somme(donnees['duree_incidents']))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            facteur_charge = charge / pointe * 100
+            taux_utilisation = pointe / donnees['capacite'][premieres] * 100
+        return {
+            'energie_transitee': groupes.somme(donnees['energie_transitee']),
+            'pointe': pointe,
+            'charge_moyenne': charge,
+            'facteur_charge': np.where(pointe > 0, facteur_charge, np.nan),
+            'taux_utilisation': np.where(donnees['capacite'][premieres] > 0, taux_utilisation, np.nan),
+            'nombre_incidents': np.nan_to_num(groupes.somme(donnees['nombre_incidents'])),
+            'minutes_incidents': minutes,
+            'disponibilite': np.clip(100 * (1 - minutes / (groupes.tailles * MINUTES_JOUR)), 0, 100),
+        }
+
+    @staticmethod
+    def agreger_rapports(rapport_ids):
+        """
+        Recalculer les champs mensuels des rapports depuis leurs données quotidiennes
+        (lecture par lots de 500 rapports, UPDATE groupé ; un champ sans donnée garde
+        sa saisie). Ne valide pas la transaction. Retourne le nombre de rapports mis à jour.
+        """
+        quotidiennes = DonneesTransportQuotidiennes.__table__
+        parametres = []
+        for i in range(0, len(rapport_ids), 500):
+            donnees = DonneesTransportService._donnees(quotidiennes.c.rapport_id.in_(rapport_ids[i:i + 500]))
+            if donnees is not None:
+                parametres.extend(DonneesTransportService._agregats_rapports(donnees))
+
+        if parametres:
+            table = RapportTransport.__table__
+            valeurs = {nom: func.coalesce(bindparam(nom), table.c[nom]) for nom in CHAMPS_RAPPORT}
+            valeurs['date_modification'] = bindparam('date_modification')
+            executer_par_lots(table.update().where(table.c.id == bindparam('b_id')).values(valeurs), parametres)
+        return len(parametres)
+
+    @staticmethod
+    def _agregats_rapports(donnees):
+        groupes = Groupes(donnees['rapport_id'])
+        indicateurs = DonneesTransportService._indicateurs(groupes, donnees)
+        pointe = groupes.indice_max(donnees['puissance_maximale'])
+        creux = groupes.indice_max(-donnees['puissance_minimale'])
+        resultats = {
+            'energie_transitee': indicateurs['energie_transitee'],
+            'energie_maximale': indicateurs['pointe'],
+            'energie_minimale': groupes.minimum(donnees['puissance_minimale']),
+            'facteur_charge': indicateurs['facteur_charge'],
+            'taux_utilisation': indicateurs['taux_utilisation'],
+            'charge_moyenne': indicateurs['charge_moyenne'],
+            'nombre_incidents': indicateurs['nombre_incidents'],
+            'duree_total_incidents': indicateurs['minutes_incidents'] / 60,  # heures
+            'disponibilite': indicateurs['disponibilite'],
+            'temperature_maximale': groupes.maximum(donnees['temperature_max']),
+            'humidite_moyenne': groupes.moyenne(donnees['humidite']),
+        }
+        dates, heures_max, heures_min = donnees['dates'], donnees['heures_max'], donnees['heures_min']
+        maintenant = datetime.utcnow()
+        parametres = []
+        for g, rapport_id in enumerate(groupes.cles):
+            ligne = {nom: valeur_sql(valeurs[g]) for nom, valeurs in resultats.items()}
+            ligne['nombre_incidents'] = int(ligne['nombre_incidents'])
+            p, c = pointe[g], creux[g]
+            ligne['heure_pointe'] = heures_max[p] if p >= 0 else None
+            ligne['date_pointe'] = date_avec_heure(dates[p], heures_max[p]) if p >= 0 else None
+            ligne['heure_creuse'] = heures_min[c] if c >= 0 else None
+            ligne.update(b_id=int(rapport_id), date_modification=maintenant)
+            parametres.append(ligne)
+        return parametres
+
+    @staticmethod
+    def agreger_syntheses(lignes_annees):
+        """
+        Recalculer les synthèses annuelles des couples (ligne_id, annee) depuis les
+        données quotidiennes de tous les rapports de l'année. Les synthèses sont
+        remplacées ; un couple sans donnée n'a plus de synthèse. Ne valide pas la
+        transaction. Retourne le nombre de synthèses écrites.
+        """
+        lignes_annees = sorted({(int(l), int(a)) for l, a in lignes_annees})
+        if not lignes_annees:
+            return 0
+        rapports = RapportTransport.__table__
+        lignes = []
+        for i in range(0, len(lignes_annees), 500):
+            couples = lignes_annees[i:i + 500]
+            donnees = DonneesTransportService._donnees(
+                rapports.c.ligne_id.in_({l for l, _ in couples}), rapports.c.annee.in_({a for _, a in couples})
+            )
+            if donnees is not None:
+                lignes.extend(DonneesTransportService._agregats_syntheses(donnees, set(couples)))
+
+        table = SyntheseAnnuelleLigne.__table__
+        executer_par_lots(
+            table.delete().where(table.c.ligne_id == bindparam('b_ligne_id'), table.c.annee == bindparam('b_annee')),
+            [{'b_ligne_id': l, 'b_annee': a} for l, a in lignes_annees]
+        )
+        if lignes:
+            executer_par_lots(table.insert(), lignes)
+        return len(lignes)
+
+    @staticmethod
+    def _agregats_syntheses(donnees, couples):
+        cles = donnees['ligne_id'] * 10000 + donnees['annee']
+        groupes = Groupes(cles)
+        indicateurs = DonneesTransportService._indicateurs(groupes, donnees)
+        pointe = groupes.indice_max(donnees['puissance_maximale'])
+        # Mois renseignés : couples (ligne, année, mois) distincts par (ligne, année)
+        mois_distincts = np.unique(cles * 100 + donnees['mois']) // 100
+        mois_renseignes = np.searchsorted(mois_distincts, groupes.cles, side='right') \
+            - np.searchsorted(mois_distincts, groupes.cles, side='left')
+
+        maintenant = datetime.utcnow()
+        lignes = []
+        for g, cle in enumerate(groupes.cles):
+            ligne_id, annee = int(cle // 10000), int(cle % 10000)
+            if (ligne_id, annee) not in couples:
+                continue
+            p = pointe[g]
+            ligne = {
+                'ligne_id': ligne_id, 'annee': annee,
+                'energie_transitee': valeur_sql(indicateurs['energie_transitee'][g]),
+                'puissance_pointe': valeur_sql(indicateurs['pointe'][g]),
+                'date_pointe': date_avec_heure(donnees['dates'][p], donnees['heures_max'][p]) if p >= 0 else None,
+                'charge_moyenne': valeur_sql(indicateurs['charge_moyenne'][g]),
+                'facteur_charge': valeur_sql(indicateurs['facteur_charge'][g]),
+                'taux_utilisation': valeur_sql(indicateurs['taux_utilisation'][g]),
+                'nombre_incidents': int(indicateurs['nombre_incidents'][g]),
+                'minutes_incidents': valeur_sql(indicateurs['minutes_incidents'][g]),
+                'disponibilite': valeur_sql(indicateurs['disponibilite'][g]),
+                'jours_renseignes': int(groupes.tailles[g]),
+                'mois_renseignes': int(mois_renseignes[g]),
+                'date_creation': maintenant, 'date_modification': maintenant, 'actif': True,
+            }
+            lignes.append(ligne)
+        return lignes
@@ -263,22 +263,11 @@ class TransformateurTransportForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(TransformateurTransportForm, self).__init__(*args, **kwargs)
         # Configurer les choix de postes selon les permissions
-        from app.models.transport import PosteTransport
-        from flask_login import current_user
+        from app.utils.referentiel import choix_accessibles
         
-        if current_user.is_admin():
-            postes = PosteTransport.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            postes = PosteTransport.query.filter_by(
-                operateur_id=current_user.operateur_id,
-                actif=True
-            ).all()
-        else:
-            postes = []
-        
-        self.poste_id.choices = [('', 'Sélectionner un poste')] + [
-            (p.id, f"{p.nom} ({p.operateur.nom})") for p in postes
-        ]
+        self.poste_id.choices = choix_accessibles(
+            'postes_transport', '{nom} ({operateur})', vide=('', 'Sélectionner un poste')
+        )
 
 
 class RapportTransportForm(FlaskForm):
@@ -348,22 +337,11 @@ class RapportTransportForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(RapportTransportForm, self).__init__(*args, **kwargs)
         # Configurer les choix de lignes selon les permissions
-        from app.models.transport import LigneTransport
-        from flask_login import current_user
-        
-        if current_user.is_admin():
-            lignes = LigneTransport.query.filter_by(actif=True).all()
-        elif current_user.operateur_id:
-            lignes = LigneTransport.query.filter_by(
-                operateur_id=current_user.operateur_id,
-                actif=True
-            ).all()
-        else:
-            lignes = []
+        from app.utils.referentiel import choix_accessibles
         
-        self.ligne_id.choices = [('', 'Sélectionner une ligne')] + [
-            (l.id, f"{l.nom} ({l.operateur.nom})") for l in lignes
-        ]
+        self.ligne_id.choices = choix_accessibles(
+            'lignes_transport', '{nom} ({operateur})', vide=('', 'Sélectionner une ligne')
+        )
 
 
 class FiltreTransportForm(FlaskForm):
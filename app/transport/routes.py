@@ -5,13 +5,20 @@ Gestion des lignes de transport, postes et transformateurs
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort
 from flask_login import login_required, current_user
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 import json
 
 from app.extensions import db
-from app.models.transport import LigneTransport, PosteTransport, TransformateurTransport, RapportTransport
+from app.models.transport import (
+    LigneTransport, PosteTransport, TransformateurTransport, RapportTransport, SyntheseAnnuelleLigne
+)
 from app.models.operateurs import Operateur
+from app.utils.cache_http import reponse_conditionnelle
+from app.utils.pagination import paginer_par_curseur
+from app.utils.referentiel import choix_accessibles, choix_referentiel
+from app.utils.serialisation import Champ, Schema, reponse_flux
 from app.transport.forms import (
     LigneTransportForm, PosteTransportForm, TransformateurTransportForm, 
     RapportTransportForm, FiltreTransportForm
@@ -160,10 +167,7 @@ def nouvelle_ligne():
     # Limiter les opérateurs selon les permissions
     if current_user.is_admin():
         # Les admins peuvent assigner à tous les opérateurs actifs
-        form.operateur_id.choices = [
-            (op.id, op.nom) for op in 
-            Operateur.query.filter_by(actif=True).all()
-        ]
+        form.operateur_id.choices = choix_referentiel('operateurs')
     else:
         # Les utilisateurs non-admin ne peuvent créer que pour leur propre opérateur
         if current_user.operateur:
@@ -207,9 +211,15 @@ def detail_ligne(id):
         actif=True
     ).order_by(RapportTransport.periode_debut.desc()).limit(10).all()
     
+    # Synthèses annuelles précalculées depuis les données quotidiennes
+    syntheses = SyntheseAnnuelleLigne.query.filter_by(
+        ligne_id=ligne.id
+    ).order_by(SyntheseAnnuelleLigne.annee.desc()).limit(5).all()
+    
     return render_template('transport/lignes/detail.html',
                          ligne=ligne,
                          rapports=rapports,
+                         syntheses=syntheses,
                          donnees_performance=donnees_performance)
 
 @bp.route('/lignes/<int:id>/modifier', methods=['GET', 'POST'])
@@ -226,10 +236,7 @@ def modifier_ligne(id):
     
     # Configuration des choix selon les permissions
     if current_user.is_admin():
-        form.operateur_id.choices = [
-            (op.id, op.nom) for op in 
-            Operateur.query.filter_by(actif=True).all()
-        ]
+        form.operateur_id.choices = choix_referentiel('operateurs')
     else:
         form.operateur_id.choices = [(ligne.operateur_id, ligne.operateur.nom)]
     
@@ -295,10 +302,7 @@ def nouveau_poste():
     
     # Configuration des choix d'opérateurs
     if current_user.is_admin():
-        form.operateur_id.choices = [
-            (op.id, op.nom) for op in 
-            Operateur.query.filter_by(actif=True).all()
-        ]
+        form.operateur_id.choices = choix_referentiel('operateurs')
     else:
         if current_user.operateur:
             form.operateur_id.choices = [(current_user.operateur_id, current_user.operateur.nom)]
@@ -649,15 +653,15 @@ def supprimer_transformateur(id):
 def liste_rapports():
     """Liste des rapports de transport"""
     
-    page = request.args.get('page', 1, type=int)
+    curseur = request.args.get('curseur')
     per_page = request.args.get('per_page', 25, type=int)
     
     # Requête de base selon les permissions
     if current_user.is_admin():
-        query = RapportTransport.query.join(PosteTransport)
+        query = RapportTransport.query
     else:
-        query = RapportTransport.query.join(PosteTransport).filter(
-            PosteTransport.operateur_id == current_user.operateur_id
+        query = RapportTransport.query.join(LigneTransport).filter(
+            LigneTransport.operateur_id == current_user.operateur_id
         )
     
     # Filtres par date
@@ -683,10 +687,12 @@ def liste_rapports():
     if type_rapport:
         query = query.filter_by(type_rapport=type_rapport)
     
-    # Pagination
-    rapports_paginated = query.filter_by(actif=True).order_by(
-        RapportTransport.periode_debut.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Pagination par curseur sur (periode_debut, id)
+    rapports_paginated = paginer_par_curseur(
+        query.filter(RapportTransport.actif == True),
+        (RapportTransport.periode_debut, RapportTransport.id),
+        curseur=curseur, per_page=per_page
+    )
     
     return render_template('transport/rapports/liste.html',
                          rapports=rapports_paginated)
@@ -699,21 +705,8 @@ def nouveau_rapport():
     form = RapportTransportForm()
     
     # Configuration des choix selon les permissions
-    if current_user.is_admin():
-        postes = PosteTransport.query.filter_by(actif=True).all()
-        lignes = LigneTransport.query.filter_by(actif=True).all()
-    else:
-        postes = PosteTransport.query.filter_by(
-            operateur_id=current_user.operateur_id,
-            actif=True
-        ).all()
-        lignes = LigneTransport.query.filter_by(
-            operateur_id=current_user.operateur_id,
-            actif=True
-        ).all()
-    
-    form.poste_id.choices = [(0, 'Sélectionner un poste')] + [(p.id, p.nom) for p in postes]
-    form.ligne_id.choices = [(0, 'Sélectionner une ligne')] + [(l.id, l.nom) for l in lignes]
+    form.poste_id.choices = choix_accessibles('postes_transport', vide=(0, 'Sélectionner un poste'))
+    form.ligne_id.choices = choix_accessibles('lignes_transport', vide=(0, 'Sélectionner une ligne'))
     
     if form.validate_on_submit():
         try:
@@ -745,6 +738,7 @@ def nouveau_rapport():
 # API Routes
 @bp.route('/api/statistiques')
 @login_required
+@reponse_conditionnelle(LigneTransport, PosteTransport, RapportTransport)
 def api_statistiques():
     """API pour récupérer les statistiques de transport"""
     
@@ -780,25 +774,27 @@ def api_statistiques():
             actif=True
         ).count()
     
-    # Disponibilité moyenne
-    rapports_periode = RapportTransport.query.filter(
+    # Disponibilité et fiabilité moyennes, agrégées dans la base sur les rapports
+    # (la disponibilité est précalculée depuis les données quotidiennes)
+    fiabilite = case(
+        (func.coalesce(RapportTransport.nombre_incidents, 0) >= 10, 0),
+        else_=100 - func.coalesce(RapportTransport.nombre_incidents, 0) * 10
+    )
+    requete = db.session.query(
+        func.avg(RapportTransport.disponibilite), func.avg(fiabilite)
+    ).filter(
         RapportTransport.periode_debut >= date_debut.date(),
         RapportTransport.actif == True
     )
     
     if not current_user.is_admin():
-        rapports_periode = rapports_periode.join(PosteTransport).filter(
-            PosteTransport.operateur_id == current_user.operateur_id
+        requete = requete.join(LigneTransport).filter(
+            LigneTransport.operateur_id == current_user.operateur_id
         )
     
-    rapports = rapports_periode.all()
-    
-    if rapports:
-        disponibilite_moyenne = sum([r.disponibilite for r in rapports if r.disponibilite]) / len(rapports)
-        fiabilite_moyenne = sum([r.fiabilite for r in rapports if r.fiabilite]) / len(rapports)
-    else:
-        disponibilite_moyenne = 0
-        fiabilite_moyenne = 0
+    disponibilite_moyenne, fiabilite_moyenne = requete.one()
+    disponibilite_moyenne = disponibilite_moyenne or 0
+    fiabilite_moyenne = fiabilite_moyenne or 0
     
     return jsonify({
         'total_lignes': total_lignes,
@@ -808,6 +804,44 @@ def api_statistiques():
         'periode': periode
     })
 
+def _periode_str(annee_mois):
+    annee, mois = annee_mois
+    return RapportTransport.get_periode_str(SimpleNamespace(annee=annee, mois=mois))
+
+# Champs de RapportTransport.to_dict(), ligne jointe dans la même requête
+SCHEMA_RAPPORTS = Schema(RapportTransport, (
+    'id', 'date_creation', 'date_modification', 'actif', 'ligne_id', 'annee', 'mois',
+    'periode_debut', 'periode_fin', 'energie_transitee', 'energie_maximale', 'facteur_charge',
+    'taux_utilisation', 'nombre_incidents', 'duree_total_incidents', 'date_pointe', 'disponibilite',
+    'saidi', 'saifi', 'pertes_totales', 'statut', 'observations',
+    Champ('ligne.nom', cle='ligne_nom'), Champ('ligne.code', cle='ligne_code'),
+    Champ(('annee', 'mois'), cle='periode_str', convertir=_periode_str)
+))
+
+@bp.route('/api/rapports')
+@login_required
+@reponse_conditionnelle(LigneTransport, RapportTransport)
+def api_rapports():
+    """API des rapports de transport, envoyée en flux (?format=colonnes pour les graphiques)"""
+    
+    if current_user.is_admin():
+        query = RapportTransport.query
+    else:
+        query = RapportTransport.query.join(LigneTransport).filter(
+            LigneTransport.operateur_id == current_user.operateur_id
+        )
+    
+    annee = request.args.get('annee', type=int)
+    if annee:
+        query = query.filter(RapportTransport.annee == annee)
+    ligne_id = request.args.get('ligne_id', type=int)
+    if ligne_id:
+        query = query.filter(RapportTransport.ligne_id == ligne_id)
+    
+    query = query.filter(RapportTransport.actif == True) \
+                 .order_by(RapportTransport.periode_debut, RapportTransport.id)
+    return reponse_flux(SCHEMA_RAPPORTS, query)
+
 # Fonctions utilitaires
 def generer_donnees_graphiques_transport(lignes, postes):
     """Générer les données pour les graphiques du dashboard transport"""
@@ -857,8 +891,10 @@ def generer_donnees_performance_ligne(ligne):
     
     for rapport in rapports:
         donnees['labels'].append(rapport.periode_debut.strftime('%m/%Y'))
-        # Disponibilité basée sur le taux d'utilisation
-        donnees['disponibilite'].append(rapport.taux_utilisation or 0)
+        # Disponibilité calculée depuis les données quotidiennes, sinon taux d'utilisation saisi
+        donnees['disponibilite'].append(
+            rapport.disponibilite if rapport.disponibilite is not None else (rapport.taux_utilisation or 0)
+        )
         # Fiabilité calculée à partir des incidents (100% - impact des incidents)
         fiabilite = max(0, 100 - (rapport.nombre_incidents or 0) * 10)  # Estimation simple
         donnees['fiabilite'].append(fiabilite)
@@ -8,7 +8,9 @@ from app.utils.helpers import (
     admin_required, 
     format_number, 
     get_current_year,
-    flash_errors
+    flash_errors,
+    bornes_mois,
+    bornes_annee
 )
 
 __all__ = [
@@ -21,5 +23,7 @@ __all__ = [
     'admin_required',
     'format_number',
     'get_current_year',
-    'flash_errors'
+    'flash_errors',
+    'bornes_mois',
+    'bornes_annee'
 ]
@@ -0,0 +1,183 @@
+"""
+Outils des chargements en masse et des agrégations de séries quotidiennes.
+
+``lire_par_lots`` lit un fichier CSV ou NDJSON (une ligne JSON par
+enregistrement) en DataFrames pandas de taille bornée. ``Groupes`` calcule
+des agrégats par clé (rapport, centrale, ligne...) sur des tableaux NumPy :
+les lignes sont triées une fois par clé puis réduites avec ``reduceat``,
+sans boucle Python par groupe. Les valeurs manquantes (NaN) sont ignorées
+comme en SQL.
+
+    groupes = Groupes(rapport_ids)
+    energie = groupes.somme(energie_quotidienne)
+    pic = groupes.indice_max(puissance)   # indices dans les tableaux d'origine
+    mediane = groupes.quantile(debit, 0.5)
+"""
+import csv
+import os
+
+from app.extensions import db
+from app.utils.imports import ModuleParesseux
+
+np = ModuleParesseux('numpy')
+pd = ModuleParesseux('pandas')
+
+
+FORMATS_SERIES = ('.csv', '.ndjson', '.jsonl')
+
+
+def lire_par_lots(chemin, taille=5000):
+    """DataFrames successifs d'au plus `taille` lignes d'un fichier .csv ou .ndjson/.jsonl"""
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == '.csv':
+        with open(chemin, newline='', encoding='utf-8-sig') as fichier:
+            echantillon = fichier.read(4096)
+        try:
+            separateur = csv.Sniffer().sniff(echantillon, delimiters=';,\t').delimiter
+        except csv.Error:
+            separateur = ','
+        lecteur = pd.read_csv(chemin, sep=separateur, chunksize=taille, encoding='utf-8-sig',
+                              dtype=str, keep_default_na=False)
+    elif extension in ('.ndjson', '.jsonl'):
+        lecteur = pd.read_json(chemin, lines=True, chunksize=taille, dtype=False, convert_dates=False)
+    else:
+        raise ValueError(f"Format non pris en charge : {extension or 'sans extension'} ({', '.join(FORMATS_SERIES)})")
+
+    with lecteur:
+        for lot in lecteur:
+            lot.columns = [str(colonne).strip().lower() for colonne in lot.columns]
+            yield lot
+
+
+def en_nombres(serie):
+    """Série convertie en flottants (virgule décimale acceptée, cellules invalides en NaN)"""
+    nombres = pd.to_numeric(serie, errors='coerce').astype(float)
+    if serie.dtype == object:
+        # Nettoyage des seules cellules non reconnues (virgule décimale, espaces)
+        a_nettoyer = nombres.isna() & serie.notna()
+        if a_nettoyer.any():
+            nettoyees = serie[a_nettoyer].astype(str).str.strip().str.replace(',', '.', regex=False)
+            nombres[a_nettoyer] = pd.to_numeric(nettoyees, errors='coerce').astype(float)
+    return nombres
+
+
+def en_horodatages(serie):
+    """Dates ISO (AAAA-MM-JJ, heure facultative) en horodatages naïfs, NaT si invalides"""
+    horodatages = pd.to_datetime(serie, errors='coerce', format='ISO8601', utc=True)
+    return horodatages.dt.tz_localize(None)
+
+
+def en_textes(serie):
+    """Chaînes sans espaces superflus, None si vides"""
+    textes = serie.where(serie.notna(), '').astype(str).str.strip()
+    return textes.where(textes != '', None)
+
+
+def date_avec_heure(jour, heure):
+    """Date complétée par une heure HH:MM si elle est connue"""
+    try:
+        heures, minutes = (int(partie) for partie in str(heure).split(':')[:2])
+        return jour.replace(hour=heures, minute=minutes, second=0, microsecond=0)
+    except (TypeError, ValueError, AttributeError):
+        return jour
+
+
+def executer_par_lots(instruction, parametres, taille=1000):
+    """executemany de `instruction` par lots, dans la transaction de la session"""
+    for i in range(0, len(parametres), taille):
+        db.session.execute(instruction, parametres[i:i + taille])
+
+
+def valeur_sql(valeur):
+    """Scalaire NumPy ou NaN converti pour le pilote SQL (None si manquant)"""
+    if valeur is None:
+        return None
+    valeur = valeur.item() if hasattr(valeur, 'item') else valeur
+    if isinstance(valeur, float) and valeur != valeur:
+        return None
+    return valeur
+
+
+class Groupes:
+    """Réductions par groupe de tableaux alignés sur un tableau de clés"""
+
+    def __init__(self, cles):
+        cles = np.asarray(cles)
+        self.ordre = np.argsort(cles, kind='stable')
+        triees = cles[self.ordre]
+        if len(triees):
+            self.debuts = np.flatnonzero(np.r_[True, triees[1:] != triees[:-1]])
+        else:
+            self.debuts = np.array([], dtype=int)
+        self.cles = triees[self.debuts]
+        self.tailles = np.diff(np.r_[self.debuts, len(triees)])
+
+    def __len__(self):
+        return len(self.debuts)
+
+    def _trier(self, valeurs):
+        return np.asarray(valeurs, dtype=float)[self.ordre]
+
+    def _reduire(self, fonction, valeurs):
+        if not len(self.debuts):
+            return np.array([], dtype=float)
+        return fonction.reduceat(valeurs, self.debuts)
+
+    def compte(self, valeurs):
+        """Nombre de valeurs renseignées par groupe"""
+        return self._reduire(np.add, (~np.isnan(self._trier(valeurs))).astype(int))
+
+    def somme(self, valeurs):
+        """Somme par groupe (NaN si aucune valeur)"""
+        triees = self._trier(valeurs)
+        sommes = self._reduire(np.add, np.nan_to_num(triees))
+        return np.where(self.compte(valeurs) > 0, sommes, np.nan)
+
+    def moyenne(self, valeurs):
+        """Moyenne par groupe des valeurs renseignées"""
+        compte = self.compte(valeurs)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(compte > 0, self.somme(valeurs) / compte, np.nan)
+
+    def maximum(self, valeurs):
+        return self._reduire(np.fmax, self._trier(valeurs))
+
+    def minimum(self, valeurs):
+        return self._reduire(np.fmin, self._trier(valeurs))
+
+    def quantile(self, valeurs, q):
+        """Quantile q (0-1) par groupe, interpolation linéaire entre valeurs renseignées"""
+        return self.quantiles(valeurs, (q,))[0]
+
+    def quantiles(self, valeurs, niveaux):
+        """Plusieurs quantiles par groupe avec un seul tri (liste de tableaux, un par niveau)"""
+        triees = self._trier(valeurs)
+        if not len(triees):
+            return [np.array([], dtype=float) for _ in niveaux]
+        groupe = np.repeat(np.arange(len(self.debuts)), self.tailles)
+        # Tri par groupe puis valeur (NaN en fin de groupe)
+        valeurs_triees = triees[np.lexsort((triees, groupe))]
+        compte = self.compte(valeurs)
+        dernier = self.debuts + np.maximum(compte - 1, 0)
+        resultats = []
+        for q in niveaux:
+            position = self.debuts + np.clip(q * (compte - 1), 0, None)
+            bas = np.floor(position).astype(int)
+            haut = np.minimum(bas + 1, dernier)
+            fraction = position - bas
+            resultat = valeurs_triees[bas] * (1 - fraction) + valeurs_triees[haut] * fraction
+            resultats.append(np.where(compte > 0, resultat, np.nan))
+        return resultats
+
+    def indice_max(self, valeurs):
+        """Indice (dans les tableaux d'origine) du premier maximum de chaque groupe, -1 si aucun"""
+        triees = self._trier(valeurs)
+        resultat = np.full(len(self.debuts), -1)
+        if not len(self.debuts):
+            return resultat
+        egal = triees == np.repeat(self.maximum(valeurs), self.tailles)
+        positions = np.flatnonzero(egal)
+        groupes = np.searchsorted(self.debuts, positions, side='right') - 1
+        groupes_trouves, premiers = np.unique(groupes, return_index=True)
+        resultat[groupes_trouves] = self.ordre[positions[premiers]]
+        return resultat
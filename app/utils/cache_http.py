@@ -0,0 +1,101 @@
+"""
+Requêtes HTTP conditionnelles (ETag / Last-Modified).
+
+Le validateur d'une réponse est dérivé du vecteur de versions des tables
+dont elle dépend (``VersionDonnees``), de l'URL, de l'utilisateur et du jour
+(les vues calculent souvent des périodes relatives à aujourd'hui). Un client
+qui présente ``If-None-Match`` (ou ``If-Modified-Since``) encore valide
+reçoit un 304 sans que la vue, ses agrégations ni ses exports soient
+exécutés : une seule petite requête SQL est faite.
+
+    @bp.route('/api/statistiques')
+    @login_required
+    @reponse_conditionnelle(RapportSolaire, CentraleSolaire)
+    def api_statistiques(): ...
+
+Sans modèle, la réponse dépend de toutes les tables versionnées.
+"""
+import hashlib
+from datetime import datetime, time, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+from sqlalchemy import inspect
+
+from app.models.versions_donnees import VersionDonnees
+
+
+def _noms_tables(modeles):
+    noms = set()
+    for modele in modeles:
+        if isinstance(modele, str):
+            noms.add(modele)
+        else:
+            noms.update(table.name for table in inspect(modele).tables)
+    return tuple(sorted(noms))
+
+
+def _cle_utilisateur():
+    """Les réponses dépendent des droits de l'utilisateur connecté"""
+    if not current_user.is_authenticated:
+        return None
+    return (current_user.get_id(), getattr(current_user, 'role', None),
+            getattr(current_user, 'operateur_id', None))
+
+
+def validateurs(noms_tables=None):
+    """(ETag, Last-Modified) de la requête courante pour les tables données"""
+    versions = VersionDonnees.lire(noms_tables)
+    jour = datetime.utcnow().date()
+    empreinte = repr((
+        request.endpoint, request.full_path, _cle_utilisateur(), jour.isoformat(),
+        sorted((nom, version) for nom, (version, _) in versions.items())
+    ))
+    etag = hashlib.sha1(empreinte.encode('utf-8')).hexdigest()
+
+    # Pas antérieur au début du jour : le jour fait partie du validateur
+    dates = [date for _, date in versions.values() if date is not None]
+    derniere_modification = max(dates + [datetime.combine(jour, time.min)])
+    return etag, derniere_modification.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def client_a_jour(etag, derniere_modification):
+    """Le client possède-t-il déjà cette version de la réponse ?"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return derniere_modification <= request.if_modified_since
+    return False
+
+
+def reponse_conditionnelle(*modeles):
+    """
+    Décorateur de vue : ETag faible et Last-Modified calculés depuis les
+    versions des tables des modèles, 304 sans exécuter la vue si le client
+    est à jour. À placer après les décorateurs d'authentification.
+    """
+    noms_tables = _noms_tables(modeles) if modeles else None
+
+    def decorateur(vue):
+        @wraps(vue)
+        def vue_conditionnelle(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not current_app.config.get('CONDITIONAL_GET_ENABLED', True):
+                return vue(*args, **kwargs)
+
+            etag, derniere_modification = validateurs(noms_tables)
+            if client_a_jour(etag, derniere_modification):
+                reponse = current_app.response_class(status=304)
+            else:
+                reponse = make_response(vue(*args, **kwargs))
+                if reponse.status_code != 200:
+                    return reponse  # erreurs et redirections ne sont pas validées
+
+            reponse.set_etag(etag, weak=True)
+            reponse.last_modified = derniere_modification
+            # Toujours revalider auprès du serveur, jamais dans un cache partagé
+            reponse.cache_control.private = True
+            reponse.cache_control.no_cache = True
+            return reponse
+        return vue_conditionnelle
+    return decorateur
@@ -0,0 +1,141 @@
+"""
+Compression des réponses HTTP (gzip, brotli si le module est installé).
+
+Seuls les types de contenu textuels de COMPRESS_MIMETYPES sont compressés
+(les exports xlsx sont déjà des archives zip), et seulement au-delà de
+COMPRESS_MIN_SIZE octets. Les réponses en flux (générateurs, fichiers
+envoyés par ``send_file``) sont compressées morceau par morceau avec un
+vidage à chaque morceau : le client reçoit les données au fil de l'eau et
+le serveur ne met jamais l'export entier en mémoire.
+"""
+import zlib
+
+from flask import request
+
+# Import optionnel de brotli
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+MIMETYPES_COMPRESSES = (
+    'text/html', 'text/css', 'text/csv', 'text/plain', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+
+
+class CompresseurGzip:
+    encodage = 'gzip'
+
+    def __init__(self, niveau=6):
+        self._objet = zlib.compressobj(niveau, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+
+    def compresser(self, donnees, vider=False):
+        sortie = self._objet.compress(donnees)
+        return sortie + self._objet.flush(zlib.Z_SYNC_FLUSH) if vider else sortie
+
+    def terminer(self):
+        return self._objet.flush(zlib.Z_FINISH)
+
+
+class CompresseurBrotli:
+    encodage = 'br'
+
+    def __init__(self, niveau=4):
+        self._objet = brotli.Compressor(quality=niveau)
+
+    def compresser(self, donnees, vider=False):
+        sortie = self._objet.process(donnees)
+        return sortie + self._objet.flush() if vider else sortie
+
+    def terminer(self):
+        return self._objet.finish()
+
+
+def _flux_compresse(morceaux, compresseur):
+    """Compresser un flux morceau par morceau (vidage après chaque morceau)"""
+    for morceau in morceaux:
+        if morceau:
+            sortie = compresseur.compresser(morceau, vider=True)
+            if sortie:
+                yield sortie
+    yield compresseur.terminer()
+
+
+class CompressionReponses:
+    """Hook after_request de compression des réponses"""
+
+    def __init__(self):
+        self.actif = True
+        self.mimetypes = MIMETYPES_COMPRESSES
+        self.taille_min = 500
+        self.niveau_gzip = 6
+        self.niveau_brotli = 4
+        self.algorithmes = ('br', 'gzip')
+
+    def init_app(self, app):
+        self.actif = app.config.get('COMPRESS_ENABLED', True)
+        self.mimetypes = tuple(app.config.get('COMPRESS_MIMETYPES', MIMETYPES_COMPRESSES))
+        self.taille_min = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.niveau_gzip = app.config.get('COMPRESS_LEVEL', 6)
+        self.niveau_brotli = app.config.get('COMPRESS_BR_LEVEL', 4)
+        self.algorithmes = tuple(a for a in app.config.get('COMPRESS_ALGORITHMS', ('br', 'gzip'))
+                                 if a != 'br' or HAS_BROTLI)
+        app.extensions['compression'] = self
+        if self.actif:
+            app.after_request(self.compresser_reponse)
+
+    def compresseur(self, encodage):
+        if encodage == 'br':
+            return CompresseurBrotli(self.niveau_brotli)
+        return CompresseurGzip(self.niveau_gzip)
+
+    def negocier(self):
+        """Meilleur encodage accepté par le client (None si aucun)"""
+        return request.accept_encodings.best_match(self.algorithmes)
+
+    def compresser_reponse(self, reponse):
+        if reponse.mimetype not in self.mimetypes:
+            return reponse
+        reponse.vary.add('Accept-Encoding')
+
+        if (request.method == 'HEAD' or reponse.status_code < 200
+                or reponse.status_code in (204, 206, 304)
+                or 'Content-Encoding' in reponse.headers
+                or 'no-transform' in reponse.headers.get('Cache-Control', '')):
+            return reponse
+
+        encodage = self.negocier()
+        if encodage is None:
+            return reponse
+
+        if reponse.is_streamed or reponse.direct_passthrough:
+            longueur = reponse.content_length
+            if longueur is not None and longueur < self.taille_min:
+                return reponse
+            origine = reponse.response
+            if hasattr(origine, 'close'):
+                # Fichier ou générateur d'origine fermé en fin de réponse, même
+                # si le client se déconnecte avant la lecture du flux
+                reponse.call_on_close(origine.close)
+            reponse.response = _flux_compresse(reponse.iter_encoded(), self.compresseur(encodage))
+            reponse.direct_passthrough = False
+            reponse.headers.pop('Content-Length', None)
+        else:
+            donnees = reponse.get_data()
+            if len(donnees) < self.taille_min:
+                return reponse
+            compresseur = self.compresseur(encodage)
+            reponse.set_data(compresseur.compresser(donnees) + compresseur.terminer())
+
+        reponse.headers['Content-Encoding'] = encodage
+        # Le corps change avec l'encodage : un ETag fort ne peut plus être conservé
+        etag, faible = reponse.get_etag()
+        if etag and not faible:
+            reponse.set_etag(etag, weak=True)
+        return reponse
+
+
+compression = CompressionReponses()
@@ -0,0 +1,89 @@
+"""
+Mesure du temps de démarrage de l'application (commande ``flask startup-report``).
+
+Chaque mesure lance un interpréteur neuf, comme le ferait une commande
+``flask`` ou un nouveau worker : une série de démarrages chronométrés donne
+la médiane (import du paquet ``app`` puis ``create_app``), puis un démarrage
+sous ``python -X importtime`` ventile le temps par module importé.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+SCRIPT_MESURE = """
+import json, sys, time
+debut = time.perf_counter()
+from app import create_app
+importe = time.perf_counter()
+create_app()
+fin = time.perf_counter()
+print(json.dumps({'import_ms': (importe - debut) * 1000, 'create_app_ms': (fin - importe) * 1000,
+                  'modules': sorted(sys.modules)}))
+"""
+
+# Dépendances lourdes dont le chargement doit rester différé
+MODULES_DIFFERES = ('pandas', 'numpy', 'openpyxl', 'pptx')
+
+
+def _environnement():
+    """Pas de thread d'arrière-plan dans les processus de mesure"""
+    env = dict(os.environ)
+    env.update({'SCHEDULER_ENABLED': 'false', 'SYSTEM_SAMPLER_ENABLED': 'false'})
+    return env
+
+
+def _lancer(racine, options=()):
+    """Démarrer l'application dans un interpréteur neuf -> (mesure, stderr)"""
+    processus = subprocess.run(
+        [sys.executable, *options, '-c', SCRIPT_MESURE],
+        cwd=racine, env=_environnement(), capture_output=True, text=True, check=True
+    )
+    return json.loads(processus.stdout.strip().splitlines()[-1]), processus.stderr
+
+
+def analyser_importtime(sortie):
+    """Lignes de ``-X importtime`` -> [(module, propre_ms, cumul_ms, profondeur)]"""
+    modules = []
+    for ligne in sortie.splitlines():
+        if not ligne.startswith('import time:') or 'self [us]' in ligne:
+            continue
+        propre, cumul, nom = ligne[len('import time:'):].split('|')
+        profondeur = (len(nom) - len(nom.lstrip())) // 2
+        modules.append((nom.strip(), int(propre) / 1000, int(cumul) / 1000, profondeur))
+    return modules
+
+
+def mesurer_demarrage(racine, repetitions=3):
+    """Temps de démarrage à froid et ventilation des imports"""
+    mesures = [_lancer(racine)[0] for _ in range(repetitions)]
+
+    trace, sortie_erreur = _lancer(racine, ('-X', 'importtime'))
+    charges = set(trace['modules'])
+    modules = analyser_importtime(sortie_erreur)
+
+    # Premier niveau de chaque paquet : le cumul n'est pas compté deux fois
+    paquets_app = {}
+    tiers = {}
+    for nom, _, cumul, _ in modules:
+        parties = nom.split('.')
+        if parties[0] == 'app':
+            if len(parties) == 2:
+                paquets_app[nom] = paquets_app.get(nom, 0) + cumul
+        elif len(parties) == 1:
+            tiers[nom] = tiers.get(nom, 0) + cumul
+
+    import_ms = statistics.median(m['import_ms'] for m in mesures)
+    create_app_ms = statistics.median(m['create_app_ms'] for m in mesures)
+    return {
+        'repetitions': repetitions,
+        'import_ms': import_ms,
+        'create_app_ms': create_app_ms,
+        'total_ms': import_ms + create_app_ms,
+        'paquets_app': sorted(paquets_app.items(), key=lambda p: -p[1]),
+        'tiers': sorted(tiers.items(), key=lambda p: -p[1]),
+        'plus_lents': sorted(modules, key=lambda m: -m[1]),
+        'differes_charges': [nom for nom in MODULES_DIFFERES if nom in charges],
+    }
@@ -0,0 +1,173 @@
+"""
+Échantillonneur des métriques système en arrière-plan.
+
+Un thread relève périodiquement CPU, mémoire, disque, taille de la base
+SQLite et de son WAL ainsi que le débit de requêtes, et les range dans un
+tampon circulaire de taille fixe (un ``array('d')`` par métrique). Les pages
+d'administration lisent le dernier échantillon et l'historique sans jamais
+bloquer la requête (contrairement à ``psutil.cpu_percent(interval=1)``).
+"""
+import itertools
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from flask import request
+from sqlalchemy.engine import make_url
+
+# Import optionnel de psutil
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+
+METRIQUES = ('horodatage', 'cpu', 'memoire', 'disque', 'taille_base_mo', 'taille_wal_mo', 'requetes_par_s')
+
+
+class TamponCirculaire:
+    """Tampon circulaire de taille fixe, une colonne array('d') par métrique"""
+
+    def __init__(self, capacite, metriques=METRIQUES):
+        self.capacite = capacite
+        self.metriques = metriques
+        self._colonnes = {nom: array('d', bytes(8 * capacite)) for nom in metriques}
+        self._position = 0  # prochaine case à écrire
+        self._taille = 0
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        return self._taille
+
+    def ajouter(self, echantillon):
+        """Écrire un échantillon (les métriques absentes valent NaN)"""
+        with self._verrou:
+            for nom, colonne in self._colonnes.items():
+                valeur = echantillon.get(nom)
+                colonne[self._position] = float('nan') if valeur is None else valeur
+            self._position = (self._position + 1) % self.capacite
+            self._taille = min(self._taille + 1, self.capacite)
+
+    def serie(self, nom, points=None):
+        """Valeurs d'une métrique, de la plus ancienne à la plus récente"""
+        with self._verrou:
+            colonne = self._colonnes[nom]
+            if self._taille < self.capacite:
+                valeurs = colonne[:self._taille]
+            else:
+                valeurs = colonne[self._position:] + colonne[:self._position]
+        valeurs = [_sans_nan(v) for v in valeurs.tolist()]
+        return valeurs[-points:] if points else valeurs
+
+    def dernier(self):
+        """Dernier échantillon enregistré (None si le tampon est vide)"""
+        with self._verrou:
+            if not self._taille:
+                return None
+            indice = (self._position - 1) % self.capacite
+            return {nom: _sans_nan(colonne[indice]) for nom, colonne in self._colonnes.items()}
+
+
+def _sans_nan(valeur):
+    """NaN (métrique absente) -> None, pour la sérialisation JSON"""
+    return None if valeur != valeur else valeur
+
+
+def _taille_mo(chemin):
+    try:
+        return os.path.getsize(chemin) / (1024 * 1024)
+    except OSError:
+        return 0.0
+
+
+class EchantillonneurSysteme:
+    """Thread d'échantillonnage et compteur de requêtes"""
+
+    def __init__(self):
+        self.tampon = None
+        self.intervalle = 5
+        self.chemin_base = None
+        self.demarrage = datetime.now()
+        self._compteur_requetes = itertools.count()
+        self._lectures_compteur = 0
+        self._precedent = None  # (instant, nombre de requêtes)
+        self._thread = None
+        self._arret = threading.Event()
+
+    def init_app(self, app):
+        self.intervalle = app.config.get('SYSTEM_SAMPLER_INTERVAL', 5)
+        self.tampon = TamponCirculaire(app.config.get('SYSTEM_SAMPLER_SIZE', 720))
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+            self.chemin_base = url.database
+        app.extensions['echantillonneur'] = self
+
+        @app.before_request
+        def compter_requete():
+            if request.endpoint != 'static':
+                next(self._compteur_requetes)  # incrément atomique, sans verrou
+
+        if app.config.get('SYSTEM_SAMPLER_ENABLED', True) and not app.testing:
+            self.demarrer()
+
+    def demarrer(self):
+        if self._thread and self._thread.is_alive():
+            return
+        if HAS_PSUTIL:
+            psutil.cpu_percent(interval=None)  # amorce : la mesure suivante couvre l'intervalle
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._boucle, name='echantillonneur', daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            try:
+                self.tampon.ajouter(self.echantillonner())
+            except Exception:
+                pass  # un relevé manqué ne doit pas arrêter le thread
+            self._arret.wait(self.intervalle)
+
+    def _nombre_requetes(self):
+        # Lire itertools.count en l'incrémentant, puis retirer nos propres lectures
+        self._lectures_compteur += 1
+        return next(self._compteur_requetes) - (self._lectures_compteur - 1)
+
+    def echantillonner(self):
+        """Relever un échantillon (appels psutil non bloquants)"""
+        instant = time.monotonic()
+        requetes = self._nombre_requetes()
+        debit = None
+        if self._precedent:
+            ecoule = instant - self._precedent[0]
+            debit = (requetes - self._precedent[1]) / ecoule if ecoule > 0 else 0.0
+        self._precedent = (instant, requetes)
+
+        echantillon = {
+            'horodatage': time.time(),
+            'requetes_par_s': debit,
+        }
+        if self.chemin_base:
+            echantillon['taille_base_mo'] = _taille_mo(self.chemin_base)
+            echantillon['taille_wal_mo'] = _taille_mo(self.chemin_base + '-wal')
+        if HAS_PSUTIL:
+            echantillon.update({
+                'cpu': psutil.cpu_percent(interval=None),
+                'memoire': psutil.virtual_memory().percent,
+                'disque': psutil.disk_usage('/').percent,
+            })
+        return echantillon
+
+    def historique(self, points=None):
+        """Séries de toutes les métriques pour les sparklines"""
+        if not self.tampon:
+            return {}
+        return {nom: self.tampon.serie(nom, points) for nom in self.tampon.metriques}
+
+
+echantillonneur = EchantillonneurSysteme()
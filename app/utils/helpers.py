@@ -49,6 +49,22 @@ def get_current_year():
     return datetime.now().year
 
 
+def bornes_mois(annee, mois):
+    """
+    Bornes [début, fin[ d'un mois, pour filtrer une colonne DateTime
+    sans appliquer de fonction dessus (requête indexable)
+    """
+    debut = datetime(annee, mois, 1)
+    if mois == 12:
+        return debut, datetime(annee + 1, 1, 1)
+    return debut, datetime(annee, mois + 1, 1)
+
+
+def bornes_annee(annee):
+    """Bornes [1er janvier, 1er janvier suivant[ d'une année"""
+    return datetime(annee, 1, 1), datetime(annee + 1, 1, 1)
+
+
 def safe_int_coerce(value):
     """
     Coercition sécurisée pour les SelectField
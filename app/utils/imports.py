@@ -0,0 +1,42 @@
+"""
+Imports différés des dépendances lourdes (pandas, numpy, openpyxl, pptx).
+
+Importer pandas ou openpyxl au chargement d'un module de routes coûte
+plusieurs centaines de millisecondes à chaque démarrage (commandes ``flask``,
+nouveaux workers) alors que seuls quelques exports s'en servent. Un
+``ModuleParesseux`` n'importe le module qu'au premier accès à un attribut ;
+``module_disponible`` vérifie la présence d'un module sans l'importer.
+
+    pd = ModuleParesseux('pandas')
+    HAS_PANDAS = module_disponible('pandas')
+"""
+import importlib
+import importlib.util
+
+
+def module_disponible(nom):
+    """Le module est-il installé ? (recherche sur le chemin, sans import)"""
+    try:
+        return importlib.util.find_spec(nom) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class ModuleParesseux:
+    """Mandataire d'un module importé au premier accès à l'un de ses attributs"""
+
+    def __init__(self, nom):
+        self._nom = nom
+        self._module = None
+
+    def _charger(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._nom)
+        return self._module
+
+    def __getattr__(self, attribut):
+        return getattr(self._charger(), attribut)
+
+    def __repr__(self):
+        etat = 'chargé' if self._module is not None else 'non chargé'
+        return f"<ModuleParesseux {self._nom} ({etat})>"
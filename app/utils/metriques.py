@@ -0,0 +1,337 @@
+"""
+Métriques applicatives au format d'exposition texte Prometheus (/metrics).
+
+Implémentation sans dépendance externe. Chaque métrique répartit ses
+valeurs sur un nombre fixe de bandes (dictionnaire + verrou), choisies par
+``threading.get_native_id() % NB_BANDES`` (identifiant système : les
+``get_ident`` pthread, alignés sur une page, tomberaient tous dans la même
+bande) : deux threads ne se disputent un
+verrou que s'ils tombent sur la même bande, et la mémoire ne croît pas avec
+le nombre de threads créés. Les bandes sont additionnées à la lecture.
+
+Activation : METRICS_ENABLED et METRICS_TOKEN (désactivé par défaut : les
+métriques ne sont alors ni collectées ni exposées). L'endpoint exige
+toujours « Authorization: Bearer <jeton> » : derrière un reverse proxy,
+l'adresse d'origine ne permet pas de distinguer les requêtes locales.
+"""
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Bornes (secondes) des histogrammes de durée
+BORNES_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BORNES_DUREE_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BORNES_TAILLE = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Bandes par métrique (nombre fixe, indépendant du nombre de threads)
+NB_BANDES = 16
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_etiquettes(noms, valeurs, supplementaires=()):
+    paires = list(zip(noms, valeurs)) + list(supplementaires)
+    if not paires:
+        return ''
+    return '{' + ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + '}'
+
+
+def _format_nombre(valeur):
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return repr(valeur) if isinstance(valeur, float) else str(valeur)
+
+
+class _Metrique:
+    """Base : bandes (valeurs, verrou) choisies par thread, agrégées à la lecture"""
+    type = None
+
+    def __init__(self, nom, aide, etiquettes=()):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self._bandes = [({}, threading.Lock()) for _ in range(NB_BANDES)]
+
+    def _bande(self):
+        return self._bandes[threading.get_native_id() % NB_BANDES]
+
+    def _cle(self, etiquettes):
+        return tuple(str(etiquettes.get(nom, '')) for nom in self.etiquettes)
+
+    def _bandes_copies(self):
+        copies = []
+        for valeurs, verrou in self._bandes:
+            with verrou:
+                copies.append({cle: list(valeur) if isinstance(valeur, list) else valeur
+                               for cle, valeur in valeurs.items()})
+        return copies
+
+    def lignes(self):
+        raise NotImplementedError
+
+
+class Compteur(_Metrique):
+    type = 'counter'
+
+    def inc(self, valeur=1, **etiquettes):
+        cle = self._cle(etiquettes)
+        valeurs, verrou = self._bande()
+        with verrou:
+            valeurs[cle] = valeurs.get(cle, 0) + valeur
+
+    def valeurs(self):
+        total = {}
+        for bande in self._bandes_copies():
+            for cle, valeur in bande.items():
+                total[cle] = total.get(cle, 0) + valeur
+        return total
+
+    def lignes(self):
+        for cle, valeur in sorted(self.valeurs().items()):
+            yield f'{self.nom}{_format_etiquettes(self.etiquettes, cle)} {_format_nombre(valeur)}'
+
+
+class Histogramme(_Metrique):
+    type = 'histogram'
+
+    def __init__(self, nom, aide, etiquettes=(), bornes=BORNES_DUREE):
+        super().__init__(nom, aide, etiquettes)
+        self.bornes = tuple(bornes)
+
+    def observer(self, valeur, **etiquettes):
+        cle = self._cle(etiquettes)
+        # Case de la première borne >= valeur (len(bornes) : au-delà de la dernière)
+        indice = next((i for i, borne in enumerate(self.bornes) if valeur <= borne), None)
+        valeurs, verrou = self._bande()
+        with verrou:
+            cellules = valeurs.get(cle)
+            if cellules is None:
+                # Une case par borne (non cumulée), puis somme et nombre
+                cellules = valeurs[cle] = [0] * (len(self.bornes) + 2)
+            if indice is not None:
+                cellules[indice] += 1
+            cellules[-2] += valeur
+            cellules[-1] += 1
+
+    @contextmanager
+    def chronometre(self, **etiquettes):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(time.perf_counter() - debut, **etiquettes)
+
+    def lignes(self):
+        total = {}
+        for bande in self._bandes_copies():
+            for cle, cellules in bande.items():
+                cumul = total.setdefault(cle, [0] * len(cellules))
+                for indice, valeur in enumerate(cellules):
+                    cumul[indice] += valeur
+        for cle, cellules in sorted(total.items()):
+            cumule = 0
+            for borne, nombre in zip(self.bornes, cellules):
+                cumule += nombre
+                etiquettes = _format_etiquettes(self.etiquettes, cle, [('le', _format_nombre(borne))])
+                yield f'{self.nom}_bucket{etiquettes} {cumule}'
+            etiquettes = _format_etiquettes(self.etiquettes, cle, [('le', '+Inf')])
+            yield f'{self.nom}_bucket{etiquettes} {cellules[-1]}'
+            yield f'{self.nom}_sum{_format_etiquettes(self.etiquettes, cle)} {_format_nombre(cellules[-2])}'
+            yield f'{self.nom}_count{_format_etiquettes(self.etiquettes, cle)} {cellules[-1]}'
+
+
+class Jauge(_Metrique):
+    """Jauge calculée à la lecture par une fonction -> {tuple d'étiquettes: valeur}"""
+    type = 'gauge'
+
+    def __init__(self, nom, aide, fonction, etiquettes=()):
+        super().__init__(nom, aide, etiquettes)
+        self.fonction = fonction
+
+    def lignes(self):
+        valeurs = self.fonction()
+        if not isinstance(valeurs, dict):
+            valeurs = {(): valeurs}
+        for cle, valeur in sorted(valeurs.items()):
+            if valeur is not None:
+                yield f'{self.nom}{_format_etiquettes(self.etiquettes, cle)} {_format_nombre(valeur)}'
+
+
+class Registre:
+    """Ensemble des métriques exposées"""
+
+    def __init__(self):
+        self.actif = True
+        self.metriques = {}
+
+    def _enregistrer(self, metrique):
+        return self.metriques.setdefault(metrique.nom, metrique)
+
+    def compteur(self, nom, aide, etiquettes=()):
+        return self._enregistrer(Compteur(nom, aide, etiquettes))
+
+    def histogramme(self, nom, aide, etiquettes=(), bornes=BORNES_DUREE):
+        return self._enregistrer(Histogramme(nom, aide, etiquettes, bornes))
+
+    def jauge(self, nom, aide, fonction, etiquettes=()):
+        return self._enregistrer(Jauge(nom, aide, fonction, etiquettes))
+
+    def exposer(self):
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        sortie = []
+        for metrique in self.metriques.values():
+            try:
+                lignes = list(metrique.lignes())
+            except Exception as e:
+                current_app.logger.warning(f"Métrique {metrique.nom} indisponible : {e}")
+                continue
+            sortie.append(f'# HELP {metrique.nom} {metrique.aide}')
+            sortie.append(f'# TYPE {metrique.nom} {metrique.type}')
+            sortie.extend(lignes)
+        return '\n'.join(sortie) + '\n'
+
+
+registre = Registre()
+
+# ----- Métriques de l'application -----
+
+duree_requetes = registre.histogramme(
+    'http_request_duration_seconds', 'Durée des requêtes HTTP',
+    ('blueprint', 'endpoint', 'method', 'status'))
+requetes_sql = registre.compteur(
+    'db_queries_total', 'Requêtes SQL exécutées', ('operation',))
+duree_sql = registre.histogramme(
+    'db_query_duration_seconds', 'Durée des requêtes SQL', ('operation',), bornes=BORNES_DUREE_SQL)
+requetes_sql_par_requete = registre.histogramme(
+    'http_request_db_queries', 'Nombre de requêtes SQL par requête HTTP', ('blueprint',),
+    bornes=BORNES_TAILLE)
+acces_cache = registre.compteur(
+    'cache_requests_total', 'Accès aux caches applicatifs', ('cache', 'result'))
+duree_exports = registre.histogramme(
+    'export_duration_seconds', 'Durée de génération des exports', ('endpoint', 'status'))
+fan_out_notifications = registre.histogramme(
+    'notification_fanout_size', 'Destinataires par envoi de notification groupé', ('type',),
+    bornes=BORNES_TAILLE)
+duree_taches = registre.histogramme(
+    'scheduler_job_duration_seconds', 'Durée des tâches planifiées', ('job', 'status'))
+
+
+def _ratio_cache():
+    ratios = {}
+    valeurs = acces_cache.valeurs()
+    for cache in {cle[0] for cle in valeurs}:
+        succes = valeurs.get((cache, 'hit'), 0)
+        total = succes + valeurs.get((cache, 'miss'), 0)
+        ratios[(cache,)] = succes / total if total else None
+    return ratios
+
+
+registre.jauge('cache_hit_ratio', 'Taux de succès des caches applicatifs', _ratio_cache, ('cache',))
+
+
+def _file_taches():
+    from app.planificateur import planificateur
+    from datetime import datetime
+    maintenant = datetime.utcnow()
+    return sum(1 for tache in planificateur.taches.values()
+               if tache.prochaine is not None and tache.est_due(maintenant))
+
+
+registre.jauge('scheduler_queue_depth', 'Tâches planifiées échues en attente d\'exécution', _file_taches)
+
+
+def _pool_connexions():
+    from app.extensions import db
+    pool = db.engine.pool
+    valeurs = {}
+    for etat, methode in (('size', 'size'), ('checked_out', 'checkedout'),
+                          ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+        if hasattr(pool, methode):
+            valeurs[(etat,)] = getattr(pool, methode)()
+    return valeurs
+
+
+registre.jauge('db_pool_connections', 'Connexions du pool SQLAlchemy', _pool_connexions, ('state',))
+
+
+def observer(histogramme, valeur, **etiquettes):
+    """Observation conditionnée au switch METRICS_ENABLED"""
+    if registre.actif:
+        histogramme.observer(valeur, **etiquettes)
+
+
+def incrementer(compteur, valeur=1, **etiquettes):
+    if registre.actif:
+        compteur.inc(valeur, **etiquettes)
+
+
+# ----- Instrumentation -----
+
+def _operation_sql(instruction):
+    mot = instruction.lstrip().split(None, 1)[0].upper() if instruction.strip() else ''
+    return mot if mot in ('SELECT', 'INSERT', 'UPDATE', 'DELETE') else 'OTHER'
+
+
+def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metriques_debuts', []).append(time.perf_counter())
+
+
+def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+    debuts = conn.info.get('metriques_debuts')
+    if not debuts:
+        return
+    duree = time.perf_counter() - debuts.pop()
+    operation = _operation_sql(statement)
+    requetes_sql.inc(operation=operation)
+    duree_sql.observer(duree, operation=operation)
+    try:
+        g.metriques_sql = g.get('metriques_sql', 0) + 1
+    except RuntimeError:
+        pass  # hors contexte de requête (CLI, threads)
+
+
+def init_app(app):
+    jeton = app.config.get('METRICS_TOKEN')
+    registre.actif = bool(app.config.get('METRICS_ENABLED', False) and jeton)
+    if not registre.actif:
+        if app.config.get('METRICS_ENABLED', False):
+            app.logger.warning("Métriques désactivées : METRICS_ENABLED exige METRICS_TOKEN")
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _avant_execution):
+        event.listen(Engine, 'before_cursor_execute', _avant_execution)
+        event.listen(Engine, 'after_cursor_execute', _apres_execution)
+
+    @app.before_request
+    def debut_requete():
+        g.metriques_debut = time.perf_counter()
+
+    @app.after_request
+    def fin_requete(response):
+        debut = g.pop('metriques_debut', None)
+        if debut is None or request.endpoint in (None, 'static', 'metriques'):
+            return response
+        duree = time.perf_counter() - debut
+        blueprint = request.blueprint or ''
+        duree_requetes.observer(duree, blueprint=blueprint, endpoint=request.endpoint,
+                                method=request.method, status=response.status_code)
+        requetes_sql_par_requete.observer(g.pop('metriques_sql', 0), blueprint=blueprint)
+        if 'export' in request.endpoint:
+            duree_exports.observer(duree, endpoint=request.endpoint, status=response.status_code)
+        return response
+
+    def metriques():
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {jeton}'):
+            abort(401)
+        return Response(registre.exposer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metriques', metriques)
+    app.extensions['metriques'] = registre
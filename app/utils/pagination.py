@@ -0,0 +1,206 @@
+"""
+Pagination par curseur (keyset / seek) des grandes listes.
+
+Au lieu de ``OFFSET n`` (qui parcourt et jette les n premières lignes), la
+page suivante est lue à partir de la clé de tri de la dernière ligne
+affichée : ``WHERE (periode_debut, id) < (:v1, :v2) ORDER BY ... LIMIT``.
+Avec un index sur les colonnes de la clé, la centième page coûte autant que
+la première. La clé doit être non nulle et se terminer par une colonne
+unique (``id``) pour que l'ordre soit total.
+
+    page = paginer_par_curseur(query, (RapportTransport.periode_debut, RapportTransport.id),
+                               curseur=request.args.get('curseur'))
+
+Les curseurs sont opaques et signés (clé secrète de l'application) : un
+curseur altéré ou périmé ramène simplement à la première page. Le total,
+optionnel, est soit recompté (``compter='exact'``), soit mis en cache
+jusqu'à la prochaine écriture dans les tables de la requête
+(``compter='cache'``, via le vecteur ``versions_donnees``).
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+
+from flask import current_app, request, url_for
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models.versions_donnees import VersionDonnees, tables_requete
+from app.utils.metriques import acces_cache, incrementer
+
+
+# Totaux mis en cache : requête -> (versions des tables, total)
+_cache_totaux = OrderedDict()
+TAILLE_CACHE_TOTAUX = 256
+
+
+class PageCurseur:
+    """
+    Page de résultats. Les attributs ``items``, ``total``, ``per_page``,
+    ``has_next`` et ``has_prev`` reprennent ceux de la pagination
+    Flask-SQLAlchemy ; les numéros de page n'existent plus.
+    """
+
+    def __init__(self, items, per_page, curseur_suivant=None, curseur_precedent=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.curseur_suivant = curseur_suivant
+        self.curseur_precedent = curseur_precedent
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.curseur_suivant is not None
+
+    @property
+    def has_prev(self):
+        return self.curseur_precedent is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _serialiseur():
+    return URLSafeSerializer(current_app.secret_key, salt='pagination-curseur')
+
+
+def _encoder_valeur(valeur):
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    return valeur
+
+
+def _decoder_valeur(colonne, valeur):
+    type_python = colonne.type.python_type
+    if valeur is not None and type_python is datetime:
+        return datetime.fromisoformat(valeur)
+    if valeur is not None and type_python is date:
+        return date.fromisoformat(valeur)
+    return valeur
+
+
+def _noms_cles(cles):
+    return [f'{cle.class_.__tablename__}.{cle.key}' if hasattr(cle, 'class_') else str(cle) for cle in cles]
+
+
+def encoder_curseur(cles, ligne, sens):
+    """Curseur opaque positionné sur `ligne` (sens 'suivant' ou 'precedent')"""
+    valeurs = [_encoder_valeur(getattr(ligne, cle.key)) for cle in cles]
+    return _serialiseur().dumps({'c': _noms_cles(cles), 'v': valeurs, 's': sens})
+
+
+def decoder_curseur(cles, curseur):
+    """(valeurs de la clé, sens) d'un curseur, None s'il est invalide"""
+    if not curseur:
+        return None
+    try:
+        contenu = _serialiseur().loads(curseur)
+        if contenu['c'] != _noms_cles(cles) or contenu['s'] not in ('suivant', 'precedent'):
+            return None
+        valeurs = [_decoder_valeur(cle, v) for cle, v in zip(cles, contenu['v'])]
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+    return valeurs, contenu['s']
+
+
+def _apres(cles, valeurs, descendant):
+    """Lignes strictement après `valeurs` dans l'ordre de la clé"""
+    def comparer(cle, valeur):
+        return cle < valeur if descendant else cle > valeur
+
+    alternatives = []
+    for i, (cle, valeur) in enumerate(zip(cles, valeurs)):
+        egalites = [c == v for c, v in zip(cles[:i], valeurs[:i])]
+        alternatives.append(and_(*egalites, comparer(cle, valeur)))
+    # Borne redondante sur la première colonne : plage d'index exploitable par tous les SGBD
+    borne = cles[0] <= valeurs[0] if descendant else cles[0] >= valeurs[0]
+    return and_(borne, or_(*alternatives))
+
+
+def total_en_cache(query):
+    """COUNT(*) de la requête, recalculé seulement après une écriture dans ses tables"""
+    instruction = query.order_by(None).statement
+    compilee = instruction.compile(dialect=db.engine.dialect)
+    cle = (str(compilee), repr(sorted(compilee.params.items())))
+    versions = VersionDonnees.lire(tables_requete(instruction))
+
+    if cle in _cache_totaux and _cache_totaux[cle][0] == versions:
+        _cache_totaux.move_to_end(cle)
+        incrementer(acces_cache, cache='totaux_pagination', result='hit')
+        return _cache_totaux[cle][1]
+
+    incrementer(acces_cache, cache='totaux_pagination', result='miss')
+    total = query.order_by(None).count()
+    _cache_totaux[cle] = (versions, total)
+    while len(_cache_totaux) > TAILLE_CACHE_TOTAUX:
+        _cache_totaux.popitem(last=False)
+    return total
+
+
+def paginer_par_curseur(query, cles, curseur=None, per_page=20, descendant=True, compter='cache'):
+    """
+    Page de `query` ordonnée par `cles` à partir d'un curseur.
+
+    Args:
+        query: Requête ORM filtrée, sans ORDER BY
+        cles: Colonnes non nulles de la clé de tri, la dernière unique (id)
+        curseur: Curseur reçu de la page précédente (None = première page)
+        per_page: Nombre de lignes par page
+        descendant: Ordre décroissant (plus récent en premier)
+        compter: 'cache', 'exact' ou None (pas de total)
+
+    Returns:
+        PageCurseur
+    """
+    per_page = max(1, min(per_page, 200))
+    position = decoder_curseur(cles, curseur)
+    total = None
+    if compter == 'exact':
+        total = query.order_by(None).count()
+    elif compter == 'cache':
+        total = total_en_cache(query)
+
+    ordre_normal = [cle.desc() if descendant else cle.asc() for cle in cles]
+    ordre_inverse = [cle.asc() if descendant else cle.desc() for cle in cles]
+
+    if position is None:
+        lignes = query.order_by(*ordre_normal).limit(per_page + 1).all()
+        plus = len(lignes) > per_page
+        lignes = lignes[:per_page]
+        suivant = plus
+        precedent = False
+    else:
+        valeurs, sens = position
+        if sens == 'suivant':
+            lignes = query.filter(_apres(cles, valeurs, descendant)) \
+                          .order_by(*ordre_normal).limit(per_page + 1).all()
+            suivant = len(lignes) > per_page
+            lignes = lignes[:per_page]
+            precedent = True
+        else:
+            # Page précédente : parcours en sens inverse puis remise dans l'ordre
+            lignes = query.filter(_apres(cles, valeurs, not descendant)) \
+                          .order_by(*ordre_inverse).limit(per_page + 1).all()
+            precedent = len(lignes) > per_page
+            lignes = list(reversed(lignes[:per_page]))
+            suivant = True
+
+    return PageCurseur(
+        lignes, per_page,
+        curseur_suivant=encoder_curseur(cles, lignes[-1], 'suivant') if suivant and lignes else None,
+        curseur_precedent=encoder_curseur(cles, lignes[0], 'precedent') if precedent and lignes else None,
+        total=total
+    )
+
+
+def url_curseur(curseur=None):
+    """URL de la page courante positionnée sur `curseur` (filtres conservés)"""
+    arguments = request.args.to_dict(flat=False)
+    arguments.pop('page', None)
+    arguments.pop('curseur', None)
+    if curseur:
+        arguments['curseur'] = curseur
+    return url_for(request.endpoint, **(request.view_args or {}), **arguments)
@@ -76,13 +76,11 @@ def get_dashboard_are_operateur_filter():
 
 def get_dashboard_are_operateurs_choices():
     """Obtenir les choix d'opérateurs pour les filtres du dashboard ARE"""
-    from app.models.operateurs import Operateur
+    from app.utils.referentiel import choix_referentiel
     
     # Super admin peut choisir parmi tous les opérateurs
     if hasattr(current_user, 'is_super_admin') and current_user.is_super_admin():
-        operateurs = Operateur.query.filter_by(actif=True).all()
-        choices = [('', 'Tous les opérateurs')] + [(op.id, op.nom) for op in operateurs]
-        return choices
+        return choix_referentiel('operateurs', vide=('', 'Tous les opérateurs'))
     
     # Contact ou utilisateur d'opérateur ne voit que son opérateur
     if hasattr(current_user, 'operateur_id') and current_user.operateur_id and current_user.operateur:
@@ -100,11 +98,11 @@ def can_access_feeder(feeder):
 
 def get_operateur_choices():
     """Obtenir les choix d'opérateurs pour les formulaires SelectField"""
-    operateurs = get_accessible_operateurs()
+    from app.utils.referentiel import choix_accessibles
     if current_user.is_admin():
-        return [('', 'Sélectionner un opérateur')] + [(op.id, op.nom) for op in operateurs]
+        return choix_accessibles('operateurs', vide=('', 'Sélectionner un opérateur'))
     else:
-        return [(op.id, op.nom) for op in operateurs]
+        return choix_accessibles('operateurs')
 
 
 def get_default_operateur_id():
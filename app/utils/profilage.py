@@ -0,0 +1,280 @@
+"""
+Profilage de requêtes à la demande, utilisable en production.
+
+Une requête est profilée quand un super administrateur la marque (en-tête
+``X-Profile: 1`` ou paramètre ``?_profile=1``) ou, si PROFILER_SAMPLE_RATE
+vaut N > 0, une requête sur N. Elle s'exécute alors sous cProfile pendant
+qu'un thread échantillonne sa pile d'appels ; le temps passé en SQL est
+relevé par les événements du moteur.
+
+Chaque capture est rangée dans ``instance/profiles`` :
+    <id>.pstats     statistiques cProfile (``python -m pstats``, snakeviz)
+    <id>.collapsed  piles repliées (flamegraph.pl, speedscope)
+    <id>.json       résumé affiché dans l'administration
+
+Désactivé par défaut (PROFILER_ENABLED) : sans activation aucun hook n'est
+installé.
+"""
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+EXTENSIONS = ('json', 'pstats', 'collapsed')
+NB_FONCTIONS = 30  # fonctions conservées dans le résumé
+NB_REQUETES_SQL = 10  # requêtes SQL les plus lentes conservées
+PROFONDEUR_MAX = 200
+MOTIF_ID = re.compile(r'^[0-9T]{21}_[\w.-]+$')
+
+# cProfile n'accepte qu'un profileur actif à la fois (Python 3.12+) : une
+# seule capture en cours par processus, les autres requêtes ne sont pas profilées
+_verrou_capture = threading.Lock()
+
+
+class ProfileurRequetes:
+    """Hooks de profilage et accès aux captures enregistrées"""
+
+    def __init__(self):
+        self.actif = False
+        self.dossier = None
+        self.taux = 0
+        self.intervalle = 0.005
+        self.max_captures = 200
+        self._compteur = itertools.count(1)
+
+    def init_app(self, app):
+        self.actif = app.config.get('PROFILER_ENABLED', False)
+        self.dossier = app.config.get('PROFILER_DIR') or os.path.join(app.instance_path, 'profiles')
+        self.taux = app.config.get('PROFILER_SAMPLE_RATE', 0)
+        self.intervalle = app.config.get('PROFILER_SAMPLE_INTERVAL', 0.005)
+        self.max_captures = app.config.get('PROFILER_MAX_CAPTURES', 200)
+        app.extensions['profileur'] = self
+        if not self.actif:
+            return
+
+        if not event.contains(Engine, 'before_cursor_execute', _avant_execution):
+            event.listen(Engine, 'before_cursor_execute', _avant_execution)
+            event.listen(Engine, 'after_cursor_execute', _apres_execution)
+
+        app.before_request(self._debut)
+        app.after_request(self._statut)
+        app.teardown_request(self._fin)
+
+    # ----- Hooks -----
+
+    def _declencheur(self):
+        if request.endpoint in (None, 'static'):
+            return None
+        demande = request.headers.get('X-Profile') == '1' or request.args.get('_profile') == '1'
+        if demande and current_user.is_authenticated and getattr(current_user, 'role', None) == 'super_admin':
+            return 'manuel'
+        if self.taux and next(self._compteur) % self.taux == 0:
+            return 'echantillonnage'
+        return None
+
+    def _debut(self):
+        declencheur = self._declencheur()
+        if declencheur is None or not _verrou_capture.acquire(blocking=False):
+            return
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError as e:
+            # Autre outil de profilage actif (sys.monitoring)
+            _verrou_capture.release()
+            current_app.logger.warning(f"Profilage : capture ignorée : {e}")
+            return
+        echantillonneur = EchantillonneurPile(threading.get_ident(), self.intervalle)
+        g.profil = {
+            'declencheur': declencheur,
+            'profil': profil,
+            'echantillonneur': echantillonneur,
+            'sql_nombre': 0,
+            'sql_duree': 0.0,
+            'sql_lentes': [],
+            'debut': time.perf_counter(),
+        }
+        echantillonneur.demarrer()
+
+    def _statut(self, response):
+        if 'profil' in g:
+            g.profil['statut'] = response.status_code
+        return response
+
+    def _fin(self, exception=None):
+        capture = g.pop('profil', None)
+        if capture is None:
+            return
+        try:
+            capture['profil'].disable()
+        finally:
+            _verrou_capture.release()
+        capture['echantillonneur'].arreter()
+        capture['duree'] = time.perf_counter() - capture['debut']
+        try:
+            self.enregistrer(capture, exception)
+        except Exception as e:
+            current_app.logger.error(f"Profilage : capture non enregistrée : {e}")
+
+    # ----- Enregistrement -----
+
+    def enregistrer(self, capture, exception=None):
+        """Écrire les fichiers .pstats, .collapsed et .json d'une capture"""
+        os.makedirs(self.dossier, exist_ok=True)
+        horodatage = datetime.utcnow()
+        endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'inconnu')
+        identifiant = f"{horodatage:%Y%m%dT%H%M%S%f}_{endpoint}"
+        base = os.path.join(self.dossier, identifiant)
+
+        stats = pstats.Stats(capture['profil'])
+        stats.dump_stats(base + '.pstats')
+
+        piles = capture['echantillonneur'].piles
+        with open(base + '.collapsed', 'w', encoding='utf-8') as fichier:
+            for pile, nombre in piles.most_common():
+                fichier.write(f"{';'.join(pile)} {nombre}\n")
+
+        resume = {
+            'id': identifiant,
+            'date': horodatage.isoformat(),
+            'endpoint': request.endpoint,
+            'methode': request.method,
+            'url': request.full_path.rstrip('?'),
+            'statut': 500 if exception is not None else capture.get('statut'),
+            'utilisateur': current_user.get_id() if current_user.is_authenticated else None,
+            'declencheur': capture['declencheur'],
+            'duree_ms': capture['duree'] * 1000,
+            'sql': {
+                'nombre': capture['sql_nombre'],
+                'duree_ms': capture['sql_duree'] * 1000,
+                'plus_lentes': capture['sql_lentes'],
+            },
+            'echantillons': sum(piles.values()),
+            'fonctions_cumul': _fonctions(stats, 'cumulative'),
+            'fonctions_propre': _fonctions(stats, 'tottime'),
+        }
+        with open(base + '.json', 'w', encoding='utf-8') as fichier:
+            json.dump(resume, fichier, ensure_ascii=False)
+
+        self.purger()
+        return resume
+
+    def purger(self):
+        """Ne conserver que les PROFILER_MAX_CAPTURES captures les plus récentes"""
+        for identifiant in self.identifiants()[self.max_captures:]:
+            for extension in EXTENSIONS:
+                chemin = self.chemin(identifiant, extension)
+                if chemin and os.path.exists(chemin):
+                    os.remove(chemin)
+
+    # ----- Consultation -----
+
+    def identifiants(self):
+        """Identifiants des captures, de la plus récente à la plus ancienne"""
+        if not self.dossier or not os.path.isdir(self.dossier):
+            return []
+        return sorted((nom[:-5] for nom in os.listdir(self.dossier) if nom.endswith('.json')),
+                      reverse=True)
+
+    def chemin(self, identifiant, extension):
+        if extension not in EXTENSIONS or not MOTIF_ID.match(identifiant):
+            return None
+        return os.path.join(self.dossier, f"{identifiant}.{extension}")
+
+    def capture(self, identifiant):
+        """Résumé d'une capture (None si inconnue)"""
+        chemin = self.chemin(identifiant, 'json')
+        if not chemin or not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding='utf-8') as fichier:
+            return json.load(fichier)
+
+    def captures(self, limite=100):
+        resumes = []
+        for identifiant in self.identifiants()[:limite]:
+            try:
+                resumes.append(self.capture(identifiant))
+            except (OSError, ValueError):
+                continue  # capture en cours d'écriture ou purgée entre-temps
+        return [r for r in resumes if r]
+
+
+class EchantillonneurPile:
+    """Relève périodiquement la pile d'appels d'un thread (piles repliées)"""
+
+    def __init__(self, ident, intervalle):
+        self.ident = ident
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._boucle, name='profilage', daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread:
+            self._thread.join()
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            cadre = sys._current_frames().get(self.ident)
+            pile = []
+            while cadre is not None and len(pile) < PROFONDEUR_MAX:
+                code = cadre.f_code
+                pile.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                cadre = cadre.f_back
+            if pile:
+                self.piles[tuple(reversed(pile))] += 1
+
+
+def _fonctions(stats, tri):
+    """Fonctions les plus coûteuses selon le tri cProfile demandé"""
+    indice = 3 if tri == 'cumulative' else 2
+    lignes = sorted(stats.stats.items(), key=lambda item: -item[1][indice])[:NB_FONCTIONS]
+    return [{
+        'fonction': fonction,
+        'fichier': fichier,
+        'ligne': ligne,
+        'appels': appels,
+        'propre_ms': propre * 1000,
+        'cumul_ms': cumul * 1000,
+    } for (fichier, ligne, fonction), (_, appels, propre, cumul, _) in lignes]
+
+
+def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profil' in g:
+        conn.info.setdefault('profilage_debuts', []).append(time.perf_counter())
+
+
+def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+    debuts = conn.info.get('profilage_debuts')
+    if not debuts or not has_request_context() or 'profil' not in g:
+        return
+    duree = time.perf_counter() - debuts.pop()
+    capture = g.profil
+    capture['sql_nombre'] += 1
+    capture['sql_duree'] += duree
+    lentes = capture['sql_lentes']
+    if len(lentes) < NB_REQUETES_SQL or duree * 1000 > lentes[-1]['duree_ms']:
+        lentes.append({'requete': statement[:500], 'duree_ms': duree * 1000})
+        lentes.sort(key=lambda r: -r['duree_ms'])
+        del lentes[NB_REQUETES_SQL:]
+
+
+profileur = ProfileurRequetes()
@@ -0,0 +1,167 @@
+"""
+Projections en lecture seule pour les listes et tableaux de bord.
+
+Une liste qui affiche cinq champs n'a pas besoin d'entités ORM complètes
+(colonnes Text ``observations``, ``description_incidents``..., suivi des
+modifications, carte d'identité de la session, chargements paresseux des
+relations). Une projection déclare les champs lus par la vue, les charge
+par ``with_entities`` et renvoie des lignes légères à ``__slots__``,
+détachées de toute session :
+
+    RAPPORTS = Projection(RapportHydro, (
+        'id', 'annee', 'mois', 'energie_produite', 'statut',
+        'centrale.nom', 'centrale.code',           # relation : jointure externe
+        ('centrale.description', func.substr(CentraleHydro.description, 1, 101)),
+    ), methodes=('get_periode_str',))
+
+    rapports = RAPPORTS.paginer(query, page, per_page)   # rapport.centrale.nom
+    centrales = CENTRALES.lister(CentraleHydro.query.filter_by(actif=True))
+
+Les méthodes listées dans ``methodes`` sont reprises du modèle ; elles ne
+doivent lire que des champs projetés. Une relation dont la clé est nulle
+vaut ``None``, comme sur l'entité.
+"""
+from sqlalchemy import inspect
+
+from app.models.versions_donnees import tables_requete
+
+
+class LigneProjection:
+    """Ligne projetée : attributs dans ``__slots__``, non modifiable"""
+    __slots__ = ()
+
+    def __init__(self, *valeurs):
+        for nom, valeur in zip(self.__slots__, valeurs):
+            object.__setattr__(self, nom, valeur)
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError(f'{type(self).__name__} est en lecture seule')
+
+    def __delattr__(self, nom):
+        raise AttributeError(f'{type(self).__name__} est en lecture seule')
+
+    def _asdict(self):
+        return {nom: getattr(self, nom) for nom in self.__slots__}
+
+    def __eq__(self, autre):
+        return type(autre) is type(self) and self._asdict() == autre._asdict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        champs = ', '.join(f'{nom}={getattr(self, nom)!r}' for nom in self.__slots__)
+        return f'<{type(self).__name__} {champs}>'
+
+
+class _Noeud:
+    """Modèle projeté (racine ou relation) : ses champs puis ses relations"""
+
+    def __init__(self, modele, relation=None):
+        self.modele = modele
+        self.relation = relation
+        self.champs = {}
+        self.enfants = {}
+        self.classe = None
+        self.indices = []
+        self.indice_cle = None
+
+    def enfant(self, nom):
+        if nom not in self.enfants:
+            relation = getattr(self.modele, nom)
+            self.enfants[nom] = _Noeud(relation.property.mapper.class_, relation)
+        return self.enfants[nom]
+
+    def construire(self, ligne):
+        valeurs = [ligne[i] for i in self.indices]
+        for enfant in self.enfants.values():
+            valeurs.append(None if ligne[enfant.indice_cle] is None else enfant.construire(ligne))
+        return self.classe(*valeurs)
+
+
+class Projection:
+    """
+    Champs d'un modèle (et de ses relations) lus par une vue.
+
+    Args:
+        modele: Modèle racine
+        champs: Noms de colonnes, chemins 'relation.colonne' ou couples
+            (chemin, expression SQL) pour un champ calculé ou tronqué
+        methodes: Méthodes du modèle disponibles sur les lignes
+        nom: Nom de la classe des lignes (par défaut <Modele>Projection)
+    """
+
+    def __init__(self, modele, champs, methodes=(), nom=None):
+        self.modele = modele
+        self.racine = _Noeud(modele)
+        for champ in champs:
+            chemin, expression = champ if isinstance(champ, tuple) else (champ, None)
+            *relations, attribut = chemin.split('.')
+            noeud = self.racine
+            for relation in relations:
+                noeud = noeud.enfant(relation)
+            noeud.champs[attribut] = expression if expression is not None else getattr(noeud.modele, attribut)
+
+        self.colonnes = []
+        self.jointures = []
+        # chemin ('centrale.nom') -> position de la colonne dans les tuples de `requete`
+        self.indices = {}
+        self._preparer(self.racine, nom or f'{modele.__name__}Projection', methodes)
+
+    def _preparer(self, noeud, nom_classe, methodes=(), prefixe=''):
+        if noeud.relation is not None:
+            # La clé primaire de la relation distingue « pas de relation » d'une ligne vide
+            self.jointures.append(noeud.relation)
+            cle = inspect(noeud.modele).primary_key[0]
+            noeud.indice_cle = len(self.colonnes)
+            self.colonnes.append(cle.label(None))
+
+        for nom, expression in noeud.champs.items():
+            self.indices[prefixe + nom] = len(self.colonnes)
+            noeud.indices.append(len(self.colonnes))
+            self.colonnes.append(expression.label(None))
+
+        attributs = {'__slots__': tuple(noeud.champs) + tuple(noeud.enfants)}
+        for methode in methodes:
+            attributs[methode] = _attribut_modele(noeud.modele, methode)
+        noeud.classe = type(nom_classe, (LigneProjection,), attributs)
+
+        for nom, enfant in noeud.enfants.items():
+            self._preparer(enfant, f'{nom_classe}_{nom}', prefixe=f'{prefixe}{nom}.')
+
+    def requete(self, query=None):
+        """`query` (filtres, tri) réduite aux colonnes projetées"""
+        if query is None:
+            query = self.modele.query
+        tables = tables_requete(query.statement)
+        for relation in self.jointures:
+            # Relation déjà jointe par la vue (filtre ou tri) : ses colonnes sont réutilisées
+            if relation.property.mapper.local_table.name not in tables:
+                query = query.outerjoin(relation)
+        return query.with_entities(*self.colonnes)
+
+    def construire(self, lignes):
+        """Lignes projetées à partir des tuples de `requete`"""
+        return [self.racine.construire(ligne) for ligne in lignes]
+
+    def lister(self, query=None):
+        """Toutes les lignes de `query`"""
+        return self.construire(self.requete(query))
+
+    def premier(self, query=None):
+        """Première ligne de `query` ou None"""
+        ligne = self.requete(query).first()
+        return self.racine.construire(ligne) if ligne is not None else None
+
+    def paginer(self, query, page, per_page):
+        """Pagination Flask-SQLAlchemy dont les items sont des lignes projetées"""
+        pagination = self.requete(query).paginate(page=page, per_page=per_page, error_out=False)
+        pagination.items = self.construire(pagination.items)
+        return pagination
+
+
+def _attribut_modele(modele, nom):
+    """Fonction ou propriété telle que déclarée sur le modèle (sans liaison)"""
+    for classe in modele.__mro__:
+        if nom in classe.__dict__:
+            return classe.__dict__[nom]
+    raise AttributeError(f'{modele.__name__} n\'a pas d\'attribut {nom}')
@@ -0,0 +1,158 @@
+"""
+Cache des données de référence pour les listes de choix des formulaires.
+
+Les SelectField n'ont besoin que de ``(id, libellé)`` : au lieu de charger
+tous les opérateurs, lignes, postes ou centrales comme objets ORM à chaque
+affichage de formulaire, les colonnes utiles sont projetées une seule fois
+par entité et par périmètre d'opérateur, puis servies depuis la mémoire.
+Une entrée est recalculée dès que le vecteur ``versions_donnees`` d'une de
+ses tables a changé (création, modification, suppression logique), ce que
+tous les processus voient au prix d'une seule petite requête.
+
+    form.reseau_id.choices = choix_accessibles(
+        'reseaux_distribution', '{nom} ({operateur})', vide=('', 'Sélectionner un réseau')
+    )
+"""
+from flask_login import current_user
+
+from app.extensions import db
+from app.models.distribution import PosteDistribution, ReseauDistribution
+from app.models.operateurs import Operateur
+from app.models.production_hydro import CentraleHydro
+from app.models.production_solaire import CentraleSolaire
+from app.models.production_thermique import CentraleThermique
+from app.models.transport import LigneTransport, PosteTransport
+from app.models.versions_donnees import VersionDonnees, tables_requete
+from app.utils.metriques import acces_cache, incrementer
+
+
+# (entité, périmètre) -> {'versions', 'lignes', 'libelles'}
+_cache_referentiel = {}
+
+
+class Referentiel:
+    """Projection d'une entité de référence : champs du libellé et colonne de périmètre"""
+
+    def __init__(self, modele, champs, portee, jointures=(), filtres=()):
+        self.modele = modele
+        self.champs = champs
+        self.portee = portee
+        self.jointures = jointures
+        self.filtres = filtres
+        self._tables = None
+
+    def tables(self):
+        """Tables dont dépend la liste (modèle et jointures)"""
+        if self._tables is None:
+            self._tables = tables_requete(self.requete().statement)
+        return self._tables
+
+    def requete(self, operateur_id=None):
+        requete = db.session.query(
+            self.modele.id, *(colonne.label(nom) for nom, colonne in self.champs.items())
+        ).select_from(self.modele)
+        for jointure in self.jointures:
+            requete = requete.outerjoin(jointure)
+        requete = requete.filter(self.modele.actif == True, *self.filtres)
+        if operateur_id is not None:
+            requete = requete.filter(self.portee == operateur_id)
+        return requete.order_by(self.champs['nom'], self.modele.id)
+
+
+REFERENTIELS = {
+    'operateurs': Referentiel(
+        Operateur, {'nom': Operateur.nom, 'sigle': Operateur.sigle}, Operateur.id
+    ),
+    'operateurs_distribution': Referentiel(
+        Operateur, {'nom': Operateur.nom, 'sigle': Operateur.sigle}, Operateur.id,
+        filtres=(Operateur.type_operateur == 'Distribution',)
+    ),
+    'lignes_transport': Referentiel(
+        LigneTransport, {'nom': LigneTransport.nom, 'code': LigneTransport.code, 'operateur': Operateur.nom},
+        LigneTransport.operateur_id, jointures=(LigneTransport.operateur,)
+    ),
+    'postes_transport': Referentiel(
+        PosteTransport, {'nom': PosteTransport.nom, 'code': PosteTransport.code, 'operateur': Operateur.nom},
+        PosteTransport.operateur_id, jointures=(PosteTransport.operateur,)
+    ),
+    'reseaux_distribution': Referentiel(
+        ReseauDistribution,
+        {'nom': ReseauDistribution.nom, 'code': ReseauDistribution.code, 'operateur': Operateur.nom},
+        ReseauDistribution.operateur_id, jointures=(ReseauDistribution.operateur,)
+    ),
+    'postes_distribution': Referentiel(
+        PosteDistribution,
+        {'nom': PosteDistribution.nom, 'code': PosteDistribution.code,
+         'reseau': ReseauDistribution.nom, 'operateur': Operateur.nom},
+        ReseauDistribution.operateur_id,
+        jointures=(PosteDistribution.reseau, ReseauDistribution.operateur)
+    ),
+    'centrales_hydro': Referentiel(
+        CentraleHydro, {'nom': CentraleHydro.nom, 'code': CentraleHydro.code, 'operateur': Operateur.nom},
+        CentraleHydro.operateur_id, jointures=(CentraleHydro.operateur,)
+    ),
+    'centrales_thermique': Referentiel(
+        CentraleThermique,
+        {'nom': CentraleThermique.nom, 'code': CentraleThermique.code, 'operateur': Operateur.nom},
+        CentraleThermique.operateur_id, jointures=(CentraleThermique.operateur,)
+    ),
+    'centrales_solaire': Referentiel(
+        CentraleSolaire, {'nom': CentraleSolaire.nom, 'code': CentraleSolaire.code, 'operateur': Operateur.nom},
+        CentraleSolaire.operateur_id, jointures=(CentraleSolaire.operateur,)
+    ),
+}
+
+
+def _entree(entite, operateur_id):
+    """Lignes projetées de l'entité, rechargées si une de ses tables a changé"""
+    referentiel = REFERENTIELS[entite]
+    versions = VersionDonnees.lire(referentiel.tables())
+
+    cle = (entite, operateur_id)
+    entree = _cache_referentiel.get(cle)
+    if entree is not None and entree['versions'] == versions:
+        incrementer(acces_cache, cache='referentiel', result='hit')
+        return entree
+
+    incrementer(acces_cache, cache='referentiel', result='miss')
+    lignes = [ligne._asdict() for ligne in referentiel.requete(operateur_id)]
+    entree = {'versions': versions, 'lignes': lignes, 'libelles': {}}
+    _cache_referentiel[cle] = entree
+    return entree
+
+
+def choix_referentiel(entite, libelle='{nom}', operateur_id=None, vide=None):
+    """
+    Choix ``(id, libellé)`` d'une entité de référence active.
+
+    Args:
+        entite: Clé de REFERENTIELS ('operateurs', 'reseaux_distribution', ...)
+        libelle: Format du libellé sur les champs projetés ('{nom} ({code})')
+        operateur_id: Limiter à un opérateur (None = tous)
+        vide: Choix ajouté en tête, par exemple ('', 'Sélectionner...')
+
+    Returns:
+        Nouvelle liste de tuples, modifiable par l'appelant
+    """
+    entree = _entree(entite, operateur_id)
+    if libelle not in entree['libelles']:
+        entree['libelles'][libelle] = [
+            (ligne['id'], libelle.format_map({nom: valeur or '' for nom, valeur in ligne.items()}))
+            for ligne in entree['lignes']
+        ]
+    choix = list(entree['libelles'][libelle])
+    return [vide] + choix if vide else choix
+
+
+def choix_accessibles(entite, libelle='{nom}', vide=None):
+    """Choix limités au périmètre de l'utilisateur connecté (tous pour un admin)"""
+    if hasattr(current_user, 'is_admin') and current_user.is_admin():
+        return choix_referentiel(entite, libelle, vide=vide)
+    if getattr(current_user, 'operateur_id', None):
+        return choix_referentiel(entite, libelle, operateur_id=current_user.operateur_id, vide=vide)
+    return [vide] if vide else []
+
+
+def vider_cache_referentiel():
+    """Vider le cache (toutes entités)"""
+    _cache_referentiel.clear()
@@ -0,0 +1,169 @@
+"""
+Sérialisation JSON en masse pilotée par un schéma.
+
+Les ``to_dict()`` des modèles construisent un dictionnaire objet par objet
+(``isoformat()`` et accès aux relations à chaque ligne). Un ``Schema``
+déclare une fois les champs exposés par une API ; au premier usage il est
+compilé en un plan : une projection (``app/utils/projections.py``) qui
+lit les colonnes et joint les relations en une requête, la position de
+chaque champ dans les tuples et la conversion à appliquer selon le type
+de colonne (dates ISO 8601, valeur des Enum, Numeric en float).
+
+    SCHEMA_KPIS = Schema(KPIStrategic, (
+        'id', 'code', 'valeur', 'tendance', 'date_modification',
+        Champ('operateur.nom', cle='operateur', defaut='National'),
+    ))
+
+    SCHEMA_KPIS.dicts(query)          # [{'id': 1, 'code': ..., 'operateur': ...}, ...]
+    SCHEMA_KPIS.colonnes(query)       # {'cols': [...], 'rows': [[...], ...]} pour les graphiques
+    reponse_flux(SCHEMA_KPIS, query)  # tableau JSON envoyé par lots
+"""
+import json
+from operator import itemgetter
+
+from flask import current_app, request, stream_with_context
+from sqlalchemy import types
+
+from app.utils.projections import Projection
+
+
+# Lignes lues et encodées par lot dans une réponse en flux
+TAILLE_LOT_FLUX = 500
+
+
+class Champ:
+    """
+    Champ d'un schéma.
+
+    Args:
+        chemin: Colonne ('nom'), colonne d'une relation ('ligne.code') ou tuple
+            de chemins passés ensemble à `convertir` pour un champ calculé
+        cle: Clé JSON (par défaut le chemin)
+        defaut: Valeur quand la colonne (ou la relation) est nulle
+        convertir: Conversion de la valeur non nulle (déduite du type de colonne sinon)
+    """
+
+    def __init__(self, chemin, cle=None, defaut=None, convertir=None):
+        self.chemins = chemin if isinstance(chemin, tuple) else (chemin,)
+        self.cle = cle or chemin
+        self.defaut = defaut
+        self.convertir = convertir
+
+
+def _conversion_type(type_colonne):
+    """Conversion JSON d'une valeur selon le type SQLAlchemy (None si inutile)"""
+    if isinstance(type_colonne, (types.DateTime, types.Date, types.Time)):
+        return lambda valeur: valeur.isoformat()
+    if isinstance(type_colonne, types.Enum) and type_colonne.enum_class is not None:
+        return lambda valeur: valeur.value
+    if isinstance(type_colonne, types.Numeric) and type_colonne.asdecimal:
+        return float
+    return None
+
+
+class Schema:
+    """Champs exposés d'un modèle, compilés en plan de sérialisation au premier usage"""
+
+    def __init__(self, modele, champs):
+        self.modele = modele
+        self.champs = [champ if isinstance(champ, Champ) else Champ(champ) for champ in champs]
+        self.cles = [champ.cle for champ in self.champs]
+        self._plan = None
+
+    def _compiler(self):
+        chemins = list(dict.fromkeys(chemin for champ in self.champs for chemin in champ.chemins))
+        projection = Projection(self.modele, chemins)
+
+        positions = []
+        conversions = []
+        for position, champ in enumerate(self.champs):
+            indices = tuple(projection.indices[chemin] for chemin in champ.chemins)
+            positions.append(indices[0])
+            if len(indices) > 1:
+                # Champ calculé : `convertir` reçoit le tuple des valeurs
+                conversions.append((position, indices, champ.convertir, champ.defaut))
+                continue
+            convertir = champ.convertir or _conversion_type(projection.colonnes[indices[0]].type)
+            if convertir is not None or champ.defaut is not None:
+                conversions.append((position, None, convertir, champ.defaut))
+
+        if len(positions) == 1:
+            extraire = lambda ligne, i=positions[0]: (ligne[i],)
+        else:
+            extraire = itemgetter(*positions)
+        self._plan = (projection, extraire, conversions)
+        return self._plan
+
+    @property
+    def plan(self):
+        return self._plan or self._compiler()
+
+    def requete(self, query=None):
+        """Requête projetée sur les colonnes du schéma"""
+        return self.plan[0].requete(query)
+
+    def valeurs(self, lignes):
+        """Listes de valeurs JSON (ordre de `cles`) à partir des tuples de `requete`"""
+        _, extraire, conversions = self.plan
+        for ligne in lignes:
+            valeurs = list(extraire(ligne))
+            for position, indices, convertir, defaut in conversions:
+                if indices is not None:
+                    valeurs[position] = convertir(tuple(ligne[i] for i in indices))
+                    continue
+                valeur = valeurs[position]
+                if valeur is None:
+                    valeurs[position] = defaut
+                elif convertir is not None:
+                    valeurs[position] = convertir(valeur)
+            yield valeurs
+
+    def dicts(self, query=None):
+        """Liste de dictionnaires (format des to_dict())"""
+        cles = self.cles
+        return [dict(zip(cles, valeurs)) for valeurs in self.valeurs(self.requete(query))]
+
+    def colonnes(self, query=None):
+        """Format colonnes pour les graphiques : {'cols': [...], 'rows': [[...], ...]}"""
+        return {'cols': list(self.cles), 'rows': list(self.valeurs(self.requete(query)))}
+
+    def flux(self, query=None, colonnes=False, taille_lot=TAILLE_LOT_FLUX):
+        """Morceaux de texte JSON d'un tableau (ou du format colonnes), lot par lot"""
+        fournisseur = current_app.json
+        encodeur = json.JSONEncoder(
+            ensure_ascii=fournisseur.ensure_ascii, sort_keys=fournisseur.sort_keys,
+            separators=(',', ':'), default=fournisseur.default
+        )
+        cles = self.cles
+        if colonnes:
+            yield '{"cols":' + encodeur.encode(cles) + ',"rows":['
+        else:
+            yield '['
+
+        lignes = self.requete(query).yield_per(taille_lot)
+        lot = []
+        premier = True
+        for valeurs in self.valeurs(lignes):
+            lot.append(valeurs if colonnes else dict(zip(cles, valeurs)))
+            if len(lot) == taille_lot:
+                yield ('' if premier else ',') + encodeur.encode(lot)[1:-1]
+                premier = False
+                lot = []
+        if lot:
+            yield ('' if premier else ',') + encodeur.encode(lot)[1:-1]
+
+        yield ']}' if colonnes else ']'
+
+
+def format_colonnes_demande():
+    """Format colonnes demandé par le client (?format=colonnes)"""
+    return request.args.get('format') == 'colonnes'
+
+
+def reponse_flux(schema, query=None, colonnes=None):
+    """Réponse JSON en flux (tableau ou format colonnes selon ?format=colonnes)"""
+    if colonnes is None:
+        colonnes = format_colonnes_demande()
+    return current_app.response_class(
+        stream_with_context(schema.flux(query, colonnes=colonnes)), mimetype='application/json'
+    )
@@ -16,9 +16,11 @@ from app.models.workflow import (
     TypeRapport, StatutWorkflow, TypeAction
 )
 from app.models.utilisateurs import User
-from app.models.operateurs import Operateur
 from app.extensions import db
 from app.utils.helpers import admin_required
+from app.workflow.services import WorkflowService
+from app.utils.pagination import paginer_par_curseur
+from app.utils.referentiel import choix_referentiel
 import json
 
 
@@ -286,10 +288,11 @@ def liste_validations():
         elif exp_filter == 'en_cours':
             query = query.filter(ValidationRapport.date_expiration > now)
     
-    # Pagination
-    page = request.args.get('page', 1, type=int)
-    validations = query.order_by(ValidationRapport.date_soumission.desc())\
-                      .paginate(page=page, per_page=20, error_out=False)
+    # Pagination par curseur sur (date_creation, id) : date_soumission peut être nulle
+    validations = paginer_par_curseur(
+        query, (ValidationRapport.date_creation, ValidationRapport.id),
+        curseur=request.args.get('curseur'), per_page=20
+    )
     
     return render_template('workflow/liste.html',
                          form=form,
@@ -349,30 +352,31 @@ def relancer_validation(validation_id):
 @admin_required
 def admin_index():
     """Tableau de bord administrateur du workflow"""
-    # Statistiques globales
+    # Statistiques détaillées (agrégats en cache, validations expirées comptées à chaque appel)
+    statistiques = WorkflowService.get_statistiques_detaillees()
+    globales = statistiques['global']
+    
     stats = {
-        'total_validations': ValidationRapport.query.count(),
-        'en_attente': ValidationRapport.query.filter(
-            ValidationRapport.statut.in_([StatutWorkflow.SOUMIS, StatutWorkflow.EN_VALIDATION])
-        ).count(),
-        'expirees': len(ValidationRapport.get_validations_expirees()),
+        'total_validations': globales['total'],
+        'en_attente': globales['en_attente'],
+        'expirees': globales['expirees'],
         'workflows_configures': Workflow.query.count()
     }
     
     # Validations par statut
-    validations_par_statut = {}
-    for statut in StatutWorkflow:
-        validations_par_statut[statut.value] = ValidationRapport.query.filter_by(statut=statut).count()
+    validations_par_statut = {statut.value: globales[statut.value] for statut in StatutWorkflow}
     
     # Validations par type
-    validations_par_type = {}
-    for type_rapport in TypeRapport:
-        validations_par_type[type_rapport.value] = ValidationRapport.query.filter_by(type_rapport=type_rapport).count()
+    validations_par_type = {type_rapport.value: 0 for type_rapport in TypeRapport}
+    for ligne in statistiques['par_type']:
+        if ligne['cle'] in validations_par_type:
+            validations_par_type[ligne['cle']] = ligne['total']
     
     return render_template('workflow/admin/index.html',
                          stats=stats,
                          validations_par_statut=validations_par_statut,
-                         validations_par_type=validations_par_type)
+                         validations_par_type=validations_par_type,
+                         statistiques=statistiques)
 
 
 @bp.route('/admin/workflows')
@@ -430,8 +434,7 @@ def nouveau_validateur():
     form = ValidateurDesigneForm()
     
     # Remplir les choix
-    operateurs = Operateur.query.filter_by(actif=True).all()
-    form.operateur_id.choices = [(o.id, o.nom) for o in operateurs]
+    form.operateur_id.choices = choix_referentiel('operateurs')
     
     validateurs = User.query.filter_by(actif=True).all()
     form.validateur_id.choices = [(u.id, u.nom_complet) for u in validateurs]
@@ -511,8 +514,19 @@ def api_statistiques():
             ValidationRapport.date_validation >= il_y_a_30j,
             ValidationRapport.statut == StatutWorkflow.VALIDE
         ).count(),
-        'delai_moyen': 0,  # TODO: Calculer le délai moyen de validation
-        'taux_validation': 0  # TODO: Calculer le taux de validation
     }
     
+    # Délais, percentiles et ventilations (en cache jusqu'à la prochaine écriture)
+    statistiques = WorkflowService.get_statistiques_detaillees(
+        rafraichir=request.args.get('rafraichir') == '1'
+    )
+    stats.update({
+        'delai_moyen': statistiques['global']['delai_moyen'] or 0,
+        'taux_validation': statistiques['global']['taux_validation'],
+        'delais': {p: statistiques['global'][p] for p in ('p50', 'p90', 'p99')},
+        'par_workflow': statistiques['par_workflow'],
+        'par_type': statistiques['par_type'],
+        'par_validateur': statistiques['par_validateur']
+    })
+    
     return jsonify(stats)
\ No newline at end of file
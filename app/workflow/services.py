@@ -3,15 +3,89 @@ Services pour le système de workflow de validation
 """
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, func
 from flask import current_app
 from app.extensions import db
 from app.models.workflow import (
     Workflow, ValidationRapport, HistoriqueValidation, ValidateurDesigne,
-    TypeRapport, StatutWorkflow, TypeAction
+    MarqueurTraitement, TypeRapport, StatutWorkflow, TypeAction
 )
 from app.models.utilisateurs import User
 from app.models.operateurs import Operateur
+from app.models.versions_donnees import VersionDonnees
+from app.utils.metriques import acces_cache, incrementer
+from app.utils.imports import ModuleParesseux
+
+# NumPy n'est importé qu'au premier calcul de percentiles
+np = ModuleParesseux('numpy')
+
+
+STATUTS_EN_ATTENTE = [StatutWorkflow.SOUMIS, StatutWorkflow.EN_VALIDATION]
+PERCENTILES_DELAIS = (50, 90, 99)
+
+# Marqueur du scanner d'expiration et taille des lots d'UPDATE
+MARQUEUR_EXPIRATION = 'workflow.expiration_validations'
+TAILLE_LOT_EXPIRATION = 500
+
+# Statistiques détaillées du workflow et versions des tables lues pour les
+# calculer (noms des validateurs exceptés : chaque connexion écrit dans users)
+TABLES_STATISTIQUES = (ValidationRapport.__tablename__, Workflow.__tablename__)
+_cache_statistiques = {}
+
+
+def _duree_heures(debut, fin):
+    """Expression SQL de la durée en heures entre deux colonnes DateTime"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.extract('epoch', fin - debut) / 3600.0
+    return (func.julianday(fin) - func.julianday(debut)) * 24.0
+
+
+def _compteurs(ligne: Dict[str, Any]) -> Dict[str, Any]:
+    """Normaliser une ligne d'agrégat (SUM NULL -> 0) et dériver les taux"""
+    compteurs = {cle: int(ligne.get(cle) or 0)
+                 for cle in ['total', 'expirees', 'nb_terminees'] + [s.value for s in StatutWorkflow]}
+    compteurs['validees'] = compteurs[StatutWorkflow.VALIDE.value]
+    compteurs['rejetees'] = compteurs[StatutWorkflow.REJETE.value]
+    compteurs['en_attente'] = sum(compteurs[s.value] for s in STATUTS_EN_ATTENTE)
+    somme_delais = float(ligne.get('somme_delais') or 0)
+    compteurs['delai_moyen'] = somme_delais / compteurs['nb_terminees'] if compteurs['nb_terminees'] else None
+    compteurs['taux_validation'] = (compteurs['validees'] / compteurs['total'] * 100) if compteurs['total'] else 0.0
+    return compteurs
+
+
+def _percentiles(valeurs) -> Dict[str, Optional[float]]:
+    """Percentiles des délais (heures) calculés avec NumPy"""
+    if len(valeurs) == 0:
+        return {f'p{p}': None for p in PERCENTILES_DELAIS}
+    resultats = np.percentile(np.asarray(valeurs, dtype=float), PERCENTILES_DELAIS)
+    return {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES_DELAIS, resultats)}
+
+
+def _ventiler(groupes, delais, extraire, libelle) -> List[Dict[str, Any]]:
+    """
+    Cumuler les agrégats SQL (workflow, type, validateur) sur une dimension
+    et y associer les percentiles des délais de cette dimension
+    """
+    cumuls = {}
+    for groupe in groupes:
+        cle = extraire((groupe['workflow_id'], groupe['type_rapport'], groupe['validateur_id']))
+        cumul = cumuls.setdefault(cle, {})
+        for nom, valeur in groupe.items():
+            if nom not in ('workflow_id', 'type_rapport', 'validateur_id'):
+                cumul[nom] = (cumul.get(nom) or 0) + (valeur or 0)
+    
+    valeurs_par_cle = {}
+    for workflow_id, type_rapport, validateur_id, duree in delais:
+        valeurs_par_cle.setdefault(extraire((workflow_id, type_rapport, validateur_id)), []).append(duree)
+    
+    lignes = []
+    for cle, cumul in cumuls.items():
+        ligne = _compteurs(cumul)
+        ligne.update(_percentiles(valeurs_par_cle.get(cle, [])))
+        ligne['cle'] = cle.value if hasattr(cle, 'value') else cle
+        ligne['libelle'] = libelle(cle)
+        lignes.append(ligne)
+    return sorted(lignes, key=lambda l: -l['total'])
 
 
 class WorkflowService:
@@ -323,10 +397,32 @@ class WorkflowService:
             db.session.rollback()
             return False
     
+    @staticmethod
+    def _agregats_validations(maintenant: datetime = None) -> list:
+        """
+        Colonnes d'agrégat communes : comptages conditionnels par statut et
+        somme des délais de validation (en heures) calculée côté SQL
+        """
+        maintenant = maintenant or datetime.utcnow()
+        statut = ValidationRapport.statut
+        duree = _duree_heures(ValidationRapport.date_soumission, ValidationRapport.date_validation)
+        colonnes = [func.count(ValidationRapport.id).label('total')]
+        colonnes += [
+            func.sum(case((statut == s, 1), else_=0)).label(s.value) for s in StatutWorkflow
+        ]
+        colonnes += [
+            func.sum(case((and_(statut.in_(STATUTS_EN_ATTENTE),
+                                ValidationRapport.date_expiration < maintenant), 1),
+                          else_=0)).label('expirees'),
+            func.sum(duree).label('somme_delais'),
+            func.count(duree).label('nb_terminees')
+        ]
+        return colonnes
+    
     @staticmethod
     def get_statistiques_workflow(workflow_id: int = None) -> Dict[str, Any]:
         """
-        Récupérer les statistiques du workflow
+        Récupérer les statistiques du workflow (une seule requête d'agrégat)
         
         Args:
             workflow_id: ID du workflow (optionnel)
@@ -334,45 +430,163 @@ class WorkflowService:
         Returns:
             Dictionnaire des statistiques
         """
-        query = ValidationRapport.query
+        query = db.session.query(*WorkflowService._agregats_validations())
         if workflow_id:
-            query = query.filter_by(workflow_id=workflow_id)
+            query = query.filter(ValidationRapport.workflow_id == workflow_id)
+        ligne = _compteurs(query.one()._asdict())
         
-        total = query.count()
-        validees = query.filter_by(statut=StatutWorkflow.VALIDE).count()
-        rejetees = query.filter_by(statut=StatutWorkflow.REJETE).count()
-        en_attente = query.filter(
-            ValidationRapport.statut.in_([StatutWorkflow.SOUMIS, StatutWorkflow.EN_VALIDATION])
-        ).count()
+        delai_moyen = ligne['delai_moyen'] or 0
+        taux_validation = ligne['taux_validation']
         
-        # Calcul du délai moyen (en heures)
-        validations_terminees = query.filter(
-            ValidationRapport.date_validation.isnot(None)
-        ).all()
+        return {
+            'total_validations': ligne['total'],
+            'validees': ligne['validees'],
+            'rejetees': ligne['rejetees'],
+            'en_attente': ligne['en_attente'],
+            'delai_moyen': f"{delai_moyen:.1f}h" if delai_moyen > 0 else "N/A",
+            'taux_validation': f"{taux_validation:.1f}" if taux_validation > 0 else "0.0"
+        }
+    
+    @staticmethod
+    def get_statistiques_detaillees(rafraichir: bool = False) -> Dict[str, Any]:
+        """
+        Statistiques du workflow ventilées par workflow, type de rapport et
+        validateur, avec les percentiles p50/p90/p99 des délais de validation.
+        Le résultat est mis en cache jusqu'à la prochaine écriture dans les
+        tables lues (VersionDonnees), quel que soit le processus auteur ; le
+        nombre de validations expirées, qui dépend de l'heure, est compté à
+        chaque appel.
         
-        delai_moyen = 0
-        if validations_terminees:
-            delais = []
-            for v in validations_terminees:
-                if v.date_soumission and v.date_validation:
-                    delta = v.date_validation - v.date_soumission
-                    delais.append(delta.total_seconds() / 3600)  # en heures
-            
-            if delais:
-                delai_moyen = sum(delais) / len(delais)
+        Args:
+            rafraichir: Forcer le recalcul
+        
+        Returns:
+            Dictionnaire avec les clés global, par_workflow, par_type, par_validateur
+        """
+        versions = VersionDonnees.lire(TABLES_STATISTIQUES)
+        entree = _cache_statistiques.get('entree')
+        if not rafraichir and entree is not None and entree[0] == versions:
+            incrementer(acces_cache, cache='statistiques_workflow', result='hit')
+            resultat = entree[1]
+        else:
+            incrementer(acces_cache, cache='statistiques_workflow', result='miss')
+            resultat = WorkflowService._calculer_statistiques()
+            _cache_statistiques['entree'] = (versions, resultat)
+        
+        expirees = WorkflowService.compter_expirees()
+        return dict(resultat, **{'global': dict(resultat['global'], expirees=expirees)})
+    
+    @staticmethod
+    def compter_expirees(maintenant: datetime = None) -> int:
+        """Nombre de validations en attente dont l'échéance est passée (index statut, expiration)"""
+        return db.session.query(func.count(ValidationRapport.id)).filter(
+            ValidationRapport.statut.in_(STATUTS_EN_ATTENTE),
+            ValidationRapport.date_expiration < (maintenant or datetime.utcnow())
+        ).scalar()
+    
+    @staticmethod
+    def _calculer_statistiques() -> Dict[str, Any]:
+        """Agrégats et percentiles ventilés, sans les expirations (dépendantes de l'heure)"""
+        dimensions = (ValidationRapport.workflow_id, ValidationRapport.type_rapport,
+                      ValidationRapport.validateur_id)
+        groupes = [
+            ligne._asdict() for ligne in db.session.query(
+                *dimensions, *WorkflowService._agregats_validations()
+            ).group_by(*dimensions)
+        ]
+        
+        # Délais individuels projetés (une colonne calculée en SQL) pour les percentiles
+        duree = _duree_heures(ValidationRapport.date_soumission, ValidationRapport.date_validation)
+        delais = db.session.query(*dimensions, duree).filter(duree.isnot(None)).all()
         
-        # Taux de validation
-        taux_validation = 0
-        if total > 0:
-            taux_validation = (validees / total) * 100
+        noms_workflows = dict(db.session.query(Workflow.id, Workflow.nom))
+        ids_validateurs = {g['validateur_id'] for g in groupes if g['validateur_id']}
+        noms_validateurs = {
+            u.id: u.nom_complet for u in User.query.filter(User.id.in_(ids_validateurs))
+        } if ids_validateurs else {}
+        
+        def libelle_workflow(workflow_id):
+            return noms_workflows.get(workflow_id, f'Workflow {workflow_id}')
+        
+        def libelle_type(type_rapport):
+            return type_rapport.value if type_rapport else 'inconnu'
+        
+        def libelle_validateur(validateur_id):
+            if not validateur_id:
+                return 'Non assigné'
+            return noms_validateurs.get(validateur_id, f'Utilisateur {validateur_id}')
+        
+        resultat = {
+            'global': (_ventiler(groupes, delais, lambda cle: None, lambda cle: 'Global')
+                       or [dict(_compteurs({}), **_percentiles([]), cle=None, libelle='Global')])[0],
+            'par_workflow': _ventiler(groupes, delais, lambda cle: cle[0], libelle_workflow),
+            'par_type': _ventiler(groupes, delais, lambda cle: cle[1], libelle_type),
+            'par_validateur': _ventiler(groupes, delais, lambda cle: cle[2], libelle_validateur),
+        }
+        for ligne in [resultat['global']] + resultat['par_workflow'] + resultat['par_type'] \
+                + resultat['par_validateur']:
+            ligne.pop('expirees', None)
+        return resultat
+    
+    @staticmethod
+    def expirer_validations(utilisateur_id: int = 1, maintenant: datetime = None) -> Dict[str, Any]:
+        """
+        Scanner périodique des validations expirées.
+        
+        Seules les validations en attente dont l'échéance est passée depuis
+        la dernière exécution (marqueur high-water mark) sont lues, via
+        l'index (statut, date_expiration). Elles passent au statut EXPIRE en
+        une requête UPDATE et l'historique est écrit en un seul executemany.
+        
+        Args:
+            utilisateur_id: Utilisateur auteur des entrées d'historique (système)
+            maintenant: Date de référence (défaut : maintenant, UTC)
+        
+        Returns:
+            Dictionnaire avec le nombre d'expirations et la fenêtre scannée
+        """
+        maintenant = maintenant or datetime.utcnow()
+        depuis = MarqueurTraitement.lire(MARQUEUR_EXPIRATION)
+        
+        try:
+            query = db.session.query(ValidationRapport.id, ValidationRapport.rapport_id).filter(
+                ValidationRapport.statut.in_(STATUTS_EN_ATTENTE),
+                ValidationRapport.date_expiration < maintenant
+            )
+            if depuis:
+                query = query.filter(ValidationRapport.date_expiration >= depuis)
+            expirees = query.all()
+            
+            if expirees:
+                ids = [validation_id for validation_id, _ in expirees]
+                for debut in range(0, len(ids), TAILLE_LOT_EXPIRATION):
+                    ValidationRapport.query.filter(
+                        ValidationRapport.id.in_(ids[debut:debut + TAILLE_LOT_EXPIRATION]),
+                        ValidationRapport.statut.in_(STATUTS_EN_ATTENTE)
+                    ).update({
+                        ValidationRapport.statut: StatutWorkflow.EXPIRE,
+                        ValidationRapport.date_modification: maintenant
+                    }, synchronize_session=False)
+                
+                db.session.execute(HistoriqueValidation.__table__.insert(), [{
+                    'rapport_id': rapport_id,
+                    'validation_id': validation_id,
+                    'utilisateur_id': utilisateur_id,
+                    'action': TypeAction.EXPIRATION,
+                    'details': "Validation expirée automatiquement",
+                    'timestamp': maintenant
+                } for validation_id, rapport_id in expirees])
+            
+            MarqueurTraitement.avancer(MARQUEUR_EXPIRATION, maintenant)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
         return {
-            'total_validations': total,
-            'validees': validees,
-            'rejetees': rejetees,
-            'en_attente': en_attente,
-            'delai_moyen': f"{delai_moyen:.1f}h" if delai_moyen > 0 else "N/A",
-            'taux_validation': f"{taux_validation:.1f}" if taux_validation > 0 else "0.0"
+            'expirees': len(expirees),
+            'depuis': depuis,
+            'jusqu_a': maintenant
         }
     
     @staticmethod
@@ -382,24 +596,10 @@ class WorkflowService:
         Fonction à exécuter périodiquement
         """
         try:
-            validations_expirees = ValidationRapport.get_validations_expirees()
-            
-            for validation in validations_expirees:
-                validation.statut = StatutWorkflow.EXPIRE
-                validation.save()
-                
-                HistoriqueValidation.ajouter_action(
-                    rapport_id=validation.rapport_id,
-                    action=TypeAction.EXPIRATION,
-                    utilisateur_id=1,  # Système
-                    details="Validation expirée automatiquement",
-                    validation_id=validation.id
-                )
-            
-            current_app.logger.info(f"{len(validations_expirees)} validations marquées comme expirées")
-            return len(validations_expirees)
+            resultat = WorkflowService.expirer_validations()
+            current_app.logger.info(f"{resultat['expirees']} validations marquées comme expirées")
+            return resultat['expirees']
             
         except Exception as e:
             current_app.logger.error(f"Erreur nettoyage validations: {str(e)}")
-            db.session.rollback()
-            return 0
\ No newline at end of file
+            return 0
@@ -0,0 +1,3 @@
+"""
+Benchmarks de performance (données synthétiques, base SQLite temporaire)
+"""
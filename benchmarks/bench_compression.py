@@ -0,0 +1,95 @@
+"""
+Benchmark : octets économisés par la compression des réponses (gzip, et
+brotli si le module est installé) sur les pages, API JSON et exports CSV.
+
+Usage : python -m benchmarks.bench_compression [nb_centrales] [nb_annees]
+"""
+import gzip
+import sys
+
+from benchmarks.commun import app_benchmark, chronometrer
+from benchmarks.bench_periode_yyyymm import generer_donnees
+from app.extensions import db
+from app.models.utilisateurs import User
+from app.utils.compression import HAS_BROTLI
+
+if HAS_BROTLI:
+    import brotli
+
+
+ENDPOINTS = (
+    '/admin/dashboard',
+    '/admin/api/stats',
+    '/are/dashboard/',
+    '/admin/export/rapports_csv',
+    '/production-hydro/centrales/export',
+)
+
+
+def decoder(reponse):
+    """Corps décompressé selon Content-Encoding"""
+    encodage = reponse.headers.get('Content-Encoding')
+    if encodage == 'gzip':
+        return gzip.decompress(reponse.data)
+    if encodage == 'br':
+        return brotli.decompress(reponse.data)
+    return reponse.data
+
+
+def mesurer(client, url, encodage):
+    """(durée médiane ms, octets transférés, octets décodés, encodage obtenu)"""
+    # Sans ETag : chaque requête recalcule et recompresse la réponse
+    entetes = {'Accept-Encoding': encodage} if encodage else {'Accept-Encoding': 'identity'}
+
+    def requete():
+        reponse = client.get(url, headers=entetes)
+        reponse.get_data()  # les réponses en flux ne sont produites (et compressées) qu'à la lecture
+        return reponse
+
+    duree, reponse = chronometrer(requete)
+    return duree, len(reponse.data), len(decoder(reponse)), reponse.headers.get('Content-Encoding')
+
+
+def main():
+    nb_centrales = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    encodages = ['gzip'] + (['br'] if HAS_BROTLI else [])
+
+    with app_benchmark() as app:
+        app.config['CONDITIONAL_GET_ENABLED'] = False
+        nb = generer_donnees(nb_centrales, nb_annees, 2024)
+        admin = User(username='bench', email='bench@example.org', role='super_admin')
+        admin.set_password('bench')
+        db.session.add(admin)
+        db.session.commit()
+        print(f"{nb} rapports hydro générés ({nb_centrales} centrales) - "
+              f"brotli {'disponible' if HAS_BROTLI else 'non installé'}")
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+
+        print('-' * 96)
+        print(f"{'Endpoint':<44}{'Enc.':>6}{'Brut (o)':>11}{'Compressé (o)':>15}{'Gain':>8}{'Δ ms':>12}")
+        print('-' * 96)
+        total_brut = total_compresse = 0
+        for url in ENDPOINTS:
+            duree_brute, brut, _, _ = mesurer(client, url, None)
+            for encodage in encodages:
+                duree, transfere, decode, obtenu = mesurer(client, url, encodage)
+                if decode != brut:
+                    raise AssertionError(f'{url} : corps décompressé différent ({decode} != {brut} octets)')
+                gain = f"{(1 - transfere / brut) * 100:.0f}%" if brut else '-'
+                print(f"{url:<44}{obtenu or '-':>6}{brut:>11}{transfere:>15}{gain:>8}"
+                      f"{duree - duree_brute:>+12.2f}")
+                if encodage == 'gzip':
+                    total_brut += brut
+                    total_compresse += transfere
+        print('-' * 96)
+        print(f"Total gzip : {total_brut} -> {total_compresse} octets "
+              f"({(1 - total_compresse / total_brut) * 100:.0f}% économisés)")
+
+
+if __name__ == '__main__':
+    main()
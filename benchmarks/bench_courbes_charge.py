@@ -0,0 +1,161 @@
+"""
+Benchmark : courbes de charge 15 minutes des postes et feeders stockées
+une ligne par mesure (table indexée, lecture puis regroupement horaire en
+Python) contre les blocs journaliers float32 de CourbeCharge
+(app/distribution/courbes_charge.py : un BLOB par actif et par jour,
+décodage np.frombuffer et rééchantillonnage NumPy).
+
+Usage : python -m benchmarks.bench_courbes_charge [nb_feeders] [nb_jours]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table, select
+
+from benchmarks.commun import afficher_resultats, app_benchmark, chronometrer, colonnes_base, inserer_en_masse
+from app.extensions import db
+from app.models.distribution import CourbeCharge, FeederDistribution, PosteDistribution, ReseauDistribution
+from app.models.operateurs import Operateur
+from app.distribution.courbes_charge import CourbesChargeService, reechantillonner
+
+PAS = 15
+PREMIER_JOUR = date(2024, 1, 1)
+
+# Stockage de référence : une ligne par mesure
+mesures = Table(
+    'mesures_charge_bench', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('type_actif', String(10), nullable=False),
+    Column('actif_id', Integer, nullable=False),
+    Column('horodatage', DateTime, nullable=False),
+    Column('charge', Float),
+    Index('ix_mesures_charge_bench_actif', 'type_actif', 'actif_id', 'horodatage'),
+)
+
+
+def ecrire_fichier(chemin, nb_postes, nb_feeders, nb_jours):
+    """Une ligne par actif et par pas de 15 minutes"""
+    random.seed(42)
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        fichier.write('poste,feeder,horodatage,charge\n')
+        for jour in range(nb_jours):
+            debut = datetime.combine(PREMIER_JOUR + timedelta(days=jour), datetime.min.time())
+            for minute in range(0, 24 * 60, PAS):
+                instant = (debut + timedelta(minutes=minute)).isoformat(timespec='minutes')
+                pointe = 1.4 if 18 * 60 <= minute < 22 * 60 else 1.0
+                for poste in range(1, nb_postes + 1):
+                    fichier.write(f"PD-{poste:04d},,{instant},{random.uniform(800, 1200) * pointe:.2f}\n")
+                for feeder in range(1, nb_feeders + 1):
+                    fichier.write(f",FD-{feeder:04d},{instant},{random.uniform(100, 300) * pointe:.2f}\n")
+
+
+def charger_lignes(chemin):
+    """Une ligne insérée par mesure (executemany)"""
+    codes = {
+        'poste': dict(db.session.execute(select(PosteDistribution.code, PosteDistribution.id)).all()),
+        'feeder': dict(db.session.execute(select(FeederDistribution.code, FeederDistribution.id)).all()),
+    }
+    lot = []
+    with open(chemin, encoding='utf-8') as fichier:
+        for ligne in csv.DictReader(fichier):
+            type_actif = 'poste' if ligne['poste'] else 'feeder'
+            lot.append({'type_actif': type_actif, 'actif_id': codes[type_actif][ligne[type_actif]],
+                        'horodatage': datetime.fromisoformat(ligne['horodatage']), 'charge': float(ligne['charge'])})
+            if len(lot) == 5000:
+                db.session.execute(mesures.insert(), lot)
+                lot = []
+    if lot:
+        db.session.execute(mesures.insert(), lot)
+    db.session.commit()
+
+
+def max_horaire_lignes(feeder_id, debut, fin):
+    """Maximum horaire d'un feeder : lecture des mesures et regroupement en Python"""
+    maxima = defaultdict(lambda: None)
+    for horodatage, charge in db.session.execute(
+        select(mesures.c.horodatage, mesures.c.charge).where(
+            mesures.c.type_actif == 'feeder', mesures.c.actif_id == feeder_id,
+            mesures.c.horodatage >= debut, mesures.c.horodatage < fin + timedelta(days=1)
+        )
+    ):
+        heure = horodatage.replace(minute=0)
+        if maxima[heure] is None or charge > maxima[heure]:
+            maxima[heure] = charge
+    heures = [debut + timedelta(hours=h) for h in range(((fin - debut).days + 1) * 24)]
+    return [maxima[h] for h in heures]
+
+
+def max_horaire_blocs(feeder_id, debut, fin):
+    matrices = CourbesChargeService.matrices('feeder', [feeder_id], debut, fin)
+    return [None if v != v else v for v in
+            reechantillonner(matrices.valeurs[feeder_id], matrices.pas, 60, 'max').reshape(-1).tolist()]
+
+
+def verifier(obtenu, attendu):
+    """Mêmes maxima, à la précision float32 des blocs près"""
+    if len(obtenu) != len(attendu) or any(
+        (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6 * abs(b))
+        for a, b in zip(obtenu, attendu)
+    ):
+        raise AssertionError('Maxima horaires différents entre les deux stockages')
+
+
+def main():
+    nb_feeders = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    nb_jours = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    nb_postes = max(1, nb_feeders // 4)
+
+    with app_benchmark():
+        mesures.create(db.engine)
+        base = colonnes_base()
+        inserer_en_masse(Operateur.__table__, [dict(base, nom='Opérateur distribution', numero_licence='LIC-00001')])
+        inserer_en_masse(ReseauDistribution.__table__, [
+            dict(base, operateur_id=1, nom='Réseau 1', code='RD-0001', tension_distribution=15.0)
+        ])
+        inserer_en_masse(PosteDistribution.__table__, [
+            dict(base, reseau_id=1, nom=f'Poste {i}', code=f'PD-{i:04d}') for i in range(1, nb_postes + 1)
+        ])
+        inserer_en_masse(FeederDistribution.__table__, [
+            dict(base, reseau_id=1, poste_source_id=(i - 1) % nb_postes + 1, nom=f'Feeder {i}', code=f'FD-{i:04d}',
+                 tension_nominale=15.0)
+            for i in range(1, nb_feeders + 1)
+        ])
+        chemin = os.path.join(tempfile.mkdtemp(prefix='bench_courbes_'), 'courbes.csv')
+        ecrire_fichier(chemin, nb_postes, nb_feeders, nb_jours)
+        nb_mesures = (nb_postes + nb_feeders) * nb_jours * 24 * 60 // PAS
+        print(f"{nb_mesures} mesures ({nb_postes} postes, {nb_feeders} feeders, {nb_jours} jours au pas de {PAS} min)")
+
+        debut = time.perf_counter()
+        charger_lignes(chemin)
+        charge_avant = (time.perf_counter() - debut) * 1000
+        debut = time.perf_counter()
+        CourbesChargeService.charger(chemin, pas_minutes=PAS)
+        charge_apres = (time.perf_counter() - debut) * 1000
+        print(f"{db.session.query(CourbeCharge).count()} blocs journaliers")
+
+        fin = datetime.combine(PREMIER_JOUR + timedelta(days=nb_jours - 1), datetime.min.time())
+        debut_mois = fin - timedelta(days=29)
+        mois_avant, attendu = chronometrer(lambda: max_horaire_lignes(1, debut_mois, fin))
+        mois_apres, obtenu = chronometrer(lambda: max_horaire_blocs(1, debut_mois, fin))
+        verifier(obtenu, attendu)
+
+        jour_avant, attendu = chronometrer(lambda: max_horaire_lignes(1, fin, fin))
+        jour_apres, obtenu = chronometrer(lambda: max_horaire_blocs(1, fin, fin))
+        verifier(obtenu, attendu)
+
+        afficher_resultats('Courbes de charge des postes et feeders', [
+            ('Chargement du fichier', charge_avant, charge_apres),
+            ('Max horaire d\'un feeder sur 30 jours', mois_avant, mois_apres),
+            ('Max horaire d\'un feeder sur 1 jour', jour_avant, jour_apres),
+        ])
+        os.remove(chemin)
+
+
+if __name__ == '__main__':
+    main()
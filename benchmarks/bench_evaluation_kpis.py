@@ -0,0 +1,94 @@
+"""
+Benchmark : évaluation des KPIs réglementaires ligne par ligne
+(calculer_evaluation + commit) contre EvaluationKPIService.evaluer_periode.
+
+Usage : python -m benchmarks.bench_evaluation_kpis [nb_operateurs] [nb_kpis]
+"""
+import random
+import sys
+
+from benchmarks.commun import app_benchmark, chronometrer, inserer_en_masse, colonnes_base, afficher_resultats
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.kpis_reglementaires import KPIReglementaire, PerformanceOperateurKPI, TypeKPIReglementaire
+from app.are.services_conformite import EvaluationKPIService
+
+ANNEE, MOIS = 2024, 6
+
+
+def generer_donnees(nb_operateurs, nb_kpis):
+    """Opérateurs, KPIs (deux sens d'amélioration) et un mois de mesures"""
+    random.seed(7)
+    base = colonnes_base()
+    inserer_en_masse(Operateur.__table__, [
+        dict(base, nom=f'Opérateur {i}', numero_licence=f'LIC-{i:05d}') for i in range(1, nb_operateurs + 1)
+    ])
+    kpis = []
+    for i in range(1, nb_kpis + 1):
+        if i % 2:
+            seuils = dict(sens_amelioration='diminution', seuil_excellent=2.0, seuil_acceptable=5.0, seuil_limite=10.0)
+        else:
+            seuils = dict(sens_amelioration='augmentation', seuil_excellent=98.0, seuil_acceptable=95.0, seuil_limite=90.0)
+        kpis.append(dict(base, code=f'KPI-{i:03d}', nom=f'KPI {i}', type_kpi=TypeKPIReglementaire.QUALITE_SERVICE.name,
+                         penalite_moderee=1000.0 * i, penalite_critique=5000.0 * i, **seuils))
+    inserer_en_masse(KPIReglementaire.__table__, kpis)
+    inserer_en_masse(PerformanceOperateurKPI.__table__, [
+        dict(base, operateur_id=o, kpi_id=k, annee=ANNEE, mois=MOIS,
+             valeur_mesuree=random.uniform(0, 15) if k % 2 else random.uniform(85, 100))
+        for o in range(1, nb_operateurs + 1) for k in range(1, nb_kpis + 1)
+    ])
+
+
+def reinitialiser():
+    db.session.execute(PerformanceOperateurKPI.__table__.update().values(evaluation=None, penalite_appliquee=0))
+    db.session.commit()
+
+
+def evaluation_ligne_par_ligne():
+    performances = PerformanceOperateurKPI.query.filter_by(annee=ANNEE, mois=MOIS).all()
+    for performance in performances:
+        performance.calculer_evaluation()
+        performance.save()
+    return len(performances)
+
+
+def main():
+    nb_operateurs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nb_kpis = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with app_benchmark():
+        generer_donnees(nb_operateurs, nb_kpis)
+        total = nb_operateurs * nb_kpis
+        print(f"{total} performances ({nb_operateurs} opérateurs x {nb_kpis} KPIs)")
+
+        # Cohérence avec l'évaluation scalaire du modèle
+        attendu = {}
+        for performance in PerformanceOperateurKPI.query.all():
+            evaluation, penalite = performance.kpi.evaluer_performance(performance.valeur_mesuree)
+            attendu[performance.id] = (evaluation, penalite or 0)
+        db.session.rollback()
+        resultat = EvaluationKPIService.evaluer_periode(ANNEE, MOIS, enregistrer=False)
+        obtenu = {e['performance_id']: (e['evaluation'], e['penalite']) for e in resultat['evaluations']}
+        assert attendu == obtenu, "écart entre évaluation scalaire et vectorisée"
+        print(f"Évaluations identiques : {resultat['repartition']}")
+
+        reinitialiser()
+        db.session.expire_all()
+        duree_avant, _ = chronometrer(evaluation_ligne_par_ligne, repetitions=1)
+
+        def evaluation_en_lot():
+            reinitialiser()
+            return EvaluationKPIService.evaluer_periode(ANNEE, MOIS)
+        duree_apres, resultat = chronometrer(evaluation_en_lot, repetitions=5)
+        assert resultat['mises_a_jour'] == total
+
+        duree_lecture, _ = chronometrer(lambda: EvaluationKPIService.evaluer_periode(ANNEE, MOIS), repetitions=5)
+
+        afficher_resultats(f"Mois national complet — {total} performances", [
+            ("Évaluation + écriture (toutes modifiées)", duree_avant, duree_apres),
+            ("Réévaluation sans changement", duree_avant, duree_lecture),
+        ])
+
+
+if __name__ == '__main__':
+    main()
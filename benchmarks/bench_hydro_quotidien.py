@@ -0,0 +1,128 @@
+"""
+Benchmark : recalcul des rapports hydro d'une période depuis leurs données
+journalières, rapport par rapport avec l'ORM (chargement de la relation
+donnees_mensuelles, moyennes, extrêmes et débits classés en Python) contre
+l'agrégation vectorisée (app/production_hydro/donnees_quotidiennes.py : une
+lecture, réductions NumPy par rapport et UPDATE groupé).
+
+Usage : python -m benchmarks.bench_hydro_quotidien [nb_centrales] [nb_annees]
+"""
+import calendar
+import random
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.commun import afficher_resultats, app_benchmark, colonnes_base, inserer_en_masse
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.production_hydro import CentraleHydro, DonneesMensuelles, RapportHydro
+from app.production_hydro.donnees_quotidiennes import CHAMPS_RAPPORT, DonneesHydroService
+
+
+def preparer(nb_centrales, nb_annees):
+    """Rapports mensuels et une ligne journalière par jour du mois"""
+    random.seed(42)
+    base = colonnes_base()
+    inserer_en_masse(Operateur.__table__, [dict(base, nom='Opérateur hydro', numero_licence='LIC-00001')])
+    inserer_en_masse(CentraleHydro.__table__, [
+        dict(base, operateur_id=1, nom=f'Centrale {i}', code=f'CH-{i:04d}', puissance_installee=random.uniform(50, 500))
+        for i in range(1, nb_centrales + 1)
+    ])
+    rapports, jours = [], []
+    for centrale_id in range(1, nb_centrales + 1):
+        for annee in range(2024 - nb_annees, 2024):
+            for mois in range(1, 13):
+                fin = calendar.monthrange(annee, mois)[1]
+                rapports.append(dict(base, centrale_id=centrale_id, annee=annee, mois=mois,
+                                     periode_yyyymm=annee * 100 + mois, statut='brouillon',
+                                     periode_debut=datetime(annee, mois, 1), periode_fin=datetime(annee, mois, fin)))
+                rapport_id = len(rapports)
+                for jour in range(1, fin + 1):
+                    turbine = random.uniform(100, 900)
+                    jours.append(dict(
+                        base, rapport_id=rapport_id, jour=jour, niveau_retenue=random.uniform(300, 320),
+                        debit_turbiné=turbine, debit_déversé=random.choice((0.0, 0.0, 0.0, random.uniform(10, 200))),
+                        energie_produite=turbine * random.uniform(5, 6), heures_fonctionnement=random.uniform(18, 24)
+                    ))
+    inserer_en_masse(RapportHydro.__table__, rapports)
+    inserer_en_masse(DonneesMensuelles.__table__, jours)
+    return len(rapports), len(jours)
+
+
+def quantile(valeurs, q):
+    """Quantile avec interpolation linéaire sur une liste triée"""
+    position = q * (len(valeurs) - 1)
+    bas = int(position)
+    haut = min(bas + 1, len(valeurs) - 1)
+    return valeurs[bas] + (valeurs[haut] - valeurs[bas]) * (position - bas)
+
+
+def agreger_orm(annee):
+    """Un rapport à la fois, agrégats calculés en Python sur la relation"""
+    for rapport in RapportHydro.query.filter_by(annee=annee).all():
+        jours = rapport.donnees_mensuelles
+        if not jours:
+            continue
+        niveaux = [j.niveau_retenue for j in jours]
+        debits = sorted(j.debit_turbiné + j.debit_déversé for j in jours)
+        rapport.niveau_retenue_moyen = sum(niveaux) / len(niveaux)
+        rapport.niveau_retenue_min = min(niveaux)
+        rapport.niveau_retenue_max = max(niveaux)
+        rapport.debit_moyen = sum(debits) / len(debits)
+        rapport.debit_min = debits[0]
+        rapport.debit_max = debits[-1]
+        rapport.debit_q10 = quantile(debits, 0.9)
+        rapport.debit_q50 = quantile(debits, 0.5)
+        rapport.debit_q90 = quantile(debits, 0.1)
+        rapport.volume_turbiné = sum(j.debit_turbiné for j in jours) * 86400 / 1e6
+        rapport.volume_deverse = sum(j.debit_déversé for j in jours) * 86400 / 1e6
+        rapport.jours_deversement = sum(1 for j in jours if j.debit_déversé > 0)
+        rapport.energie_produite = sum(j.energie_produite for j in jours)
+        rapport.temps_fonctionnement = sum(j.heures_fonctionnement for j in jours)
+        heures_mois = calendar.monthrange(rapport.annee, rapport.mois)[1] * 24
+        rapport.facteur_charge = rapport.energie_produite / (rapport.centrale.puissance_installee * heures_mois) * 100
+    db.session.commit()
+
+
+def agreger_vectorise(annee):
+    DonneesHydroService.agreger_periode(annee=annee)
+    db.session.commit()
+
+
+def mesurer(fonction, annee):
+    db.session.execute(RapportHydro.__table__.update().values({nom: None for nom in CHAMPS_RAPPORT}))
+    db.session.commit()
+    db.session.expunge_all()
+    debut = time.perf_counter()
+    fonction(annee)
+    duree = (time.perf_counter() - debut) * 1000
+    colonnes = [RapportHydro.id] + [getattr(RapportHydro, nom) for nom in CHAMPS_RAPPORT]
+    instantane = [
+        tuple(round(valeur, 6) if valeur is not None else None for valeur in ligne)
+        for ligne in db.session.query(*colonnes).filter(RapportHydro.annee == annee).order_by(RapportHydro.id)
+    ]
+    return duree, instantane
+
+
+def main():
+    nb_centrales = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with app_benchmark():
+        nb_rapports, nb_jours = preparer(nb_centrales, nb_annees)
+        print(f"{nb_rapports} rapports, {nb_jours} lignes journalières ; "
+              f"recalcul de l'année 2023 ({nb_centrales * 12} rapports)")
+
+        avant, attendu = mesurer(agreger_orm, 2023)
+        apres, obtenu = mesurer(agreger_vectorise, 2023)
+        if obtenu != attendu:
+            raise AssertionError('Agrégats différents entre les deux calculs')
+
+        afficher_resultats('Agrégation des rapports hydro', [
+            ('ORM par rapport / lecture unique + NumPy', avant, apres),
+        ])
+
+
+if __name__ == '__main__':
+    main()
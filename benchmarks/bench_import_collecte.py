@@ -0,0 +1,127 @@
+"""
+Benchmark : import d'un fichier CSV de collectes mensuelles ligne par ligne
+(recherche de la collecte existante puis enregistrement par l'ORM, comme
+le formulaire de saisie) contre le pipeline d'import en masse
+(app/collecte/importation.py : validation par lots avec pandas, upsert en
+executemany dans une seule transaction). Un tiers des collectes existe
+déjà en brouillon et est mis à jour.
+
+Usage : python -m benchmarks.bench_import_collecte [nb_operateurs] [nb_annees]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.commun import afficher_resultats, app_benchmark, colonnes_base, inserer_en_masse
+from app.collecte.importation import CHAMPS_DECIMAUX, CHAMPS_ENTIERS, ImportCollecteService
+from app.extensions import db
+from app.models.collecte_donnees import CollecteDonneesMensuelles, ImportCollecte, StatutCollecte
+from app.models.operateurs import Operateur
+
+
+def ecrire_fichier(chemin, nb_operateurs, nb_annees):
+    """Fichier CSV (séparateur ';', décimales à virgule) d'une ligne par opérateur et par mois"""
+    random.seed(42)
+    champs = list(CHAMPS_ENTIERS) + list(CHAMPS_DECIMAUX)
+    with open(chemin, 'w', newline='', encoding='utf-8') as fichier:
+        ecrivain = csv.writer(fichier, delimiter=';')
+        ecrivain.writerow(['operateur_id', 'annee', 'mois'] + champs + ['commentaires'])
+        for operateur_id in range(1, nb_operateurs + 1):
+            for annee in range(2024 - nb_annees, 2024):
+                for mois in range(1, 13):
+                    ecrivain.writerow(
+                        [operateur_id, annee, mois]
+                        + [random.randint(0, 500) for _ in CHAMPS_ENTIERS]
+                        + [f"{random.uniform(0, 90):.2f}".replace('.', ',') for _ in CHAMPS_DECIMAUX]
+                        + ['Import de référence']
+                    )
+    return len(champs)
+
+
+def preparer(nb_operateurs, nb_annees):
+    """Opérateurs et collectes en brouillon de la première année (remplacées à chaque mesure)"""
+    CollecteDonneesMensuelles.query.delete()
+    base = colonnes_base()
+    inserer_en_masse(CollecteDonneesMensuelles.__table__, [
+        dict(base, operateur_id=operateur_id, annee=2024 - nb_annees, mois=mois,
+             statut=StatutCollecte.BROUILLON.name)
+        for operateur_id in range(1, nb_operateurs + 1) for mois in range(1, 13)
+    ])
+
+
+def importer_ligne_par_ligne(chemin):
+    """Une recherche et un enregistrement ORM par ligne"""
+    with open(chemin, newline='', encoding='utf-8') as fichier:
+        for ligne in csv.DictReader(fichier, delimiter=';'):
+            cle = {nom: int(ligne[nom]) for nom in ('operateur_id', 'annee', 'mois')}
+            collecte = CollecteDonneesMensuelles.query.filter_by(**cle).first() \
+                or CollecteDonneesMensuelles(**cle)
+            for nom in CHAMPS_ENTIERS:
+                setattr(collecte, nom, int(ligne[nom]))
+            for nom in CHAMPS_DECIMAUX:
+                setattr(collecte, nom, float(ligne[nom].replace(',', '.')))
+            collecte.commentaires = ligne['commentaires']
+            collecte.statut = StatutCollecte.BROUILLON
+            collecte.save()
+
+
+def importer_en_masse(chemin):
+    """Pipeline d'import (exécuté ici sans thread)"""
+    import_collecte = ImportCollecte(user_id=1, nom_fichier=os.path.basename(chemin))
+    import_collecte.save()
+    copie = chemin + '.import.csv'  # le pipeline supprime le fichier traité
+    with open(chemin, 'rb') as source, open(copie, 'wb') as cible:
+        cible.write(source.read())
+    resultat = ImportCollecteService.executer(import_collecte.id, copie)
+    if resultat.statut != 'termine':
+        raise AssertionError(f"Import en échec : {resultat.message}")
+
+
+def mesurer(fonction, chemin, nb_operateurs, nb_annees):
+    preparer(nb_operateurs, nb_annees)
+    db.session.expunge_all()
+    debut = time.perf_counter()
+    fonction(chemin)
+    duree = (time.perf_counter() - debut) * 1000
+    instantane = [
+        tuple(ligne) for ligne in db.session.query(
+            CollecteDonneesMensuelles.operateur_id, CollecteDonneesMensuelles.annee,
+            CollecteDonneesMensuelles.mois, CollecteDonneesMensuelles.nombre_plaintes_clients,
+            CollecteDonneesMensuelles.revenus_ventes_electricite_millions_usd
+        ).order_by(CollecteDonneesMensuelles.operateur_id, CollecteDonneesMensuelles.annee,
+                   CollecteDonneesMensuelles.mois)
+    ]
+    return duree, instantane
+
+
+def main():
+    nb_operateurs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with app_benchmark():
+        base = colonnes_base()
+        inserer_en_masse(Operateur.__table__, [
+            dict(base, nom=f'Opérateur {i}', numero_licence=f'LIC-{i:05d}')
+            for i in range(1, nb_operateurs + 1)
+        ])
+        chemin = os.path.join(tempfile.mkdtemp(prefix='bench_import_'), 'collectes.csv')
+        nb_champs = ecrire_fichier(chemin, nb_operateurs, nb_annees)
+        print(f"{nb_operateurs * nb_annees * 12} lignes de {nb_champs} champs, "
+              f"{nb_operateurs * 12} collectes existantes mises à jour")
+
+        avant, attendu = mesurer(importer_ligne_par_ligne, chemin, nb_operateurs, nb_annees)
+        apres, obtenu = mesurer(importer_en_masse, chemin, nb_operateurs, nb_annees)
+        if obtenu != attendu:
+            raise AssertionError('Collectes différentes entre les deux imports')
+
+        afficher_resultats('Import de collectes mensuelles', [
+            ('Ligne par ligne (ORM) / lots + executemany', avant, apres),
+        ])
+        os.remove(chemin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark : filtres func.extract(...) contre periode_yyyymm indexée
+et intervalles [début, fin[ sur date_creation.
+
+Usage : python -m benchmarks.bench_periode_yyyymm [nb_centrales] [nb_annees]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.commun import (
+    app_benchmark, chronometrer, inserer_en_masse, colonnes_base, afficher_resultats
+)
+from sqlalchemy import func, text
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.production_hydro import CentraleHydro, RapportHydro
+from app.utils.helpers import bornes_mois, bornes_annee
+
+
+def generer_donnees(nb_centrales, nb_annees, annee_fin):
+    """Opérateurs, centrales et rapports mensuels synthétiques"""
+    random.seed(42)
+    base = colonnes_base()
+    nb_operateurs = max(1, nb_centrales // 20)
+    inserer_en_masse(Operateur.__table__, [
+        dict(base, nom=f'Opérateur {i}', numero_licence=f'LIC-{i:05d}')
+        for i in range(1, nb_operateurs + 1)
+    ])
+    inserer_en_masse(CentraleHydro.__table__, [
+        dict(base, operateur_id=(i % nb_operateurs) + 1, nom=f'Centrale {i}', code=f'CH-{i:05d}',
+             puissance_installee=random.uniform(5, 500))
+        for i in range(1, nb_centrales + 1)
+    ])
+    
+    rapports = []
+    for annee in range(annee_fin - nb_annees + 1, annee_fin + 1):
+        for mois in range(1, 13):
+            debut, fin = bornes_mois(annee, mois)
+            for centrale_id in range(1, nb_centrales + 1):
+                creation = fin + timedelta(days=random.randint(0, 20), seconds=random.randint(0, 86399))
+                rapports.append({
+                    'date_creation': creation, 'date_modification': creation, 'actif': True,
+                    'centrale_id': centrale_id, 'annee': annee, 'mois': mois,
+                    'periode_debut': debut, 'periode_fin': fin - timedelta(seconds=1),
+                    'periode_yyyymm': annee * 100 + mois,
+                    'energie_produite': random.uniform(100, 50000),
+                    'facteur_charge': random.uniform(20, 90),
+                })
+    inserer_en_masse(RapportHydro.__table__, rapports)
+    db.session.execute(text('ANALYZE'))
+    return len(rapports)
+
+
+def plan(requete):
+    """Plan d'exécution SQLite d'une requête ORM"""
+    compilee = requete.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    lignes = db.session.execute(text(f'EXPLAIN QUERY PLAN {compilee}')).fetchall()
+    return ' | '.join(l[-1] for l in lignes)
+
+
+def main():
+    nb_centrales = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    annee_fin = 2024
+    annee_cible, mois_cible = annee_fin - 3, 6
+    
+    with app_benchmark():
+        nb = generer_donnees(nb_centrales, nb_annees, annee_fin)
+        print(f"{nb} rapports hydro générés ({nb_centrales} centrales x {nb_annees * 12} mois)")
+        
+        debut_annee, fin_annee = bornes_annee(annee_cible)
+        debut_mois, fin_mois = bornes_mois(annee_cible, mois_cible)
+        
+        cas = [
+            (
+                "Rapports d'une année (periode_debut)",
+                RapportHydro.query.filter(func.extract('year', RapportHydro.periode_debut) == annee_cible),
+                RapportHydro.query.filter(RapportHydro.filtre_annee(annee_cible)),
+            ),
+            (
+                "Rapports d'un mois (periode_debut)",
+                RapportHydro.query.filter(
+                    func.extract('year', RapportHydro.periode_debut) == annee_cible,
+                    func.extract('month', RapportHydro.periode_debut) == mois_cible),
+                RapportHydro.query.filter(RapportHydro.filtre_mois(annee_cible, mois_cible)),
+            ),
+            (
+                "Rapports créés dans le mois (date_creation)",
+                RapportHydro.query.filter(
+                    func.extract('year', RapportHydro.date_creation) == annee_cible,
+                    func.extract('month', RapportHydro.date_creation) == mois_cible),
+                RapportHydro.query.filter(
+                    RapportHydro.date_creation >= debut_mois, RapportHydro.date_creation < fin_mois),
+            ),
+            (
+                "Rapports créés dans l'année (date_creation)",
+                RapportHydro.query.filter(func.extract('year', RapportHydro.date_creation) == annee_cible),
+                RapportHydro.query.filter(
+                    RapportHydro.date_creation >= debut_annee, RapportHydro.date_creation < fin_annee),
+            ),
+        ]
+        
+        resultats = []
+        for nom, avant, apres in cas:
+            duree_avant, n_avant = chronometrer(avant.count)
+            duree_apres, n_apres = chronometrer(apres.count)
+            assert n_avant == n_apres, (nom, n_avant, n_apres)
+            resultats.append((nom, duree_avant, duree_apres))
+            print(f"\n{nom} ({n_apres} lignes)")
+            print(f"  avant : {plan(avant)}")
+            print(f"  après : {plan(apres)}")
+        
+        # Production annuelle par opérateur (services_reel)
+        def production_avant():
+            return db.session.query(CentraleHydro.operateur_id, func.sum(RapportHydro.energie_produite))\
+                .join(CentraleHydro, RapportHydro.centrale_id == CentraleHydro.id)\
+                .filter(func.extract('year', RapportHydro.periode_debut) == annee_cible)\
+                .group_by(CentraleHydro.operateur_id).all()
+        
+        def production_apres():
+            return db.session.query(CentraleHydro.operateur_id, func.sum(RapportHydro.energie_produite))\
+                .join(CentraleHydro, RapportHydro.centrale_id == CentraleHydro.id)\
+                .filter(RapportHydro.filtre_annee(annee_cible))\
+                .group_by(CentraleHydro.operateur_id).all()
+        
+        duree_avant, _ = chronometrer(production_avant)
+        duree_apres, _ = chronometrer(production_apres)
+        resultats.append(("Production annuelle par opérateur", duree_avant, duree_apres))
+        
+        afficher_resultats(f"Médiane sur 5 exécutions — {nb} rapports", resultats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark : listes chargées en entités ORM complètes puis lues champ par
+champ, contre les projections en lecture seule (app/utils/projections.py)
+déclarées par les vues. Mesure la durée, le pic et la mémoire retenue
+(tracemalloc) et le nombre de requêtes SQL.
+
+Usage : python -m benchmarks.bench_projections [nb_centrales] [nb_annees]
+"""
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event
+
+from benchmarks.commun import app_benchmark, chronometrer, colonnes_base, inserer_en_masse
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.production_hydro import CentraleHydro, RapportHydro
+from app.models.production_solaire import CentraleSolaire, RapportSolaire
+from app.models.production_thermique import CentraleThermique, RapportThermique
+from app.production_hydro.routes_centrales import PROJECTION_CENTRALES as CENTRALES_HYDRO
+from app.production_hydro.routes_rapports import PROJECTION_RAPPORTS as RAPPORTS_HYDRO
+from app.production_solaire.routes import (
+    PROJECTION_CENTRALES as CENTRALES_SOLAIRE, PROJECTION_RAPPORTS as RAPPORTS_SOLAIRE
+)
+from app.production_thermique.routes_centrales import PROJECTION_CENTRALES as CENTRALES_THERMIQUE
+from app.production_thermique.routes_main import PROJECTION_RAPPORTS as RAPPORTS_THERMIQUE
+
+
+TEXTE = 'Observation détaillée de la période, incidents et mesures correctives. ' * 12
+
+
+def generer_donnees(nb_centrales, nb_annees):
+    """Centrales et rapports mensuels des trois filières, colonnes Text remplies"""
+    random.seed(42)
+    base = colonnes_base()
+    nb_operateurs = max(1, nb_centrales // 10)
+    inserer_en_masse(Operateur.__table__, [
+        dict(base, nom=f'Opérateur {i}', numero_licence=f'LIC-{i:05d}')
+        for i in range(1, nb_operateurs + 1)
+    ])
+    for prefixe, centrale, rapport in (('CH', CentraleHydro, RapportHydro),
+                                       ('CT', CentraleThermique, RapportThermique),
+                                       ('CS', CentraleSolaire, RapportSolaire)):
+        inserer_en_masse(centrale.__table__, [
+            dict(base, operateur_id=(i % nb_operateurs) + 1, nom=f'Centrale {prefixe} {i}',
+                 code=f'{prefixe}-{i:05d}', puissance_installee=random.uniform(5, 500),
+                 description=TEXTE, observations=TEXTE)
+            for i in range(1, nb_centrales + 1)
+        ])
+        lignes = []
+        for annee in range(2025 - nb_annees, 2025):
+            for mois in range(1, 13):
+                for centrale_id in range(1, nb_centrales + 1):
+                    lignes.append(dict(
+                        base, centrale_id=centrale_id, annee=annee, mois=mois,
+                        periode_debut=datetime(annee, mois, 1), periode_fin=datetime(annee, mois, 28),
+                        periode_yyyymm=annee * 100 + mois, energie_produite=random.uniform(100, 50000),
+                        statut='valide', description_incidents=TEXTE, impact_environnemental=TEXTE,
+                        observations=TEXTE
+                    ))
+        inserer_en_masse(rapport.__table__, lignes)
+
+
+def lire(objet, noeud):
+    """Lire sur une entité les champs qu'affiche la vue (relations comprises)"""
+    for nom in noeud.champs:
+        getattr(objet, nom)
+    for nom, enfant in noeud.enfants.items():
+        cible = getattr(objet, nom)
+        if cible is not None:
+            lire(cible, enfant)
+
+
+class CompteurSQL:
+    """Nombre d'instructions SQL exécutées"""
+
+    def __init__(self):
+        self.nombre = 0
+        event.listen(db.engine, 'before_cursor_execute', self._compter)
+
+    def _compter(self, *args):
+        self.nombre += 1
+
+
+def mesurer(fonction, compteur):
+    """(durée médiane ms, pic Mo, mémoire retenue Mo, requêtes SQL)"""
+    def executer():
+        db.session.expunge_all()
+        return fonction()
+
+    duree, _ = chronometrer(executer)
+    db.session.expunge_all()
+    avant = compteur.nombre
+    tracemalloc.start()
+    resultat = fonction()
+    retenue, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    requetes = compteur.nombre - avant
+    del resultat
+    return duree, pic / 2**20, retenue / 2**20, requetes
+
+
+def main():
+    nb_centrales = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with app_benchmark():
+        generer_donnees(nb_centrales, nb_annees)
+        compteur = CompteurSQL()
+        print(f"{nb_centrales} centrales et {nb_centrales * nb_annees * 12} rapports par filière")
+
+        cas = (
+            ('Rapports hydro', RAPPORTS_HYDRO,
+             lambda: RapportHydro.query.order_by(RapportHydro.periode_debut.desc())),
+            ('Rapports thermiques', RAPPORTS_THERMIQUE,
+             lambda: RapportThermique.query.order_by(RapportThermique.periode_debut.desc())),
+            ('Rapports solaires', RAPPORTS_SOLAIRE,
+             lambda: RapportSolaire.query.order_by(RapportSolaire.periode_debut.desc())),
+            ('Centrales hydro', CENTRALES_HYDRO, lambda: CentraleHydro.query.filter_by(actif=True)),
+            ('Centrales thermiques', CENTRALES_THERMIQUE, lambda: CentraleThermique.query.filter_by(actif=True)),
+            ('Centrales solaires', CENTRALES_SOLAIRE, lambda: CentraleSolaire.query.filter_by(actif=True)),
+        )
+
+        print('-' * 104)
+        print(f"{'Liste':<26}{'ORM ms':>9}{'Proj. ms':>10}{'Pic ORM':>10}{'Pic proj.':>11}"
+              f"{'Retenu ORM':>12}{'Retenu proj.':>14}{'SQL':>12}")
+        print(f"{'':<26}{'':>9}{'':>10}{'(Mo)':>10}{'(Mo)':>11}{'(Mo)':>12}{'(Mo)':>14}{'ORM/proj.':>12}")
+        print('-' * 104)
+        for nom, projection, requete in cas:
+            def orm():
+                objets = requete().all()
+                for objet in objets:
+                    lire(objet, projection.racine)
+                return objets
+            proj = lambda: projection.lister(requete())
+
+            duree_orm, pic_orm, retenu_orm, sql_orm = mesurer(orm, compteur)
+            duree_proj, pic_proj, retenu_proj, sql_proj = mesurer(proj, compteur)
+            print(f"{nom:<26}{duree_orm:>9.1f}{duree_proj:>10.1f}{pic_orm:>10.1f}{pic_proj:>11.1f}"
+                  f"{retenu_orm:>12.1f}{retenu_proj:>14.1f}{f'{sql_orm}/{sql_proj}':>12}")
+        print('-' * 104)
+
+
+if __name__ == '__main__':
+    main()
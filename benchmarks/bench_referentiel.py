@@ -0,0 +1,91 @@
+"""
+Benchmark : construction des listes de choix des formulaires (opérateurs,
+postes de distribution avec réseau et opérateur) par objets ORM, comme
+avant, puis par le cache du référentiel (app/utils/referentiel.py).
+
+Usage : python -m benchmarks.bench_referentiel [nb_operateurs] [nb_postes]
+"""
+import sys
+
+from benchmarks.commun import (
+    afficher_resultats, app_benchmark, chronometrer, colonnes_base, inserer_en_masse
+)
+from app.extensions import db
+from app.models.distribution import PosteDistribution, ReseauDistribution
+from app.models.operateurs import Operateur
+from app.utils.referentiel import choix_referentiel, vider_cache_referentiel
+
+
+def generer_donnees(nb_operateurs, nb_postes):
+    """Opérateurs de distribution, un réseau par opérateur et leurs postes"""
+    base = colonnes_base()
+    inserer_en_masse(Operateur.__table__, [
+        dict(base, nom=f'Opérateur {i:05d}', numero_licence=f'LIC-{i:05d}', type_operateur='Distribution')
+        for i in range(1, nb_operateurs + 1)
+    ])
+    inserer_en_masse(ReseauDistribution.__table__, [
+        dict(base, operateur_id=i, nom=f'Réseau {i:05d}', code=f'RD-{i:05d}',
+             tension_distribution=15.0)
+        for i in range(1, nb_operateurs + 1)
+    ])
+    inserer_en_masse(PosteDistribution.__table__, [
+        dict(base, reseau_id=(i % nb_operateurs) + 1, nom=f'Poste {i:05d}', code=f'PD-{i:05d}')
+        for i in range(1, nb_postes + 1)
+    ])
+
+
+def operateurs_orm():
+    db.session.expire_all()
+    return [(op.id, op.nom) for op in Operateur.query.filter_by(actif=True).order_by(Operateur.nom).all()]
+
+
+def postes_orm():
+    db.session.expire_all()
+    postes = PosteDistribution.query.join(ReseauDistribution).filter(PosteDistribution.actif == True) \
+                                    .order_by(PosteDistribution.nom).all()
+    return [(p.id, f"{p.nom} - {p.reseau.operateur.nom}") for p in postes]
+
+
+def a_froid(fonction):
+    """Premier appel après invalidation (une requête projetée)"""
+    def executer():
+        vider_cache_referentiel()
+        return fonction()
+    return executer
+
+
+def main():
+    nb_operateurs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    nb_postes = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with app_benchmark() as app:
+        generer_donnees(nb_operateurs, nb_postes)
+        print(f"{nb_operateurs} opérateurs, {nb_postes} postes de distribution")
+
+        cas = (
+            ('Opérateurs', operateurs_orm, lambda: choix_referentiel('operateurs')),
+            ('Postes (nom - opérateur)', postes_orm,
+             lambda: choix_referentiel('postes_distribution', '{nom} - {operateur}')),
+        )
+        resultats = []
+        for nom, avant, apres in cas:
+            duree_avant, attendu = chronometrer(avant)
+            duree_froid, obtenu = chronometrer(a_froid(apres))
+            duree_chaud, _ = chronometrer(apres, repetitions=50)
+            if sorted(obtenu) != sorted(attendu):
+                raise AssertionError(f'{nom} : choix différents ({len(obtenu)} != {len(attendu)})')
+            resultats.append((f'{nom}, cache vide', duree_avant, duree_froid))
+            resultats.append((f'{nom}, cache valide', duree_avant, duree_chaud))
+
+        # Une écriture invalide l'entrée au prochain affichage
+        choix_referentiel('operateurs')
+        Operateur(nom='Opérateur ajouté', numero_licence='LIC-NOUVEAU').save()
+        if (db.session.query(Operateur.id).filter_by(nom='Opérateur ajouté').scalar(),
+                'Opérateur ajouté') not in choix_referentiel('operateurs'):
+            raise AssertionError("Cache non invalidé après l'ajout d'un opérateur")
+
+        afficher_resultats('Listes de choix des formulaires', resultats)
+
+
+if __name__ == '__main__':
+    main()
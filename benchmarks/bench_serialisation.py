@@ -0,0 +1,119 @@
+"""
+Benchmark : réponses JSON des APIs construites par to_dict() sur des
+entités ORM, contre les schémas compilés (app/utils/serialisation.py) en
+dictionnaires, en format colonnes et en flux. Mesure la durée (requête,
+sérialisation et encodage JSON compris) et la taille de la réponse.
+
+Usage : python -m benchmarks.bench_serialisation [nb_lignes] [nb_annees]
+"""
+import random
+import sys
+from datetime import datetime
+
+from flask import current_app
+
+from benchmarks.commun import app_benchmark, chronometrer, colonnes_base, inserer_en_masse
+from app.are.dashboard.routes import SCHEMA_KPIS
+from app.are.services_statistiques import SCHEMA_PORTFOLIO
+from app.extensions import db
+from app.models.dashboard_are import KPIStrategic, TendanceKPI
+from app.models.operateurs import Operateur
+from app.models.statistiques_are import PortfolioProjet, StatutProjet, TypeProjet
+from app.models.transport import LigneTransport, RapportTransport
+from app.transport.routes import SCHEMA_RAPPORTS
+
+
+TEXTE = 'Incident sur le tronçon, déclenchement et réenclenchement. ' * 4
+
+
+def generer_donnees(nb_lignes, nb_annees):
+    """Lignes de transport et rapports mensuels, KPIs et projets du portfolio"""
+    random.seed(42)
+    base = colonnes_base()
+    nb_operateurs = max(1, nb_lignes // 10)
+    inserer_en_masse(Operateur.__table__, [
+        dict(base, nom=f'Opérateur {i}', numero_licence=f'LIC-{i:05d}')
+        for i in range(1, nb_operateurs + 1)
+    ])
+    inserer_en_masse(LigneTransport.__table__, [
+        dict(base, operateur_id=(i % nb_operateurs) + 1, nom=f'Ligne {i}', code=f'LT-{i:05d}',
+             tension_nominale=random.choice((110.0, 220.0, 400.0)))
+        for i in range(1, nb_lignes + 1)
+    ])
+    rapports = []
+    for annee in range(2025 - nb_annees, 2025):
+        for mois in range(1, 13):
+            for ligne_id in range(1, nb_lignes + 1):
+                rapports.append(dict(
+                    base, ligne_id=ligne_id, annee=annee, mois=mois,
+                    periode_debut=datetime(annee, mois, 1), periode_fin=datetime(annee, mois, 28),
+                    energie_transitee=random.uniform(1000, 90000), energie_maximale=random.uniform(50, 400),
+                    facteur_charge=random.uniform(20, 90), taux_utilisation=random.uniform(20, 95),
+                    nombre_incidents=random.randint(0, 5), saidi=random.uniform(0, 300),
+                    statut='validé', observations=TEXTE
+                ))
+    inserer_en_masse(RapportTransport.__table__, rapports)
+    inserer_en_masse(KPIStrategic.__table__, [
+        dict(base, code=f'KPI-{i:04d}', nom=f'Indicateur {i}', valeur=random.uniform(0, 100),
+             unite='%', periode='2024', annee=2024, tendance=random.choice(list(TendanceKPI)).name,
+             operateur_id=(i % nb_operateurs) + 1 if i % 3 else None)
+        for i in range(1, nb_lignes * 5 + 1)
+    ])
+    inserer_en_masse(PortfolioProjet.__table__, [
+        dict(base, nom_projet=f'Projet {i}', type_projet=TypeProjet.PRODUCTION_SOLAIRE.name,
+             operateur_id=(i % nb_operateurs) + 1, capacite_mw=random.uniform(1, 100),
+             date_depot_demande=datetime(2023, 1, 1).date(), statut=StatutProjet.EN_ETUDE.name)
+        for i in range(1, nb_lignes * 5 + 1)
+    ])
+
+
+def mesurer(fonction):
+    """(durée médiane ms, octets) d'une réponse construite par `fonction`"""
+    def executer():
+        db.session.expunge_all()
+        return fonction()
+
+    duree, texte = chronometrer(executer)
+    return duree, len(texte.encode())
+
+
+def main():
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with app_benchmark():
+        generer_donnees(nb_lignes, nb_annees)
+        dumps = current_app.json.dumps
+        print(f"{nb_lignes} lignes, {nb_lignes * nb_annees * 12} rapports de transport, "
+              f"{nb_lignes * 5} KPIs et projets")
+
+        cas = (
+            ('Rapports transport', SCHEMA_RAPPORTS,
+             lambda: RapportTransport.query.order_by(RapportTransport.periode_debut, RapportTransport.id)),
+            ('KPIs stratégiques', SCHEMA_KPIS, lambda: KPIStrategic.query.filter_by(annee=2024)),
+            ('Portfolio ARE', SCHEMA_PORTFOLIO, lambda: PortfolioProjet.query.filter_by(actif=True)),
+        )
+
+        print('-' * 92)
+        print(f"{'API':<22}{'to_dict ms':>12}{'Schéma ms':>11}{'Colonnes ms':>13}{'Flux ms':>10}"
+              f"{'Octets dict':>13}{'Octets col.':>13}")
+        print('-' * 92)
+        for nom, schema, requete in cas:
+            attendu = [objet.to_dict() for objet in requete().all()]
+            if schema.dicts(requete()) != attendu:
+                raise AssertionError(f'{nom} : sérialisation différente de to_dict()')
+            db.session.expunge_all()
+
+            duree_orm, octets_orm = mesurer(lambda: dumps([objet.to_dict() for objet in requete().all()]))
+            duree_schema, octets_schema = mesurer(lambda: dumps(schema.dicts(requete())))
+            duree_col, octets_col = mesurer(lambda: dumps(schema.colonnes(requete())))
+            duree_flux, _ = mesurer(lambda: ''.join(schema.flux(requete())))
+            if octets_schema != octets_orm:
+                raise AssertionError(f'{nom} : réponses de tailles différentes')
+            print(f"{nom:<22}{duree_orm:>12.1f}{duree_schema:>11.1f}{duree_col:>13.1f}{duree_flux:>10.1f}"
+                  f"{octets_orm:>13}{octets_col:>13}")
+        print('-' * 92)
+
+
+if __name__ == '__main__':
+    main()
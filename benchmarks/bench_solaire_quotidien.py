@@ -0,0 +1,120 @@
+"""
+Benchmark : chargement d'une année de données solaires quotidiennes puis
+agrégation dans les rapports mensuels, entité par entité avec l'ORM (un
+objet par jour, somme et maximum en Python sur la relation
+donnees_quotidiennes) contre le chargeur en masse
+(app/production_solaire/donnees_quotidiennes.py : lots pandas,
+executemany, agrégats NumPy et UPDATE groupé).
+
+Usage : python -m benchmarks.bench_solaire_quotidien [nb_centrales] [nb_annees]
+"""
+import calendar
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.commun import afficher_resultats, app_benchmark, colonnes_base, inserer_en_masse
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.production_solaire import CentraleSolaire, DonneesSolaireQuotidiennes, RapportSolaire
+from app.production_solaire.donnees_quotidiennes import DonneesSolaireService
+
+
+def ecrire_fichier(chemin, nb_centrales, nb_annees):
+    """Une ligne par centrale et par jour"""
+    random.seed(42)
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        fichier.write('centrale,date,energie_produite,puissance_max,heure_puissance_max,irradiation,duree_arrets\n')
+        for centrale in range(1, nb_centrales + 1):
+            jour = date(2024 - nb_annees, 1, 1)
+            while jour.year < 2024:
+                fichier.write(f"CS-{centrale:04d},{jour.isoformat()},{random.uniform(20000, 90000):.3f},"
+                              f"{random.uniform(5000, 18000):.3f},12:{random.randint(0, 59):02d},"
+                              f"{random.uniform(3.5, 6.5):.3f},{random.choice((0, 0, 0, 1.5))}\n")
+                jour += timedelta(days=1)
+
+
+def charger_orm(chemin):
+    """Un objet par jour, rapport recherché par ligne, agrégats en Python par rapport"""
+    rapports = {}
+    with open(chemin, encoding='utf-8') as fichier:
+        next(fichier)
+        for ligne in fichier:
+            code, jour, energie, puissance, heure, irradiation, arrets = ligne.rstrip('\n').split(',')
+            jour = datetime.strptime(jour, '%Y-%m-%d')
+            centrale = CentraleSolaire.query.filter_by(code=code).first()
+            cle = (centrale.id, jour.year, jour.month)
+            if cle not in rapports:
+                rapport = RapportSolaire.query.filter_by(centrale_id=centrale.id, annee=jour.year,
+                                                         mois=jour.month).first()
+                if rapport is None:
+                    fin = calendar.monthrange(jour.year, jour.month)[1]
+                    rapport = RapportSolaire(centrale_id=centrale.id, annee=jour.year, mois=jour.month,
+                                             periode_debut=jour.replace(day=1), periode_fin=jour.replace(day=fin))
+                    db.session.add(rapport)
+                rapports[cle] = rapport
+            rapports[cle].donnees_quotidiennes.append(DonneesSolaireQuotidiennes(
+                date_production=jour, energie_produite=float(energie),
+                puissance_max=float(puissance), heure_puissance_max=heure, irradiation=float(irradiation),
+                duree_arrets=float(arrets)
+            ))
+    db.session.flush()
+    for rapport in rapports.values():
+        jours = rapport.donnees_quotidiennes
+        rapport.energie_produite = sum(j.energie_produite for j in jours) / 1000
+        rapport.puissance_max = max(j.puissance_max for j in jours) / 1000
+        rapport.irradiation_totale = sum(j.irradiation for j in jours)
+        rapport.duree_arrets = sum(j.duree_arrets for j in jours)
+    db.session.commit()
+
+
+def mesurer(fonction):
+    DonneesSolaireQuotidiennes.query.delete()
+    RapportSolaire.query.delete()
+    db.session.commit()
+    db.session.expunge_all()
+    debut = time.perf_counter()
+    fonction()
+    duree = (time.perf_counter() - debut) * 1000
+    instantane = [
+        (c, a, m, round(e, 6), round(p, 6), round(i, 6), round(d, 6))
+        for c, a, m, e, p, i, d in db.session.query(
+            RapportSolaire.centrale_id, RapportSolaire.annee, RapportSolaire.mois, RapportSolaire.energie_produite,
+            RapportSolaire.puissance_max, RapportSolaire.irradiation_totale, RapportSolaire.duree_arrets
+        ).order_by(RapportSolaire.centrale_id, RapportSolaire.annee, RapportSolaire.mois)
+    ]
+    return duree, instantane
+
+
+def main():
+    nb_centrales = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with app_benchmark():
+        base = colonnes_base()
+        inserer_en_masse(Operateur.__table__, [dict(base, nom='Opérateur solaire', numero_licence='LIC-00001')])
+        inserer_en_masse(CentraleSolaire.__table__, [
+            dict(base, operateur_id=1, nom=f'Centrale {i}', code=f'CS-{i:04d}', puissance_installee=20.0)
+            for i in range(1, nb_centrales + 1)
+        ])
+        chemin = os.path.join(tempfile.mkdtemp(prefix='bench_solaire_'), 'solaire.csv')
+        ecrire_fichier(chemin, nb_centrales, nb_annees)
+        nb_jours = (date(2024, 1, 1) - date(2024 - nb_annees, 1, 1)).days * nb_centrales
+        print(f"{nb_jours} jours, {nb_centrales * nb_annees * 12} rapports mensuels")
+
+        avant, attendu = mesurer(lambda: charger_orm(chemin))
+        apres, obtenu = mesurer(lambda: DonneesSolaireService.charger(chemin))
+        if obtenu != attendu:
+            raise AssertionError('Agrégats différents entre les deux chargements')
+
+        afficher_resultats('Chargement et agrégation solaire', [
+            ('ORM par jour / lots + NumPy', avant, apres),
+        ])
+        os.remove(chemin)
+
+
+if __name__ == '__main__':
+    main()
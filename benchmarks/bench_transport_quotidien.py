@@ -0,0 +1,144 @@
+"""
+Benchmark : chargement de données quotidiennes de transport puis agrégation
+mensuelle (rapports) et annuelle (synthèses par ligne), entité par entité
+avec l'ORM (un objet par jour, agrégats en Python sur la relation
+données_quotidiennes) contre le chargeur en masse
+(app/transport/donnees_quotidiennes.py : lots pandas, executemany,
+réductions NumPy et écritures groupées).
+
+Usage : python -m benchmarks.bench_transport_quotidien [nb_lignes] [nb_annees]
+"""
+import calendar
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.commun import afficher_resultats, app_benchmark, colonnes_base, inserer_en_masse
+from app.extensions import db
+from app.models.operateurs import Operateur
+from app.models.transport import DonneesTransportQuotidiennes, LigneTransport, RapportTransport, SyntheseAnnuelleLigne
+from app.transport.donnees_quotidiennes import DonneesTransportService
+
+
+def ecrire_fichier(chemin, nb_lignes, nb_annees):
+    """Une ligne par ligne de transport et par jour"""
+    random.seed(42)
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        fichier.write('ligne,date,energie_transitee,puissance_maximale,heure_puissance_max,'
+                      'nombre_incidents,duree_incidents\n')
+        for ligne in range(1, nb_lignes + 1):
+            jour = date(2024 - nb_annees, 1, 1)
+            while jour.year < 2024:
+                incidents = random.choice((0, 0, 0, 1, 2))
+                fichier.write(f"LT-{ligne:04d},{jour.isoformat()},{random.uniform(5000, 20000):.3f},"
+                              f"{random.uniform(300, 900):.3f},19:{random.randint(0, 59):02d},"
+                              f"{incidents},{incidents * random.uniform(5, 60):.3f}\n")
+                jour += timedelta(days=1)
+
+
+def charger_orm(chemin):
+    """Un objet par jour, rapport recherché par ligne, agrégats en Python par rapport et par année"""
+    rapports = {}
+    with open(chemin, encoding='utf-8') as fichier:
+        next(fichier)
+        for texte in fichier:
+            code, jour, energie, puissance, heure, incidents, duree = texte.rstrip('\n').split(',')
+            jour = datetime.strptime(jour, '%Y-%m-%d')
+            ligne = LigneTransport.query.filter_by(code=code).first()
+            cle = (ligne.id, jour.year, jour.month)
+            if cle not in rapports:
+                rapport = RapportTransport.query.filter_by(ligne_id=ligne.id, annee=jour.year, mois=jour.month).first()
+                if rapport is None:
+                    fin = calendar.monthrange(jour.year, jour.month)[1]
+                    rapport = RapportTransport(ligne_id=ligne.id, annee=jour.year, mois=jour.month,
+                                               periode_debut=jour.replace(day=1), periode_fin=jour.replace(day=fin))
+                    db.session.add(rapport)
+                rapports[cle] = rapport
+            rapports[cle].données_quotidiennes.append(DonneesTransportQuotidiennes(
+                date=jour, energie_transitee=float(energie), puissance_maximale=float(puissance),
+                heure_puissance_max=heure, nombre_incidents=int(incidents), duree_incidents=float(duree)
+            ))
+    db.session.flush()
+
+    annees = {}
+    for (ligne_id, annee, _), rapport in rapports.items():
+        jours = rapport.données_quotidiennes
+        minutes = sum(j.duree_incidents for j in jours)
+        rapport.energie_transitee = sum(j.energie_transitee for j in jours)
+        rapport.energie_maximale = max(j.puissance_maximale for j in jours)
+        rapport.nombre_incidents = sum(j.nombre_incidents for j in jours)
+        rapport.duree_total_incidents = minutes / 60
+        rapport.disponibilite = 100 * (1 - minutes / (len(jours) * 1440))
+        annees.setdefault((ligne_id, annee), []).extend(jours)
+    for (ligne_id, annee), jours in annees.items():
+        minutes = sum(j.duree_incidents for j in jours)
+        db.session.add(SyntheseAnnuelleLigne(
+            ligne_id=ligne_id, annee=annee, energie_transitee=sum(j.energie_transitee for j in jours),
+            puissance_pointe=max(j.puissance_maximale for j in jours),
+            nombre_incidents=sum(j.nombre_incidents for j in jours), minutes_incidents=minutes,
+            disponibilite=100 * (1 - minutes / (len(jours) * 1440)), jours_renseignes=len(jours)
+        ))
+    db.session.commit()
+
+
+def mesurer(fonction):
+    DonneesTransportQuotidiennes.query.delete()
+    RapportTransport.query.delete()
+    SyntheseAnnuelleLigne.query.delete()
+    db.session.commit()
+    db.session.expunge_all()
+    debut = time.perf_counter()
+    fonction()
+    duree = (time.perf_counter() - debut) * 1000
+
+    def arrondir(ligne):
+        return tuple(round(valeur, 6) for valeur in ligne)
+
+    instantane = [arrondir(ligne) for ligne in db.session.query(
+        RapportTransport.ligne_id, RapportTransport.annee, RapportTransport.mois,
+        RapportTransport.energie_transitee, RapportTransport.energie_maximale, RapportTransport.nombre_incidents,
+        RapportTransport.duree_total_incidents, RapportTransport.disponibilite
+    ).order_by(RapportTransport.ligne_id, RapportTransport.annee, RapportTransport.mois)]
+    instantane += [arrondir(ligne) for ligne in db.session.query(
+        SyntheseAnnuelleLigne.ligne_id, SyntheseAnnuelleLigne.annee, SyntheseAnnuelleLigne.energie_transitee,
+        SyntheseAnnuelleLigne.puissance_pointe, SyntheseAnnuelleLigne.nombre_incidents,
+        SyntheseAnnuelleLigne.minutes_incidents, SyntheseAnnuelleLigne.disponibilite,
+        SyntheseAnnuelleLigne.jours_renseignes
+    ).order_by(SyntheseAnnuelleLigne.ligne_id, SyntheseAnnuelleLigne.annee)]
+    return duree, instantane
+
+
+def main():
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    nb_annees = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with app_benchmark():
+        base = colonnes_base()
+        inserer_en_masse(Operateur.__table__, [dict(base, nom='Opérateur transport', numero_licence='LIC-00001')])
+        inserer_en_masse(LigneTransport.__table__, [
+            dict(base, operateur_id=1, nom=f'Ligne {i}', code=f'LT-{i:04d}', tension_nominale=220.0,
+                 capacite_transport=1000.0)
+            for i in range(1, nb_lignes + 1)
+        ])
+        chemin = os.path.join(tempfile.mkdtemp(prefix='bench_transport_'), 'transport.csv')
+        ecrire_fichier(chemin, nb_lignes, nb_annees)
+        nb_jours = (date(2024, 1, 1) - date(2024 - nb_annees, 1, 1)).days * nb_lignes
+        print(f"{nb_jours} jours, {nb_lignes * nb_annees * 12} rapports mensuels, "
+              f"{nb_lignes * nb_annees} synthèses annuelles")
+
+        avant, attendu = mesurer(lambda: charger_orm(chemin))
+        apres, obtenu = mesurer(lambda: DonneesTransportService.charger(chemin))
+        if obtenu != attendu:
+            raise AssertionError('Agrégats différents entre les deux chargements')
+
+        afficher_resultats('Chargement et agrégation transport', [
+            ('ORM par jour / lots + NumPy', avant, apres),
+        ])
+        os.remove(chemin)
+
+
+if __name__ == '__main__':
+    main()
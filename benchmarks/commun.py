@@ -0,0 +1,75 @@
+"""
+Outils communs aux benchmarks : application sur base temporaire,
+chronométrage et données de référence synthétiques
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.config import config, TestingConfig
+from app.extensions import db
+
+
+@contextmanager
+def app_benchmark():
+    """Application Flask sur une base SQLite fichier jetable (tables créées)"""
+    dossier = tempfile.mkdtemp(prefix='bench_are_')
+    chemin_db = os.path.join(dossier, 'bench.db')
+    
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + chemin_db
+        SQLALCHEMY_ECHO = False
+    
+    config['benchmark'] = BenchmarkConfig
+    app = create_app('benchmark')
+    with app.app_context():
+        db.create_all()
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+            if os.path.exists(chemin_db):
+                os.remove(chemin_db)
+
+
+def chronometrer(fonction, repetitions=5):
+    """Durée médiane (ms) de `fonction` sur plusieurs exécutions"""
+    durees = []
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return durees[len(durees) // 2], resultat
+
+
+def inserer_en_masse(table, lignes, taille_lot=5000):
+    """INSERT executemany par lots sur une table Core"""
+    for i in range(0, len(lignes), taille_lot):
+        db.session.execute(table.insert(), lignes[i:i + taille_lot])
+    db.session.commit()
+
+
+def colonnes_base(maintenant=None):
+    """Colonnes communes de BaseModel pour les insertions Core"""
+    maintenant = maintenant or datetime.utcnow()
+    return {'date_creation': maintenant, 'date_modification': maintenant, 'actif': True}
+
+
+def afficher_resultats(titre, lignes):
+    """Afficher un tableau avant/après"""
+    print(f"\n{titre}")
+    print('-' * 78)
+    print(f"{'Requête':<44}{'Avant (ms)':>11}{'Après (ms)':>11}{'Gain':>10}")
+    print('-' * 78)
+    for nom, avant, apres in lignes:
+        gain = f"x{avant / apres:.1f}" if apres > 0 else '-'
+        print(f"{nom:<44}{avant:>11.2f}{apres:>11.2f}{gain:>10}")
@@ -0,0 +1,46 @@
+"""Imports en masse des collectes mensuelles
+
+Revision ID: a6d3e8b15c72
+Revises: f2b7d4e90a63
+Create Date: 2026-10-19 18:32:07.419385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e8b15c72'
+down_revision = 'f2b7d4e90a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('imports_collecte',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('operateur_id', sa.Integer(), nullable=True),
+    sa.Column('nom_fichier', sa.String(length=255), nullable=False),
+    sa.Column('soumettre', sa.Boolean(), nullable=True),
+    sa.Column('partiel', sa.Boolean(), nullable=True),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('lignes_lues', sa.Integer(), nullable=True),
+    sa.Column('lignes_creees', sa.Integer(), nullable=True),
+    sa.Column('lignes_mises_a_jour', sa.Integer(), nullable=True),
+    sa.Column('lignes_en_erreur', sa.Integer(), nullable=True),
+    sa.Column('erreurs', sa.Text(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('debut', sa.DateTime(), nullable=True),
+    sa.Column('fin', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['operateur_id'], ['operateurs.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('imports_collecte')
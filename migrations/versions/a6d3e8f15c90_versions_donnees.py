@@ -0,0 +1,48 @@
+"""Vecteur de versions des données (ETag des réponses HTTP)
+
+Revision ID: a6d3e8f15c90
+Revises: f1b7c4d92e36
+Create Date: 2026-10-19 15:02:47.318820
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e8f15c90'
+down_revision = 'f1b7c4d92e36'
+branch_labels = None
+depends_on = None
+
+TABLES_NON_VERSIONNEES = (
+    'alembic_version', 'versions_donnees', 'verrous_taches', 'executions_taches', 'marqueurs_traitement'
+)
+
+
+def upgrade():
+    versions = op.create_table('versions_donnees',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('nom_table', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom_table')
+    )
+
+    # Une ligne par table existante : les écritures n'ont plus qu'à incrémenter
+    maintenant = datetime.utcnow()
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    op.bulk_insert(versions, [
+        {'nom_table': nom, 'version': 0, 'date_creation': maintenant,
+         'date_modification': maintenant, 'actif': True}
+        for nom in sorted(tables) if nom not in TABLES_NON_VERSIONNEES
+    ])
+
+
+def downgrade():
+    op.drop_table('versions_donnees')
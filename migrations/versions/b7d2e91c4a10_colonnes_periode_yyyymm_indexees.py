@@ -0,0 +1,41 @@
+"""Colonnes periode_yyyymm indexées sur les rapports de production
+
+Revision ID: b7d2e91c4a10
+Revises: f4610c055f72
+Create Date: 2026-10-18 09:12:41.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e91c4a10'
+down_revision = 'f4610c055f72'
+branch_labels = None
+depends_on = None
+
+
+TABLES_RAPPORTS = ('rapports_hydro', 'rapports_thermique', 'rapports_solaire')
+
+
+def upgrade():
+    for table in TABLES_RAPPORTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('periode_yyyymm', sa.Integer(), nullable=True))
+            batch_op.create_index(f'ix_{table}_periode_yyyymm', ['periode_yyyymm'], unique=False)
+            batch_op.create_index(f'ix_{table}_date_creation', ['date_creation'], unique=False)
+
+        # Remplissage des lignes existantes à partir de annee/mois
+        op.execute(
+            f"UPDATE {table} SET periode_yyyymm = annee * 100 + mois "
+            f"WHERE annee IS NOT NULL AND mois IS NOT NULL"
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES_RAPPORTS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_date_creation')
+            batch_op.drop_index(f'ix_{table}_periode_yyyymm')
+            batch_op.drop_column('periode_yyyymm')
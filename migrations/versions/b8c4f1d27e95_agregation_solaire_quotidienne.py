@@ -0,0 +1,37 @@
+"""Pic de puissance et arrêts des rapports solaires, index des données quotidiennes
+
+Revision ID: b8c4f1d27e95
+Revises: a6d3e8b15c72
+Create Date: 2026-10-19 19:14:52.807311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c4f1d27e95'
+down_revision = 'a6d3e8b15c72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rapports_solaire', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('puissance_max', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('date_puissance_max', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('duree_arrets', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('donnees_solaire_quotidiennes', schema=None) as batch_op:
+        batch_op.create_index('ix_donnees_solaire_quotidiennes_rapport_date',
+                              ['rapport_id', 'date_production'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('donnees_solaire_quotidiennes', schema=None) as batch_op:
+        batch_op.drop_index('ix_donnees_solaire_quotidiennes_rapport_date')
+
+    with op.batch_alter_table('rapports_solaire', schema=None) as batch_op:
+        batch_op.drop_column('duree_arrets')
+        batch_op.drop_column('date_puissance_max')
+        batch_op.drop_column('puissance_max')
@@ -0,0 +1,32 @@
+"""Index pour la campagne mensuelle de conformité
+
+Revision ID: c3a8f0d25e47
+Revises: b7d2e91c4a10
+Create Date: 2026-10-19 08:41:03.226914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8f0d25e47'
+down_revision = 'b7d2e91c4a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('performances_operateur_kpi', schema=None) as batch_op:
+        batch_op.create_index('ix_performances_operateur_kpi_periode', ['annee', 'mois'], unique=False)
+
+    with op.batch_alter_table('sanctions_reglementaires', schema=None) as batch_op:
+        batch_op.create_index('ix_sanctions_reglementaires_performance_kpi_id', ['performance_kpi_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sanctions_reglementaires', schema=None) as batch_op:
+        batch_op.drop_index('ix_sanctions_reglementaires_performance_kpi_id')
+
+    with op.batch_alter_table('performances_operateur_kpi', schema=None) as batch_op:
+        batch_op.drop_index('ix_performances_operateur_kpi_periode')
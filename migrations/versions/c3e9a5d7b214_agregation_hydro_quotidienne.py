@@ -0,0 +1,40 @@
+"""Débits classés et déversements des rapports hydro, index des données journalières
+
+Revision ID: c3e9a5d7b214
+Revises: b8c4f1d27e95
+Create Date: 2026-10-19 21:37:08.415927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a5d7b214'
+down_revision = 'b8c4f1d27e95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rapports_hydro', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('volume_deverse', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('jours_deversement', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('debit_q10', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('debit_q50', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('debit_q90', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('donnees_mensuelles', schema=None) as batch_op:
+        batch_op.create_index('ix_donnees_mensuelles_rapport_jour', ['rapport_id', 'jour'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('donnees_mensuelles', schema=None) as batch_op:
+        batch_op.drop_index('ix_donnees_mensuelles_rapport_jour')
+
+    with op.batch_alter_table('rapports_hydro', schema=None) as batch_op:
+        batch_op.drop_column('debit_q90')
+        batch_op.drop_column('debit_q50')
+        batch_op.drop_column('debit_q10')
+        batch_op.drop_column('jours_deversement')
+        batch_op.drop_column('volume_deverse')
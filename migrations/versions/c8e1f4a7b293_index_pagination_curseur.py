@@ -0,0 +1,37 @@
+"""Index composites pour la pagination par curseur des listes
+
+Revision ID: c8e1f4a7b293
+Revises: a6d3e8f15c90
+Create Date: 2026-10-19 16:21:09.562418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e1f4a7b293'
+down_revision = 'a6d3e8f15c90'
+branch_labels = None
+depends_on = None
+
+
+INDEX_PAGINATION = (
+    ('rapports_transport', 'ix_rapports_transport_periode_id', ['periode_debut', 'id']),
+    ('rapports_distribution', 'ix_rapports_distribution_periode_id', ['periode_debut', 'id']),
+    ('donnees_distribution_mensuelles', 'ix_donnees_distrib_mensuelles_periode_id', ['annee', 'mois', 'id']),
+    ('validations_rapport', 'ix_validations_rapport_creation_id', ['date_creation', 'id']),
+    ('notifications', 'ix_notifications_user_creation_id', ['user_id', 'date_creation', 'id']),
+)
+
+
+def upgrade():
+    for table, nom, colonnes in INDEX_PAGINATION:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(nom, colonnes, unique=False)
+
+
+def downgrade():
+    for table, nom, _ in reversed(INDEX_PAGINATION):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(nom)
@@ -0,0 +1,59 @@
+"""Pointe datée et disponibilité des rapports transport, synthèses annuelles des lignes
+
+Revision ID: d5f1b8c3e620
+Revises: c3e9a5d7b214
+Create Date: 2026-10-19 23:05:41.203586
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f1b8c3e620'
+down_revision = 'c3e9a5d7b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rapports_transport', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date_pointe', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('disponibilite', sa.Float(), nullable=True))
+
+    with op.batch_alter_table('donnees_transport_quotidiennes', schema=None) as batch_op:
+        batch_op.create_index('ix_donnees_transport_quotidiennes_rapport_date', ['rapport_id', 'date'], unique=False)
+
+    op.create_table('syntheses_annuelles_lignes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('ligne_id', sa.Integer(), nullable=False),
+    sa.Column('annee', sa.Integer(), nullable=False),
+    sa.Column('energie_transitee', sa.Float(), nullable=True),
+    sa.Column('puissance_pointe', sa.Float(), nullable=True),
+    sa.Column('date_pointe', sa.DateTime(), nullable=True),
+    sa.Column('charge_moyenne', sa.Float(), nullable=True),
+    sa.Column('facteur_charge', sa.Float(), nullable=True),
+    sa.Column('taux_utilisation', sa.Float(), nullable=True),
+    sa.Column('nombre_incidents', sa.Integer(), nullable=True),
+    sa.Column('minutes_incidents', sa.Float(), nullable=True),
+    sa.Column('disponibilite', sa.Float(), nullable=True),
+    sa.Column('jours_renseignes', sa.Integer(), nullable=True),
+    sa.Column('mois_renseignes', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['ligne_id'], ['lignes_transport.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ligne_id', 'annee', name='uq_synthese_ligne_annee')
+    )
+
+
+def downgrade():
+    op.drop_table('syntheses_annuelles_lignes')
+
+    with op.batch_alter_table('donnees_transport_quotidiennes', schema=None) as batch_op:
+        batch_op.drop_index('ix_donnees_transport_quotidiennes_rapport_date')
+
+    with op.batch_alter_table('rapports_transport', schema=None) as batch_op:
+        batch_op.drop_column('disponibilite')
+        batch_op.drop_column('date_pointe')
@@ -0,0 +1,40 @@
+"""Clé déterministe des alertes automatiques
+
+Revision ID: d9e4b17a6c02
+Revises: c3a8f0d25e47
+Create Date: 2026-10-19 10:12:47.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e4b17a6c02'
+down_revision = 'c3a8f0d25e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerte_regulateur', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cle_alerte', sa.String(length=200), nullable=True))
+        batch_op.create_index(batch_op.f('ix_alerte_regulateur_cle_alerte'), ['cle_alerte'], unique=False)
+
+    # Renseigner la clé des alertes automatiques existantes pour qu'elles
+    # continuent de bloquer les doublons
+    op.execute(
+        "UPDATE alerte_regulateur SET cle_alerte = 'retard_rapport:' || operateur_id || ':' || substr(titre, 16) "
+        "WHERE titre LIKE 'Retard rapport %' AND operateur_id IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE alerte_regulateur SET cle_alerte = 'kpi_seuil:' || ("
+        "SELECT max(k.id) FROM kpi_strategic k WHERE 'KPI ' || k.code = alerte_regulateur.entite_concernee) "
+        "WHERE type = 'TECHNIQUE' AND entite_concernee LIKE 'KPI %'"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('alerte_regulateur', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_alerte_regulateur_cle_alerte'))
+        batch_op.drop_column('cle_alerte')
@@ -0,0 +1,42 @@
+"""Colonne thread_id (racine du fil) sur les messages internes
+
+Revision ID: e3a9c5d71f48
+Revises: c8e1f4a7b293
+Create Date: 2026-10-19 17:04:52.218930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c5d71f48'
+down_revision = 'c8e1f4a7b293'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('messages_internes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('thread_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_messages_internes_thread_id', ['thread_id'], unique=False)
+        batch_op.create_index('ix_messages_internes_destinataire_fil',
+                              ['destinataire_id', 'thread_id'], unique=False)
+
+    # Remplissage : chaque message reçoit l'id de la racine de sa chaîne de réponses
+    op.execute(
+        "WITH RECURSIVE fil(id, racine) AS ("
+        " SELECT id, id FROM messages_internes WHERE message_parent_id IS NULL"
+        " UNION ALL"
+        " SELECT m.id, fil.racine FROM messages_internes m JOIN fil ON m.message_parent_id = fil.id"
+        ") "
+        "UPDATE messages_internes SET thread_id = "
+        "(SELECT racine FROM fil WHERE fil.id = messages_internes.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('messages_internes', schema=None) as batch_op:
+        batch_op.drop_index('ix_messages_internes_destinataire_fil')
+        batch_op.drop_index('ix_messages_internes_thread_id')
+        batch_op.drop_column('thread_id')
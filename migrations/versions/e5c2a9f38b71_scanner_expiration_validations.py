@@ -0,0 +1,39 @@
+"""Index (statut, date_expiration) et marqueurs de traitement
+
+Revision ID: e5c2a9f38b71
+Revises: d9e4b17a6c02
+Create Date: 2026-10-19 11:26:05.904317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c2a9f38b71'
+down_revision = 'd9e4b17a6c02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('marqueurs_traitement',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('valeur', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom')
+    )
+
+    with op.batch_alter_table('validations_rapport', schema=None) as batch_op:
+        batch_op.create_index('ix_validations_rapport_statut_expiration', ['statut', 'date_expiration'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('validations_rapport', schema=None) as batch_op:
+        batch_op.drop_index('ix_validations_rapport_statut_expiration')
+
+    op.drop_table('marqueurs_traitement')
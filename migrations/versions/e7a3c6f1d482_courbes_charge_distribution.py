@@ -0,0 +1,40 @@
+"""Courbes de charge journalières des postes et feeders de distribution
+
+Revision ID: e7a3c6f1d482
+Revises: d5f1b8c3e620
+Create Date: 2026-10-19 23:48:12.517204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c6f1d482'
+down_revision = 'd5f1b8c3e620'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('courbes_charge',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('type_actif', sa.String(length=10), nullable=False),
+    sa.Column('actif_id', sa.Integer(), nullable=False),
+    sa.Column('jour', sa.DateTime(), nullable=False),
+    sa.Column('pas_minutes', sa.Integer(), nullable=False),
+    sa.Column('valeurs', sa.LargeBinary(), nullable=False),
+    sa.Column('nombre_mesures', sa.Integer(), nullable=True),
+    sa.Column('charge_max', sa.Float(), nullable=True),
+    sa.Column('charge_moyenne', sa.Float(), nullable=True),
+    sa.Column('energie', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('type_actif', 'actif_id', 'jour', name='uq_courbe_charge_actif_jour')
+    )
+
+
+def downgrade():
+    op.drop_table('courbes_charge')
@@ -0,0 +1,57 @@
+"""Verrous et historique du planificateur de tâches
+
+Revision ID: f1b7c4d92e36
+Revises: e5c2a9f38b71
+Create Date: 2026-10-19 13:48:22.671054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7c4d92e36'
+down_revision = 'e5c2a9f38b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('verrous_taches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('detenteur', sa.String(length=200), nullable=True),
+    sa.Column('expire_le', sa.DateTime(), nullable=True),
+    sa.Column('derniere_echeance', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom')
+    )
+    op.create_table('executions_taches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('declencheur', sa.String(length=50), nullable=True),
+    sa.Column('echeance', sa.DateTime(), nullable=True),
+    sa.Column('debut', sa.DateTime(), nullable=False),
+    sa.Column('fin', sa.DateTime(), nullable=True),
+    sa.Column('duree_ms', sa.Float(), nullable=True),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('resultat', sa.Text(), nullable=True),
+    sa.Column('detenteur', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('executions_taches', schema=None) as batch_op:
+        batch_op.create_index('ix_executions_taches_nom_debut', ['nom', 'debut'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('executions_taches', schema=None) as batch_op:
+        batch_op.drop_index('ix_executions_taches_nom_debut')
+
+    op.drop_table('executions_taches')
+    op.drop_table('verrous_taches')
@@ -0,0 +1,43 @@
+"""Compteurs par utilisateur des notifications et messages
+
+Revision ID: f2b7d4e90a63
+Revises: e3a9c5d71f48
+Create Date: 2026-10-19 17:48:15.604271
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d4e90a63'
+down_revision = 'e3a9c5d71f48'
+branch_labels = None
+depends_on = None
+
+
+COMPTEURS = (
+    'notifications_total', 'notifications_non_lues', 'notifications_importantes', 'notifications_urgentes',
+    'messages_recus', 'messages_non_lus', 'messages_envoyes', 'messages_archives'
+)
+
+
+def upgrade():
+    # Les lignes sont créées à la première lecture des compteurs de chaque utilisateur
+    op.create_table('compteurs_utilisateurs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_modification', sa.DateTime(), nullable=False),
+    sa.Column('actif', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    *(sa.Column(nom, sa.Integer(), nullable=False) for nom in COMPTEURS),
+    sa.Column('perime', sa.Boolean(), nullable=False),
+    sa.Column('date_calcul', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('compteurs_utilisateurs')
@@ -2,6 +2,7 @@
 Point d'entrée de l'application Flask
 """
 import os
+import click
 from app import create_app
 from app.extensions import db
 from app.utils import init_database, create_admin_user, seed_sample_data
@@ -61,6 +62,204 @@ def init_kpis_reglementaires():
             print("❌ Échec de l'initialisation des KPIs réglementaires")
 
 
+@app.cli.command()
+@click.option('--annee', type=int, help="Année de la période (défaut : mois précédent)")
+@click.option('--mois', type=int, help="Mois de la période, 1-12 (défaut : mois précédent)")
+@click.option('--dry-run', is_flag=True, help="Simuler sans rien écrire en base")
+def conformite_mensuelle(annee, mois, dry_run):
+    """Campagne mensuelle de conformité (sanctions et alertes automatiques)"""
+    with app.app_context():
+        from app.are.services_conformite import ConformiteMensuelleService
+        
+        if not annee or not mois:
+            annee_defaut, mois_defaut = ConformiteMensuelleService.mois_precedent()
+            annee, mois = annee or annee_defaut, mois or mois_defaut
+        
+        print(f"🔎 Conformité réglementaire {mois:02d}/{annee}{' (simulation)' if dry_run else ''}...")
+        resultat = ConformiteMensuelleService.executer(annee, mois, dry_run=dry_run)
+        
+        print(f"  Performances évaluées : {resultat['performances_evaluees']} "
+              f"({resultat['evaluations_mises_a_jour']} mises à jour)")
+        print(f"  Répartition : {resultat['repartition']}")
+        print(f"  Non-conformités : {resultat['non_conformites']} "
+              f"(dont {resultat['deja_sanctionnees']} déjà sanctionnées)")
+        for sanction in resultat['sanctions']:
+            print(f"    - {sanction['numero_decision']} : {sanction['type_sanction']} "
+                  f"{sanction['montant_amende'] or 0:,.0f} USD")
+        verbe = 'à créer' if dry_run else 'créées'
+        print(f"✅ Sanctions {verbe} : {resultat['sanctions_creees']}, alertes {verbe} : "
+              f"{resultat['alertes_creees']} (+{resultat['alertes_mises_a_jour']} mise(s) à jour), "
+              f"montant total : {resultat['montant_total']:,.0f} USD")
+
+
+@app.cli.command()
+def expirer_validations():
+    """Marquer comme expirées les validations dont l'échéance est passée"""
+    with app.app_context():
+        from app.workflow.services import WorkflowService
+        
+        resultat = WorkflowService.expirer_validations()
+        depuis = resultat['depuis'].strftime('%d/%m/%Y %H:%M') if resultat['depuis'] else 'origine'
+        print(f"✅ {resultat['expirees']} validation(s) expirée(s) "
+              f"(échéances du {depuis} au {resultat['jusqu_a']:%d/%m/%Y %H:%M})")
+
+
+@app.cli.command()
+@click.option('--tick', type=int, help="Intervalle de vérification en secondes")
+@click.option('--executer', 'nom_tache', help="Exécuter immédiatement une tâche puis quitter")
+@click.option('--liste', is_flag=True, help="Lister les tâches et leur prochaine échéance")
+def scheduler(tick, nom_tache, liste):
+    """Worker du planificateur de tâches périodiques"""
+    from app.planificateur import planificateur
+    
+    if liste:
+        with app.app_context():
+            for tache in planificateur.etat():
+                print(f"  {tache['nom']:<25} {tache['cron']:<15} prochaine : {tache['prochaine']:%d/%m/%Y %H:%M} UTC")
+        return
+    
+    if nom_tache:
+        if nom_tache not in planificateur.taches:
+            raise click.BadParameter(f"tâche inconnue : {nom_tache}", param_hint='--executer')
+        with app.app_context():
+            execution = planificateur.executer(nom_tache, declencheur='manuel')
+            if execution is None:
+                print(f"⏳ {nom_tache} est déjà en cours d'exécution dans un autre processus")
+            else:
+                print(f"{'✅' if execution.statut == 'succes' else '❌'} {nom_tache} : {execution.statut} "
+                      f"en {execution.duree_ms:.0f} ms - {execution.resultat or ''}")
+        return
+    
+    print(f"🕒 Planificateur démarré ({len(planificateur.taches)} tâches, {planificateur.identifiant})")
+    try:
+        planificateur.boucle(intervalle=tick)
+    except KeyboardInterrupt:
+        planificateur.arreter()
+        print("Planificateur arrêté.")
+
+
+@app.cli.command()
+@click.option('--repetitions', default=3, show_default=True, help="Démarrages chronométrés (médiane)")
+@click.option('--top', default=15, show_default=True, help="Nombre de modules affichés par section")
+@click.option('--budget-ms', type=float, help="Budget de démarrage (défaut : STARTUP_BUDGET_MS)")
+def startup_report(repetitions, top, budget_ms):
+    """Temps de démarrage à froid et imports les plus coûteux"""
+    from app.utils.demarrage import mesurer_demarrage
+    
+    budget_ms = budget_ms or app.config.get('STARTUP_BUDGET_MS')
+    print(f"⏱️  Mesure du démarrage ({repetitions} démarrages à froid)...")
+    rapport = mesurer_demarrage(os.path.dirname(os.path.abspath(__file__)), repetitions=repetitions)
+    
+    print(f"\n   import du paquet app : {rapport['import_ms']:8.1f} ms")
+    print(f"   create_app()         : {rapport['create_app_ms']:8.1f} ms")
+    print(f"   total                : {rapport['total_ms']:8.1f} ms")
+    
+    print("\n📦 Paquets de l'application (temps cumulé d'import)")
+    for nom, duree in rapport['paquets_app'][:top]:
+        print(f"   {duree:8.1f} ms  {nom}")
+    
+    print("\n📚 Dépendances (temps cumulé d'import)")
+    for nom, duree in rapport['tiers'][:top]:
+        print(f"   {duree:8.1f} ms  {nom}")
+    
+    print("\n🐢 Modules les plus lents (temps propre)")
+    for nom, propre, cumul, _ in rapport['plus_lents'][:top]:
+        print(f"   {propre:8.1f} ms  {nom} (cumul {cumul:.1f} ms)")
+    
+    if rapport['differes_charges']:
+        print(f"\n⚠️  Dépendances lourdes chargées au démarrage : {', '.join(rapport['differes_charges'])}")
+    
+    if budget_ms:
+        if rapport['total_ms'] > budget_ms:
+            print(f"\n❌ Budget dépassé : {rapport['total_ms']:.0f} ms > {budget_ms:.0f} ms")
+            raise SystemExit(1)
+        print(f"\n✅ Dans le budget : {rapport['total_ms']:.0f} ms <= {budget_ms:.0f} ms")
+
+
+@app.cli.command()
+@click.argument('fichier', type=click.Path(exists=True, dir_okay=False))
+@click.option('--operateur-id', type=int, help="Limiter aux centrales d'un opérateur")
+@click.option('--taille-lot', default=5000, show_default=True, help="Lignes lues par lot")
+@click.option('--force', is_flag=True, help="Remplacer aussi les jours des rapports transmis ou validés")
+def charger_solaire(fichier, operateur_id, taille_lot, force):
+    """Charger des séries solaires quotidiennes ou d'onduleurs (CSV, NDJSON) et agréger les mois touchés"""
+    with app.app_context():
+        from app.production_solaire.donnees_quotidiennes import DonneesSolaireService
+        
+        bilan = DonneesSolaireService.charger(fichier, operateur_id=operateur_id, taille_lot=taille_lot, force=force)
+        print(f"  Lignes lues : {bilan['lignes_lues']} ({bilan['lignes_rejetees']} rejetée(s) : "
+              f"centrale inconnue ou date invalide)")
+        if bilan['jours_ignores']:
+            print(f"  ⚠️  {bilan['jours_ignores']} jour(s) ignoré(s) : {bilan['rapports_ignores']} rapport(s) "
+                  f"transmis ou validé(s) (--force pour les remplacer)")
+        print(f"✅ {bilan['jours']} jour(s) enregistré(s), {bilan['rapports_crees']} rapport(s) créé(s), "
+              f"{bilan['mois_recalcules']} mois recalculé(s)")
+
+
+@app.cli.command()
+@click.option('--annee', type=int, help="Année des rapports (toutes par défaut)")
+@click.option('--mois', type=int, help="Mois des rapports")
+@click.option('--centrale-id', type=int, help="Limiter à une centrale hydro")
+def agreger_hydro(annee, mois, centrale_id):
+    """Recalculer les rapports hydro depuis leurs données journalières"""
+    with app.app_context():
+        from app.production_hydro.donnees_quotidiennes import DonneesHydroService
+        
+        nombre = DonneesHydroService.agreger_periode(annee=annee, mois=mois, centrale_id=centrale_id)
+        db.session.commit()
+        print(f"✅ {nombre} rapport(s) hydro recalculé(s)")
+
+
+@app.cli.command()
+@click.argument('fichier', type=click.Path(exists=True, dir_okay=False))
+@click.option('--operateur-id', type=int, help="Limiter aux lignes d'un opérateur")
+@click.option('--taille-lot', default=5000, show_default=True, help="Lignes lues par lot")
+@click.option('--force', is_flag=True, help="Remplacer aussi les jours des rapports transmis ou validés")
+def charger_transport(fichier, operateur_id, taille_lot, force):
+    """Charger des données quotidiennes de transport (CSV, NDJSON) et agréger mois et années touchés"""
+    with app.app_context():
+        from app.transport.donnees_quotidiennes import DonneesTransportService
+        
+        bilan = DonneesTransportService.charger(fichier, operateur_id=operateur_id, taille_lot=taille_lot, force=force)
+        print(f"  Lignes lues : {bilan['lignes_lues']} ({bilan['lignes_rejetees']} rejetée(s) : "
+              f"ligne inconnue ou date invalide)")
+        if bilan['jours_ignores']:
+            print(f"  ⚠️  {bilan['jours_ignores']} jour(s) ignoré(s) : {bilan['rapports_ignores']} rapport(s) "
+                  f"transmis ou validé(s) (--force pour les remplacer)")
+        print(f"✅ {bilan['jours']} jour(s) enregistré(s), {bilan['rapports_crees']} rapport(s) créé(s), "
+              f"{bilan['mois_recalcules']} mois et {bilan['syntheses_recalculees']} synthèse(s) annuelle(s) recalculés")
+
+
+@app.cli.command()
+@click.option('--annee', type=int, help="Année des rapports (toutes par défaut)")
+@click.option('--ligne-id', type=int, help="Limiter à une ligne de transport")
+def agreger_transport(annee, ligne_id):
+    """Recalculer les rapports transport et les synthèses annuelles depuis les données quotidiennes"""
+    with app.app_context():
+        from app.transport.donnees_quotidiennes import DonneesTransportService
+        
+        mois, syntheses = DonneesTransportService.agreger_periode(annee=annee, ligne_id=ligne_id)
+        db.session.commit()
+        print(f"✅ {mois} rapport(s) et {syntheses} synthèse(s) annuelle(s) recalculé(s)")
+
+
+@app.cli.command()
+@click.argument('fichier', type=click.Path(exists=True, dir_okay=False))
+@click.option('--pas', default='15', show_default=True, type=click.Choice(['5', '10', '15', '30', '60']),
+              help="Pas des courbes en minutes")
+@click.option('--taille-lot', default=50000, show_default=True, help="Lignes lues par lot")
+def charger_courbes(fichier, pas, taille_lot):
+    """Charger des mesures de charge des postes et feeders (CSV, NDJSON) dans les courbes journalières"""
+    with app.app_context():
+        from app.distribution.courbes_charge import CourbesChargeService
+
+        bilan = CourbesChargeService.charger(fichier, pas_minutes=int(pas), taille_lot=taille_lot)
+        print(f"  Lignes lues : {bilan['lignes_lues']} ({bilan['lignes_rejetees']} rejetée(s) : "
+              f"actif inconnu, horodatage ou charge invalide)")
+        print(f"✅ {bilan['mesures']} mesure(s) enregistrée(s) : {bilan['blocs_crees']} courbe(s) journalière(s) "
+              f"créée(s), {bilan['blocs_modifies']} complétée(s)")
+
+
 @app.cli.command()
 def reset_db():
     """Réinitialiser complètement la base de données"""